@@ -32,7 +32,8 @@ except:
 from ._galsim import *
 from base import *
 from real import RealGalaxy, RealGalaxyCatalog, simReal
-from optics import OpticalPSF
+from optics import OpticalPSF, setOpticalPSFCacheSize
+from psf_field import PSFField
 from shapelet import Shapelet
 from interpolatedimage import InterpolatedImage
 from compound import Add, Convolve, Deconvolve, AutoConvolve, AutoCorrelate
@@ -44,6 +45,7 @@ from catalog import Catalog, Dict
 from table import LookupTable
 from random import DistDeviate
 from correlatednoise import CorrelatedNoise, getCOSMOSNoise, UncorrelatedNoise
+from correlatednoise import setCorrelatedNoiseCacheSize, clearCorrelatedNoiseCache
 from fits import FitsHeader
 
 # packages with docs and such, so nothing really to import by name.
@@ -850,7 +850,8 @@ class GSObject(object):
 
     def drawShoot(self, image=None, dx=None, gain=1., wmult=1., normalization="flux",
                   add_to_image=False, use_true_center=True, offset=None,
-                  n_photons=0., rng=None, max_extra_noise=0., poisson_flux=None):
+                  n_photons=0., rng=None, max_extra_noise=0., poisson_flux=None,
+                  nthreads=1):
         """Draw an image of the object by shooting individual photons drawn from the surface 
         brightness profile of the object.
 
@@ -969,6 +970,14 @@ class GSObject(object):
                                 `poisson_flux = True` unless n_photons is given, in which case
                                 the default is `poisson_flux = False`).
 
+        @param nthreads         The number of threads to use for shooting the photons.  This is
+                                only used if `max_extra_noise = 0` and there are more than 
+                                100000 photons.  The photons are shot in chunks, each with its
+                                own random number generator seeded from `rng`, so the results
+                                are reproducible for a given seed and `nthreads`.  However, they
+                                are not the same as the results with `nthreads = 1`.
+                                (Default `nthreads = 1`)
+
         @returns      The drawn image.
         """
 
@@ -1029,7 +1038,7 @@ class GSObject(object):
         try:
             image.added_flux = prof.SBProfile.drawShoot(
                 image.view(), n_photons, uniform_deviate, gain, max_extra_noise,
-                poisson_flux, add_to_image)
+                poisson_flux, add_to_image, int(nthreads))
         except RuntimeError:
             # Give some extra explanation as a warning, then raise the original exception
             # so the traceback shows as much detail as possible.
@@ -1041,6 +1050,52 @@ class GSObject(object):
 
         return image
 
+    def shoot(self, n_photons, rng=None):
+        """Shoot photons into a PhotonArray.
+
+        This is the first step of what drawShoot does, but without binning the photons into
+        an image.  The photon positions and fluxes are available as numpy arrays that are
+        views into the PhotonArray's memory:
+
+            photons = obj.shoot(n_photons, rng)
+            x = photons.x
+            y = photons.y
+            flux = photons.flux
+
+        These may be modified in place (e.g. to apply some sensor effect), and then the
+        photons may be added to an image with
+
+            photons.addTo(image.view())
+
+        Note that the image must already have defined bounds and a pixel scale, and that
+        `addTo` adds surface brightness, so the values are the photons' fluxes divided by the
+        pixel area.  Unlike drawShoot, the photons are centered at the origin of the image's
+        coordinates, not at the center of the image.
+
+        You can also make a PhotonArray from your own arrays with
+        `galsim.PhotonArray(x, y, flux)`.
+
+        @param n_photons  The number of photons to shoot.
+        @param rng        If provided, a random number generator to use for photon shooting.
+                          (may be any kind of `galsim.BaseDeviate` object)
+                          If `rng=None`, one will be automatically created, using the time
+                          as a seed. (Default `rng = None`)
+
+        @returns the PhotonArray.
+        """
+        n_photons = int(n_photons)
+        if n_photons < 0:
+            raise ValueError("Invalid n_photons < 0 in shoot command")
+
+        if rng is None:
+            uniform_deviate = galsim.UniformDeviate()
+        elif isinstance(rng,galsim.BaseDeviate):
+            uniform_deviate = galsim.UniformDeviate(rng)
+        else:
+            raise TypeError("The rng provided to shoot is not a BaseDeviate")
+
+        return self.SBProfile.shoot(n_photons, uniform_deviate)
+
     def drawK(self, re=None, im=None, dk=None, gain=1., add_to_image=False):
         """Draws the k-space Images (real and imaginary parts) of the object, with bounds
         optionally set by input Images.
@@ -1111,6 +1166,59 @@ class GSObject(object):
         return re,im
 
 
+def drawMany(objects, images, offsets=None, gain=1., wmult=1., normalization="flux",
+             add_to_image=False, use_true_center=True):
+    """Draw a list of GSObjects onto a list of existing images.
+
+    This is equivalent to
+
+        for obj, im, offset in zip(objects, images, offsets):
+            obj.draw(im, gain=gain, wmult=wmult, normalization=normalization,
+                     add_to_image=add_to_image, use_true_center=use_true_center, offset=offset)
+
+    but the loop is done in C++, which avoids most of the python overhead of the draw command.
+    This can be a significant fraction of the time for small stamps.
+
+    Unlike draw, the images must already have defined bounds and a pixel scale > 0, since the
+    drawing uses the scale of each image.  They must be ImageF or ImageD (or views of these).
+
+    As with draw, each image will have its `added_flux` attribute set to the total flux
+    added to the image.
+
+    @param objects        A list of GSObjects to draw.
+    @param images         A list of images on which to draw the corresponding objects.
+    @param offsets        An optional list of offsets (PositionD or (dx,dy) tuples), one for each
+                          object, in pixels.  cf. the `offset` parameter of draw.
+                          (Default `offsets = None`)
+    @param gain           The number of photons per ADU. (Default `gain = 1.`)
+    @param wmult          A factor by which to enlarge the FFT grids.  cf. draw.
+                          (Default `wmult = 1.`)
+    @param normalization  Either "flux" (or "f") or "surface brightness" (or "sb").
+                          (Default `normalization = "flux"`)
+    @param add_to_image   Whether to add flux to the existing images rather than clear them
+                          first.  (Default `add_to_image = False`)
+    @param use_true_center  Whether to center the profiles at the true centers of the images
+                          rather than the integer centers. (Default `use_true_center = True`)
+
+    @returns the list of images.
+    """
+    if not normalization.lower() in ("flux", "f", "surface brightness", "sb"):
+        raise ValueError(("Invalid normalization requested: '%s'. Expecting one of 'flux', "+
+                          "'f', 'surface brightness' or 'sb'.") % normalization)
+    if type(gain) != float:
+        gain = float(gain)
+    if gain <= 0.:
+        raise ValueError("Invalid gain <= 0. in drawMany command")
+    if type(wmult) != float:
+        wmult = float(wmult)
+    if wmult <= 0:
+        raise ValueError("Invalid wmult <= 0 in drawMany command")
+
+    flux_norm = normalization.lower() in ("flux", "f")
+    galsim._galsim._drawMany(objects, images, offsets, gain, wmult, flux_norm,
+                             add_to_image, use_true_center)
+    return images
+
 
 # --- Now defining the derived classes ---
 #
@@ -32,7 +32,8 @@ valid_gsobject_types = {
     'Ring' : '_BuildRing',
     'Pixel' : '_BuildPixel',
     'RealGalaxy' : '_BuildRealGalaxy',
-    'RealGalaxyOriginal' : '_BuildRealGalaxyOriginal'
+    'RealGalaxyOriginal' : '_BuildRealGalaxyOriginal',
+    'PSFField' : '_BuildPSFField'
 }
 
 class SkipThisObject(Exception):
@@ -462,6 +463,45 @@ def _BuildRealGalaxyOriginal(config, key, base, ignore, gsparams, logger):
     return image.original_image, safe    
 
 
+def _BuildPSFField(config, key, base, ignore, gsparams, logger):
+    """@brief Build the PSF from a PSFField at the current image position.
+    """
+    opt = { 'flux' : float , 'num' : int , 'x_interpolant' : str }
+    kwargs, safe = galsim.config.GetAllParams(config, key, base, opt=opt, ignore=ignore)
+
+    if 'psf_field' not in base:
+        raise ValueError("No PSFField instance available for building type = PSFField")
+
+    num = kwargs.get('num', 0)
+    if num < 0:
+        raise ValueError("Invalid num < 0 supplied for PSFField: num = %d"%num)
+    if num >= len(base['psf_field']):
+        raise ValueError("Invalid num supplied for PSFField (too large): num = %d"%num)
+
+    psf_field = base['psf_field'][num]
+
+    if 'image_pos' not in base:
+        raise ValueError("PSFField requested, but no image_pos defined in base.")
+    image_pos = base['image_pos']
+
+    if gsparams: gsparams = galsim.GSParams(**gsparams)
+    else: gsparams = None
+
+    # As for DES_PSFEx, the input object may be a proxy, which can't return the
+    # InterpolatedImage from getPSF.  So build it here from the interpolated array.
+    ar = psf_field.getPSFArray(image_pos)
+    im = galsim.ImageView[ar.dtype.type](ar)
+    im.scale = psf_field.getScale()
+    psf = galsim.InterpolatedImage(im, x_interpolant=kwargs.get('x_interpolant',None),
+                                   gsparams=gsparams)
+
+    if 'flux' in kwargs:
+        psf.setFlux(kwargs['flux'])
+
+    # The PSF depends on the position, so it is not safe to reuse for later objects.
+    return psf, False
+
+
 def _BuildSimple(config, key, base, ignore, gsparams, logger):
     """@brief Build a simple GSObject (i.e. one without a specialized _Build function) or
     any other galsim object that defines _req_params, _opt_params and _single_params.
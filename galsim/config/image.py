@@ -53,38 +53,6 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
         config['image']['random_seed'] = { 'type' : 'Sequence', 'first' : first }
 
     import time
-    def worker(input, output):
-        proc = current_process().name
-        for job in iter(input.get, 'STOP'):
-            try :
-                (kwargs, image_num, obj_num, nim, info, logger) = job
-                if logger:
-                    logger.debug('%s: Received job to do %d images, starting with %d',
-                                 proc,nim,image_num)
-                results = []
-                for k in range(nim):
-                    t1 = time.time()
-                    kwargs['image_num'] = image_num + k
-                    kwargs['obj_num'] = obj_num
-                    kwargs['logger'] = logger
-                    im = BuildImage(**kwargs)
-                    obj_num += galsim.config.GetNObjForImage(kwargs['config'], image_num+k)
-                    t2 = time.time()
-                    results.append( [im[0], im[1], im[2], im[3], t2-t1 ] )
-                    ys, xs = im[0].array.shape
-                    if logger:
-                        logger.info('%s: Image %d: size = %d x %d, time = %f sec', 
-                                    proc, image_num+k, xs, ys, t2-t1)
-                output.put( (results, info, proc) )
-                if logger:
-                    logger.debug('%s: Finished job %d -- %d',proc,image_num,image_num+nim-1)
-            except Exception as e:
-                import traceback
-                tr = traceback.format_exc()
-                if logger:
-                    logger.debug('%s: Caught exception %s\n%s',proc,str(e),tr)
-                output.put( (e, info, tr) )
-    
     # The kwargs to pass to BuildImage
     kwargs = {
         'make_psf_image' : make_psf_image,
@@ -118,9 +86,6 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
                 logger.info("Unable to determine ncpu.  Using %d processes",nproc)
  
     if nproc > 1:
-        from multiprocessing import Process, Queue, current_process
-        from multiprocessing.managers import BaseManager
-
         # Initialize the images list to have the correct size.
         # This is important here, since we'll be getting back images in a random order,
         # and we need them to go in the right places (in order to have deterministic
@@ -152,48 +117,28 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
         if logger:
             logger.debug('file %d: nim_per_task = %d',config['file_num'],nim_per_task)
 
-        # The logger is not picklable, se we set up a proxy object.  See comments in process.py
-        # for more details about how this works.
-        class LoggerManager(BaseManager): pass
-        if logger:
-            logger_generator = galsim.utilities.SimpleGenerator(logger)
-            LoggerManager.register('logger', callable = logger_generator)
-            logger_manager = LoggerManager()
-            logger_manager.start()
+        # Get the worker pool to use.  Normally this is the one set up by Process, so we don't
+        # need to start up new processes here.  See process.py for more details.
+        pool, temporary_pool = galsim.config.GetWorkerPool(config, nproc, logger)
 
         # Set up the task list
-        task_queue = Queue()
+        # The worker processes start working on each task as soon as it is submitted.
         for k in range(0,nimages,nim_per_task):
             import copy
             kwargs1 = copy.copy(kwargs)
             kwargs1['config'] = galsim.config.CopyConfig(config)
-            if logger:
-                logger_proxy = logger_manager.logger()
-            else:
-                logger_proxy = None
             nim1 = min(nim_per_task, nimages-k)
-            task_queue.put( ( kwargs1, image_num+k, obj_num, nim1, k, logger_proxy ) )
+            pool.submit(_BuildImagesJob, (kwargs1, image_num+k, obj_num, nim1), k)
             for i in range(nim1):
                 obj_num += galsim.config.GetNObjForImage(config, image_num+k+i)
 
-        # Run the tasks
-        # Each Process command starts up a parallel process that will keep checking the queue 
-        # for a new task. If there is one there, it grabs it and does it. If not, it waits 
-        # until there is one to grab. When it finds a 'STOP', it shuts down. 
-        done_queue = Queue()
-        p_list = []
-        for j in range(nproc):
-            p = Process(target=worker, args=(task_queue, done_queue), name='Process-%d'%(j+1))
-            p.start()
-            p_list.append(p)
-
         # In the meanwhile, the main process keeps going.  We pull each set of images off of the 
-        # done_queue and put them in the appropriate place in the lists.
+        # pool's done_queue and put them in the appropriate place in the lists.
         # This loop is happening while the other processes are still working on their tasks.
         # You'll see that these logging statements get printed out as the stamp images are still 
         # being drawn.  
         for i in range(0,nimages,nim_per_task):
-            results, k0, proc = done_queue.get()
+            results, k0, proc = pool.get()
             if isinstance(results,Exception):
                 # results is really the exception, e
                 # proc is really the traceback
@@ -201,8 +146,9 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
                     logger.error('Exception caught during job starting with image %d', k0)
                     logger.error('%s',proc)
                     logger.error('Aborting the rest of this file')
-                for j in range(nproc):
-                    p_list[j].terminate()
+                pool.terminate()
+                if temporary_pool:
+                    pool.close()
                 raise results
             k = k0
             for result in results:
@@ -214,19 +160,10 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
             if logger:
                 logger.debug('%s: Successfully returned results for images %d--%d', proc, k0, k-1)
 
-        # Stop the processes
-        # The 'STOP's could have been put on the task list before starting the processes, or you
-        # can wait.  In some cases it can be useful to clear out the done_queue (as we just did)
-        # and then add on some more tasks.  We don't need that here, but it's perfectly fine to do.
-        # Once you are done with the processes, putting nproc 'STOP's will stop them all.
-        # This is important, because the program will keep running as long as there are running
-        # processes, even if the main process gets to the end.  So you do want to make sure to 
-        # add those 'STOP's at some point!
-        for j in range(nproc):
-            task_queue.put('STOP')
-        for j in range(nproc):
-            p_list[j].join()
-        task_queue.close()
+        # If we made our own pool, stop the processes.  Otherwise, leave them running for the
+        # next time they are needed.
+        if temporary_pool:
+            pool.close()
 
     else : # nproc == 1
 
@@ -260,6 +197,36 @@ def BuildImages(nimages, config, nproc=1, logger=None, image_num=0, obj_num=0,
     return images, psf_images, weight_images, badpix_images
  
 
+def _BuildImagesJob(state, logger, kwargs, image_num, obj_num, nim):
+    """Build nim images in a worker process.  This is the job function used by BuildImages.
+
+    @return a list with [ image, psf_image, weight_image, badpix_image, time ] for each image.
+    """
+    import time
+    from multiprocessing import current_process
+    proc = current_process().name
+    if logger:
+        logger.debug('%s: Received job to do %d images, starting with %d',
+                     proc,nim,image_num)
+    results = []
+    for k in range(nim):
+        t1 = time.time()
+        kwargs['image_num'] = image_num + k
+        kwargs['obj_num'] = obj_num
+        kwargs['logger'] = logger
+        im = BuildImage(**kwargs)
+        obj_num += galsim.config.GetNObjForImage(kwargs['config'], image_num+k)
+        t2 = time.time()
+        results.append( [im[0], im[1], im[2], im[3], t2-t1 ] )
+        ys, xs = im[0].array.shape
+        if logger:
+            logger.info('%s: Image %d: size = %d x %d, time = %f sec', 
+                        proc, image_num+k, xs, ys, t2-t1)
+    if logger:
+        logger.debug('%s: Finished job %d -- %d',proc,image_num,image_num+nim-1)
+    return results
+
+
 def BuildImage(config, logger=None, image_num=0, obj_num=0,
                make_psf_image=False, make_weight_image=False, make_badpix_image=False):
     """
@@ -355,7 +322,7 @@ def BuildSingleImage(config, logger=None, image_num=0, obj_num=0,
         config['image']['random_seed'] = { 'type' : 'Sequence', 'first' : first }
 
     ignore = [ 'random_seed', 'draw_method', 'noise', 'wcs', 'nproc' ,
-               'n_photons', 'wmult', 'offset', 'gsparams' ]
+               'n_photons', 'wmult', 'offset', 'gsparams', 'plan_values' ]
     opt = { 'size' : int , 'xsize' : int , 'ysize' : int , 'index_convention' : str,
             'pixel_scale' : float , 'sky_level' : float , 'sky_level_pixel' : float }
     params = galsim.config.GetAllParams(
@@ -433,7 +400,7 @@ def BuildTiledImage(config, logger=None, image_num=0, obj_num=0,
         config['image']['random_seed'] = { 'type' : 'Sequence', 'first' : first }
 
     ignore = [ 'random_seed', 'draw_method', 'noise', 'wcs', 'nproc' ,
-               'image_pos', 'n_photons', 'wmult', 'offset', 'gsparams' ]
+               'image_pos', 'n_photons', 'wmult', 'offset', 'gsparams', 'plan_values' ]
     req = { 'nx_tiles' : int , 'ny_tiles' : int }
     opt = { 'stamp_size' : int , 'stamp_xsize' : int , 'stamp_ysize' : int ,
             'border' : int , 'xborder' : int , 'yborder' : int ,
@@ -596,38 +563,77 @@ def BuildTiledImage(config, logger=None, image_num=0, obj_num=0,
                     func = eval(galsim.config.valid_input_types[key][4])
                     func(input_obj, field, config)
 
-    stamp_images = galsim.config.BuildStamps(
+    # If requested, generate the values of the gal, psf and pix parameters for all the objects
+    # at once.
+    galsim.config.PlanValues(config, obj_num, nobjects, logger)
+
+    # If any of the objects are lensed by a PowerSpectrum or NFWHalo, calculate the lensing
+    # for all of them at once.
+    PrecomputeLensing(config, obj_num, nobjects, stamp_xsize, stamp_ysize, logger)
+
+    # We add each stamp into the full image as soon as it is built, rather than building all
+    # the stamps first, so we never need to hold more than a few stamps in memory at once.
+    # If any stamps were whitened, we also need to keep track of the variance in each pixel.
+    # This is only built once we find a stamp with current_var > 0.
+    # If we are using multiple processes, the worker processes add their stamps directly into
+    # shared-memory copies of the full images, so the stamps don't need to be sent back here.
+    # See SharedImages in stamp.py for details.  We resolve nproc <= 0 to the number of cpus
+    # first, so we only use shared images when there really will be more than one process.
+    nproc = galsim.config.UpdateNProc(nproc, nobjects, logger)
+    if nproc > 1:
+        shared_images = galsim.config.SharedImages(
+            full_image.bounds, pixel_scale,
+            [ True, make_psf_image, make_weight_image, make_badpix_image ],
+            overlap = (xborder < 0 or yborder < 0))
+    else:
+        shared_images = None
+
+    max_current_var = 0
+    noise_image = None
+    for stamp in galsim.config.StreamStamps(
             nobjects=nobjects, config=config,
             nproc=nproc, logger=logger, obj_num=obj_num,
             xsize=stamp_xsize, ysize=stamp_ysize,
             sky_level_pixel=sky_level_pixel, do_noise=do_noise,
             make_psf_image=make_psf_image,
             make_weight_image=make_weight_image,
-            make_badpix_image=make_badpix_image)
-
-    images = stamp_images[0]
-    psf_images = stamp_images[1]
-    weight_images = stamp_images[2]
-    badpix_images = stamp_images[3]
-    current_vars = stamp_images[4]
-
-    max_current_var = 0
-    for k in range(nobjects):
+            make_badpix_image=make_badpix_image,
+            shared_images=shared_images):
+        im, psf_im, weight_im, badpix_im, current_var = stamp
+        if shared_images:
+            # Then the stamp was already added to the full image, and we just get its bounds.
+            b = im
+        else:
+            b = im.bounds
         # This is our signal that the object was skipped.
-        if not images[k].bounds.isDefined(): continue
+        if not b.isDefined(): continue
         if False:
             logger.debug('image %d: full bounds = %s',image_num,str(full_image.bounds))
-            logger.debug('image %d: stamp %d bounds = %s',image_num,k,str(images[k].bounds))
-        assert full_image.bounds.includes(images[k].bounds)
-        b = images[k].bounds
-        full_image[b] += images[k]
-        if make_psf_image:
-            full_psf_image[b] += psf_images[k]
-        if make_weight_image:
-            full_weight_image[b] += weight_images[k]
-        if make_badpix_image:
-            full_badpix_image[b] |= badpix_images[k]
-        if current_vars[k] > max_current_var: max_current_var = current_vars[k]
+            logger.debug('image %d: stamp bounds = %s',image_num,str(b))
+        assert full_image.bounds.includes(b)
+        if not shared_images:
+            full_image[b] += im
+            if make_psf_image:
+                full_psf_image[b] += psf_im
+            if make_weight_image:
+                full_weight_image[b] += weight_im
+            if make_badpix_image:
+                full_badpix_image[b] |= badpix_im
+        if current_var > 0:
+            if noise_image is None:
+                noise_image = galsim.ImageF(full_image.bounds, full_image.scale)
+                noise_image.setZero()
+            noise_image[b] += current_var
+        if current_var > max_current_var: max_current_var = current_var
+
+    if shared_images:
+        # Copy the shared images into the regular images, so we can get rid of the shared files.
+        for full_im, shared_im in zip(
+                [ full_image, full_psf_image, full_weight_image, full_badpix_image ],
+                shared_images.getImages()):
+            if full_im is not None:
+                full_im.copyFrom(shared_im)
+        shared_images.close()
 
     if not do_noise:
         if 'noise' in config['image']:
@@ -639,8 +645,7 @@ def BuildTiledImage(config, logger=None, image_num=0, obj_num=0,
                 # Then there was whitening applied in the individual stamps.
                 # But there could be a different variance in each postage stamp, so the first
                 # thing we need to do is bring everything up to a common level.
-                noise_image = galsim.ImageF(full_image.bounds, full_image.scale)
-                for k in range(nobjects): noise_image[images[k].bounds] += current_vars[k]
+                # noise_image has the current variance in each pixel from the loop above.
                 # Update this, since overlapping postage stamps may have led to a larger 
                 # value in some pixels.
                 max_current_var = numpy.max(noise_image.array)
@@ -701,7 +706,8 @@ def BuildScatteredImage(config, logger=None, image_num=0, obj_num=0,
 
     ignore = [ 'random_seed', 'draw_method', 'noise', 'wcs', 'nproc' ,
                'image_pos', 'sky_pos', 'n_photons', 'wmult', 'offset',
-               'stamp_size', 'stamp_xsize', 'stamp_ysize', 'gsparams', 'nobjects' ]
+               'stamp_size', 'stamp_xsize', 'stamp_ysize', 'gsparams', 'nobjects',
+               'plan_values' ]
     opt = { 'size' : int , 'xsize' : int , 'ysize' : int , 
             'pixel_scale' : float , 'nproc' : int , 'index_convention' : str,
             'sky_level' : float , 'sky_level_pixel' : float }
@@ -828,46 +834,86 @@ def BuildScatteredImage(config, logger=None, image_num=0, obj_num=0,
                     func = eval(galsim.config.valid_input_types[key][4])
                     func(input_obj, field, config)
 
-    stamp_images = galsim.config.BuildStamps(
+    # If requested, generate the values of the gal, psf and pix parameters for all the objects
+    # at once.
+    galsim.config.PlanValues(config, obj_num, nobjects, logger)
+
+    # If any of the objects are lensed by a PowerSpectrum or NFWHalo, calculate the lensing
+    # for all of them at once.
+    PrecomputeLensing(config, obj_num, nobjects, logger=logger)
+
+    # We add each stamp into the full image as soon as it is built, rather than building all
+    # the stamps first, so we never need to hold more than a few stamps in memory at once.
+    # If any stamps were whitened, we also need to keep track of the variance in each pixel.
+    # This is only built once we find a stamp with current_var > 0.
+    # If we are using multiple processes, the worker processes add their stamps directly into
+    # shared-memory copies of the full images, so the stamps don't need to be sent back here.
+    # See SharedImages in stamp.py for details.  We resolve nproc <= 0 to the number of cpus
+    # first, so we only use shared images when there really will be more than one process.
+    nproc = galsim.config.UpdateNProc(nproc, nobjects, logger)
+    if nproc > 1:
+        shared_images = galsim.config.SharedImages(
+            full_image.bounds, pixel_scale,
+            [ True, make_psf_image, make_weight_image, make_badpix_image ],
+            overlap = True)
+    else:
+        shared_images = None
+
+    max_current_var = 0.
+    noise_image = None
+    for stamp in galsim.config.StreamStamps(
             nobjects=nobjects, config=config,
             nproc=nproc, logger=logger,obj_num=obj_num,
             sky_level_pixel=sky_level_pixel, do_noise=False,
             make_psf_image=make_psf_image,
             make_weight_image=make_weight_image,
-            make_badpix_image=make_badpix_image)
-
-    images = stamp_images[0]
-    psf_images = stamp_images[1]
-    weight_images = stamp_images[2]
-    badpix_images = stamp_images[3]
-    current_vars = stamp_images[4]
-
-    max_current_var = 0.
-    for k in range(nobjects):
+            make_badpix_image=make_badpix_image,
+            shared_images=shared_images):
+        im, psf_im, weight_im, badpix_im, current_var = stamp
+        if shared_images:
+            # Then the stamp was already added to the full image, and we just get its bounds.
+            stamp_bounds = im
+        else:
+            stamp_bounds = im.bounds
         # This is our signal that the object was skipped.
-        if not images[k].bounds.isDefined(): continue
-        bounds = images[k].bounds & full_image.bounds
+        if not stamp_bounds.isDefined(): continue
+        bounds = stamp_bounds & full_image.bounds
         if False:
             logger.debug('image %d: full bounds = %s',image_num,str(full_image.bounds))
-            logger.debug('image %d: stamp %d bounds = %s',image_num,k,str(images[k].bounds))
+            logger.debug('image %d: stamp bounds = %s',image_num,str(stamp_bounds))
             logger.debug('image %d: Overlap = %s',image_num,str(bounds))
         if bounds.isDefined():
-            full_image[bounds] += images[k][bounds]
-            if make_psf_image:
-                full_psf_image[bounds] += psf_images[k][bounds]
-            if make_weight_image:
-                full_weight_image[bounds] += weight_images[k][bounds]
-            if make_badpix_image:
-                full_badpix_image[bounds] |= badpix_images[k][bounds]
+            if not shared_images:
+                full_image[bounds] += im[bounds]
+                if make_psf_image:
+                    full_psf_image[bounds] += psf_im[bounds]
+                if make_weight_image:
+                    full_weight_image[bounds] += weight_im[bounds]
+                if make_badpix_image:
+                    full_badpix_image[bounds] |= badpix_im[bounds]
+            if current_var > 0:
+                if noise_image is None:
+                    noise_image = galsim.ImageF(full_image.bounds, full_image.scale)
+                    noise_image.setZero()
+                noise_image[bounds] += current_var
         else:
             if logger:
                 logger.warn(
                     "Object centered at (%d,%d) is entirely off the main image,\n"%(
-                        images[k].bounds.center().x, images[k].bounds.center().y) +
+                        stamp_bounds.center().x, stamp_bounds.center().y) +
                     "whose bounds are (%d,%d,%d,%d)."%(
                         full_image.bounds.xmin, full_image.bounds.xmax,
                         full_image.bounds.ymin, full_image.bounds.ymax))
-        if current_vars[k] > max_current_var: max_current_var = current_vars[k]
+        if current_var > max_current_var: max_current_var = current_var
+
+    if shared_images:
+        # Copy the shared images into the regular images, so we can get rid of the shared files.
+        for full_im, shared_im in zip(
+                [ full_image, full_psf_image, full_weight_image, full_badpix_image ],
+                shared_images.getImages()):
+            if full_im is not None:
+                full_im.copyFrom(shared_im)
+        shared_images.close()
 
     if 'noise' in config['image']:
         # Apply the noise to the full image
@@ -877,10 +923,7 @@ def BuildScatteredImage(config, logger=None, image_num=0, obj_num=0,
             # Then there was whitening applied in the individual stamps.
             # But there could be a different variance in each postage stamp, so the first
             # thing we need to do is bring everything up to a common level.
-            noise_image = galsim.ImageF(full_image.bounds, full_image.scale)
-            for k in range(nobjects): 
-                b = images[k].bounds & full_image.bounds
-                if b.isDefined(): noise_image[b] += current_vars[k]
+            # noise_image has the current variance in each pixel from the loop above.
             # Update this, since overlapping postage stamps may have led to a larger 
             # value in some pixels.
             max_current_var = numpy.max(noise_image.array)
@@ -982,3 +1025,93 @@ def PowerSpectrumInit(ps, config, base):
     ps.buildGrid(grid_spacing=grid_spacing, ngrid=ngrid, rng=base['rng'], interpolant=interpolant)
 
 
+def PrecomputeLensing(config, obj_num, nobjects, xsize=0, ysize=0, logger=None):
+    """
+    Calculate the lensing shears and magnifications for all the objects in an image at once.
+
+    If the gal field uses PowerSpectrumShear, PowerSpectrumMagnification, NFWHaloShear or
+    NFWHaloMagnification, this first generates the positions of all the objects in the image, 
+    and then evaluates the lensing quantities for all of them with a single vectorized call 
+    for each lensing input.  The results are stored in config['precomputed_lensing'], where
+    the value generators for these types will find them, rather than calling the lensing 
+    engine separately for each object.
+
+    The positions are generated exactly the way BuildSingleStamp does it, so this requires
+    image.random_seed to be set (otherwise the positions would not be reproducible).  It uses
+    a copy of the config, so it doesn't change the random number sequences for the stamps.
+    NFWHalo quantities are only precomputed if gal.redshift is a constant value.
+
+    @param config              A configuration dict.
+    @param obj_num             The obj_num of the first object in the image.
+    @param nobjects            The number of objects in the image.
+    @param xsize               The xsize of the stamps (if known).
+    @param ysize               The ysize of the stamps (if known).
+    @param logger              If given, a logger object to log progress.
+    """
+    if 'precomputed_lensing' in config:
+        del config['precomputed_lensing']
+    if 'gal' not in config or 'random_seed' not in config['image']:
+        return
+    if 'image_pos' not in config['image'] and 'sky_pos' not in config['image']:
+        return
+
+    types = _FindValueTypes(config['gal'])
+    do_ps = ( 'power_spectrum' in config and 
+              ('PowerSpectrumShear' in types or 'PowerSpectrumMagnification' in types) )
+    do_nfw = ( 'nfw_halo' in config and 
+               ('NFWHaloShear' in types or 'NFWHaloMagnification' in types) and
+               isinstance(config['gal'].get('redshift',None), (int, float)) )
+    if not do_ps and not do_nfw:
+        return
+
+    import numpy
+    x = numpy.empty(nobjects)
+    y = numpy.empty(nobjects)
+    config1 = galsim.config.CopyConfig(config)
+    for k in range(nobjects):
+        galsim.config.SetupStampRNG(config1, obj_num+k)
+        sky_pos = galsim.config.GetStampPosition(config1, xsize, ysize)[3]
+        x[k] = sky_pos.x
+        y[k] = sky_pos.y
+
+    lensing = { 'first_obj_num' : obj_num, 'x' : x, 'y' : y }
+    if do_ps:
+        lensing['power_spectrum'] = []
+        for ps in config['power_spectrum']:
+            g1, g2 = ps.getShear((x,y))
+            mu = ps.getMagnification((x,y))
+            lensing['power_spectrum'].append( (g1, g2, mu) )
+    if do_nfw:
+        z = float(config['gal']['redshift'])
+        lensing['redshift'] = z
+        lensing['nfw_halo'] = []
+        for nfw in config['nfw_halo']:
+            # Use numpy's error handling rather than exceptions for strong lensing.  The 
+            # value generators will catch any invalid values when they make the Shear.
+            old_settings = numpy.seterr(all='ignore')
+            try:
+                g1, g2 = nfw.getShear((x,y), z)
+                mu = nfw.getMagnification((x,y), z)
+            finally:
+                numpy.seterr(**old_settings)
+            lensing['nfw_halo'].append( (g1, g2, mu) )
+    config['precomputed_lensing'] = lensing
+    if logger:
+        logger.debug('image %d: Precomputed lensing for %d objects',
+                     config['image_num'],nobjects)
+
+def _FindValueTypes(field, types=None):
+    """Return a set of all the value types used anywhere in a config field.
+    """
+    if types is None:
+        types = set()
+    if isinstance(field, dict):
+        if 'type' in field and isinstance(field['type'], basestring):
+            types.add(field['type'])
+        for key in field:
+            if not (isinstance(key, basestring) and key.startswith('current_')):
+                _FindValueTypes(field[key], types)
+    elif isinstance(field, list):
+        for item in field:
+            _FindValueTypes(item, types)
+    return types
@@ -46,6 +46,7 @@ valid_input_types = {
                         'galsim.config.PowerSpectrumInit',
                         ['PowerSpectrumShear','PowerSpectrumMagnification']),
     'fits_header' : ('galsim.FitsHeader', [], False, True, None, ['FitsHeader']), 
+    'psf_field' : ('galsim.PSFField', [], False, False, None, ['PSFField']),
 }
 
 valid_output_types = { 
@@ -110,10 +111,13 @@ def CopyConfig(config):
     """
     import copy
     config1 = copy.copy(config)
-  
-    # Make sure the input_manager isn't in the copy
-    if 'input_manager' in config1:
-        del config1['input_manager']
+
+    # Make sure the input_manager isn't in the copy.  Likewise the input_cache, worker_pool,
+    # des_psfex_cache and eval_namespace, which only make sense in the process that created them.
+    for key in [ 'input_manager', 'input_cache', 'worker_pool', 'des_psfex_cache',
+                 'eval_namespace' ]:
+        if key in config1:
+            del config1[key]
 
     # Now deepcopy all the regular config fields to make sure things like current_val don't
     # get clobbered by two processes writing to the same dict.
@@ -135,6 +139,192 @@ def CopyConfig(config):
     return config1
 
 
+def _PoolWorker(input, output, lock):
+    """The function run by each process in a WorkerPool.
+
+    Each job on the input queue is a tuple (func, args, info, logger).  The worker calls
+    func(state, logger, *args) and puts (result, info, proc) on the output queue.  If func
+    raises an exception, it puts (e, info, traceback) on the output queue instead.
+
+    The state dict persists from one job to the next for the life of the worker process.
+    The job functions use it to keep things like the input_manager and the input objects it
+    holds, so they don't need to be rebuilt for every job.  It also has state['lock'], a
+    multiprocessing Lock shared by all the workers in the pool.
+    """
+    from multiprocessing import current_process
+    proc = current_process().name
+    state = { 'lock' : lock }
+    logger = None
+    for job in iter(input.get, 'STOP'):
+        (func, args, info, logger) = job
+        try:
+            result = func(state, logger, *args)
+            output.put( (result, info, proc) )
+        except Exception as e:
+            import traceback
+            tr = traceback.format_exc()
+            if logger:
+                logger.debug('%s: Caught exception %s\n%s',proc,str(e),tr)
+            output.put( (e, info, tr) )
+    if logger:
+        logger.debug('%s: Received STOP',proc)
+
+
+class WorkerPool(object):
+    """A pool of worker processes that can be reused for many jobs.
+
+    Process() makes one of these and stores it in config['worker_pool'].  Then BuildImages and
+    BuildStamps use this same pool (growing it if they want more processes than it has), rather
+    than starting up new processes and a new LoggerManager every time they are called.
+    If there is no worker_pool in the config dict (e.g. when BuildImages is called directly),
+    they make a temporary pool just for that call.
+
+    Jobs are submitted as a function and a tuple of arguments.  The function is called in the
+    worker process as func(state, logger, *args), where state is a dict that persists in that
+    worker from one job to the next.  The function needs to be picklable, so it should be
+    defined at module scope.
+
+    The results are returned by get() in the order they finish, not the order they were
+    submitted, so each job has an info item that is returned along with its result to let
+    the caller put the results in the right place.
+
+    The pool also has a Lock, which is available to the job functions as state['lock'].
+    This is used to serialize writes to memory that is shared among the workers.
+    """
+    def __init__(self, nproc=0, logger=None):
+        from multiprocessing import Queue, Lock
+        self.task_queue = Queue()
+        self.done_queue = Queue()
+        # The lock needs to be made before any of the workers are started.
+        self.lock = Lock()
+        self.p_list = []
+        self.nstarted = 0
+
+        # The logger is not picklable, so we use the same trick for it as we used for the
+        # input fields in ProcessInput to allow the worker processes to log their progress.
+        # The real logger stays in this process, and the workers all get a proxy logger which
+        # they can use normally.  We use galsim.utilities.SimpleGenerator as the callable that
+        # just returns the existing logger object.
+        if logger:
+            from multiprocessing.managers import BaseManager
+            class LoggerManager(BaseManager): pass
+            logger_generator = galsim.utilities.SimpleGenerator(logger)
+            LoggerManager.register('logger', callable = logger_generator)
+            self.logger_manager = LoggerManager()
+            self.logger_manager.start()
+            self.logger_proxy = self.logger_manager.logger()
+        else:
+            self.logger_manager = None
+            self.logger_proxy = None
+
+        self.grow(nproc)
+
+    def __len__(self):
+        return len(self.p_list)
+
+    def grow(self, nproc):
+        """Make sure there are at least nproc worker processes running.
+        """
+        from multiprocessing import Process
+        while len(self.p_list) < nproc:
+            # Each Process command starts up a parallel process that will keep checking the
+            # queue for a new task. If there is one there, it grabs it and does it. If not, it
+            # waits until there is one to grab. When it finds a 'STOP', it shuts down.
+            # We name the processes explicitly for the sake of the logging output.
+            self.nstarted += 1
+            p = Process(target=_PoolWorker, args=(self.task_queue, self.done_queue, self.lock),
+                        name='Process-%d'%self.nstarted)
+            p.start()
+            self.p_list.append(p)
+
+    def submit(self, func, args, info):
+        """Add a job to the task queue.  It will be run as func(state, logger, *args).
+        """
+        self.task_queue.put( (func, args, info, self.logger_proxy) )
+
+    def get(self):
+        """Get the next finished job.
+
+        @return (result, info, proc), or (e, info, traceback) if the job raised an exception.
+        """
+        return self.done_queue.get()
+
+    def terminate(self):
+        """Kill all the worker processes, dropping any jobs that have not finished yet.
+        The pool may still be used afterwards, in which case new workers will be started
+        as needed by grow().
+        """
+        from multiprocessing import Queue, Lock
+        for p in self.p_list:
+            p.terminate()
+        for p in self.p_list:
+            p.join()
+        self.p_list = []
+        self.task_queue = Queue()
+        self.done_queue = Queue()
+        # A killed worker might have been holding the lock, so make a new one.
+        self.lock = Lock()
+
+    def close(self):
+        """Stop all the worker processes once they have finished their current jobs.
+        """
+        # Putting nproc 'STOP's will stop them all.  This is important, because the program
+        # will keep running as long as there are running processes, even if the main process
+        # gets to the end.
+        for p in self.p_list:
+            self.task_queue.put('STOP')
+        for p in self.p_list:
+            p.join()
+        self.p_list = []
+        self.task_queue.close()
+        if self.logger_manager:
+            self.logger_manager.shutdown()
+            self.logger_manager = None
+            self.logger_proxy = None
+
+
+def GetWorkerPool(config, nproc, logger=None):
+    """Get a WorkerPool with at least nproc processes.
+
+    If config['worker_pool'] exists, then that pool is used (after growing it if necessary).
+    Otherwise, a new pool is made, which the caller should close when done with it.
+
+    @return (pool, is_temporary)
+    """
+    if 'worker_pool' in config:
+        pool = config['worker_pool']
+        pool.grow(nproc)
+        return pool, False
+    else:
+        return WorkerPool(nproc, logger), True
+
+
+def _BuildFileJob(state, logger, build_func, kwargs, file_num, file_name):
+    """Build one file in a worker process.  This is the job function used by Process.
+    """
+    from multiprocessing import current_process
+    proc = current_process().name
+    if logger:
+        logger.debug('%s: Received job to do file %d, %s',proc,file_num,file_name)
+    config = kwargs['config']
+    # Use the input_manager and input_cache from previous jobs in this process, so any input
+    # objects that have already been built by this worker don't need to be built again.
+    for key in [ 'input_manager', 'input_cache' ]:
+        if key in state:
+            config[key] = state[key]
+    ProcessInput(config, file_num=file_num, logger=logger)
+    for key in [ 'input_manager', 'input_cache' ]:
+        if key in config:
+            state[key] = config[key]
+    if logger:
+        logger.debug('%s: After ProcessInput for file %d',proc,file_num)
+    kwargs['logger'] = logger
+    t = build_func(**kwargs)
+    if logger:
+        logger.debug('%s: After %s for file %d',proc,build_func,file_num)
+    return t
+
+
 def ProcessInput(config, file_num=0, logger=None, file_scope_only=False):
     """
     Process the input field, reading in any specified input files or setting up
@@ -145,6 +335,11 @@ def ProcessInput(config, file_num=0, logger=None, file_scope_only=False):
         config['catalog'] = the catalog specified by config.input.catalog, if provided.
         config['real_catalog'] = the catalog specified by config.input.real_catalog, if provided.
         etc.
+
+    Note: an input object is reused for a later file if it is built with exactly the same
+    kwargs as the last time, even if those kwargs were not marked as safe (e.g. a file_name
+    given by a List that repeats).  Only input types that take an rng are always rebuilt.
+    So the input files should not be changed on disk while the config is being processed.
     """
     config['seq_index'] = file_num
     config['file_num'] = file_num
@@ -244,6 +439,20 @@ def ProcessInput(config, file_num=0, logger=None, file_scope_only=False):
                                                               opt = init_func._opt_params,
                                                               single = init_func._single_params,
                                                               ignore = ignore)
+                    tag = key + str(i)
+
+                    # Objects that are not safe still often end up being built with the same
+                    # kwargs as the last time (e.g. several files using the same catalog).
+                    # So we keep the most recent object for each tag in config['input_cache']
+                    # and reuse it if the kwargs match.  Objects using an rng are never reused.
+                    if 'input_cache' not in config:
+                        config['input_cache'] = {}
+                    cache = config['input_cache']
+                    if init_func._takes_rng:
+                        cache_key = None
+                    else:
+                        cache_key = repr(sorted(kwargs.items()))
+
                     if logger and init_func._takes_logger: kwargs['logger'] = logger
                     if init_func._takes_rng:
                         if 'rng' not in config:
@@ -252,12 +461,20 @@ def ProcessInput(config, file_num=0, logger=None, file_scope_only=False):
                         kwargs['rng'] = config['rng']
                         safe = False
 
-                    tag = key + str(i)
-                    input_obj = getattr(config['input_manager'],tag)(**kwargs)
-                    if logger:
-                        logger.debug('file %d: Built input object %s, %s',file_num,key,type)
-                        if valid_input_types[key][2]:
-                            logger.info('Read %d objects from %s',input_obj.getNObjects(),key)
+                    if cache_key is not None and tag in cache and cache[tag][0] == cache_key:
+                        input_obj = cache[tag][1]
+                        if logger:
+                            logger.debug('file %d: Reusing cached input object %s, %s',
+                                         file_num,key,type)
+                    else:
+                        input_obj = getattr(config['input_manager'],tag)(**kwargs)
+                        if cache_key is not None:
+                            cache[tag] = (cache_key, input_obj)
+                        if logger:
+                            logger.debug('file %d: Built input object %s, %s',file_num,key,type)
+                            if valid_input_types[key][2]:
+                                logger.info('Read %d objects from %s',input_obj.getNObjects(),
+                                            key)
                     # Store input_obj in the config for use by BuildGSObject function.
                     ck[i] = input_obj
                     ck_safe[i] = safe
@@ -417,287 +634,258 @@ def Process(config, logger=None):
                 logger.warn("config.output.nproc <= 0, but unable to determine number of cpus.")
             nproc = 1
 
-    def worker(input, output):
-        proc = current_process().name
-        for job in iter(input.get, 'STOP'):
-            try:
-                (kwargs, file_num, file_name, logger) = job
-                if logger:
-                    logger.debug('%s: Received job to do file %d, %s',proc,file_num,file_name)
-                ProcessInput(kwargs['config'], file_num=file_num, logger=logger)
-                if logger:
-                    logger.debug('%s: After ProcessInput for file %d',proc,file_num)
-                kwargs['logger'] = logger
-                t = build_func(**kwargs)
-                if logger:
-                    logger.debug('%s: After %s for file %d',proc,build_func,file_num)
-                output.put( (t, file_num, file_name, proc) )
-            except Exception as e:
-                import traceback
-                tr = traceback.format_exc()
+    # We use a single WorkerPool for all the multiprocessing done during this call, whether it
+    # is done here at the file level or later on at the image or stamp level.  This way the
+    # processes (and any input objects they build) are reused rather than being started up
+    # again for every file or image.  The pool also holds the logger proxy for us.
+    # The worker processes themselves are only started once some level asks for them.
+    pool = WorkerPool(0, logger)
+    config['worker_pool'] = pool
+    try:
+        logger_proxy = pool.logger_proxy
+
+        # Start up the processes now if we are going to need them at the file level, so they
+        # can get to work as soon as the first file is submitted.
+        if nproc > 1:
+            if logger:
+                logger.warn("Using %d processes",nproc)
+            import time
+            t1 = time.time()
+            pool.grow(nproc)
+
+        # Now start working on the files.
+        image_num = 0
+        obj_num = 0
+
+        extra_keys = [ 'psf', 'weight', 'badpix' ]
+        last_file_name = {}
+        for key in extra_keys:
+            last_file_name[key] = None
+
+        # Process the input field for the first file.  Usually we won't need to reprocess
+        # things, since they are often "safe", so they won't need to be reprocessed for the
+        # later file_nums.  This is important to do here if nproc != 1.
+        ProcessInput(config, file_num=0, logger=logger_proxy)
+
+        # Normally, random_seed is just a number, which really means to use that number
+        # for the first item and go up sequentially from there for each object.
+        # However, we allow for random_seed to be a gettable parameter, so for the 
+        # normal case, we just convert it into a Sequence.
+        if ( 'image' in config 
+             and 'random_seed' in config['image'] 
+             and not isinstance(config['image']['random_seed'],dict) ):
+            config['first_seed'] = galsim.config.ParseValue(
+                    config['image'], 'random_seed', config, int)[0]
+
+        nfiles_use = nfiles
+        for file_num in range(nfiles):
+            if logger:
+                logger.debug('file_num, image_num, obj_num = %d,%d,%d',file_num,image_num,obj_num)
+            # Set the index for any sequences in the input or output parameters.
+            # These sequences are indexed by the file_num.
+            # (In image, they are indexed by image_num, and after that by obj_num.)
+            config['seq_index'] = file_num
+            config['file_num'] = file_num
+            config['start_obj_num'] = obj_num
+
+            # Process the input fields that might be relevant at file scope:
+            ProcessInput(config, file_num=file_num, logger=logger_proxy, file_scope_only=True)
+
+            # Set up random_seed appropriately if necessary.
+            if 'first_seed' in config:
+                config['image']['random_seed'] = {
+                    'type' : 'Sequence' ,
+                    'first' : config['first_seed']
+                }
+
+            # It is possible that some items at image scope could need a random number generator.
+            # For example, in demo9, we have a random number of objects per image.
+            # So we need to build an rng here.
+            if 'random_seed' in config['image']:
+                config['seq_index'] = obj_num
+                seed = galsim.config.ParseValue(config['image'], 'random_seed', config, int)[0]
+                config['seq_index'] = file_num
                 if logger:
-                    logger.debug('%s: Caught exception %s\n%s',proc,str(e),tr)
-                output.put( (e, file_num, file_name, tr) )
-
-    # Set up the multi-process task_queue if we're going to need it.
-    if nproc > 1:
-        # NB: See the function BuildStamps for more verbose comments about how
-        # the multiprocessing stuff works.
-        from multiprocessing import Process, Queue, current_process
-        task_queue = Queue()
-
-    # The logger is not picklable, so we use the same trick for it as we used for the 
-    # input fields in CopyConfig to allow the worker processes to log their progress.
-    # The real logger stays in this process, and the workers all get a proxy logger which 
-    # they can use normally.  We use galsim.utilities.SimpleGenerator as the callable that
-    # just returns the existing logger object.
-    from multiprocessing.managers import BaseManager
-    class LoggerManager(BaseManager): pass
-    if logger:
-        logger_generator = galsim.utilities.SimpleGenerator(logger)
-        LoggerManager.register('logger', callable = logger_generator)
-        logger_manager = LoggerManager()
-        logger_manager.start()
-        logger_proxy = logger_manager.logger()
-    else:
-        logger_proxy = None
-
-    # Now start working on the files.
-    image_num = 0
-    obj_num = 0
-
-    extra_keys = [ 'psf', 'weight', 'badpix' ]
-    last_file_name = {}
-    for key in extra_keys:
-        last_file_name[key] = None
-
-    # Process the input field for the first file.  Usually we won't need to reprocess
-    # things, since they are often "safe", so they won't need to be reprocessed for the
-    # later file_nums.  This is important to do here if nproc != 1.
-    ProcessInput(config, file_num=0, logger=logger_proxy)
-
-    # Normally, random_seed is just a number, which really means to use that number
-    # for the first item and go up sequentially from there for each object.
-    # However, we allow for random_seed to be a gettable parameter, so for the 
-    # normal case, we just convert it into a Sequence.
-    if ( 'image' in config 
-         and 'random_seed' in config['image'] 
-         and not isinstance(config['image']['random_seed'],dict) ):
-        config['first_seed'] = galsim.config.ParseValue(
-                config['image'], 'random_seed', config, int)[0]
-
-    nfiles_use = nfiles
-    for file_num in range(nfiles):
-        if logger:
-            logger.debug('file_num, image_num, obj_num = %d,%d,%d',file_num,image_num,obj_num)
-        # Set the index for any sequences in the input or output parameters.
-        # These sequences are indexed by the file_num.
-        # (In image, they are indexed by image_num, and after that by obj_num.)
-        config['seq_index'] = file_num
-        config['file_num'] = file_num
-        config['start_obj_num'] = obj_num
-
-        # Process the input fields that might be relevant at file scope:
-        ProcessInput(config, file_num=file_num, logger=logger_proxy, file_scope_only=True)
-
-        # Set up random_seed appropriately if necessary.
-        if 'first_seed' in config:
-            config['image']['random_seed'] = {
-                'type' : 'Sequence' ,
-                'first' : config['first_seed']
+                    logger.debug('file %d: seed = %d',file_num,seed)
+                rng = galsim.BaseDeviate(seed)
+            else:
+                rng = galsim.BaseDeviate()
+            config['rng'] = rng
+
+            # Get the file_name
+            if 'file_name' in output:
+                SetDefaultExt(output['file_name'],'.fits')
+                file_name = galsim.config.ParseValue(output, 'file_name', config, str)[0]
+            elif 'root' in config:
+                # If a file_name isn't specified, we use the name of the config file + '.fits'
+                file_name = config['root'] + '.fits'
+            else:
+                raise AttributeError(
+                    "No output.file_name specified and unable to generate it automatically.")
+        
+            # Prepend a dir to the beginning of the filename if requested.
+            if 'dir' in output:
+                dir = galsim.config.ParseValue(output, 'dir', config, str)[0]
+                if dir and not os.path.isdir(dir): os.makedirs(dir)
+                file_name = os.path.join(dir,file_name)
+            else:
+                dir = None
+
+            # Assign some of the kwargs we know now:
+            kwargs = {
+                'file_name' : file_name,
+                'file_num' : file_num,
+                'image_num' : image_num,
+                'obj_num' : obj_num
             }
+            if nproc2:
+                kwargs['nproc'] = nproc2
 
-        # It is possible that some items at image scope could need a random number generator.
-        # For example, in demo9, we have a random number of objects per image.
-        # So we need to build an rng here.
-        if 'random_seed' in config['image']:
-            config['seq_index'] = obj_num
-            seed = galsim.config.ParseValue(config['image'], 'random_seed', config, int)[0]
-            config['seq_index'] = file_num
+            output = config['output']
+            # This also updates nimages or nobjects as needed if they are being automatically
+            # set from an input catalog.
+            nobj = nobj_func(config,file_num,image_num)
             if logger:
-                logger.debug('file %d: seed = %d',file_num,seed)
-            rng = galsim.BaseDeviate(seed)
-        else:
-            rng = galsim.BaseDeviate()
-        config['rng'] = rng
-
-        # Get the file_name
-        if 'file_name' in output:
-            SetDefaultExt(output['file_name'],'.fits')
-            file_name = galsim.config.ParseValue(output, 'file_name', config, str)[0]
-        elif 'root' in config:
-            # If a file_name isn't specified, we use the name of the config file + '.fits'
-            file_name = config['root'] + '.fits'
-        else:
-            raise AttributeError(
-                "No output.file_name specified and unable to generate it automatically.")
-        
-        # Prepend a dir to the beginning of the filename if requested.
-        if 'dir' in output:
-            dir = galsim.config.ParseValue(output, 'dir', config, str)[0]
-            if dir and not os.path.isdir(dir): os.makedirs(dir)
-            file_name = os.path.join(dir,file_name)
-        else:
-            dir = None
-
-        # Assign some of the kwargs we know now:
-        kwargs = {
-            'file_name' : file_name,
-            'file_num' : file_num,
-            'image_num' : image_num,
-            'obj_num' : obj_num
-        }
-        if nproc2:
-            kwargs['nproc'] = nproc2
-
-        output = config['output']
-        # This also updates nimages or nobjects as needed if they are being automatically
-        # set from an input catalog.
-        nobj = nobj_func(config,file_num,image_num)
-        if logger:
-            logger.debug('file %d: nobj = %s',file_num,str(nobj))
-
-        # nobj is a list of nobj for each image in that file.
-        # So len(nobj) = nimages and sum(nobj) is the total number of objects
-        # This gets the values of image_num and obj_num ready for the next loop.
-        image_num += len(nobj)
-        obj_num += sum(nobj)
+                logger.debug('file %d: nobj = %s',file_num,str(nobj))
 
-        # Check if we ought to skip this file
-        if ('skip' in output 
-                and galsim.config.ParseValue(output, 'skip', config, bool)[0]):
-            if logger:
-                logger.warn('Skipping file %d = %s because output.skip = True',file_num,file_name)
-            nfiles_use -= 1
-            continue
-        if ('noclobber' in output 
-                and galsim.config.ParseValue(output, 'noclobber', config, bool)[0]
-                and os.path.isfile(file_name)):
-            if logger:
-                logger.warn('Skipping file %d = %s because output.noclobber = True' +
-                            ' and file exists',file_num,file_name)
-            nfiles_use -= 1
-            continue
+            # nobj is a list of nobj for each image in that file.
+            # So len(nobj) = nimages and sum(nobj) is the total number of objects
+            # This gets the values of image_num and obj_num ready for the next loop.
+            image_num += len(nobj)
+            obj_num += sum(nobj)
 
-        # Check if we need to build extra images for write out as well
-        for extra_key in [ key for key in extra_keys if key in output ]:
-            if logger:
-                logger.debug('extra_key = %s',extra_key)
-            output_extra = output[extra_key]
-
-            output_extra['type'] = 'default'
-            req = {}
-            single = []
-            opt = {}
-            ignore = []
-            if extra_file_name and extra_hdu:
-                single += [ { 'file_name' : str, 'hdu' : int } ]
-                opt['dir'] = str
-            elif extra_file_name:
-                req['file_name'] = str
-                opt['dir'] = str
-            elif extra_hdu:
-                req['hdu'] = int
-
-            if extra_key == 'psf': 
-                ignore += ['real_space', 'signal_to_noise']
-            if extra_key == 'weight': 
-                ignore += ['include_obj_var']
-            if 'file_name' in output_extra:
-                SetDefaultExt(output_extra['file_name'],'.fits')
-            params, safe = galsim.config.GetAllParams(output_extra,extra_key,config,
-                                                      req=req, opt=opt, single=single,
-                                                      ignore=ignore)
-
-            if 'file_name' in params:
-                f = params['file_name']
-                if 'dir' in params:
-                    dir = params['dir']
-                    if dir and not os.path.isdir(dir): os.makedirs(dir)
-                # else keep dir from above.
-                if dir:
-                    f = os.path.join(dir,f)
-                # If we already wrote this file, skip it this time around.
-                # (Typically this is applicable for psf, where we may only want 1 psf file.)
-                if last_file_name[key] == f:
-                    if logger:
-                        logger.debug('skipping %s, since already written',f)
-                    continue
-                kwargs[ extra_key+'_file_name' ] = f
-                last_file_name[key] = f
-            elif 'hdu' in params:
-                kwargs[ extra_key+'_hdu' ] = params['hdu']
-
-        # This is where we actually build the file.
-        # If we're doing multiprocessing, we send this information off to the task_queue.
-        # Otherwise, we just call build_func.
-        if nproc > 1:
-            import copy
-            # Make new copies of config and kwargs so we can update them without
-            # clobbering the versions for other tasks on the queue.
-            kwargs1 = copy.copy(kwargs)
-            kwargs1['config'] = CopyConfig(config)
-            task_queue.put( (kwargs1, file_num, file_name, logger_proxy) )
-        else:
-            try:
-                ProcessInput(config, file_num=file_num, logger=logger_proxy)
+            # Check if we ought to skip this file
+            if ('skip' in output 
+                    and galsim.config.ParseValue(output, 'skip', config, bool)[0]):
                 if logger:
-                    logger.debug('file %d: After ProcessInput',file_num)
-                kwargs['config'] = config
-                kwargs['logger'] = logger 
-                t = build_func(**kwargs)
+                    logger.warn('Skipping file %d = %s because output.skip = True',
+                                file_num,file_name)
+                nfiles_use -= 1
+                continue
+            if ('noclobber' in output 
+                    and galsim.config.ParseValue(output, 'noclobber', config, bool)[0]
+                    and os.path.isfile(file_name)):
                 if logger:
-                    logger.warn('File %d = %s: time = %f sec', file_num, file_name, t)
-            except Exception as e:
-                import traceback
-                tr = traceback.format_exc()
-                if logger:
-                    logger.error('Exception caught for file %d = %s', file_num, file_name)
-                    logger.error('%s',tr)
-                    logger.error('%s',e)
-                    logger.error('File %s not written! Continuing on...',file_name)
-
-    # If we're doing multiprocessing, here is the machinery to run through the task_queue
-    # and process the results.
-    if nproc > 1:
-        logger.warn("Using %d processes",nproc)
-        import time
-        t1 = time.time()
-        # Run the tasks
-        done_queue = Queue()
-        p_list = []
-        for j in range(nproc):
-            p = Process(target=worker, args=(task_queue, done_queue), name='Process-%d'%(j+1))
-            p.start()
-            p_list.append(p)
+                    logger.warn('Skipping file %d = %s because output.noclobber = True' +
+                                ' and file exists',file_num,file_name)
+                nfiles_use -= 1
+                continue
 
-        # Log the results.
-        if logger:
-            logger.debug('nfiles_use = %d',nfiles_use)
-        for k in range(nfiles_use):
-            t, file_num, file_name, proc = done_queue.get()
-            if isinstance(t,Exception):
-                # t is really the exception, e
-                # proc is really the traceback
+            # Check if we need to build extra images for write out as well
+            for extra_key in [ key for key in extra_keys if key in output ]:
                 if logger:
-                    logger.error('Exception caught for file %d = %s', file_num, file_name)
-                    logger.error('%s',proc)
-                    logger.error('%s',t)
-                    logger.error('File %s not written! Continuing on...',file_name)
+                    logger.debug('extra_key = %s',extra_key)
+                output_extra = output[extra_key]
+
+                output_extra['type'] = 'default'
+                req = {}
+                single = []
+                opt = {}
+                ignore = []
+                if extra_file_name and extra_hdu:
+                    single += [ { 'file_name' : str, 'hdu' : int } ]
+                    opt['dir'] = str
+                elif extra_file_name:
+                    req['file_name'] = str
+                    opt['dir'] = str
+                elif extra_hdu:
+                    req['hdu'] = int
+
+                if extra_key == 'psf': 
+                    ignore += ['real_space', 'signal_to_noise']
+                if extra_key == 'weight': 
+                    ignore += ['include_obj_var']
+                if 'file_name' in output_extra:
+                    SetDefaultExt(output_extra['file_name'],'.fits')
+                params, safe = galsim.config.GetAllParams(output_extra,extra_key,config,
+                                                          req=req, opt=opt, single=single,
+                                                          ignore=ignore)
+
+                if 'file_name' in params:
+                    f = params['file_name']
+                    if 'dir' in params:
+                        dir = params['dir']
+                        if dir and not os.path.isdir(dir): os.makedirs(dir)
+                    # else keep dir from above.
+                    if dir:
+                        f = os.path.join(dir,f)
+                    # If we already wrote this file, skip it this time around.
+                    # (Typically this is applicable for psf, where we may only want 1 psf file.)
+                    if last_file_name[key] == f:
+                        if logger:
+                            logger.debug('skipping %s, since already written',f)
+                        continue
+                    kwargs[ extra_key+'_file_name' ] = f
+                    last_file_name[key] = f
+                elif 'hdu' in params:
+                    kwargs[ extra_key+'_hdu' ] = params['hdu']
+
+            # This is where we actually build the file.
+            # If we're doing multiprocessing, we send this information off to the worker pool.
+            # Otherwise, we just call build_func.
+            if nproc > 1:
+                import copy
+                # Make new copies of config and kwargs so we can update them without
+                # clobbering the versions for other tasks on the queue.
+                kwargs1 = copy.copy(kwargs)
+                kwargs1['config'] = CopyConfig(config)
+                pool.submit(_BuildFileJob, (build_func, kwargs1, file_num, file_name),
+                            (file_num, file_name))
             else:
-                if logger:
-                    logger.warn('%s: File %d = %s: time = %f sec', proc, file_num, file_name, t)
+                try:
+                    ProcessInput(config, file_num=file_num, logger=logger_proxy)
+                    if logger:
+                        logger.debug('file %d: After ProcessInput',file_num)
+                    kwargs['config'] = config
+                    kwargs['logger'] = logger 
+                    t = build_func(**kwargs)
+                    if logger:
+                        logger.warn('File %d = %s: time = %f sec', file_num, file_name, t)
+                except Exception as e:
+                    import traceback
+                    tr = traceback.format_exc()
+                    if logger:
+                        logger.error('Exception caught for file %d = %s', file_num, file_name)
+                        logger.error('%s',tr)
+                        logger.error('%s',e)
+                        logger.error('File %s not written! Continuing on...',file_name)
+                    # The failed file might have left jobs in the worker pool, whose results
+                    # must not be picked up when building the next file.  So start over with
+                    # fresh workers and queues.
+                    pool.terminate()
+
+        # If we're doing multiprocessing, here is where we collect the results.
+        if nproc > 1:
+            # Log the results.
+            if logger:
+                logger.debug('nfiles_use = %d',nfiles_use)
+            for k in range(nfiles_use):
+                t, (file_num, file_name), proc = pool.get()
+                if isinstance(t,Exception):
+                    # t is really the exception, e
+                    # proc is really the traceback
+                    if logger:
+                        logger.error('Exception caught for file %d = %s', file_num, file_name)
+                        logger.error('%s',proc)
+                        logger.error('%s',t)
+                        logger.error('File %s not written! Continuing on...',file_name)
+                else:
+                    if logger:
+                        logger.warn('%s: File %d = %s: time = %f sec', proc, file_num, file_name, t)
 
+            t2 = time.time()
+            if logger:
+                logger.warn('Total time for %d files with %d processes = %f sec', 
+                            nfiles_use,nproc,t2-t1)
+    except:
+        # Don't leave the worker processes (and the logger manager) running if anything goes
+        # wrong, or the program would hang on exit waiting for them.
+        pool.terminate()
+        raise
+    finally:
         # Stop the processes
-        for j in range(nproc):
-            task_queue.put('STOP')
-        for j in range(nproc):
-            p_list[j].join()
-        task_queue.close()
-        t2 = time.time()
-        if logger:
-            logger.warn('Total time for %d files with %d processes = %f sec', 
-                        nfiles_use,nproc,t2-t1)
+        pool.close()
+        del config['worker_pool']
 
     if logger:
         logger.debug('Done building files')
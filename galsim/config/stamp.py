@@ -45,38 +45,47 @@ def BuildStamps(nobjects, config, nproc=1, logger=None, obj_num=0,
     @return (images, psf_images, weight_images, badpix_images, current_vars) 
     (All in tuple are lists)
     """
-    def worker(input, output):
-        proc = current_process().name
-        for job in iter(input.get, 'STOP'):
-            try :
-                (kwargs, obj_num, nobj, info, logger) = job
-                if logger:
-                    logger.debug('%s: Received job to do %d stamps, starting with %d',
-                                 proc,nobj,obj_num)
-                results = []
-                for k in range(nobj):
-                    kwargs['obj_num'] = obj_num + k
-                    kwargs['logger'] = logger
-                    result = BuildSingleStamp(**kwargs)
-                    results.append(result)
-                    # Note: numpy shape is y,x
-                    ys, xs = result[0].array.shape
-                    t = result[5]
-                    if logger:
-                        logger.info('%s: Stamp %d: size = %d x %d, time = %f sec', 
-                                    proc, obj_num+k, xs, ys, t)
-                output.put( (results, info, proc) )
-                if logger:
-                    logger.debug('%s: Finished job %d -- %d',proc,obj_num,obj_num+nobj-1)
-            except Exception as e:
-                import traceback
-                tr = traceback.format_exc()
-                if logger:
-                    logger.error('%s: Caught exception %s\n%s',proc,str(e),tr)
-                output.put( (e, info, tr) )
-        if logger:
-            logger.debug('%s: Received STOP',proc)
-    
+    images = []
+    psf_images = []
+    weight_images = []
+    badpix_images = []
+    current_vars = []
+
+    for result in StreamStamps(
+            nobjects=nobjects, config=config, nproc=nproc, logger=logger, obj_num=obj_num,
+            xsize=xsize, ysize=ysize, sky_level_pixel=sky_level_pixel, do_noise=do_noise,
+            make_psf_image=make_psf_image,
+            make_weight_image=make_weight_image,
+            make_badpix_image=make_badpix_image):
+        images += [ result[0] ]
+        psf_images += [ result[1] ]
+        weight_images += [ result[2] ]
+        badpix_images += [ result[3] ]
+        current_vars += [ result[4] ]
+
+    return images, psf_images, weight_images, badpix_images, current_vars
+
+
+def StreamStamps(nobjects, config, nproc=1, logger=None, obj_num=0,
+                 xsize=0, ysize=0, sky_level_pixel=None, do_noise=True,
+                 make_psf_image=False, make_weight_image=False, make_badpix_image=False,
+                 shared_images=None):
+    """
+    A generator that builds a number of postage stamp images as specified by the config dict,
+    yielding each one as soon as it is ready.
+
+    The parameters are the same as for BuildStamps.  The stamps are yielded in order of 
+    obj_num, regardless of the order in which the worker processes finish them.  Unlike 
+    BuildStamps, this doesn't keep any of the stamps around after they are yielded, so the 
+    caller can add each one into a larger image and then let it go.
+
+    If shared_images (a SharedImages instance) is given, then each stamp is added directly 
+    into those images by whichever process built it, so the stamp images never need to be
+    sent back to this process.  In this case, the yielded tuple has the bounds of the stamp 
+    in place of the image, and None for the psf, weight and badpix images.
+
+    @yields (image, psf_image, weight_image, badpix_image, current_var) for each stamp.
+    """
     # The kwargs to pass to build_func.
     # We'll be adding to this below...
     kwargs = {
@@ -88,6 +97,58 @@ def BuildStamps(nobjects, config, nproc=1, logger=None, obj_num=0,
         'make_badpix_image' : make_badpix_image
     }
 
+    nproc = UpdateNProc(nproc, nobjects, logger)
+
+    if nproc > 1:
+        # Get the worker pool to use.  Normally this is the one set up by Process, so we don't
+        # need to start up new processes here.  See process.py for more details.
+        pool, temporary_pool = galsim.config.GetWorkerPool(config, nproc, logger)
+
+        # The stamps are returned in order of obj_num, even though the workers may finish
+        # them in a different order.  See _ScheduleStamps for how the work is divided up.
+        # If we made our own pool, stop the processes when we're done.  Otherwise, leave 
+        # them running for the next time they are needed.
+        try:
+            for k, result in _ScheduleStamps(pool, nobjects, nproc, kwargs, config, logger,
+                                             obj_num, shared_images):
+                yield result[0:5]
+        finally:
+            if temporary_pool:
+                pool.close()
+
+    else : # nproc == 1
+
+        for k in range(nobjects):
+            kwargs['config'] = config
+            kwargs['obj_num'] = obj_num+k
+            kwargs['logger'] = logger
+            result = BuildSingleStamp(**kwargs)
+            if logger:
+                # Note: numpy shape is y,x
+                ys, xs = result[0].array.shape
+                t = result[5]
+                logger.info('Stamp %d: size = %d x %d, time = %f sec', obj_num+k, xs, ys, t)
+            if shared_images:
+                shared_images.addStamp(result)
+                result = (result[0].bounds, None, None, None, result[4])
+            yield result[0:5]
+
+    if logger:
+        logger.debug('image %d: Done making stamps',config['image_num'])
+
+
+def UpdateNProc(nproc, nobjects, logger=None):
+    """Get the number of processes to actually use for building nobjects stamps.
+
+    If nproc <= 0, this is the number of cpus (or 1 if that can't be determined).  In any 
+    case, it is never more than nobjects.
+
+    @param nproc        The requested number of processes, e.g. config.image.nproc.
+    @param nobjects     The number of objects to be built.
+    @param logger       If given, a logger object to log progress.
+
+    @returns the number of processes to use.
+    """
     if nproc > nobjects:
         if logger:
             logger.warn(
@@ -112,170 +173,270 @@ def BuildStamps(nobjects, config, nproc=1, logger=None, obj_num=0,
             nproc = 1
             if logger:
                 logger.info("Unable to determine ncpu.  Using %d processes",nproc)
-    
-    if nproc > 1:
-        from multiprocessing import Process, Queue, current_process
-        from multiprocessing.managers import BaseManager
-
-        # Initialize the images list to have the correct size.
-        # This is important here, since we'll be getting back images in a random order,
-        # and we need them to go in the right places (in order to have deterministic
-        # output files).  So we initialize the list to be the right size.
-        images = [ None for i in range(nobjects) ]
-        psf_images = [ None for i in range(nobjects) ]
-        weight_images = [ None for i in range(nobjects) ]
-        badpix_images = [ None for i in range(nobjects) ]
-        current_vars = [ None for i in range(nobjects) ]
-
-        # Number of objects to do in each task:
-        # At most nobjects / nproc.
-        # At least 1 normally, but number in Ring if doing a Ring test
-        # Shoot for geometric mean of these two.
-        max_nobj = nobjects / nproc
-        min_nobj = 1
-        if ( 'gal' in config and isinstance(config['gal'],dict) and 'type' in config['gal'] and
-             config['gal']['type'] == 'Ring' and 'num' in config['gal'] ):
-            min_nobj = galsim.config.ParseValue(config['gal'], 'num', config, int)[0]
-        if max_nobj < min_nobj: 
-            nobj_per_task = min_nobj
+    return nproc
+
+
+class SharedImages(object):
+    """The full-sized images (image, psf_image, weight_image, badpix_image) being built for
+    a Tiled or Scattered image, stored in memory-mapped files that can be shared among
+    processes.
+
+    This lets worker processes add their stamps directly into the full images, rather than
+    sending the stamps back through a multiprocessing Queue.  The files are put in /dev/shm
+    if it exists, so normally they are never actually written to disk.
+
+    When the SharedImages object is pickled (e.g. to send it to a worker process), only the
+    file names are sent.  Each process maps the files into its own memory the first time it
+    calls getImages().  The files are deleted by close(), or when the original object (not
+    any of the unpickled copies) is garbage collected.
+
+    @param bounds       The bounds of the full images.
+    @param scale        The pixel scale of the full images.
+    @param make_images  A list of 4 bools saying which of (image, psf_image, weight_image,
+                        badpix_image) to make.
+    @param overlap      Whether different stamps might overlap each other.  If so, addStamp
+                        uses the lock that it is given to avoid two processes writing to the
+                        same pixels at the same time.  (default = True)
+    """
+    def __init__(self, bounds, scale, make_images, overlap=True):
+        import os
+        import tempfile
+        import numpy
+        self.xmin = bounds.xmin
+        self.ymin = bounds.ymin
+        self.shape = (bounds.ymax - bounds.ymin + 1, bounds.xmax - bounds.xmin + 1)
+        self.scale = scale
+        self.overlap = overlap
+        # The badpix image is an ImageS.  The rest are ImageF.
+        self.dtypes = [ numpy.float32, numpy.float32, numpy.float32, numpy.int16 ]
+        if os.path.isdir('/dev/shm'):
+            dir = '/dev/shm'
         else:
-            import math
-            # This formula keeps nobj a multiple of min_nobj, so Rings are intact.
-            nobj_per_task = min_nobj * int(math.sqrt(float(max_nobj) / float(min_nobj)))
-        
-        # The logger is not picklable, se we set up a proxy object.  See comments in process.py
-        # for more details about how this works.
-        class LoggerManager(BaseManager): pass
-        if logger:
-            logger_generator = galsim.utilities.SimpleGenerator(logger)
-            LoggerManager.register('logger', callable = logger_generator)
-            logger_manager = LoggerManager()
-            logger_manager.start()
-
-        # Set up the task list
-        task_queue = Queue()
-        for k in range(0,nobjects,nobj_per_task):
-            import copy
-            kwargs1 = copy.copy(kwargs)
-            kwargs1['config'] = galsim.config.CopyConfig(config)
-            if logger:
-                logger_proxy = logger_manager.logger()
+            dir = None
+        self.file_names = []
+        for make, dtype in zip(make_images, self.dtypes):
+            if make:
+                fd, file_name = tempfile.mkstemp(prefix='galsim_shared_', dir=dir)
+                # Extending the file fills it with zeros, so the images start out zeroed.
+                os.ftruncate(fd, self.shape[0] * self.shape[1] * numpy.dtype(dtype).itemsize)
+                os.close(fd)
+                self.file_names.append(file_name)
             else:
-                logger_proxy = None
-            nobj1 = min(nobj_per_task, nobjects-k)
-            task_queue.put( ( kwargs1, obj_num+k, nobj1, k, logger_proxy ) )
-
-        # Run the tasks
-        # Each Process command starts up a parallel process that will keep checking the queue 
-        # for a new task. If there is one there, it grabs it and does it. If not, it waits 
-        # until there is one to grab. When it finds a 'STOP', it shuts down. 
-        done_queue = Queue()
-        p_list = []
-        for j in range(nproc):
-            # The name is actually the default name for the first time we do this,
-            # but after that it just keeps incrementing the numbers, rather than starting
-            # over at Process-1.  As far as I can tell, it's not actually spawning more 
-            # processes, so for the sake of the info output, we name the processes 
-            # explicitly.
-            p = Process(target=worker, args=(task_queue, done_queue), name='Process-%d'%(j+1))
-            p.start()
-            p_list.append(p)
-
-        # In the meanwhile, the main process keeps going.  We pull each set of images off of the 
-        # done_queue and put them in the appropriate place in the lists.
-        # This loop is happening while the other processes are still working on their tasks.
-        # You'll see that these logging statements get print out as the stamp images are still 
-        # being drawn.  
-        for i in range(0,nobjects,nobj_per_task):
-            results, k0, proc = done_queue.get()
+                self.file_names.append(None)
+        self._images = None
+        self._owner = True
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d['_images'] = None
+        d['_owner'] = False
+        return d
+
+    def __del__(self):
+        if self._owner:
+            self.close()
+
+    def getImages(self):
+        """Get the shared images as a list of 4 ImageViews (some of which may be None).
+        """
+        import numpy
+        if self._images is None:
+            self._images = []
+            for file_name, dtype in zip(self.file_names, self.dtypes):
+                if file_name:
+                    array = numpy.memmap(file_name, dtype=dtype, mode='r+', shape=self.shape)
+                    im = galsim.ImageView[dtype](array, self.xmin, self.ymin, self.scale)
+                    self._images.append(im)
+                else:
+                    self._images.append(None)
+        return self._images
+
+    def addStamp(self, result, lock=None):
+        """Add a stamp into the shared images.
+
+        @param result   The tuple returned by BuildSingleStamp.
+        @param lock     A multiprocessing Lock to use if stamps might overlap.
+        """
+        im, psf_im, weight_im, badpix_im = result[0:4]
+        # This is our signal that the object was skipped.
+        if not im.bounds.isDefined(): return
+        full_image, full_psf_image, full_weight_image, full_badpix_image = self.getImages()
+        b = im.bounds & full_image.bounds
+        if not b.isDefined(): return
+        if lock and self.overlap:
+            lock.acquire()
+        try:
+            full_image[b] += im[b]
+            if full_psf_image is not None:
+                full_psf_image[b] += psf_im[b]
+            if full_weight_image is not None:
+                full_weight_image[b] += weight_im[b]
+            if full_badpix_image is not None:
+                full_badpix_image[b] |= badpix_im[b]
+        finally:
+            if lock and self.overlap:
+                lock.release()
+
+    def close(self):
+        """Unmap and delete the shared files.
+        """
+        import os
+        self._images = None
+        for file_name in self.file_names:
+            if file_name and os.path.exists(file_name):
+                os.remove(file_name)
+        self.file_names = [ None for f in self.file_names ]
+
+
+# When scheduling the stamps for multiple processes, we try to keep each task from taking
+# longer than this many seconds, based on the running average time per stamp.
+stamp_task_time = 1.
+
+# The finished stamps have to be held until all the ones before them are done, so if one task is
+# very slow, the others could pile up behind it.  So don't hand out stamps more than this many
+# ahead of the next one to be yielded.
+max_stamps_pending = 1000
+
+def _ScheduleStamps(pool, nobjects, nproc, kwargs, config, logger, obj_num, shared_images=None):
+    """Build nobjects stamps using the given WorkerPool, yielding (k, result) for each stamp
+    in order of k (i.e. obj_num - first obj_num), where result is the output of
+    BuildSingleStamp.
+
+    Rather than dividing the stamps into equal-sized chunks up front, the stamps are handed
+    out a chunk at a time as workers become free, so a few expensive stamps don't leave the
+    other workers sitting idle at the end.  The chunk size is based on the number of stamps
+    remaining (guided self-scheduling: remaining / (2 nproc)), and it is also limited so a
+    chunk should take no longer than stamp_task_time seconds, using the average time per
+    stamp measured so far.  So the chunks start out large for cheap stamps and get smaller
+    towards the end of the image.  No more than max_stamps_pending stamps past the next one
+    to be yielded are handed out, which limits how many finished stamps are held in memory.
+
+    If the gal field is a Ring, the chunks are always a multiple of the Ring's num, so
+    Rings are kept intact.
+
+    If shared_images is given, it is passed along to the workers.  See StreamStamps.
+    """
+    import copy
+    min_nobj = 1
+    if ( 'gal' in config and isinstance(config['gal'],dict) and 'type' in config['gal'] and
+         config['gal']['type'] == 'Ring' and 'num' in config['gal'] ):
+        min_nobj = galsim.config.ParseValue(config['gal'], 'num', config, int)[0]
+
+    # Keep a few more tasks in flight than there are processes, so no worker has to wait
+    # for this process to hand it more work.
+    max_in_flight = 2 * nproc
+
+    next_k = 0        # The next stamp index to hand out
+    next_yield = 0    # The next stamp index to yield
+    in_flight = 0     # The number of tasks submitted whose results we don't have yet.
+    done = {}         # Finished tasks that cannot be yielded yet, keyed by first index.
+    total_time = 0.   # The total time taken for the stamps finished so far
+    total_nobj = 0    # The number of stamps finished so far
+
+    try:
+        while next_yield < nobjects:
+            # Hand out more work if there is any left.
+            while ( next_k < nobjects and in_flight < max_in_flight and
+                    next_k - next_yield < max_stamps_pending ):
+                remaining = nobjects - next_k
+                nobj1 = remaining / (2*nproc)
+                if total_nobj > 0 and total_time > 0.:
+                    max_nobj = int(stamp_task_time * total_nobj / total_time)
+                    if nobj1 > max_nobj: nobj1 = max_nobj
+                elif total_nobj == 0:
+                    # Until we have timing information, use small tasks so we get some quickly.
+                    nobj1 = min(nobj1, 1)
+                nobj1 = min(nobj1, max_stamps_pending - (next_k - next_yield))
+                # Keep nobj1 a multiple of min_nobj, so Rings are intact.
+                nobj1 = max(nobj1 / min_nobj, 1) * min_nobj
+                nobj1 = min(nobj1, remaining)
+                kwargs1 = copy.copy(kwargs)
+                kwargs1['config'] = galsim.config.CopyConfig(config)
+                pool.submit(_BuildStampsJob, (kwargs1, obj_num+next_k, nobj1, shared_images),
+                            next_k)
+                next_k += nobj1
+                in_flight += 1
+
+            results, k0, proc = pool.get()
+            in_flight -= 1
             if isinstance(results,Exception):
                 # results is really the exception, e
                 # proc is really the traceback
                 if logger:
                     logger.error('Exception caught during job starting with stamp %d', k0)
                     logger.error('Aborting the rest of this image')
-                for j in range(nproc):
-                    p_list[j].terminate()
+                pool.terminate()
+                in_flight = 0
                 raise results
-            k = k0
+            if logger:
+                logger.debug('%s: Successfully returned results for stamps %d--%d',
+                             proc, k0, k0+len(results)-1)
             for result in results:
-                images[k] = result[0]
-                psf_images[k] = result[1]
-                weight_images[k] = result[2]
-                badpix_images[k] = result[3]
-                current_vars[k] = result[4]
-                k += 1
+                total_time += result[5]
+            total_nobj += len(results)
+            done[k0] = results
+
+            # Yield whatever results are now ready in order.
+            while next_yield in done:
+                results = done.pop(next_yield)
+                for result in results:
+                    yield next_yield, result
+                    next_yield += 1
+    finally:
+        # If we stop early (e.g. the caller raised an exception while handling a stamp, or
+        # abandoned this generator), there are still jobs in flight.  Their results would be
+        # picked up by the next image to use this pool, so kill the workers and start over.
+        # terminate() makes new queues, so the pool is still usable afterwards.
+        if in_flight > 0:
             if logger:
-                logger.debug('%s: Successfully returned results for stamps %d--%d', proc, k0, k-1)
-
-        # Stop the processes
-        # The 'STOP's could have been put on the task list before starting the processes, or you
-        # can wait.  In some cases it can be useful to clear out the done_queue (as we just did)
-        # and then add on some more tasks.  We don't need that here, but it's perfectly fine to do.
-        # Once you are done with the processes, putting nproc 'STOP's will stop them all.
-        # This is important, because the program will keep running as long as there are running
-        # processes, even if the main process gets to the end.  So you do want to make sure to 
-        # add those 'STOP's at some point!
-        for j in range(nproc):
-            task_queue.put('STOP')
-        for j in range(nproc):
-            p_list[j].join()
-        task_queue.close()
+                logger.debug('Terminating worker pool with %d jobs still in flight', in_flight)
+            pool.terminate()
 
-    else : # nproc == 1
 
-        images = []
-        psf_images = []
-        weight_images = []
-        badpix_images = []
-        current_vars = []
-
-        for k in range(nobjects):
-            kwargs['obj_num'] = obj_num+k
-            kwargs['config'] = config
-            kwargs['obj_num'] = obj_num+k
-            kwargs['logger'] = logger
-            result = BuildSingleStamp(**kwargs)
-            images += [ result[0] ]
-            psf_images += [ result[1] ]
-            weight_images += [ result[2] ]
-            badpix_images += [ result[3] ]
-            current_vars += [ result[4] ]
-            if logger:
-                # Note: numpy shape is y,x
-                ys, xs = result[0].array.shape
-                t = result[5]
-                logger.info('Stamp %d: size = %d x %d, time = %f sec', obj_num+k, xs, ys, t)
+def _BuildStampsJob(state, logger, kwargs, obj_num, nobj, shared_images=None):
+    """Build nobj stamps in a worker process.  This is the job function used by BuildStamps.
 
+    If shared_images is given, then each stamp is added into it, and the images in the 
+    returned result are replaced by the stamp's bounds and None.
 
+    @return a list of the results of BuildSingleStamp for each stamp.
+    """
+    from multiprocessing import current_process
+    proc = current_process().name
     if logger:
-        logger.debug('image %d: Done making stamps',config['image_num'])
+        logger.debug('%s: Received job to do %d stamps, starting with %d',
+                     proc,nobj,obj_num)
+    results = []
+    for k in range(nobj):
+        kwargs['obj_num'] = obj_num + k
+        kwargs['logger'] = logger
+        result = BuildSingleStamp(**kwargs)
+        # Note: numpy shape is y,x
+        ys, xs = result[0].array.shape
+        t = result[5]
+        if logger:
+            logger.info('%s: Stamp %d: size = %d x %d, time = %f sec', 
+                        proc, obj_num+k, xs, ys, t)
+        if shared_images:
+            shared_images.addStamp(result, state['lock'])
+            result = (result[0].bounds, None, None, None, result[4], result[5])
+        results.append(result)
+    if logger:
+        logger.debug('%s: Finished job %d -- %d',proc,obj_num,obj_num+nobj-1)
+    return results
 
-    return images, psf_images, weight_images, badpix_images, current_vars
- 
 
-def BuildSingleStamp(config, xsize=0, ysize=0,
-                     obj_num=0, sky_level_pixel=None, do_noise=True, logger=None,
-                     make_psf_image=False, make_weight_image=False, make_badpix_image=False):
+def SetupStampRNG(config, obj_num, logger=None):
     """
-    Build a single image using the given config file
+    Set up config for building the object obj_num.  This sets the seq_index and obj_num and
+    makes the random number generator to use for this object, storing it as config['rng'].
 
     @param config              A configuration dict.
-    @param xsize               The xsize of the image to build (if known).
-    @param ysize               The ysize of the image to build (if known).
-    @param obj_num             If given, the current obj_num (default = 0)
-    @param sky_level_pixel     The background sky level to add to the image (in ADU/pixel).
-    @param do_noise            Whether to add noise to the image (according to config['noise']).
+    @param obj_num             The current obj_num.
     @param logger              If given, a logger object to log progress.
-    @param make_psf_image      Whether to make psf_image.
-    @param make_weight_image   Whether to make weight_image.
-    @param make_badpix_image   Whether to make badpix_image.
 
-    @return image, psf_image, weight_image, badpix_image, current_var, time
+    @return rng
     """
-    import time
-    t1 = time.time()
-
     config['seq_index'] = obj_num 
     config['obj_num'] = obj_num
     # Initialize the random number generator we will be using.
@@ -290,7 +451,24 @@ def BuildSingleStamp(config, xsize=0, ysize=0,
     config['rng'] = rng
     if 'gd' in config:
         del config['gd']  # In case it was set.
+    return rng
+
+
+def GetStampPosition(config, xsize=0, ysize=0, logger=None):
+    """
+    Determine the size and position of the current object's postage stamp.  This should be 
+    called just after SetupStampRNG, since it may use the rng.
+
+    The image_pos and sky_pos are also saved in config for possible use in Evals or other
+    modules.
+
+    @param config              A configuration dict.
+    @param xsize               The xsize of the image to build (if known).
+    @param ysize               The ysize of the image to build (if known).
+    @param logger              If given, a logger object to log progress.
 
+    @return xsize, ysize, image_pos, sky_pos   (image_pos and sky_pos may be None)
+    """
     # Determine the size of this stamp
     if not xsize:
         if 'stamp_xsize' in config['image']:
@@ -340,6 +518,34 @@ def BuildSingleStamp(config, xsize=0, ysize=0,
         if logger:
             logger.debug('obj %d: sky_pos = %s',config['obj_num'],str(config['sky_pos']))
 
+    return xsize, ysize, image_pos, sky_pos
+
+
+def BuildSingleStamp(config, xsize=0, ysize=0,
+                     obj_num=0, sky_level_pixel=None, do_noise=True, logger=None,
+                     make_psf_image=False, make_weight_image=False, make_badpix_image=False):
+    """
+    Build a single image using the given config file
+
+    @param config              A configuration dict.
+    @param xsize               The xsize of the image to build (if known).
+    @param ysize               The ysize of the image to build (if known).
+    @param obj_num             If given, the current obj_num (default = 0)
+    @param sky_level_pixel     The background sky level to add to the image (in ADU/pixel).
+    @param do_noise            Whether to add noise to the image (according to config['noise']).
+    @param logger              If given, a logger object to log progress.
+    @param make_psf_image      Whether to make psf_image.
+    @param make_weight_image   Whether to make weight_image.
+    @param make_badpix_image   Whether to make badpix_image.
+
+    @return image, psf_image, weight_image, badpix_image, current_var, time
+    """
+    import time
+    t1 = time.time()
+
+    SetupStampRNG(config, obj_num, logger)
+    xsize, ysize, image_pos, sky_pos = GetStampPosition(config, xsize, ysize, logger)
+
     if image_pos is not None:
         import math
         # The image_pos refers to the location of the true center of the image, which is not 
@@ -61,6 +61,7 @@ valid_value_types = {
 standard_ignore = [ 
     'type',
     'current_val', 'current_safe', 'current_seq_index', 'current_value_type',
+    'planned', # Values generated by PlanValues
     '#' # When we read in json files, there represent comments
 ]
 
@@ -127,10 +128,17 @@ def ParseValue(config, param_name, base, value_type):
                 "Invalid value_type = %s specified for parameter %s with type = %s."%(
                     value_type, param_name, type))
 
-        generate_func = eval(valid_value_types[type][0])
-        #print 'generate_func = ',generate_func
-        val, safe = generate_func(param, param_name, base, value_type)
-        #print 'returned val, safe = ',val,safe
+        # If the values were planned for the whole image, use the one for this object.
+        planned = None
+        if 'planned' in param:
+            planned = _GetPlannedValue(param, param_name, base, value_type)
+        if planned is not None:
+            val, safe = planned
+        else:
+            generate_func = eval(valid_value_types[type][0])
+            #print 'generate_func = ',generate_func
+            val, safe = generate_func(param, param_name, base, value_type)
+            #print 'returned val, safe = ',val,safe
 
         # Make sure we really got the right type back.  (Just in case...)
         if not isinstance(val,value_type):
@@ -398,18 +406,22 @@ def _GenerateFromCatalog(param, param_name, base, value_type):
     kwargs, safe1 = GetAllParams(param, param_name, base, req=req, ignore=['num'])
     safe = safe and safe1
 
+    val = _GetCatalogValue(input_cat, kwargs, param_name, value_type)
+    #print base['file_num'],
+    #print 'Catalog: col = %s, index = %s, val = %s'%(kwargs['col'],kwargs['index'],val)
+    return val, safe
+
+def _GetCatalogValue(input_cat, kwargs, param_name, value_type):
+    """@brief Return the value in an input catalog for the given col and index.
+    """
     if value_type is str:
-        val = input_cat.get(**kwargs)
+        return input_cat.get(**kwargs)
     elif value_type is float:
-        val = input_cat.getFloat(**kwargs)
+        return input_cat.getFloat(**kwargs)
     elif value_type is int:
-        val = input_cat.getInt(**kwargs)
+        return input_cat.getInt(**kwargs)
     elif value_type is bool:
-        val = _GetBoolValue(input_cat.get(**kwargs),param_name)
-
-    #print base['file_num'],
-    #print 'Catalog: col = %s, index = %s, val = %s'%(kwargs['col'],kwargs['index'],val)
-    return val, safe
+        return _GetBoolValue(input_cat.get(**kwargs),param_name)
 
 
 def _GenerateFromDict(param, param_name, base, value_type):
@@ -531,28 +543,8 @@ def _GenerateFromRandomGaussian(param, param_name, base, value_type):
         base['current_gdsigma'] = sigma
 
     if 'min' in kwargs or 'max' in kwargs:
-        # Clip at min/max.
-        # However, special cases if min == mean or max == mean
-        #  -- can use fabs to double the chances of falling in the range.
-        mean = kwargs.get('mean',0.)
-        min = kwargs.get('min',-float('inf'))
-        max = kwargs.get('max',float('inf'))
-
-        do_abs = False
-        do_neg = False
-        if min == mean:
-            do_abs = True
-            max -= mean
-            min = -max
-        elif max == mean:
-            do_abs = True
-            do_neg = True
-            min -= mean
-            max = -min
-        else:
-            min -= mean
-            max -= mean
-    
+        mean, min, max, do_abs, do_neg = _GetGaussianClipping(kwargs)
+
         # Emulate a do-while loop
         import math
         while True:
@@ -569,6 +561,35 @@ def _GenerateFromRandomGaussian(param, param_name, base, value_type):
     return val, False
 
 
+def _GetGaussianClipping(kwargs):
+    """@brief Return the range in which to keep the deviates of a clipped RandomGaussian.
+
+    @return mean, min, max, do_abs, do_neg
+    """
+    # Clip at min/max.
+    # However, special cases if min == mean or max == mean
+    #  -- can use fabs to double the chances of falling in the range.
+    mean = kwargs.get('mean',0.)
+    min = kwargs.get('min',-float('inf'))
+    max = kwargs.get('max',float('inf'))
+
+    do_abs = False
+    do_neg = False
+    if min == mean:
+        do_abs = True
+        max -= mean
+        min = -max
+    elif max == mean:
+        do_abs = True
+        do_neg = True
+        min -= mean
+        max = -min
+    else:
+        min -= mean
+        max -= mean
+    return mean, min, max, do_abs, do_neg
+
+
 def _GenerateFromRandomDistribution(param, param_name, base, value_type):
     """@brief Return a random value drawn from a user-defined probability distribution
     """
@@ -646,6 +667,13 @@ def _GenerateFromSequence(param, param_name, base, value_type):
             'repeat' : int, 'nitems' : int, 'start_seq_index' : int }
     kwargs, safe = GetAllParams(param, param_name, base, opt=opt, ignore=ignore)
 
+    index = _GetSequenceValue(kwargs, base['seq_index'], param_name, value_type)
+    #print base['seq_index'],'Sequence index = %s'%index
+    return index, False
+
+def _GetSequenceValue(kwargs, seq_index, param_name, value_type):
+    """@brief Return the value of a Sequence with the given parameters for this seq_index.
+    """
     step = kwargs.get('step',1)
     first = kwargs.get('first',0)
     repeat = kwargs.get('repeat',1)
@@ -679,15 +707,13 @@ def _GenerateFromSequence(param, param_name, base, value_type):
         if last is not None:
             nitems = (last - first)/step + 1
 
-    k = base['seq_index'] - start_seq_index
+    k = seq_index - start_seq_index
     k = k / repeat
 
     if nitems is not None and nitems > 0:
         k = k % nitems
 
-    index = first + k*step
-    #print base['seq_index'],'Sequence index = %s + %d*%s = %s'%(first,k,step,index)
-    return index, False
+    return first + k*step
 
 
 def _GenerateFromNumberedFile(param, param_name, base, value_type):
@@ -766,6 +792,28 @@ def _GenerateFromFormattedStr(param, param_name, base, value_type):
     return final_str, safe
 
 
+def _GetPrecomputedLensing(base, key, num, redshift=None):
+    """@brief Return the (g1, g2, mu) for the current object calculated by PrecomputeLensing,
+    or None if they were not precomputed.
+    """
+    if 'precomputed_lensing' not in base:
+        return None
+    lensing = base['precomputed_lensing']
+    if key not in lensing or num >= len(lensing[key]):
+        return None
+    if redshift is not None and redshift != lensing['redshift']:
+        return None
+    k = base['obj_num'] - lensing['first_obj_num']
+    if k < 0 or k >= len(lensing['x']):
+        return None
+    # Make sure the position is the one that was used.
+    pos = base['sky_pos']
+    if pos.x != lensing['x'][k] or pos.y != lensing['y'][k]:
+        return None
+    g1, g2, mu = lensing[key][num]
+    return g1[k], g2[k], mu[k]
+
+
 def _GenerateFromNFWHaloShear(param, param_name, base, value_type):
     """@brief Return a shear calculated from an NFWHalo object.
     """
@@ -791,7 +839,11 @@ def _GenerateFromNFWHaloShear(param, param_name, base, value_type):
     nfw_halo = base['nfw_halo'][num]
 
     try:
-        g1,g2 = nfw_halo.getShear(pos,redshift)
+        lensing = _GetPrecomputedLensing(base, 'nfw_halo', num, redshift)
+        if lensing is not None:
+            g1,g2 = lensing[0:2]
+        else:
+            g1,g2 = nfw_halo.getShear(pos,redshift)
         shear = galsim.Shear(g1=g1,g2=g2)
     except Exception as e:
         import warnings
@@ -826,7 +878,11 @@ def _GenerateFromNFWHaloMagnification(param, param_name, base, value_type):
         raise ValueError("Invalid num supplied for NFWHaloMagnification (too large): num = %d"%num)
     nfw_halo = base['nfw_halo'][num]
 
-    mu = nfw_halo.getMagnification(pos,redshift)
+    lensing = _GetPrecomputedLensing(base, 'nfw_halo', num, redshift)
+    if lensing is not None:
+        mu = lensing[2]
+    else:
+        mu = nfw_halo.getMagnification(pos,redshift)
 
     max_mu = kwargs.get('max_mu', 25.)
     if not max_mu > 0.: 
@@ -864,7 +920,11 @@ def _GenerateFromPowerSpectrumShear(param, param_name, base, value_type):
     power_spectrum = base['power_spectrum'][num]
 
     try:
-        g1,g2 = power_spectrum.getShear(pos)
+        lensing = _GetPrecomputedLensing(base, 'power_spectrum', num)
+        if lensing is not None:
+            g1,g2 = lensing[0:2]
+        else:
+            g1,g2 = power_spectrum.getShear(pos)
         shear = galsim.Shear(g1=g1,g2=g2)
     except Exception as e:
         import warnings
@@ -896,7 +956,11 @@ def _GenerateFromPowerSpectrumMagnification(param, param_name, base, value_type)
             "Invalid num supplied for PowerSpectrumMagnification (too large): num = %d"%num)
     power_spectrum = base['power_spectrum'][num]
 
-    mu = power_spectrum.getMagnification(pos)
+    lensing = _GetPrecomputedLensing(base, 'power_spectrum', num)
+    if lensing is not None:
+        mu = lensing[2]
+    else:
+        mu = power_spectrum.getMagnification(pos)
 
     max_mu = kwargs.get('max_mu', 25.)
     if not max_mu > 0.: 
@@ -954,6 +1018,89 @@ def _type_by_letter(key):
     else:
         raise AttributeError("Invalid Eval variable: %s (starts with an invalid letter)"%key)
 
+# The variables in the base config dict that Eval strings may use.  Any input objects
+# (cf. galsim.config.valid_input_types) may also be used.
+_eval_base_variables = [ 'image_pos', 'sky_pos', 'image_center', 'image_origin',
+                         'image_xsize', 'image_ysize', 'stamp_xsize', 'stamp_ysize',
+                         'pixel_scale', 'rng', 'file_num', 'image_num', 'obj_num' ]
+
+# The modules that are available to all Eval strings.
+_eval_modules = None
+
+def _GetEvalModules():
+    """@brief Return a dict of the modules that are available to all Eval strings.
+    """
+    global _eval_modules
+    if _eval_modules is None:
+        # Also, we allow the use of math functions
+        import math
+        import numpy
+        import os
+        _eval_modules = { 'math' : math, 'numpy' : numpy, 'os' : os, 'galsim' : galsim }
+    return _eval_modules
+
+def _GetEvalNames(code):
+    """@brief Get all the (non-local) names used by a code object, including nested ones
+    (e.g. in generator expressions or lambdas).
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, type(code)):
+            names.update(_GetEvalNames(const))
+    return names
+
+def _CompileEval(string):
+    """@brief Compile an Eval string.
+
+    @returns (code, base_names), where base_names is the list of base variables (and input
+             objects) that the string uses.
+    """
+    code = compile(string, '<Eval string>', 'eval')
+    names = _GetEvalNames(code)
+    base_names = [ key for key in _eval_base_variables + galsim.config.valid_input_types.keys()
+                   if key in names ]
+    return code, base_names
+
+# A cache of the compiled Eval strings, so each string is only compiled once.
+_eval_cache = galsim.utilities.LRU_Cache(_CompileEval, maxsize=1024)
+
+def _GetEvalNamespace(base):
+    """@brief Get the part of the Eval namespace that is shared by all Eval strings, namely the
+    modules and any top level eval_variables.
+
+    This only changes from one object (or image or file) to the next, so it is stored in
+    base['eval_namespace'] and only rebuilt when the current object changes.
+
+    @returns (namespace, eval_names, safe), where eval_names is the set of names that came from
+             eval_variables.  The namespace must not be modified by the caller.
+    """
+    key = ( base.get('file_num',0), base.get('image_num',0), base.get('obj_num',0),
+            base.get('seq_index',0) )
+    if 'eval_namespace' in base and base['eval_namespace'][0] == key:
+        return base['eval_namespace'][1:]
+
+    namespace = dict(_GetEvalModules())
+    eval_names = set()
+    safe = True
+    if 'eval_variables' in base:
+        #print 'found eval_variables = ',base['eval_variables']
+        if not isinstance(base['eval_variables'],dict):
+            raise AttributeError("eval_variables must be a dict")
+        opt = {}
+        for key1 in base['eval_variables'].keys():
+            if key1 not in standard_ignore:
+                opt[key1] = _type_by_letter(key1)
+        #print 'opt = ',opt
+        params, safe = GetAllParams(base['eval_variables'], 'eval_variables', base, opt=opt,
+                                    ignore=standard_ignore)
+        #print 'params = ',params
+        for key1 in opt.keys():
+            namespace[key1[1:]] = params[key1]
+            eval_names.add(key1[1:])
+
+    base['eval_namespace'] = (key, namespace, eval_names, safe)
+    return namespace, eval_names, safe
+
 def _GenerateFromEval(param, param_name, base, value_type):
     """@brief Evaluate a string as the provided type
     """
@@ -972,77 +1119,39 @@ def _GenerateFromEval(param, param_name, base, value_type):
     string = params['str']
     #print 'string = ',string
 
-    # Bring the user-defined variables into scope.
+    try:
+        code, base_names = _eval_cache(string)
+    except Exception:
+        raise ValueError("Unable to evaluate string %r as a %s for %s"%(
+                string,value_type,param_name))
+
+    # Start with the modules and top level eval_variables, which are the same for every Eval
+    # string for this object.
+    shared, eval_names, safe1 = _GetEvalNamespace(base)
+    safe = safe and safe1
+    namespace = dict(shared)
+
+    # Add the variables from the base dict that the string uses, and then the user-defined
+    # variables, which take precedence over these.  The eval_variables take precedence over both.
+    for key in base_names:
+        if key in base and key not in eval_names:
+            namespace[key] = base[key]
+    user_names = set(eval_names)
     for key in opt.keys():
-        exec(key[1:] + ' = params[key]')
-        #print key[1:],'=',eval(key[1:])
+        if key[1:] not in eval_names:
+            namespace[key[1:]] = params[key]
+        user_names.add(key[1:])
 
-    # Also bring in any top level eval_variables
-    if 'eval_variables' in base:
-        #print 'found eval_variables = ',base['eval_variables']
-        if not isinstance(base['eval_variables'],dict):
-            raise AttributeError("eval_variables must be a dict")
-        opt = {}
-        for key in base['eval_variables'].keys():
-            if key not in ignore:
-                opt[key] = _type_by_letter(key)
-        #print 'opt = ',opt
-        params, safe1 = GetAllParams(base['eval_variables'], 'eval_variables', base, opt=opt,
-                                     ignore=ignore)
-        #print 'params = ',params
-        safe = safe and safe1
-        for key in opt.keys():
-            exec(key[1:] + ' = params[key]')
-            #print key[1:],'=',eval(key[1:])
+    # If the string uses any of the base variables (which are not shadowed by user-defined
+    # variables), then the value is not safe to reuse for other objects.
+    for key in base_names:
+        if key not in user_names:
+            safe = False
 
-    # Also, we allow the use of math functions
-    import math
-    import numpy
-    import os
-
-    # Try evaluating the string as is.
     try:
-        val = value_type(eval(string))
-        #print base['obj_num'],'Simple Eval(%s) = %s'%(string,val)
+        val = value_type(eval(code, namespace))
+        #print base['obj_num'],'Eval(%s) = %s'%(string,val)
         return val, safe
-    except:
-        pass
-
-    # Then try bringing in the allowed variables to see if that works:
-    if 'image_pos' in base:
-        image_pos = base['image_pos']
-    if 'sky_pos' in base:
-        sky_pos = base['sky_pos']
-    if 'image_center' in base:
-        image_center = base['image_center']
-    if 'image_origin' in base:
-        image_origin = base['image_origin']
-    if 'image_xsize' in base:
-        image_xsize = base['image_xsize']
-    if 'image_ysize' in base:
-        image_ysize = base['image_ysize']
-    if 'stamp_xsize' in base:
-        stamp_xsize = base['stamp_xsize']
-    if 'stamp_ysize' in base:
-        stamp_ysize = base['stamp_ysize']
-    if 'pixel_scale' in base:
-        pixel_sclae = base['pixel_scale']
-    if 'rng' in base:
-        rng = base['rng']
-    if 'file_num' in base:
-        file_num = base['file_num']
-    if 'image_num' in base:
-        image_num = base['image_num']
-    if 'obj_num' in base:
-        obj_num = base['obj_num']
-    for key in galsim.config.valid_input_types.keys():
-        if key in base:
-            exec(key + ' = base[key]')
-
-    try:
-        val = value_type(eval(string))
-        #print base['obj_num'],'Eval(%s) needed extra variables: val = %s'%(string,val)
-        return val, False
     except:
         raise ValueError("Unable to evaluate string %r as a %s for %s"%(
                 string,value_type,param_name))
@@ -1078,6 +1187,400 @@ def _GenerateFromCurrent(param, param_name, base, value_type):
     raise ValueError("Invalid key = %s given for %s.type = Current"%(key,param_name))
 
 
+#
+# Generating the values for all the objects in an image at once:
+#
+
+def PlanValues(config, obj_num, nobjects, logger=None):
+    """
+    Generate the values of the gal, psf and pix parameters for all the objects in an image
+    at once.
+
+    This is only done if image.plan_values is True.  Then any items of type Random,
+    RandomGaussian, RandomDistribution or Sequence whose parameters are all constants, and
+    any items of type Catalog or Eval whose parameters are constants or other planned items,
+    are generated for all nobjects objects at once with a few vectorized calls.  The results
+    are stored in the item's 'planned' field, where ParseValue will find the value for each
+    object, rather than generating it from scratch.  Other items are generated as usual.
+    (Items used as an index, e.g. for a List, are not planned, except for a Sequence used as
+    the index of a Catalog.)
+
+    The random values are not drawn from each object's own rng, so turning this on gives
+    different (but equally valid) random values.  They are drawn from the image's rng,
+    config['rng'], as follows:
+
+    1. The random items are visited in sorted order of their location in the config dict,
+       e.g. 'gal.ellip.beta' comes before 'gal.flux', which comes before 'psf.fwhm'.
+       (Items in a list are labeled by their index, e.g. 'gal.items.0.flux'.)
+    2. Each one seeds its own BaseDeviate with int(ud() * 2**31) + 1, where ud is a
+       UniformDeviate that uses config['rng'].
+    3. Each one then draws its values for obj_num, obj_num+1, ..., obj_num+nobjects-1 in that
+       order from its BaseDeviate with a single call to generate, using a UniformDeviate for
+       Random, a GaussianDeviate for RandomGaussian and a DistDeviate for RandomDistribution.
+       If a RandomGaussian has a min or max, any values outside of the allowed range are then
+       redrawn (again in order of obj_num) until all of them are in range.
+
+    Anything that uses the image's rng after this (e.g. noise added to the full image) will
+    also be different from what it would have been without plan_values.
+
+    @param config              A configuration dict.
+    @param obj_num             The obj_num of the first object in the image.
+    @param nobjects            The number of objects in the image.
+    @param logger              If given, a logger object to log progress.
+    """
+    if 'plan_values' not in config['image']:
+        return
+
+    # Find all the items that might be planned, removing any plans from a previous image.
+    items = []
+    for key in [ 'gal', 'psf', 'pix' ]:
+        if key in config:
+            _FindPlanItems(config[key], key, items)
+    if not ParseValue(config['image'], 'plan_values', config, bool)[0]:
+        return
+    items.sort(key = lambda item: item[0])
+
+    # Plan the values as though we are at the first object, so things like SetDefaultIndex
+    # work the same way they would when building the stamps.
+    saved = dict([ (key, config[key]) for key in [ 'seq_index', 'obj_num' ] if key in config ])
+    config['seq_index'] = obj_num
+    config['obj_num'] = obj_num
+    ud = galsim.UniformDeviate(config['rng'])
+
+    nplanned = 0
+    try:
+        # First the items that don't use any other items, in sorted order.  Skip any index
+        # items, since SetDefaultIndex might change them when the stamps are built.  (Catalog
+        # plans its own index after calling SetDefaultIndex.)
+        for path, param in items:
+            type = param['type']
+            if ( type in _plan_types and not _plan_types[type][2] and
+                 'default' not in param and not path.endswith('.index') ):
+                if _PlanItem(param, path, config, nobjects, ud):
+                    nplanned += 1
+        # Then Catalog and Eval, in reverse order, so any items they use are planned first.
+        for path, param in reversed(items):
+            type = param['type']
+            if type in _plan_types and _plan_types[type][2]:
+                if _PlanItem(param, path, config, nobjects, ud):
+                    nplanned += 1
+    finally:
+        for key in [ 'seq_index', 'obj_num' ]:
+            if key in saved:
+                config[key] = saved[key]
+            else:
+                del config[key]
+
+    if logger:
+        logger.debug('image %d: Planned %d values for %d objects',
+                     config.get('image_num',0),nplanned,nobjects)
+
+def _FindPlanItems(field, path, items):
+    """@brief Append (path, item) to items for every item with a type in a config field, and
+    remove any values that were planned for a previous image.
+    """
+    if isinstance(field, dict):
+        if 'planned' in field:
+            del field['planned']
+        if 'type' in field and isinstance(field['type'], basestring):
+            items.append( (path, field) )
+        for key in field:
+            if not (isinstance(key, basestring) and key.startswith('current_')):
+                _FindPlanItems(field[key], path + '.' + str(key), items)
+    elif isinstance(field, list):
+        for i in range(len(field)):
+            _FindPlanItems(field[i], path + '.' + str(i), items)
+
+def _PlanItem(param, param_name, base, nobjects, ud):
+    """@brief Plan the values of a single item.
+
+    @return whether the item could be planned.
+    """
+    plan_func = eval(_plan_types[param['type']][0])
+    plan = plan_func(param, param_name, base, nobjects, ud)
+    if plan is None:
+        return False
+    plan['first_obj_num'] = base['obj_num']
+    plan['nobjects'] = nobjects
+    param['planned'] = plan
+    return True
+
+def _GetPlannedValue(param, param_name, base, value_type, k=None):
+    """@brief Return the value, safe for the current object (or object k in the image) from
+    the values planned by PlanValues, or None if there isn't one.
+    """
+    plan = param['planned']
+    if k is None:
+        # Only use the plan for the objects it was made for.
+        if 'obj_num' not in base or base.get('seq_index',None) != base['obj_num']:
+            return None
+        k = base['obj_num'] - plan['first_obj_num']
+        if k < 0 or k >= plan['nobjects']:
+            return None
+    value_func = eval(_plan_types[param['type']][1])
+    return value_func(plan, k, param_name, base, value_type)
+
+def _GetPlannedArray(param, param_name, base, value_type):
+    """@brief Return a numpy array of the planned values for all the objects in the image,
+    along with whether they are all safe, or None if they aren't all available.
+    """
+    import numpy
+    vals = []
+    safe = True
+    for k in range(param['planned']['nobjects']):
+        planned = _GetPlannedValue(param, param_name, base, value_type, k)
+        if planned is None:
+            return None
+        vals.append(planned[0])
+        safe = safe and planned[1]
+    return numpy.array(vals), safe
+
+def _PlanDeviate(ud):
+    """@brief Make the BaseDeviate for a random item.  See PlanValues for details.
+    """
+    return galsim.BaseDeviate(int(ud() * 2**31) + 1)
+
+def _GetPlanConstants(param, valid_keys):
+    """@brief Return a dict with the parameters of an item if they are all numerical constants,
+    or None if not.
+    """
+    kwargs = {}
+    for key in param:
+        if key in standard_ignore or key == 'default':
+            continue
+        if key not in valid_keys or not isinstance(param[key], (int, long, float)):
+            return None
+        kwargs[key] = param[key]
+    return kwargs
+
+def _HasVariableParams(param):
+    """@brief Return whether any of the parameters of an item are themselves generated.
+    """
+    for key in param:
+        if key not in standard_ignore and isinstance(param[key], dict):
+            return True
+    return False
+
+def _PlanRandom(param, param_name, base, nobjects, ud):
+    kwargs = _GetPlanConstants(param, [ 'min', 'max' ])
+    if kwargs is None:
+        return None
+    u = galsim.UniformDeviate(_PlanDeviate(ud)).generate(nobjects)
+    return { 'kwargs' : kwargs, 'u' : u }
+
+def _PlannedRandom(plan, k, param_name, base, value_type):
+    kwargs = plan['kwargs']
+    u = float(plan['u'][k])
+    # These are the same calculations as in _GenerateFromRandom.
+    if value_type is galsim.Angle or value_type is bool:
+        if kwargs:
+            return None
+        if value_type is bool:
+            return u < 0.5, False
+        import math
+        return u * 2 * math.pi * galsim.radians, False
+    elif 'min' not in kwargs or 'max' not in kwargs:
+        return None
+
+    min = value_type(kwargs['min'])
+    max = value_type(kwargs['max'])
+    if value_type is int:
+        import math
+        val = int(math.floor(u * (max-min+1))) + min
+        # In case u == 1
+        if val > max: val = max
+    else:
+        val = u * (max-min) + min
+    return val, False
+
+def _PlanRandomGaussian(param, param_name, base, nobjects, ud):
+    if _HasVariableParams(param):
+        return None
+    req = { 'sigma' : float }
+    opt = { 'mean' : float, 'min' : float, 'max' : float }
+    kwargs = GetAllParams(param, param_name, base, req=req, opt=opt)[0]
+
+    gd = galsim.GaussianDeviate(_PlanDeviate(ud), sigma=kwargs['sigma'])
+    vals = gd.generate(nobjects)
+    if 'min' in kwargs or 'max' in kwargs:
+        import numpy
+        mean, min, max, do_abs, do_neg = _GetGaussianClipping(kwargs)
+        if do_abs: vals = numpy.abs(vals)
+        redraw = (vals < min) | (vals > max)
+        while redraw.any():
+            new_vals = gd.generate(int(redraw.sum()))
+            if do_abs: new_vals = numpy.abs(new_vals)
+            vals[redraw] = new_vals
+            redraw = (vals < min) | (vals > max)
+        if do_neg: vals = -vals
+        vals += mean
+    elif 'mean' in kwargs:
+        vals += kwargs['mean']
+    return { 'vals' : vals }
+
+def _PlanRandomDistribution(param, param_name, base, nobjects, ud):
+    if _HasVariableParams(param):
+        return None
+    opt = {'function' : str, 'interpolant' : str, 'npoints' : int,
+           'x_min' : float, 'x_max' : float }
+    kwargs = GetAllParams(param, param_name, base, opt=opt)[0]
+
+    distdev = galsim.DistDeviate(_PlanDeviate(ud), **kwargs)
+    return { 'vals' : distdev.generate(nobjects) }
+
+def _PlannedFloat(plan, k, param_name, base, value_type):
+    return float(plan['vals'][k]), False
+
+def _PlanSequence(param, param_name, base, nobjects, ud):
+    kwargs = _GetPlanConstants(
+        param, [ 'first', 'last', 'step', 'repeat', 'nitems', 'start_seq_index' ])
+    if kwargs is None:
+        return None
+    return { 'kwargs' : kwargs }
+
+def _PlannedSequence(plan, k, param_name, base, value_type):
+    kwargs = {}
+    for key, val in plan['kwargs'].items():
+        if key in [ 'repeat', 'nitems', 'start_seq_index' ]:
+            kwargs[key] = int(val)
+        elif value_type is bool:
+            kwargs[key] = _GetBoolValue(val, param_name)
+        else:
+            kwargs[key] = value_type(val)
+    val = _GetSequenceValue(kwargs, plan['first_obj_num'] + k, param_name, value_type)
+    return val, False
+
+def _PlanCatalog(param, param_name, base, nobjects, ud):
+    if 'catalog' not in base:
+        return None
+    num = param.get('num',0)
+    if not isinstance(num, int) or num < 0 or num >= len(base['catalog']):
+        return None
+    input_cat = base['catalog'][num]
+
+    # This might change the index, so do it before planning the index.
+    SetDefaultIndex(param, input_cat.getNObjects(), base)
+    req = { 'col' : input_cat.isFits() and str or int , 'index' : int }
+    CheckAllParams(param, param_name, req=req, ignore=['num'])
+    if isinstance(param['col'], dict):
+        return None
+    col = ParseValue(param, 'col', base, req['col'])[0]
+
+    index = param['index']
+    if isinstance(index, dict):
+        if index.get('type',None) == 'Sequence':
+            _PlanItem(index, param_name + '.index', base, nobjects, ud)
+        if 'planned' not in index:
+            return None
+        planned = _GetPlannedArray(index, param_name + '.index', base, int)
+        if planned is None:
+            return None
+        index, safe = planned
+    else:
+        index = [ ParseValue(param, 'index', base, int)[0] ] * nobjects
+        safe = True
+    return { 'num' : num, 'col' : col, 'index' : index, 'safe' : safe }
+
+def _PlannedCatalog(plan, k, param_name, base, value_type):
+    if 'catalog' not in base:
+        return None
+    input_cat = base['catalog'][plan['num']]
+    kwargs = { 'col' : plan['col'], 'index' : int(plan['index'][k]) }
+    return _GetCatalogValue(input_cat, kwargs, param_name, value_type), plan['safe']
+
+def _PlanEval(param, param_name, base, nobjects, ud):
+    import numpy
+    string = param.get('str',None)
+    if not isinstance(string, basestring):
+        return None
+    try:
+        code, base_names = _eval_cache(string)
+    except Exception:
+        return None
+
+    # Build the namespace the same way _GenerateFromEval does, but with numpy arrays of the
+    # values for all the objects for any variables that are planned items.
+    namespace = dict(_GetEvalModules())
+    safe = True
+    is_array = False
+    user_names = set()
+    fields = [ (param, param_name) ]
+    if 'eval_variables' in base and isinstance(base['eval_variables'], dict):
+        fields.append( (base['eval_variables'], 'eval_variables') )
+    for field, field_name in fields:
+        for key in field:
+            if key in standard_ignore or (field is param and key == 'str'):
+                continue
+            value_type = _type_by_letter(key)
+            if isinstance(field[key], dict):
+                if 'planned' not in field[key] or value_type not in [ float, int, bool ]:
+                    return None
+                planned = _GetPlannedArray(field[key], field_name + '.' + key, base, value_type)
+                if planned is None:
+                    return None
+                val, safe1 = planned
+                is_array = True
+            else:
+                val, safe1 = ParseValue(field, key, base, value_type)
+            namespace[key[1:]] = val
+            user_names.add(key[1:])
+            safe = safe and safe1
+
+    for key in base_names:
+        if key in user_names:
+            continue
+        if key == 'obj_num':
+            namespace[key] = numpy.arange(base['obj_num'], base['obj_num'] + nobjects)
+            is_array = True
+        elif key in [ 'file_num', 'image_num' ] and key in base:
+            namespace[key] = base[key]
+        else:
+            return None
+        safe = False
+
+    # Anything that would raise an exception for a single value should fall back to the
+    # normal evaluation, rather than giving inf or nan.
+    old_settings = numpy.seterr(divide='raise', invalid='raise')
+    try:
+        val = eval(code, namespace)
+    except Exception:
+        return None
+    finally:
+        numpy.seterr(**old_settings)
+
+    # Only use the result if it is really the values for each object (or a single number
+    # if it doesn't depend on the object).  Otherwise, e.g. if the string uses something
+    # like len or sum, let _GenerateFromEval do it one object at a time.
+    if is_array:
+        if ( not isinstance(val, numpy.ndarray) or val.shape != (nobjects,) or
+             val.dtype.kind not in 'biuf' ):
+            return None
+    elif not isinstance(val, (int, long, float)):
+        return None
+    return { 'vals' : val, 'is_array' : is_array, 'safe' : safe }
+
+def _PlannedEval(plan, k, param_name, base, value_type):
+    if value_type not in [ float, int, bool ]:
+        return None
+    val = plan['vals']
+    if plan['is_array']:
+        val = val[k]
+    return value_type(val), plan['safe']
+
+_plan_types = {
+    # The values are tuples with:
+    # - the function to call to plan the values for an image
+    # - the function to call to get the planned value for an object
+    # - whether the type may use other items, which need to be planned first
+    'Random' : ('_PlanRandom', '_PlannedRandom', False),
+    'RandomGaussian' : ('_PlanRandomGaussian', '_PlannedFloat', False),
+    'RandomDistribution' : ('_PlanRandomDistribution', '_PlannedFloat', False),
+    'Sequence' : ('_PlanSequence', '_PlannedSequence', False),
+    'Catalog' : ('_PlanCatalog', '_PlannedCatalog', True),
+    'Eval' : ('_PlanEval', '_PlannedEval', True),
+}
+
+
 def SetDefaultIndex(config, num, base):
     """
     When the number of items in a list is known, we allow the user to omit some of 
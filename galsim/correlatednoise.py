@@ -54,16 +54,22 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         # Act as a container for the GSObject used to represent the correlation funcion.
         self._profile = gsobject
 
-        # When applying normal or whitening noise to an image, we normally do calculations. 
-        # If _profile_for_stored is profile, then it means that we can use the stored values in
-        # _rootps_store and/or _rootps_whitening_store and avoid having to redo the calculations.
-        # So for now, we start out with _profile_for_stored = None and _rootps_store and 
-        # _rootps_whitening_store empty.
-        self._profile_for_stored = None
-        self._rootps_store = []
-        self._rootps_whitening_store = []
+        # When applying normal or whitening noise to an image, we need the square root of the
+        # power spectrum for the image shape and scale.  These are stored in a global cache,
+        # keyed by a hash of the correlation function drawn at that shape and scale, so they are
+        # shared by all noise objects with the same correlation function.  See _get_update_rootps.
+        # Drawing and hashing the correlation function to get that key is itself fairly slow, so
+        # the keys are also remembered here for each shape and scale, as long as the profile is
+        # unchanged.  Any method that changes the profile in place resets _profile_for_keys.
+        self._profile_for_keys = None
+        self._cache_keys = {}
+        # Any rootps arrays known in advance (see CorrelatedNoise), keyed by (shape, scale).
+        self._pending_rootps = {}
+        #
         # Also set up the cache for a stored value of the variance, needed for efficiency once the
-        # noise field can get convolved with other GSObjects making isAnalyticX() False
+        # noise field can get convolved with other GSObjects making isAnalyticX() False.
+        # If _profile_for_stored is profile, then it means that we can use the stored value.
+        self._profile_for_stored = None
         self._variance_stored = None
 
     # Make "+" work in the intuitive sense (variances being additive, correlation functions add as
@@ -89,6 +95,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
     # Make op* and op*= work to adjust the overall variance of an object
     def __imul__(self, other):
         self._profile.scaleVariance(other)
+        self._profile_for_keys = None
         return self
 
     def __mul__(self, other):
@@ -126,7 +133,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         """
         return _BaseCorrelatedNoise(self.getRNG(), self._profile.copy())
 
-    def applyTo(self, image):
+    def applyTo(self, image, tile_size=None, apron=None, nthreads=1):
         """Apply this correlated Gaussian random noise field to an input Image.
 
         Calling
@@ -151,7 +158,27 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         avoid this property being present in your final `image` you should .applyTo() an `image` of
         greater extent than you need, and take a subset.
 
-        @param image The input Image object.
+        Alternatively, you can set `tile_size` to generate the noise in tiles.  In this mode, the
+        noise is made by convolving white noise with a kernel whose autocorrelation is the
+        correlation function.  The white noise is generated in tiles of `tile_size` x `tile_size`
+        pixels, which are convolved with the kernel using FFTs of size `tile_size + 2 * apron`
+        and added into the image (the overlap-add method).  The white noise extends `apron`
+        pixels beyond the image edges, so the result is not periodic.  The memory used is
+        proportional to `tile_size * (image width + 4 * apron)` rather than the image size, which
+        is useful for very large images.  The `apron` is the radius of the kernel in pixels.  By
+        default, it is chosen to include all but 1.e-4 of the variance, but you may set it
+        explicitly.  Each tile uses its own random number generator seeded from this noise
+        object's rng, so you may also set `nthreads` to convolve several tiles at once and get
+        the same result.  Whether this is faster depends on whether numpy's FFTs release the GIL.
+
+        @param image        The input Image object.
+        @param tile_size    (Optional) The size of the tiles in pixels if the noise should be
+                            generated in tiles.  [default `tile_size = None`, which means generate
+                            the noise for the whole image at once]
+        @param apron        (Optional) The radius of the noise kernel in pixels for the tiled mode.
+                            [default `apron = None`, which means choose it automatically]
+        @param nthreads     (Optional) The number of threads to use for the tiled mode.
+                            [default `nthreads = 1`]
         """
         # Note that this uses the (fast) method of going via the power spectrum and FFTs to generate
         # noise according to the correlation function represented by this instance.  An alternative
@@ -166,14 +193,16 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
                 "or galsim.ImageView-type object with defined bounds.")
 
         # If the profile has changed since last time (or if we have never been here before),
-        # clear out the stored values.
+        # clear out the stored variance.
         if self._profile_for_stored is not self._profile:
-            self._rootps_store = []
-            self._rootps_whitening_store = []
             self._variance_stored = None
         # Set profile_for_stored for next time.
         self._profile_for_stored = self._profile
 
+        if tile_size is not None:
+            self._apply_tiled(image, int(tile_size), apron, nthreads)
+            return image
+
         # Then retrieve or redraw the sqrt(power spectrum) needed for making the noise field
         rootps = self._get_update_rootps(image.array.shape, image.scale)
 
@@ -251,10 +280,8 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
                 "or galsim.ImageView-type object with defined bounds.")
 
         # If the profile has changed since last time (or if we have never been here before),
-        # clear out the stored values.
+        # clear out the stored variance.
         if self._profile_for_stored is not self._profile:
-            self._rootps_store = []
-            self._rootps_whitening_store = []
             self._variance_stored = None
         # Set profile_for_stored for next time.
         self._profile_for_stored = self._profile
@@ -280,6 +307,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         @param scale The linear rescaling factor to apply.
         """
         self._profile.applyExpansion(scale)
+        self._profile_for_keys = None
 
     def applyDilation(self, scale):
         """Apply the appropriate changes to the scale and variance for when the object has
@@ -318,6 +346,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         if not isinstance(theta, galsim.Angle):
             raise TypeError("Input theta should be an Angle")
         self._profile.applyRotation(theta)
+        self._profile_for_keys = None
 
     def applyShear(self, *args, **kwargs):
         """Apply a shear to this correlated noise model, where arguments are either a galsim.Shear,
@@ -327,6 +356,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         (for doxygen documentation, see galsim.shear.Shear).
         """
         self._profile.applyShear(*args, **kwargs)
+        self._profile_for_keys = None
 
     # Also add methods which create a new _BaseCorrelatedNoise with the transformations applied...
     #
@@ -393,8 +423,6 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
             # If the profile has changed since last time (or if we have never been here before),
             # clear out the stored values.
             if self._profile_for_stored is not self._profile:
-                self._rootps_store = []
-                self._rootps_whitening_store = []
                 self._variance_stored = None
             # Set profile_for_stored for next time.
             self._profile_for_stored = self._profile
@@ -416,6 +444,7 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         """
         self._profile.SBProfile.scaleFlux(variance_ratio)
         self._profile_for_stored = None  # Reset the stored profile as it is no longer up-to-date
+        self._profile_for_keys = None
 
     def setVariance(self, variance):
         """Set the point variance of the noise field, equal to its correlation function value at
@@ -503,45 +532,90 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         """
         return galsim._galsim._calculateCovarianceMatrix(self._profile.SBProfile, bounds, dx)
 
-    def _get_update_rootps(self, shape, dx):
+    def _draw_cf(self, shape, dx):
+        """Internal utility function that draws the correlation function into a new ImageD with
+        the given shape and pixel scale (or 1 if dx <= 0).
+        """
+        newcf = galsim.ImageD(shape[1], shape[0]) # set the corr func to be the correct size
+        # set the scale based on dx...
+        if dx <= 0.:
+            newcf.scale = 1. # New Images have scale() = 0 unless otherwise set.
+        else:
+            newcf.scale = dx
+        # Then draw this correlation function into an array.
+        # Setting dx=None uses the newcf image scale set above.
+        self.draw(newcf, dx=None)
+        return newcf
+
+    def _get_cache_key(self, shape, dx):
+        """Internal utility function that returns the key for the rootps cache for the given shape
+        and pixel scale.
+
+        Everything in the cache is calculated from the correlation function drawn by _draw_cf, so a
+        hash of the whole image (along with its shape and scale) identifies the cached arrays
+        exactly.  The keys are remembered for as long as the profile is unchanged, so the
+        correlation function is only drawn the first time a given shape and scale are requested.
+
+        @return key, newcf   where newcf is the drawn correlation function if it was drawn here,
+                             or None if the key was already known.
+        """
+        # If the profile has changed since last time, clear out the stored keys.
+        if self._profile_for_keys is not self._profile:
+            self._cache_keys = {}
+            self._pending_rootps = {}
+            self._profile_for_keys = self._profile
+
+        memo_key = (tuple(shape), dx)
+        key = self._cache_keys.get(memo_key)
+        if key is not None:
+            return key, None
+
+        import hashlib
+        newcf = self._draw_cf(shape, dx)
+        array = np.ascontiguousarray(newcf.array, dtype=float)
+        key = (hashlib.sha1(array.tostring()).hexdigest(), array.shape, float(newcf.scale))
+        self._cache_keys[memo_key] = key
+        return key, newcf
+
+    def _get_update_rootps(self, shape, dx, newcf=None):
         """Internal utility function for querying the rootps cache, used by applyTo and 
         applyWhiteningTo methods.
-        """ 
-        # First check whether we can just use a stored power spectrum (no drawing necessary if so)
-        use_stored = False
-        for rootps_array, scale in self._rootps_store:
-            if shape == rootps_array.shape:
-                if ((dx <= 0. and scale == 1.) or (dx == scale)):
-                    use_stored = True
-                    rootps = rootps_array
-                    break
 
-        # If not, draw the correlation function to the desired size and resolution, then DFT to
-        # generate the required array of the square root of the power spectrum
-        if use_stored is False:
-            newcf = galsim.ImageD(shape[1], shape[0]) # set the corr func to be the correct size
-            # set the scale based on dx...
-            if dx <= 0.:
-                newcf.scale = 1. # New Images have scale() = 0 unless otherwise set.
-            else:
-                newcf.scale = dx
-            # Then draw this correlation function into an array.
-            # Setting dx=None uses the newcf image scale set above.
-            self.draw(newcf, dx=None)
-
-            # Since we just drew it, save the variance value for posterity.
-            var = newcf(newcf.bounds.center())
-            self._variance_stored = var
-
-            if var <= 0.:
-                raise RuntimeError("CorrelatedNoise found to have negative variance.")
-
-            # Then calculate the sqrt(PS) that will be used to generate the actual noise
+        If the correlation function has already been drawn with _draw_cf for this shape and dx,
+        it may be given as newcf, so it doesn't need to be drawn again.
+        """ 
+        # Check whether we can just use a stored power spectrum.
+        key, drawn = self._get_cache_key(shape, dx)
+        key = ('rootps',) + key
+        stored = _rootps_cache.get(key)
+        if stored is not None:
+            # Save the variance value for posterity.
+            self._variance_stored = stored[1]
+            return stored[0]
+
+        # If not, draw the correlation function to the desired size and resolution (unless we
+        # already have it).
+        if newcf is None:
+            newcf = drawn
+        if newcf is None:
+            newcf = self._draw_cf(shape, dx)
+
+        # Since we just drew it, save the variance value for posterity.
+        var = newcf(newcf.bounds.center())
+        self._variance_stored = var
+
+        if var <= 0.:
+            raise RuntimeError("CorrelatedNoise found to have negative variance.")
+
+        rootps = self._pending_rootps.get((newcf.array.shape, float(newcf.scale)))
+        if rootps is None:
+            # DFT to generate the required array of the square root of the power spectrum
+            # that will be used to generate the actual noise
             ps = np.fft.fft2(newcf.array)
             rootps = np.sqrt(np.abs(ps) * np.product(shape))
 
-            # Then add this and the relevant scale to the _rootps_store for later use
-            self._rootps_store.append((rootps, newcf.scale))
+        # Then add this and the variance to the cache for later use
+        _rootps_cache.set(key, (rootps, var))
 
         return rootps
 
@@ -552,38 +626,269 @@ class _BaseCorrelatedNoise(galsim.BaseNoise):
         @return rootps_whitening, variance
         """ 
         # First check whether we can just use a stored whitening power spectrum
-        use_stored = False
-        for rootps_whitening_array, scale, var in self._rootps_whitening_store:
-            if shape == rootps_whitening_array.shape:
-                if ((dx <= 0. and scale == 1.) or (dx == scale)):
-                    use_stored = True
-                    rootps_whitening = rootps_whitening_array
-                    variance = var
-                    break
+        key, newcf = self._get_cache_key(shape, dx)
+        key = ('whitening', headroom) + key
+        stored = _rootps_cache.get(key)
+        if stored is not None:
+            return stored
 
         # If not, calculate the whitening power spectrum as (almost) the smallest power spectrum 
         # that when added to rootps**2 gives a flat resultant power that is nowhere negative.
         # Note that rootps = sqrt(power spectrum), and this procedure therefore works since power
         # spectra add (rather like variances).  The resulting power spectrum will be all positive
         # (and thus physical).
-        if use_stored is False:
-
-            rootps = self._get_update_rootps(shape, dx)
-            ps_whitening = -rootps * rootps
-            ps_whitening += np.abs(np.min(ps_whitening)) * headroom # Headroom adds a little extra
-            rootps_whitening = np.sqrt(ps_whitening)                # variance, for "safety"
+        rootps = self._get_update_rootps(shape, dx, newcf)
+        ps_whitening = -rootps * rootps
+        ps_whitening += np.abs(np.min(ps_whitening)) * headroom # Headroom adds a little extra
+        rootps_whitening = np.sqrt(ps_whitening)                # variance, for "safety"
 
-            # Finally calculate the theoretical combined variance to output alongside the image 
-            # to be generated with the rootps_whitening.  The factor of product of the image shape
-            # is required due to inverse FFT conventions, and note that although we use the [0, 0] 
-            # element we could use any as the PS should be flat
-            variance = (rootps[0, 0]**2 + ps_whitening[0, 0]) / np.product(shape)
+        # Finally calculate the theoretical combined variance to output alongside the image 
+        # to be generated with the rootps_whitening.  The factor of product of the image shape
+        # is required due to inverse FFT conventions, and note that although we use the [0, 0] 
+        # element we could use any as the PS should be flat
+        variance = (rootps[0, 0]**2 + ps_whitening[0, 0]) / np.product(shape)
 
-            # Then add all this and the relevant scale dx to the _rootps_whitening_store
-            self._rootps_whitening_store.append((rootps_whitening, dx, variance))
+        # Then add all this to the cache
+        _rootps_cache.set(key, (rootps_whitening, variance))
 
         return rootps_whitening, variance
 
+    def _get_tiled_kernel(self, dx, apron):
+        """Internal utility function for calculating the noise kernel used by the tiled mode of
+        applyTo.
+
+        The kernel is the inverse DFT of rootps, centered in an array of size 2 * apron + 1, so
+        that its autocorrelation is the correlation function.
+        """
+        if dx <= 0.:
+            dx = 1.
+        # Calculate the kernel on a grid large enough to hold the whole correlation function.
+        extent = int(np.ceil(np.pi / (self._profile.SBProfile.stepK() * dx)))
+        if apron is not None:
+            extent = max(extent, apron)
+        n = 2 * max(extent, 8) + 1
+        key, newcf = self._get_cache_key((n, n), dx)
+        key = ('kernel', apron) + key
+        stored = _rootps_cache.get(key)
+        if stored is not None:
+            return stored[0]
+
+        # rootps is real and even, so the kernel is too.  With the normalization of rootps used
+        # in _get_update_rootps, the kernel is ifft2(rootps) / n.
+        rootps = self._get_update_rootps((n, n), dx, newcf)
+        kernel = utilities.roll2d(np.fft.ifft2(rootps).real / n, (n / 2, n / 2))
+        variance = np.sum(kernel**2)
+        c = n / 2
+        a = apron
+        if a is None:
+            # Use the smallest apron that includes all but 1.e-4 of the variance.
+            a = c
+            for i in range(1, c + 1):
+                if np.sum(kernel[c-i:c+i+1, c-i:c+i+1]**2) >= (1. - 1.e-4) * variance:
+                    a = i
+                    break
+        kernel = kernel[c-a:c+a+1, c-a:c+a+1]
+        # Rescale the truncated kernel to get the right variance.
+        kernel *= np.sqrt(variance / np.sum(kernel**2))
+
+        _rootps_cache.set(key, (kernel, None))
+        return kernel
+
+    def _apply_tiled(self, image, tile_size, apron, nthreads):
+        """Internal utility function for the tiled mode of applyTo.
+        """
+        if tile_size <= 0:
+            raise ValueError("tile_size must be > 0")
+        if apron is not None and apron < 0:
+            raise ValueError("apron must be >= 0")
+        kernel = self._get_tiled_kernel(image.scale, apron)
+        a = kernel.shape[0] / 2
+        ny, nx = image.array.shape
+        fft_size = tile_size + 2 * a
+        kernel_k = np.fft.rfft2(kernel, s=(fft_size, fft_size))
+
+        def make_tile(tile):
+            # Convolve a tile of white noise with the kernel.  The result is 2 * apron larger than
+            # the tile in each direction, and fits in the FFT without wrapping around.
+            y0, ty, x0, tx, seed = tile
+            white = galsim.ImageD(tx, ty)
+            white.addNoise(galsim.GaussianNoise(galsim.BaseDeviate(seed), sigma=1.))
+            noise = np.fft.irfft2(np.fft.rfft2(white.array, s=(fft_size, fft_size)) * kernel_k,
+                                  s=(fft_size, fft_size))
+            return x0, tx, noise[:ty+2*a, :tx+2*a]
+
+        if nthreads > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(nthreads)
+        else:
+            pool = None
+
+        # The white noise covers the image plus the apron on each side.  We do one row of tiles
+        # at a time, accumulating the noise in a strip that covers rows y0-a to y0+tile_size+a 
+        # and columns -2a to nx+2a.  After each row of tiles, the rows that the next row of tiles
+        # will not touch are added to the image.
+        ud = galsim.UniformDeviate(self.getRNG())
+        strip = np.zeros((tile_size + 2*a, nx + 4*a))
+        try:
+            for y0 in range(-a, ny + a, tile_size):
+                ty = min(tile_size, ny + a - y0)
+                tiles = [ (y0, ty, x0, min(tile_size, nx + a - x0), long(ud() * 2**30) + 1)
+                          for x0 in range(-a, nx + a, tile_size) ]
+                if pool is None:
+                    results = ( make_tile(tile) for tile in tiles )
+                else:
+                    results = pool.imap(make_tile, tiles)
+                for x0, tx, noise in results:
+                    strip[:ty+2*a, x0+a:x0+a+tx+2*a] += noise
+
+                if y0 + tile_size >= ny + a:
+                    nrows = ty + 2*a
+                else:
+                    nrows = tile_size
+                i1 = max(0, a - y0)
+                i2 = min(nrows, ny + a - y0)
+                if i2 > i1:
+                    image.array[y0-a+i1:y0-a+i2, :] += strip[i1:i2, 2*a:2*a+nx]
+                strip[:2*a, :] = strip[tile_size:tile_size+2*a, :].copy()
+                strip[2*a:, :] = 0.
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+###
+# The cache of rootps arrays, shared by all correlated noise objects.
+#
+class _RootPSCache(object):
+    """A least-recently-used cache of the square root power spectra used for generating noise.
+
+    The keys are tuples that include a hash of the drawn correlation function, and the values are
+    tuples of a 2-d array (e.g. rootps) and a float or None.  When the total size of the stored
+    arrays exceeds max_bytes, the least recently used items are dropped.
+
+    The same arrays are returned to every caller, so they are made read-only when they are stored.
+
+    If galsim.getInfoCacheDir() is set, the items are also written to files in that directory,
+    so other processes (e.g. multiprocessing workers in the config processing) can read them
+    rather than recompute them.
+    """
+    def __init__(self, max_bytes):
+        import collections
+        import threading
+        self.max_bytes = max_bytes
+        self._items = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                # Put it back at the end, since it is now the most recently used.
+                self._items[key] = value
+                return value
+        value = self._read(key)
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        self._store(key, value)
+        self._write(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._trim()
+
+    def _store(self, key, value):
+        # Nobody should change an array that might be shared with other noise objects.
+        value[0].setflags(write=False)
+        with self._lock:
+            if key in self._items:
+                self._nbytes -= self._items.pop(key)[0].nbytes
+            if value[0].nbytes > self.max_bytes:
+                return
+            self._items[key] = value
+            self._nbytes += value[0].nbytes
+            self._trim()
+
+    def _trim(self):
+        while self._nbytes > self.max_bytes:
+            key, value = self._items.popitem(last=False)
+            self._nbytes -= value[0].nbytes
+
+    def _file_name(self, key):
+        import os
+        import hashlib
+        dir = galsim.getInfoCacheDir()
+        if not dir:
+            return None
+        return os.path.join(dir, 'rootps_%s.npy'%hashlib.sha1(repr(key)).hexdigest())
+
+    def _read(self, key):
+        # The file has the shape of the array and the other value in the tuple, followed by the
+        # flattened array.
+        file_name = self._file_name(key)
+        if file_name is None:
+            return None
+        try:
+            data = np.load(file_name)
+        except (IOError, ValueError):
+            return None
+        if data.ndim != 1 or len(data) < 3:
+            return None
+        shape = (int(data[0]), int(data[1]))
+        if len(data) != 3 + shape[0] * shape[1]:
+            return None
+        array = data[3:].reshape(shape)
+        other = data[2]
+        if np.isnan(other):
+            other = None
+        return (array, other)
+
+    def _write(self, key, value):
+        import os
+        file_name = self._file_name(key)
+        if file_name is None:
+            return
+        array, other = value
+        if other is None:
+            other = np.nan
+        data = np.concatenate(([array.shape[0], array.shape[1], other], array.ravel()))
+        # Write to a temporary file first, so other processes never see a partial file.
+        tmp_name = file_name + '.%d.tmp'%os.getpid()
+        try:
+            with open(tmp_name, 'wb') as fout:
+                np.save(fout, data)
+            os.rename(tmp_name, file_name)
+        except (IOError, OSError):
+            pass
+
+_rootps_cache = _RootPSCache(max_bytes = 100 * 1024**2)
+
+def setCorrelatedNoiseCacheSize(max_bytes):
+    """Set the maximum total size in bytes of the power spectra stored by correlated noise objects.
+
+    The square root of the power spectrum needed to generate correlated noise for a given image
+    shape and pixel scale is stored in a cache that is shared by all correlated noise objects with
+    the same correlation function.  When the cache is full, the least recently used items are
+    dropped.  The default size is 100 MB.
+
+    @param max_bytes  The maximum size of the cache in bytes.
+    """
+    _rootps_cache.resize(max_bytes)
+
+def clearCorrelatedNoiseCache():
+    """Clear the cache of power spectra used by correlated noise objects.
+    """
+    _rootps_cache.clear()
+
 ###
 # Now a standalone utility function for generating noise according to an input (square rooted)
 # Power Spectrum
@@ -597,16 +902,38 @@ def _generate_noise_from_rootps(rng, rootps):
                   in two dimensions according to the usual DFT pattern (see np.fft.fftfreq)
     @return A NumPy array (contiguous) of the same shape as rootps, filled with the noise field.
     """
+    # Since the noise field is real, we only need to generate the kx >= 0 half of the Fourier
+    # plane, and the rest is implied by the Hermitian symmetry that the real inverse FFT assumes.
+    # Taking the real part of the inverse FFT of a field with independent real and imaginary unit
+    # deviates at every k, which is equivalent, gives each mode a variance of rootps**2, split 
+    # equally between the real and imaginary parts.  The exceptions are the modes that are
+    # their own reflection (k=0 and the Nyquist frequencies), which are purely real with variance
+    # rootps**2.
+    ny, nx = rootps.shape
+    nkx = nx/2 + 1
     # I believe it is cheaper to make two random vectors than to make a single one (for a phase)
     # and then apply cos(), sin() to it...
-    gaussvec_real = galsim.ImageD(rootps.shape[1], rootps.shape[0]) # Remember NumPy is [y, x]
-    gaussvec_imag = galsim.ImageD(rootps.shape[1], rootps.shape[0])
+    gaussvec_real = galsim.ImageD(nkx, ny) # Remember NumPy is [y, x]
+    gaussvec_imag = galsim.ImageD(nkx, ny)
     gn = galsim.GaussianNoise(rng, sigma=1.) # Quicker to create anew each time than to save it and
                                              # then check if its rng needs to be changed or not.
     gaussvec_real.addNoise(gn)
     gaussvec_imag.addNoise(gn)
-    noise_array = np.fft.ifft2((gaussvec_real.array + gaussvec_imag.array * 1j) * rootps)
-    return np.ascontiguousarray(noise_array.real)
+    rootps_half = rootps[:, :nkx]
+    noise_k = (gaussvec_real.array + gaussvec_imag.array * 1j) * (rootps_half * np.sqrt(0.5))
+
+    # Fix up the kx=0 and (for even nx) kx=nx/2 columns, which need to be Hermitian themselves.
+    cols = [0]
+    if nx % 2 == 0: cols.append(nx/2)
+    rows = [0]
+    if ny % 2 == 0: rows.append(ny/2)
+    for ix in cols:
+        noise_k[-1:ny/2:-1, ix] = np.conj(noise_k[1:(ny+1)/2, ix])
+        for iy in rows:
+            noise_k[iy, ix] = gaussvec_real.array[iy, ix] * rootps_half[iy, ix]
+
+    noise_array = np.fft.irfft2(noise_k, s=(ny, nx))
+    return np.ascontiguousarray(noise_array)
 
 
 ###
@@ -878,10 +1205,11 @@ class CorrelatedNoise(_BaseCorrelatedNoise):
         _BaseCorrelatedNoise.__init__(self, rng, cf_object)
 
         if store_rootps:
-            # If it corresponds to the CF above, store useful data as a (rootps, dx) tuple for
-            # efficient later use:
-            self._profile_for_stored = self._profile
-            self._rootps_store.append((np.sqrt(ps_array), cf_image.scale))
+            # If it corresponds to the CF above, keep the rootps for efficient later use.  It goes
+            # into the cache the first time this shape and scale are requested, since we can't
+            # know the cache key without drawing the CF, which we don't want to do here.
+            self._pending_rootps[(ps_array.shape, float(cf_image.scale))] = np.sqrt(ps_array)
+            self._profile_for_keys = self._profile
 
 
 def _cf_periodicity_dilution_correction(cf_shape):
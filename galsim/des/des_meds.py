@@ -19,7 +19,8 @@
 """@file des_meds.py  Module for generating DES Multi-Epoch Data Structures (MEDS) in GalSim.
 
 This module defines the `MultiExposureObject` class for representing multiple exposure data for a single object, and the `WCSTransform` class used to store general, locally-linearized WCS information per exposure.  The `write_meds` function
-can be used to write a list of `MultiExposureObject` instances to a single MEDS file.
+can be used to write a list of `MultiExposureObject` instances to a single MEDS file, and the
+`MEDSWriter` class can be used to write them one at a time without keeping them all in memory.
 
 Importing this module also adds these data structures to the config framework, so that MEDS file output can subsequently be simulated directly using a config file.
 """
@@ -29,10 +30,11 @@ import galsim
 
 # these image stamp sizes are available in MEDS format
 BOX_SIZES = [32,48,64,96,128,192,256]
-# while creating the meds file, all the data is stored in memory, and then written to disc once all
-# the necessary images have been created.
-# You can control the amound of memory used to prevent jamming your system.
+# The meds file is now written one object at a time by MEDSWriter, so there is no longer a limit
+# on the memory used.  MAX_MEMORY is no longer used, but is kept for backwards compatibility.
 MAX_MEMORY = 1e9
+# The number of stamps to build at a time in BuildMEDS.
+MEDS_STAMPS_PER_CHUNK = 1000
 # Maximum number of exposures allowed per galaxy (incl. coadd)
 MAX_NCUTOUTS = 11
 # flags for unavailable data
@@ -205,139 +207,237 @@ class MultiExposureObject(object):
                 raise TypeError('wcstrans list should contain WCSTransform objects')
             
 
-def write_meds(file_name, obj_list, clobber=True):
-    """
-    @brief Writes the galaxy, weights, segmaps images to a MEDS file.
+# The layout of one row of the object_data table.
+_object_data_dtype = numpy.dtype([
+    ('ncutout', '>i4'), ('id', '>i4'), ('box_size', '>i4'), ('file_id', '>i4'),
+    ('start_row', '>i4', (MAX_NCUTOUTS,)),
+    ('orig_row', '>f8'), ('orig_col', '>f8'), ('orig_start_row', '>i4'), ('orig_start_col', '>i4'),
+    ('dudrow', '>f8', (MAX_NCUTOUTS,)), ('dudcol', '>f8', (MAX_NCUTOUTS,)),
+    ('dvdrow', '>f8', (MAX_NCUTOUTS,)), ('dvdcol', '>f8', (MAX_NCUTOUTS,)),
+    ('cutout_row', '>f8', (MAX_NCUTOUTS,)), ('cutout_col', '>f8', (MAX_NCUTOUTS,)) ])
 
-    Arguments:
-    ----------
-    @param file_name:    Name of meds file to be written
-    @param obj_list:     List of MultiExposureObjects
-    @param clobber       Setting `clobber=True` when `file_name` is given will silently overwrite 
-                         existing files. (Default `clobber = True`.)
-    """
+# The data types of the image, weight and seg vectors.
+_vector_types = [ ('image_cutouts', '>f4'), ('weight_cutouts', '>f4'), ('seg_cutouts', '>i4') ]
 
-    import numpy
-    import sys
-    from galsim import pyfits
+# The number of pixels to write at a time when filling or copying the vectors.
+_chunk_size = 1<<20
 
-    # initialise the catalog
-    cat = {}
-    cat['ncutout'] = []
-    cat['box_size'] = []
-    cat['start_row'] = []
-    cat['id'] = []
-    cat['dudrow'] = []
-    cat['dudcol'] = []
-    cat['dvdrow'] = []
-    cat['dvdcol'] = []
-    cat['row0'] = []
-    cat['col0'] = []
-
-    # initialise the image vectors
-    vec = {}
-    vec['image'] = []
-    vec['seg'] = []
-    vec['weight'] = []
-
-    # initialise the image vector index
-    n_vec = 0
-    
-    # get number of objects
-    n_obj = len(obj_list)
+class MEDSWriter(object):
+    """
+    A class for writing a MEDS file one object at a time, using a constant amount of memory.
+
+    If the number of cutouts and the box size of every object are known in advance, the whole
+    file is laid out on disk when the writer is constructed, and the cutouts of each object are
+    written directly into their place in the image, weight and seg vectors as they are added:
+
+        >>> writer = galsim.des.MEDSWriter(file_name, n_cutouts, box_sizes)
+        >>> for i in range(len(n_cutouts)):
+        ...     obj = ...  # Build the MultiExposureObject for object i
+        ...     writer.write(obj)
+        >>> writer.close()
+
+    If they are not known, omit `n_cutouts` and `box_sizes`.  Then the vectors are streamed to
+    temporary files in the same directory as `file_name` as the objects are added, and they are
+    copied into the MEDS file (and removed) when the writer is closed.
+
+    Objects must be written in order.  Only the per-object catalog information is kept in
+    memory.
+
+    @param file_name     Name of meds file to be written
+    @param n_cutouts     (Optional) A list with the number of cutouts of each object.
+    @param box_sizes     (Optional) A list with the box size of each object.
+    @param clobber       Setting `clobber=True` will silently overwrite existing files.
+                         (Default `clobber = True`.)
+    """
+    def __init__(self, file_name, n_cutouts=None, box_sizes=None, clobber=True):
+        import os
+        if (n_cutouts is None) != (box_sizes is None):
+            raise TypeError('Either both or neither of n_cutouts and box_sizes must be given')
+        if not clobber and os.path.isfile(file_name):
+            raise IOError('File %r already exists'%file_name)
+        self.file_name = file_name
+        self.clobber = clobber
+        self.n_written = 0
+        if n_cutouts is not None:
+            if len(n_cutouts) != len(box_sizes):
+                raise ValueError('n_cutouts and box_sizes have different lengths')
+            self._cat, self._vec = _create_meds_file(file_name, n_cutouts, box_sizes, clobber)
+            self._tmp_files = None
+        else:
+            self._cat = None
+            self._vec = None
+            # Keep just the catalog information in memory.  Stream the vectors to temporary files.
+            self._objects = []
+            self._tmp_files = []
+            try:
+                for name, dtype in _vector_types:
+                    self._tmp_files.append(_make_tmp_file(file_name, name))
+            except:
+                self._remove_tmp_files()
+                raise
+
+    def write(self, obj):
+        """
+        Write the next object to the file.
+
+        @param obj           A MultiExposureObject.
+        """
+        if self._cat is None and self._tmp_files is None:
+            raise RuntimeError('MEDSWriter has already been closed')
+        if obj.n_cutouts > MAX_NCUTOUTS:
+            raise ValueError('object has %d cutouts, which is more than MAX_NCUTOUTS = %d'%(
+                    obj.n_cutouts, MAX_NCUTOUTS))
+        arrays = [ obj.images, obj.weights, obj.segs ]
+
+        if self._tmp_files is None:
+            i = self.n_written
+            if i >= len(self._cat):
+                raise ValueError('Writing more objects than were allocated (%d)'%len(self._cat))
+            row = self._cat[i]
+            if obj.n_cutouts != row['ncutout'] or obj.box_size != row['box_size']:
+                raise ValueError(
+                    'object %d has %d cutouts of size %d, but %d cutouts of size %d were '%(
+                        i, obj.n_cutouts, obj.box_size, row['ncutout'], row['box_size']) +
+                    'allocated')
+            npix = obj.box_size**2
+            for k in range(obj.n_cutouts):
+                start = row['start_row'][k]
+                for vec, ims in zip(self._vec, arrays):
+                    vec[start:start+npix] = ims[k].array.flatten()
+            _set_object_data(self._cat, i, obj.id, obj.wcstrans)
+        else:
+            for f, (name, dtype), ims in zip(self._tmp_files, _vector_types, arrays):
+                for im in ims:
+                    im.array.astype(dtype).tofile(f)
+            self._objects.append( (obj.n_cutouts, obj.box_size, obj.id, obj.wcstrans) )
+
+        self.n_written += 1
+
+    def close(self):
+        """
+        Finish writing the file.
+        """
+        if self._tmp_files is not None:
+            try:
+                for f in self._tmp_files:
+                    f.close()
+                n_cutouts = [ obj[0] for obj in self._objects ]
+                box_sizes = [ obj[1] for obj in self._objects ]
+                self._cat, self._vec = _create_meds_file(
+                    self.file_name, n_cutouts, box_sizes, self.clobber)
+                # The objects were written to the temporary files in order, so they are exactly
+                # the vectors we need.  Copy them over in chunks.
+                for vec, f, (name, dtype) in zip(self._vec, self._tmp_files, _vector_types):
+                    if len(vec) > 0:
+                        tmp = numpy.memmap(f.name, dtype=dtype, mode='r')
+                        for k in range(0, len(vec), _chunk_size):
+                            vec[k:k+_chunk_size] = tmp[k:k+_chunk_size]
+                        del tmp
+                for i, (n, box_size, id, wcstrans) in enumerate(self._objects):
+                    _set_object_data(self._cat, i, id, wcstrans)
+            finally:
+                self._remove_tmp_files()
+                self._objects = []
+        elif self._cat is None:
+            return
+        elif self.n_written != len(self._cat):
+            raise RuntimeError('Only %d of %d objects were written'%(self.n_written,len(self._cat)))
+        self._cat.flush()
+        for vec in self._vec:
+            vec.flush()
+        self._cat = None
+        self._vec = None
+
+    def _remove_tmp_files(self):
+        # Close and delete any temporary files, even if we failed part way through.
+        import os
+        for f in self._tmp_files:
+            f.close()
+            if os.path.exists(f.name):
+                os.remove(f.name)
+        self._tmp_files = None
+
+
+def _make_tmp_file(file_name, name):
+    # Make a new temporary file in the same directory as file_name, and return it open for
+    # writing.  Using mkstemp means two writers never share a temporary file.
+    import os
+    import tempfile
+    dir = os.path.dirname(file_name) or '.'
+    prefix = os.path.basename(file_name) + '.' + name + '.'
+    fd, tmp_name = tempfile.mkstemp(prefix=prefix, suffix='.tmp', dir=dir)
+    return os.fdopen(fd, 'wb')
+
+
+def _set_object_data(cat, i, id, wcstrans):
+    # Set the id and the WCS information of object i in the object_data table.
+    cat['id'][i] = id
+    for k in range(len(wcstrans)):
+        cat['dudrow'][i,k] = wcstrans[k].dudrow
+        cat['dudcol'][i,k] = wcstrans[k].dudcol
+        cat['dvdrow'][i,k] = wcstrans[k].dvdrow
+        cat['dvdcol'][i,k] = wcstrans[k].dvdcol
+        cat['cutout_row'][i,k] = wcstrans[k].row0
+        cat['cutout_col'][i,k] = wcstrans[k].col0
+
+
+def _create_meds_file(file_name, n_cutouts, box_sizes, clobber):
+    """
+    Lay out a MEDS file on disk for objects with the given numbers of cutouts and box sizes.
 
-    # loop over objects
-    for obj in obj_list:
+    The object_data table is written with the start rows filled in and empty values for the
+    id and WCS information.  The image, weight and seg vectors are written as zeros.
+
+    @return (cat, vectors), where cat is a memmap of the object_data table and vectors is a
+            list of memmaps of the image, weight and seg vectors.
+    """
+    import os
+    import warnings
+    from galsim import pyfits
 
-        # initialise the start indices for each image
-        start_rows = numpy.ones(MAX_NCUTOUTS)*EMPTY_START_INDEX
-        dudrow = numpy.ones(MAX_NCUTOUTS)*EMPTY_JAC_diag 
-        dudcol = numpy.ones(MAX_NCUTOUTS)*EMPTY_JAC_offdiag
-        dvdrow = numpy.ones(MAX_NCUTOUTS)*EMPTY_JAC_offdiag
-        dvdcol = numpy.ones(MAX_NCUTOUTS)*EMPTY_JAC_diag
-        row0   = numpy.ones(MAX_NCUTOUTS)*EMPTY_SHIFT
-        col0   = numpy.ones(MAX_NCUTOUTS)*EMPTY_SHIFT
-
-        # get the number of cutouts (exposures)
-        n_cutout = obj.n_cutouts
-        
-        # append the catalog for this object
-        cat['ncutout'].append(n_cutout)
-        cat['box_size'].append(obj.box_size)
-        cat['id'].append(obj.id)
-
-        
-        # loop over cutouts
-        for i in range(n_cutout):
-
-            # assign the start row to the end of image vector
-            start_rows[i] = n_vec
-            # update n_vec to point to the end of image vector
-            n_vec += len(obj.images[i].array.flatten()) 
-
-            # append the image vectors
-            vec['image'].append(obj.images[i].array.flatten())
-            vec['seg'].append(obj.segs[i].array.flatten())
-            vec['weight'].append(obj.weights[i].array.flatten())
-
-
-            # append the Jacobian
-            dudrow[i] = obj.wcstrans[i].dudrow
-            dudcol[i] = obj.wcstrans[i].dudcol
-            dvdrow[i] = obj.wcstrans[i].dvdrow
-            dvdcol[i] = obj.wcstrans[i].dvdcol
-            row0[i]   = obj.wcstrans[i].row0
-            col0[i]   = obj.wcstrans[i].col0
-
-            # check if we are running out of memory
-            if sys.getsizeof(vec) > MAX_MEMORY:
-                raise MemoryError(
-                    'Running out of memory > %1.0fGB - you can increase the limit by changing MAX_MEMORY' %
-                    MAX_MEMORY/1e9)
-
-            # update n_vec to point to the end of image vector
-            # n_vec = len(vec['image'])
- 
-
-        # update the start rows fields in the catalog
-        cat['start_row'].append(start_rows)
-
-        # add lists of Jacobians
-        cat['dudrow'].append(dudrow)
-        cat['dudcol'].append(dudcol)
-        cat['dvdrow'].append(dvdrow)
-        cat['dvdcol'].append(dvdcol)
-        cat['row0'].append(row0)
-        cat['col0'].append(col0)
-
-    # concatenate list to one big vector
-    vec['image'] = numpy.concatenate(vec['image'])
-    vec['seg'] = numpy.concatenate(vec['seg'])
-    vec['weight'] = numpy.concatenate(vec['weight'])
+    n_obj = len(n_cutouts)
+    n_cutouts = numpy.array(n_cutouts, dtype=int)
+    box_sizes = numpy.array(box_sizes, dtype=int)
+    if numpy.any(n_cutouts > MAX_NCUTOUTS):
+        raise ValueError('number of cutouts must be at most MAX_NCUTOUTS = %d'%MAX_NCUTOUTS)
+
+    # The cutouts are stored one after the other, so the start rows are the cumulative sum
+    # of the number of pixels.
+    npix = n_cutouts * box_sizes**2
+    obj_start = numpy.zeros(n_obj, dtype=int)
+    obj_start[1:] = numpy.cumsum(npix)[:-1]
+    n_vec = int(numpy.sum(npix))
+
+    cat = numpy.zeros(n_obj, dtype=_object_data_dtype)
+    cat['ncutout'] = n_cutouts
+    cat['box_size'] = box_sizes
+    cat['file_id'] = 1
+    cat['orig_row'] = 1
+    cat['orig_col'] = 1
+    cat['orig_start_row'] = 1
+    cat['orig_start_col'] = 1
+    cat['start_row'] = EMPTY_START_INDEX
+    cat['dudrow'] = EMPTY_JAC_diag
+    cat['dudcol'] = EMPTY_JAC_offdiag
+    cat['dvdrow'] = EMPTY_JAC_offdiag
+    cat['dvdcol'] = EMPTY_JAC_diag
+    cat['cutout_row'] = EMPTY_SHIFT
+    cat['cutout_col'] = EMPTY_SHIFT
+    for i in range(n_obj):
+        cat['start_row'][i,:n_cutouts[i]] = (
+            obj_start[i] + numpy.arange(n_cutouts[i]) * box_sizes[i]**2)
 
     # get the primary HDU
     primary = pyfits.PrimaryHDU()
 
     # second hdu is the object_data
     cols = []
-    cols.append( pyfits.Column(name='ncutout', format='i4', array=cat['ncutout'] ) )
-    cols.append( pyfits.Column(name='id', format='i4', array=cat['id'] ) )
-    cols.append( pyfits.Column(name='box_size', format='i4', array=cat['box_size'] ) )
-    cols.append( pyfits.Column(name='file_id', format='i4', array=[1]*n_obj) )
-    cols.append( pyfits.Column(name='start_row', format='%di4' % MAX_NCUTOUTS,
-                                                        array=numpy.array(cat['start_row'])) )
-    cols.append( pyfits.Column(name='orig_row', format='f8', array=[1]*n_obj) )
-    cols.append( pyfits.Column(name='orig_col', format='f8', array=[1]*n_obj) )
-    cols.append( pyfits.Column(name='orig_start_row', format='i4', array=[1]*n_obj) )
-    cols.append( pyfits.Column(name='orig_start_col', format='i4', array=[1]*n_obj) )
-    cols.append( pyfits.Column(name='dudrow', format='%df8'% MAX_NCUTOUTS, array=cat['dudrow'] ) )
-    cols.append( pyfits.Column(name='dudcol', format='%df8'% MAX_NCUTOUTS, array=cat['dudcol'] ) )
-    cols.append( pyfits.Column(name='dvdrow', format='%df8'% MAX_NCUTOUTS, array=cat['dvdrow'] ) )
-    cols.append( pyfits.Column(name='dvdcol', format='%df8'% MAX_NCUTOUTS, array=cat['dvdcol'] ) )
-    cols.append( pyfits.Column(name='cutout_row', format='%df8'% MAX_NCUTOUTS, array=cat['row0'] ) )
-    cols.append( pyfits.Column(name='cutout_col', format='%df8'% MAX_NCUTOUTS, array=cat['col0'] ) )
-
-
+    for name in _object_data_dtype.names:
+        dtype, shape = _object_data_dtype.fields[name][0].base, _object_data_dtype[name].shape
+        format = { 'i' : 'i4', 'f' : 'f8' }[dtype.kind]
+        if shape:
+            format = '%d%s'%(shape[0], format)
+        cols.append( pyfits.Column(name=name, format=format, array=cat[name]) )
     object_data = pyfits.new_table(pyfits.ColDefs(cols))
     object_data.update_ext_name('object_data')
 
@@ -371,22 +471,79 @@ def write_meds(file_name, obj_list, clobber=True):
     metadata = pyfits.new_table(pyfits.ColDefs(cols))
     metadata.update_ext_name('metadata')
 
-    # rest of HDUs are image vectors
-    image_cutouts   = pyfits.ImageHDU( vec['image'] , name='image_cutouts'  )
-    weight_cutouts  = pyfits.ImageHDU( vec['weight'], name='weight_cutouts' )
-    seg_cutouts     = pyfits.ImageHDU( vec['seg']   , name='seg_cutouts'    )
+    if os.path.isfile(file_name) and not clobber:
+        raise IOError('File %r already exists'%file_name)
+
+    # Lay out the file under a temporary name in the same directory, and only move it into
+    # place once it is complete, so a failure never leaves a partial file behind.
+    f = _make_tmp_file(file_name, 'layout')
+    tmp_name = f.name
+    try:
+        try:
+            pyfits.HDUList([ primary, object_data, image_info, metadata ]).writeto(f)
+        finally:
+            f.close()
+
+        # rest of HDUs are image vectors.  Stream zeros into them, so we never need to hold a
+        # whole vector in memory.
+        for name, dtype in _vector_types:
+            header = pyfits.Header()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                header.update('SIMPLE', True)
+                header.update('BITPIX', { '>f4' : -32, '>i4' : 32 }[dtype])
+                header.update('NAXIS', 1)
+                header.update('NAXIS1', n_vec)
+                header.update('EXTNAME', name)
+            stream = pyfits.StreamingHDU(tmp_name, header)
+            zeros = numpy.zeros(min(n_vec, _chunk_size), dtype=dtype)
+            for k in range(0, n_vec, _chunk_size):
+                stream.write(zeros[:min(_chunk_size, n_vec-k)])
+            stream.close()
+
+        if os.path.isfile(file_name):
+            os.remove(file_name)
+        os.rename(tmp_name, file_name)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+    # Now map the object_data table and the vectors, so objects can be written into them.
+    f = pyfits.open(file_name)
+    try:
+        offsets = [ f.fileinfo(k)['datLoc'] for k in range(len(f)) ]
+        if f[1].header['NAXIS1'] != _object_data_dtype.itemsize:
+            raise RuntimeError('Unexpected object_data row size %d != %d'%(
+                    f[1].header['NAXIS1'], _object_data_dtype.itemsize))
+    finally:
+        f.close()
+    cat = numpy.memmap(file_name, dtype=_object_data_dtype, mode='r+', offset=offsets[1],
+                       shape=(n_obj,))
+    vectors = [ numpy.memmap(file_name, dtype=dtype, mode='r+', offset=offsets[4+k],
+                             shape=(n_vec,))
+                for k, (name, dtype) in enumerate(_vector_types) ]
+    return cat, vectors
+
+
+def write_meds(file_name, obj_list, clobber=True):
+    """
+    @brief Writes the galaxy, weights, segmaps images to a MEDS file.
+
+    The file is written with a MEDSWriter, so the cutouts are written directly to disk, one
+    object at a time.
 
-    # write all
-    hdu_list = pyfits.HDUList([
-        primary,
-        object_data,
-        image_info,
-        metadata,
-        image_cutouts, 
-        weight_cutouts,
-        seg_cutouts
-    ])
-    hdu_list.writeto(file_name,clobber=clobber)
+    Arguments:
+    ----------
+    @param file_name:    Name of meds file to be written
+    @param obj_list:     List of MultiExposureObjects
+    @param clobber       Setting `clobber=True` when `file_name` is given will silently overwrite 
+                         existing files. (Default `clobber = True`.)
+    """
+    writer = MEDSWriter(file_name, n_cutouts = [ obj.n_cutouts for obj in obj_list ],
+                        box_sizes = [ obj.box_size for obj in obj_list ], clobber=clobber)
+    for obj in obj_list:
+        writer.write(obj)
+    writer.close()
 
 
 # Now add this to the config framework.
@@ -426,26 +583,34 @@ def BuildMEDS(file_name, config, nproc=1, logger=None, file_num=0, image_num=0,
 
     nobjects = params['nobjects']
     nstamps_per_object = params['nstamps_per_object']
-    ntot = nobjects * nstamps_per_object
-
-    all_images = galsim.config.BuildImages(
-        ntot, config=config, nproc=nproc, logger=logger, obj_num=obj_num,
-        make_psf_image=False, make_weight_image=True, make_badpix_image=True)
-
-    main_images = all_images[0]
-    weight_images = all_images[2]
-    badpix_images = all_images[3]
-
-    obj_list = []
-    for i in range(nobjects):
-        k1 = i*nstamps_per_object
-        k2 = (i+1)*nstamps_per_object
-        obj = MultiExposureObject(images = main_images[k1:k2], 
-                                  weights = weight_images[k1:k2],
-                                  badpix = badpix_images[k1:k2])
-        obj_list.append(obj)
 
-    write_meds(file_name, obj_list)
+    # Build the stamps a chunk of objects at a time and stream each object to the file, so the
+    # memory use does not depend on the total number of objects.  The box sizes are not known
+    # until the stamps are built, so the writer collects the vectors in temporary files.
+    writer = MEDSWriter(file_name)
+    nobj_per_chunk = max(1, MEDS_STAMPS_PER_CHUNK / nstamps_per_object)
+    for i1 in range(0, nobjects, nobj_per_chunk):
+        i2 = min(i1 + nobj_per_chunk, nobjects)
+        k0 = i1*nstamps_per_object
+        # Each stamp is a Single image with one object, so image_num and obj_num both advance
+        # by one for each stamp.
+        all_images = galsim.config.BuildImages(
+            (i2-i1)*nstamps_per_object, config=config, nproc=nproc, logger=logger,
+            image_num=k0, obj_num=obj_num+k0,
+            make_psf_image=False, make_weight_image=True, make_badpix_image=True)
+
+        main_images = all_images[0]
+        weight_images = all_images[2]
+        badpix_images = all_images[3]
+
+        for i in range(i2-i1):
+            k1 = i*nstamps_per_object
+            k2 = (i+1)*nstamps_per_object
+            obj = MultiExposureObject(images = main_images[k1:k2], 
+                                      weights = weight_images[k1:k2],
+                                      badpix = badpix_images[k1:k2])
+            writer.write(obj)
+    writer.close()
 
     t2 = time.time()
     return t2-t1
@@ -45,23 +45,43 @@ class DES_PSFEx(object):
         psf = des_psfex.getPSF(pos, pixel_scale=0.27)
 
 
+    The PSF images for many positions can be computed at once by passing a list of positions
+    (or a tuple of x and y arrays) to getPSFArray:
+
+        psf_arrays = des_psfex.getPSFArray( (x_array, y_array) )  # shape = (npos, ny, nx)
+
+    Building the InterpolatedImage in getPSF can take longer than drawing a galaxy.  If the PSF
+    varies slowly, nearby objects can share the same PSF by setting `cache_step`.  Then each
+    position is rounded to the nearest multiple of `cache_step` (in pixels), the PSF is built at
+    the rounded position, and the most recent `cache_size` PSFs are kept for reuse.
+
     @param file_name  The file name to be read in.
     @param dir        Optionally a directory name can be provided if the file_name does not 
                       already include it.
+    @param cache_step The step size in pixels of the grid to which positions are rounded in 
+                      getPSF.  [Default `cache_step = 0`, which means not to cache the PSFs.]
+    @param cache_size The number of PSFs to keep in the cache.  When it is full, the least
+                      recently used PSF is dropped.  [Default `cache_size = 1000`]
     """
     _req_params = { 'file_name' : str }
-    _opt_params = { 'dir' : str }
+    _opt_params = { 'dir' : str , 'cache_step' : float , 'cache_size' : int }
     _single_params = []
     _takes_rng = False
     _takes_logger = False
 
-    def __init__(self, file_name, dir=None):
+    def __init__(self, file_name, dir=None, cache_step=0., cache_size=1000):
 
         if dir:
             import os
             file_name = os.path.join(dir,file_name)
         self.file_name = file_name
+        self.cache_step = cache_step
+        self.cache_size = cache_size
         self.read()
+        # The cached PSFs, keyed by the rounded position and the pixel scale.  The most recently
+        # used ones are at the end.
+        import collections
+        self._psf_cache = collections.OrderedDict()
 
     def read(self):
         from galsim import pyfits
@@ -166,6 +186,20 @@ class DES_PSFEx(object):
         self.y_scale = pol_scal2
         self.sample_scale = psf_samp
 
+        # The powers of x and y for each term of the polynomial, in the order used by PSFEx:
+        #     1, x, x^2, ..., y, xy, ..., y^2, ...
+        import numpy
+        self._xpow = numpy.array([ nx for ny in range(pol_deg+1) for nx in range(pol_deg+1-ny) ])
+        self._ypow = numpy.array([ ny for ny in range(pol_deg+1) for nx in range(pol_deg+1-ny) ])
+        assert len(self._xpow) == self.fit_size
+
+    def __getstate__(self):
+        # The cached InterpolatedImages are not picklable, so don't include them.
+        import collections
+        d = self.__dict__.copy()
+        d['_psf_cache'] = collections.OrderedDict()
+        return d
+
     def getSampleScale(self): 
         return self.sample_scale
 
@@ -176,13 +210,33 @@ class DES_PSFEx(object):
         For Galsim, we do everything in physical units (i.e. arcsec typically), so the returned 
         psf needs to account for the pixel_scale.
 
+        If the DES_PSFEx was constructed with `cache_step > 0` and gsparams is None, pos is
+        rounded to the nearest multiple of cache_step, and the PSF may be a copy of one built for
+        an earlier nearby position.
+
         @param pos          The position in pixel units for which to build the PSF.
         @param pixel_scale  The pixel scale in arcsec/pixel.
         @param gsparams     (Optional) A GSParams instance to pass to the constructed GSObject.
 
         @returns an InterpolatedImage instance.
         """
-        im = galsim.ImageViewF(self.getPSFArray(pos))
+        if self.cache_step > 0. and gsparams is None:
+            x, y = _quantizePosition(pos, self.cache_step)
+            key = (x, y, pixel_scale)
+            if key in self._psf_cache:
+                # Move it to the end, since it is now the most recently used.
+                psf = self._psf_cache.pop(key)
+            else:
+                psf = self._buildPSF(x, y, pixel_scale)
+                if len(self._psf_cache) >= self.cache_size:
+                    self._psf_cache.popitem(last=False)
+            self._psf_cache[key] = psf
+            # The cached PSF must not be changed by the caller, so return a copy.
+            return psf.copy()
+        return self._buildPSF(pos.x, pos.y, pixel_scale, gsparams)
+
+    def _buildPSF(self, x, y, pixel_scale, gsparams=None):
+        im = galsim.ImageViewF(self.getPSFArray(galsim.PositionD(x,y)))
         # We need the scale in arcsec/psfex_pixel, which is 
         #    (arcsec / image_pixel) * (image_pixel / psfex_pixel)
         #    = pixel_scale * sample_scale
@@ -192,15 +246,19 @@ class DES_PSFEx(object):
 
     def getPSFArray(self, pos):
         """Returns the PSF image as a numpy array at position pos
+
+        The position may also be given as a list of positions or as a tuple of x and y arrays,
+        in which case the PSF images for all of the positions are computed at once, and the 
+        return value is a 3-d array with the image for position i in element i.
         """
         import numpy
-        xto = self._define_xto( (pos.x - self.x_zero) / self.x_scale )
-        yto = self._define_xto( (pos.y - self.y_zero) / self.y_scale )
-        order = self.fit_order
-        P = numpy.array([ xto[nx] * yto[ny] for ny in range(order+1) for nx in range(order+1-ny) ])
-        assert len(P) == self.fit_size
+        x, y, single = _parsePixelPositions(pos)
+        xto = self._define_xto( (x - self.x_zero) / self.x_scale )
+        yto = self._define_xto( (y - self.y_zero) / self.y_scale )
+        # P[k,i] is the value of the k-th polynomial term at position i.
+        P = xto[self._xpow] * yto[self._ypow]
         ar = numpy.tensordot(P,self.basis,(0,0)).astype(numpy.float32)
-        # Note: This is equivalent to:
+        # Note: For a single position, this is equivalent to:
         #   ar = self.basis[0].astype(numpy.float32)
         #   for n in range(1,self.fit_order+1):
         #       for ny in range(n+1):
@@ -208,16 +266,53 @@ class DES_PSFEx(object):
         #           k = nx+ny*(self.fit_order+1)-ny*(ny-1)/2
         #           ar += xto[nx] * yto[ny] * self.basis[k]
         # which is pretty much Peter's version of this code.
-        return ar
+        if single:
+            return ar[0]
+        else:
+            return ar
 
     def _define_xto(self, x):
+        # Return an array with xto[i,j] = x[j]**i.
         import numpy
-        xto = numpy.empty(self.fit_order+1)
+        xto = numpy.empty((self.fit_order+1, len(x)))
         xto[0] = 1
         for i in range(1,self.fit_order+1):
             xto[i] = x*xto[i-1]
         return xto
 
+def _parsePixelPositions(pos):
+    """Convert the ways of giving positions to getPSFArray to two numpy arrays of x and y.
+
+    The positions are in pixels, so unlike galsim.utilities._convertPositions, there is no
+    conversion of units.  pos may be a PositionD or PositionI, a list of them, a tuple (x,y)
+    or a tuple of x and y arrays.
+
+    @returns x, y, single, where single says whether pos was a single position.
+    """
+    import numpy
+    if isinstance(pos, (galsim.PositionD, galsim.PositionI)):
+        return numpy.array([pos.x], dtype=float), numpy.array([pos.y], dtype=float), True
+    try:
+        if isinstance(pos[0], (galsim.PositionD, galsim.PositionI)):
+            x = numpy.array([ p.x for p in pos ], dtype=float)
+            y = numpy.array([ p.y for p in pos ], dtype=float)
+            return x, y, False
+        if len(pos) == 2:
+            x = numpy.array(pos[0], dtype=float)
+            y = numpy.array(pos[1], dtype=float)
+            if x.shape == y.shape and x.ndim <= 1:
+                single = (x.ndim == 0)
+                return x.reshape(-1), y.reshape(-1), single
+    except (TypeError, ValueError, AttributeError):
+        pass
+    raise TypeError("Unable to parse the input pos argument for getPSFArray.")
+
+def _quantizePosition(pos, step):
+    """Round the position pos to the nearest multiple of step in each direction.
+    """
+    import math
+    return (step * math.floor(pos.x / step + 0.5), step * math.floor(pos.y / step + 0.5))
+
 # Now add this class to the config framework.
 import galsim.config
 
@@ -235,7 +330,8 @@ def BuildDES_PSFEx(config, key, base, ignore, gsparams, logger):
     """@brief Build a RealGalaxy type GSObject from user input.
     """
     opt = { 'flux' : float ,
-            'num' : int }
+            'num' : int ,
+            'cache_step' : float }
     kwargs, safe = galsim.config.GetAllParams(config, key, base, opt=opt, ignore=ignore)
 
     if 'des_psfex' not in base:
@@ -263,10 +359,17 @@ def BuildDES_PSFEx(config, key, base, ignore, gsparams, logger):
 
     #psf = des_psfex.getPSF(image_pos, pixel_scale, gsparams=gsparams)
     # Because of the serialization issues, the above call doesn't work.  So we need to 
-    # repeat the last bit of getPSF here.
-    im = galsim.ImageViewF(des_psfex.getPSFArray(image_pos))
-    im.scale = pixel_scale * des_psfex.getSampleScale()
-    psf = galsim.InterpolatedImage(im, flux=1, x_interpolant=galsim.Lanczos(3), gsparams=gsparams)
+    # repeat the last bit of getPSF here.  This includes the caching, which we do with a
+    # cache stored in base, so each process has its own.  The des_psfex object is part of
+    # the key, so a new input file doesn't use the PSFs from the old one.
+    cache_step = kwargs.get('cache_step', 0.)
+    if cache_step > 0. and gsparams is None:
+        x, y = _quantizePosition(image_pos, cache_step)
+        if 'des_psfex_cache' not in base:
+            base['des_psfex_cache'] = galsim.utilities.LRU_Cache(_BuildDES_PSFExImage, 1000)
+        psf = base['des_psfex_cache'](des_psfex, x, y, pixel_scale).copy()
+    else:
+        psf = _BuildDES_PSFExImage(des_psfex, image_pos.x, image_pos.y, pixel_scale, gsparams)
 
     if 'flux' in kwargs:
         psf.setFlux(kwargs['flux'])
@@ -277,6 +380,11 @@ def BuildDES_PSFEx(config, key, base, ignore, gsparams, logger):
     return psf, False
 
 
+def _BuildDES_PSFExImage(des_psfex, x, y, pixel_scale, gsparams=None):
+    im = galsim.ImageViewF(des_psfex.getPSFArray(galsim.PositionD(x,y)))
+    im.scale = pixel_scale * des_psfex.getSampleScale()
+    return galsim.InterpolatedImage(im, flux=1, x_interpolant=galsim.Lanczos(3), gsparams=gsparams)
+
 # Register this builder with the config framework:
 galsim.config.gsobject.valid_gsobject_types['DES_PSFEx'] = 'galsim.des.BuildDES_PSFEx'
 
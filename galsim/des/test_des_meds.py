@@ -263,8 +263,100 @@ def test_meds_config():
 
     print 'all asserts succeeded'
 
+def test_meds_writer():
+    """
+    Write objects with different numbers of cutouts and box sizes with a MEDSWriter, both with
+    and without giving the sizes in advance, and check the vectors and catalog in the files.
+    """
+    import glob
+    import shutil
+    import tempfile
+    from galsim import pyfits
+
+    n_cutouts = [2, 1, 3]
+    box_sizes = [32, 48, 32]
+    objlist = []
+    for i in range(len(n_cutouts)):
+        box_size = box_sizes[i]
+        images = [ galsim.ImageF(box_size, box_size, init_value=100*i+k) 
+                   for k in range(n_cutouts[i]) ]
+        weights = [ galsim.ImageF(box_size, box_size, init_value=0.5*i+k) 
+                    for k in range(n_cutouts[i]) ]
+        segs = [ galsim.ImageI(box_size, box_size, init_value=i+1) for k in range(n_cutouts[i]) ]
+        images[0].array[3,5] = -7.
+        wcstrans = [ galsim.des.WCSTransform(0.26, 0.01*k, -0.01*k, 0.27, 16.+k, 15.5+i)
+                     for k in range(n_cutouts[i]) ]
+        objlist.append(galsim.des.MultiExposureObject(images=images, weights=weights, segs=segs,
+                                                      wcstrans=wcstrans, id=10+i))
+
+    # Write the files to a temporary directory, so we don't leave anything behind.
+    out_dir = tempfile.mkdtemp()
+    try:
+        file_name1 = os.path.join(out_dir, 'test_meds_writer1.fits')
+        galsim.des.write_meds(file_name1, objlist, clobber=True)
+
+        file_name2 = os.path.join(out_dir, 'test_meds_writer2.fits')
+        writer = galsim.des.MEDSWriter(file_name2)
+        for obj in objlist:
+            writer.write(obj)
+        writer.close()
+        # The temporary files should all have been removed.
+        assert glob.glob(os.path.join(out_dir, '*.tmp')) == []
+
+        f1 = pyfits.open(file_name1)
+        f2 = pyfits.open(file_name2)
+        cat = f1['object_data'].data
+        for name in f1['object_data'].columns.names:
+            numpy.testing.assert_array_equal(
+                f2['object_data'].data.field(name), cat.field(name),
+                err_msg="object_data column %s differs between MEDSWriter modes"%name)
+        for ext in ['image_cutouts', 'weight_cutouts', 'seg_cutouts']:
+            numpy.testing.assert_array_equal(
+                f2[ext].data, f1[ext].data, err_msg="%s differs between MEDSWriter modes"%ext)
+
+        for i, obj in enumerate(objlist):
+            numpy.testing.assert_equal(cat.field('id')[i], obj.id)
+            numpy.testing.assert_equal(cat.field('ncutout')[i], obj.n_cutouts)
+            numpy.testing.assert_equal(cat.field('box_size')[i], obj.box_size)
+            npix = obj.box_size**2
+            for k in range(obj.n_cutouts):
+                start = cat.field('start_row')[i][k]
+                numpy.testing.assert_array_equal(
+                    f1['image_cutouts'].data[start:start+npix], obj.images[k].array.flatten())
+                numpy.testing.assert_array_equal(
+                    f1['weight_cutouts'].data[start:start+npix], obj.weights[k].array.flatten())
+                numpy.testing.assert_array_equal(
+                    f1['seg_cutouts'].data[start:start+npix], obj.segs[k].array.flatten())
+                numpy.testing.assert_equal(cat.field('dudcol')[i][k], obj.wcstrans[k].dudcol)
+                numpy.testing.assert_equal(cat.field('cutout_col')[i][k], obj.wcstrans[k].col0)
+            for k in range(obj.n_cutouts, galsim.des.MAX_NCUTOUTS):
+                numpy.testing.assert_equal(
+                    cat.field('start_row')[i][k], galsim.des.EMPTY_START_INDEX)
+                numpy.testing.assert_equal(cat.field('dudrow')[i][k], galsim.des.EMPTY_JAC_diag)
+        f1.close()
+        f2.close()
+
+        # The preallocated writer should check the objects match the sizes it was given.
+        writer = galsim.des.MEDSWriter(file_name1, n_cutouts=[2], box_sizes=[48])
+        try:
+            numpy.testing.assert_raises(ValueError, writer.write, objlist[0])
+        except ImportError:
+            print 'The assert_raises tests require nose'
+        # After a rejected object, the right one can still be written and the file finished.
+        images = [ galsim.ImageF(48, 48, init_value=k) for k in range(2) ]
+        writer.write(galsim.des.MultiExposureObject(images=images, id=20))
+        writer.close()
+        f1 = pyfits.open(file_name1)
+        numpy.testing.assert_equal(f1['object_data'].data.field('id'), [20])
+        f1.close()
+    finally:
+        shutil.rmtree(out_dir)
+
+    print 'all asserts succeeded'
+
 if __name__ == "__main__":
 
     test_meds()
     test_meds_config()
+    test_meds_writer()
 
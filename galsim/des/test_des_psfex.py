@@ -0,0 +1,162 @@
+# Copyright 2012, 2013 The GalSim developers:
+# https://github.com/GalSim-developers
+#
+# This file is part of GalSim: The modular galaxy image simulation toolkit.
+#
+# GalSim is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GalSim is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GalSim.  If not, see <http://www.gnu.org/licenses/>
+
+import numpy
+import os
+import sys
+import galsim
+import galsim.des
+
+# The properties of the fake PSFEx file used for these tests.
+pol_deg = 2
+psf_size = 25
+x_zero = 1024.
+y_zero = 2048.
+x_scale = 1000.
+y_scale = 2000.
+
+def write_fake_psfex(file_name):
+    """
+    Write a PSFEx file with a second order polynomial variation of the PSF, with a Gaussian for
+    the constant term and small random images for the others.
+    """
+    from galsim import pyfits
+    import warnings
+    nterms = (pol_deg+1)*(pol_deg+2)/2
+    rng = numpy.random.RandomState(1234)
+    basis = 0.01 * rng.normal(size=(nterms, psf_size, psf_size))
+    x = numpy.arange(psf_size) - (psf_size-1)/2.
+    xx, yy = numpy.meshgrid(x, x)
+    basis[0] += numpy.exp(-0.5 * (xx**2 + yy**2) / 3.**2)
+
+    col = pyfits.Column(name='PSF_MASK', format='%dE'%basis.size, array=[basis.flatten()])
+    hdu = pyfits.new_table(pyfits.ColDefs([col]))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for key, value in [ ('POLNAXIS', 2), ('POLNAME1', 'X_IMAGE'), ('POLNAME2', 'Y_IMAGE'),
+                            ('POLZERO1', x_zero), ('POLZERO2', y_zero),
+                            ('POLSCAL1', x_scale), ('POLSCAL2', y_scale),
+                            ('POLNGRP', 1), ('POLGRP1', 1), ('POLGRP2', 1),
+                            ('POLDEG1', pol_deg), ('PSFNAXIS', 3),
+                            ('PSFAXIS1', psf_size), ('PSFAXIS2', psf_size), ('PSFAXIS3', nterms),
+                            ('PSF_SAMP', 0.5) ]:
+            hdu.header.update(key, value)
+    pyfits.HDUList([pyfits.PrimaryHDU(), hdu]).writeto(file_name, clobber=True)
+    return basis.astype(numpy.float32)
+
+def test_psfex_array():
+    """
+    Check that getPSFArray gives the right polynomial combination of the basis images, for
+    single positions and for lists of positions.
+    """
+    file_name = 'test_psfex.psf'
+    basis = write_fake_psfex(file_name)
+    psfex = galsim.des.DES_PSFEx(file_name)
+
+    xlist = [ 12.3, 1024., 1800.7, 512. ]
+    ylist = [ 4000.1, 2048., 21.9, 3333. ]
+    arrays = []
+    for x, y in zip(xlist, ylist):
+        ar = psfex.getPSFArray(galsim.PositionD(x, y))
+        numpy.testing.assert_equal(ar.shape, (psf_size, psf_size))
+        # Do the sum the slow way.
+        dx = (x - x_zero) / x_scale
+        dy = (y - y_zero) / y_scale
+        expected = numpy.zeros((psf_size, psf_size))
+        k = 0
+        for ny in range(pol_deg+1):
+            for nx in range(pol_deg+1-ny):
+                expected += dx**nx * dy**ny * basis[k]
+                k += 1
+        numpy.testing.assert_array_almost_equal(
+            ar, expected, decimal=5, err_msg="PSFEx array is not the right polynomial")
+        arrays.append(ar)
+
+    # Now all at once.
+    poslist = [ galsim.PositionD(x, y) for x, y in zip(xlist, ylist) ]
+    for pos in [ poslist, (xlist, ylist), (numpy.array(xlist), numpy.array(ylist)) ]:
+        ar = psfex.getPSFArray(pos)
+        numpy.testing.assert_equal(ar.shape, (len(xlist), psf_size, psf_size))
+        numpy.testing.assert_array_almost_equal(
+            ar, numpy.array(arrays), decimal=6,
+            err_msg="Batched PSFEx arrays differ from single position ones")
+
+    # A single (x,y) tuple gives a single image.
+    numpy.testing.assert_array_almost_equal(
+        psfex.getPSFArray( (xlist[0], ylist[0]) ), arrays[0], decimal=6)
+    numpy.testing.assert_array_almost_equal(
+        psfex.getPSFArray(galsim.PositionI(1024, 2048)), arrays[1], decimal=6)
+
+    # Positions are pixels, not angles, so anything else is an error.
+    try:
+        numpy.testing.assert_raises(TypeError, psfex.getPSFArray, (xlist, ylist, xlist))
+        numpy.testing.assert_raises(TypeError, psfex.getPSFArray, (xlist, ylist[:2]))
+        numpy.testing.assert_raises(TypeError, psfex.getPSFArray, 12.3)
+    except ImportError:
+        print 'The assert_raises tests require nose'
+
+    os.remove(file_name)
+    print 'all asserts succeeded'
+
+def test_psfex_cache():
+    """
+    Check that getPSF with cache_step uses the PSF at the rounded position, and that the
+    cached PSFs are not changed by modifying the returned ones.
+    """
+    file_name = 'test_psfex.psf'
+    write_fake_psfex(file_name)
+    psfex = galsim.des.DES_PSFEx(file_name)
+    psfex_cache = galsim.des.DES_PSFEx(file_name, cache_step=10.)
+    pixel_scale = 0.27
+
+    def draw(psf):
+        return psf.draw(image=galsim.ImageD(32,32), dx=pixel_scale).array
+
+    im1 = draw(psfex_cache.getPSF(galsim.PositionD(103.2, 207.9), pixel_scale))
+    im2 = draw(psfex.getPSF(galsim.PositionD(100., 210.), pixel_scale))
+    numpy.testing.assert_array_almost_equal(
+        im1, im2, decimal=12, err_msg="Cached PSF is not the PSF at the rounded position")
+
+    # A nearby position should get a copy of the same PSF.
+    psf = psfex_cache.getPSF(galsim.PositionD(96.1, 212.3), pixel_scale)
+    numpy.testing.assert_array_almost_equal(draw(psf), im1, decimal=12)
+    psf.applyShear(g1=0.3, g2=0.1)
+    psf *= 2.
+    psf = psfex_cache.getPSF(galsim.PositionD(99., 209.), pixel_scale)
+    numpy.testing.assert_array_almost_equal(
+        draw(psf), im1, decimal=12, err_msg="Cached PSF was changed by modifying a copy")
+
+    # Without caching, the PSF is built at the actual position.
+    im3 = draw(psfex.getPSF(galsim.PositionD(103.2, 207.9), pixel_scale))
+    assert numpy.max(numpy.abs(im3 - im1)) > 0.
+
+    # The cache is per instance, and only keeps the most recently used cache_size PSFs.
+    psfex_small = galsim.des.DES_PSFEx(file_name, cache_step=10., cache_size=2)
+    for x in [ 100., 200., 100., 300. ]:
+        psfex_small.getPSF(galsim.PositionD(x, 210.), pixel_scale)
+    numpy.testing.assert_equal(sorted(psfex_small._psf_cache.keys()),
+                               [ (100., 210., pixel_scale), (300., 210., pixel_scale) ])
+    assert len(psfex._psf_cache) == 0
+
+    os.remove(file_name)
+    print 'all asserts succeeded'
+
+if __name__ == "__main__":
+
+    test_psfex_array()
+    test_psfex_cache()
@@ -443,6 +443,264 @@ def FindAdaptiveMom(object_image, weight = None, badpix = None, guess_sig = 5.0,
             result.error_message = err.message
     return ShapeData(result)
 
+# The numerical fields of the structured arrays returned by the batch functions, in order.
+# These are the fields of ShapeData, except that observed_shape is given as the distortion
+# (observed_e1, observed_e2) and moments_centroid as (moments_centroid_x, moments_centroid_y).
+_batch_fields = [ 'moments_status', 'observed_e1', 'observed_e2', 'moments_sigma', 'moments_amp',
+                  'moments_centroid_x', 'moments_centroid_y', 'moments_rho4', 'moments_n_iter',
+                  'correction_status', 'corrected_e1', 'corrected_e2', 'corrected_g1',
+                  'corrected_g2', 'corrected_shape_err', 'resolution_factor' ]
+_batch_int_fields = [ 'moments_status', 'moments_n_iter', 'correction_status' ]
+
+def _batchViews(images, name):
+    """Convert a 3-d numpy array or a list of images into a list of ImageViewF or ImageViewD.
+
+       This is used by EstimateShearBatch and FindAdaptiveMomBatch.  Returns the list of views,
+       along with the (possibly converted) 3-d array if the input was a numpy array, else None.
+    """
+    import numpy as np
+    if isinstance(images, np.ndarray):
+        if images.ndim != 3:
+            raise ValueError("%s must be a 3-d numpy array or a list of images"%name)
+        # Other types (including non-native byte order) are converted to float64.
+        dt = np.float32 if images.dtype == np.float32 else np.float64
+        stack = np.ascontiguousarray(images, dtype=dt)
+        ImageView = galsim.ImageView[dt]
+        return [ ImageView(a) for a in stack ], stack
+    else:
+        views = [ im.view() for im in images ]
+        if len(views) == 0:
+            raise ValueError("%s must contain at least one image"%name)
+        for Class in (galsim.ImageViewF, galsim.ImageViewD):
+            if all([ isinstance(v, Class) for v in views ]):
+                return views, None
+        # If they are not all ImageViewF or all ImageViewD, convert them to ImageViewD.
+        views = [ galsim.ImageViewD(v.array.astype(np.float64), v.xmin, v.ymin) for v in views ]
+        return views, None
+
+def _batchMasks(views, stack, weight, badpix):
+    """Convert the weight and badpix inputs of the batch functions into a list of mask ImageViews.
+
+       Each of weight and badpix may be None, a single image to be used for all objects, or a
+       3-d numpy array or list of images with one for each object.  The returned list has either
+       a single mask shared by all objects, or one mask for each object.
+    """
+    import numpy as np
+    per_object = [ isinstance(x, (np.ndarray, list, tuple)) for x in (weight, badpix) ]
+    if not any(per_object):
+        if stack is not None or all([ v.bounds == views[0].bounds for v in views ]):
+            # The usual case of images of the same size with a common (or no) weight and badpix,
+            # for which we only need a single mask.
+            return [ _convertMask(views[0], weight=weight, badpix=badpix) ]
+    if stack is not None:
+        # All the images have the same shape, so we can make all the masks at once.  A shared
+        # weight or badpix image broadcasts across the stack.
+        mask = np.ones(stack.shape, dtype=np.int32)
+        for x, name in ((weight, 'Weight'), (badpix, 'Badpix')):
+            if x is None: continue
+            if isinstance(x, (list, tuple)):
+                x = np.array([ im.array for im in x ])
+            elif not isinstance(x, np.ndarray):
+                x = x.array
+            if x.shape != stack.shape and x.shape != stack.shape[1:]:
+                raise ValueError("%s images do not have the same shape as the input images!"%name)
+            if name == 'Weight':
+                if np.any(x < 0):
+                    raise ValueError("Weight image cannot contain negative values!")
+                mask *= (x > 0)
+            else:
+                mask *= (x == 0)
+        return [ galsim.ImageViewI(m) for m in mask ]
+    else:
+        # Otherwise, weight and badpix are images or lists of images.
+        if ((per_object[0] and len(weight) != len(views)) or
+            (per_object[1] and len(badpix) != len(views))):
+            raise ValueError("Weight and badpix lists must have the same length as the images!")
+        masks = []
+        for k, v in enumerate(views):
+            w = weight[k] if per_object[0] else weight
+            b = badpix[k] if per_object[1] else badpix
+            mask = galsim.ImageI(bounds=v.bounds, init_value=1)
+            if w is not None:
+                if w.bounds != v.bounds:
+                    raise ValueError("Weight image does not have same bounds as the input Image!")
+                if np.any(w.array < 0):
+                    raise ValueError("Weight image cannot contain negative values!")
+                mask.array[w.array <= 0] = 0
+            if b is not None:
+                if b.bounds != v.bounds:
+                    raise ValueError(
+                        "Badpix image does not have the same bounds as the input Image!")
+                mask.array[b.array != 0] = 0
+            masks.append(mask.view())
+        return masks
+
+def _batchResults(d, strict, func_name):
+    """Turn the dict returned by the C++ batch functions into a numpy structured array.
+    """
+    import numpy as np
+    error_message = d['error_message']
+    n = len(error_message)
+    maxlen = max([ len(m) for m in error_message ] + [1])
+    dtype = [ (name, np.int32 if name in _batch_int_fields else np.float64)
+              for name in _batch_fields ]
+    dtype += [ ('flags', np.int32), ('error_message', 'S%d'%maxlen) ]
+    result = np.zeros(n, dtype=dtype)
+    for name in _batch_fields:
+        result[name] = d[name]
+    result['error_message'] = error_message
+    result['flags'] = result['error_message'] != ''
+
+    if strict:
+        failed = np.nonzero(result['flags'])[0]
+        if len(failed) > 0:
+            raise RuntimeError("%s failed for object %d: %s"%(
+                func_name, failed[0], error_message[failed[0]]))
+    return result
+
+def EstimateShearBatch(gal_images, PSF_images, weight = None, badpix = None, sky_var = 0.0,
+                       shear_est = "REGAUSS", recompute_flux = "FIT", guess_sig_gal = 5.0,
+                       guess_sig_PSF = 3.0, precision = 1.0e-6, guess_x_centroid = -1000.0,
+                       guess_y_centroid = -1000.0, strict = True, hsmparams = None, nthreads = 1):
+    """Carry out moments-based PSF correction for a batch of galaxies.
+
+    This is equivalent to calling EstimateShear for each galaxy image, but the loop over galaxies
+    is done in C++, optionally using several threads, and the results are returned in a single
+    numpy structured array rather than a list of ShapeData objects.  For small stamps, the python
+    overhead of EstimateShear (converting the weight and badpix images and building the ShapeData
+    object) can be comparable to the time for the measurement itself, so this can be
+    significantly faster when measuring many galaxies.
+
+    Example usage
+    -------------
+
+        >>> gal_stack = numpy.array([ gal.draw(image=galsim.ImageF(48,48), dx=0.2).array
+        ...                           for gal in galaxies ])
+        >>> psf_image = final_epsf.draw(dx=0.2)
+        >>> results = galsim.hsm.EstimateShearBatch(gal_stack, psf_image, strict=False)
+        >>> good = results['flags'] == 0
+        >>> e1 = results['corrected_e1'][good]
+
+    The returned structured array has one row per galaxy with the fields:
+
+        moments_status, observed_e1, observed_e2, moments_sigma, moments_amp,
+        moments_centroid_x, moments_centroid_y, moments_rho4, moments_n_iter,
+        correction_status, corrected_e1, corrected_e2, corrected_g1, corrected_g2,
+        corrected_shape_err, resolution_factor, flags, error_message
+
+    These have the same meanings as the corresponding attributes of ShapeData, except that the
+    observed shape is given as the distortion (observed_e1, observed_e2), and the centroid as
+    (moments_centroid_x, moments_centroid_y).  flags is 1 for galaxies whose measurement failed,
+    in which case error_message gives the reason, and 0 otherwise.
+
+    @param gal_images        The galaxy images, given either as a 3-d numpy array, where
+                             gal_images[k] is the k-th galaxy image (in which case each image has
+                             bounds starting at (1,1)), or as a list of Images or ImageViews.
+                             Images other than float32 or float64 are converted to float64.
+    @param PSF_images        The PSF image, either a single Image or ImageView to be used for all
+                             galaxies, or a 3-d numpy array or list of images with one PSF for each
+                             galaxy.
+    @param weight            The optional weight image, either a single image to be used for all
+                             galaxies or a 3-d numpy array or list of images with one for each
+                             galaxy.  cf. EstimateShear.  (A 3-d array may only be used if
+                             `gal_images` is also a 3-d array.)
+    @param badpix            The optional bad pixel mask, given in the same forms as `weight`.
+    @param sky_var           The variance of the sky level; default `sky_var = 0.`.
+    @param shear_est         The method of PSF correction: REGAUSS, LINEAR, BJ, or KSB; default
+                             `shear_est = "REGAUSS"`.
+    @param recompute_flux    NONE, SUM or FIT; default `recompute_flux = FIT`.
+    @param guess_sig_gal     An initial guess for the Gaussian sigma of the galaxies, default
+                             `guess_sig_gal = 5.` (pixels).
+    @param guess_sig_PSF     An initial guess for the Gaussian sigma of the PSF, default
+                             `guess_sig_PSF = 3.` (pixels).
+    @param precision         The convergence criterion for the moments; default `precision = 1e-6`.
+    @param guess_x_centroid  An initial guess for the x component of the centroids.
+    @param guess_y_centroid  An initial guess for the y component of the centroids.
+    @param strict            If `strict = True` (default), then a `RuntimeError` is raised after
+                             the batch is measured if shear estimation failed for any galaxy.  If
+                             set to `False`, then failures are only reported in the `flags` and
+                             `error_message` fields of the output.
+    @param hsmparams         The hsmparams keyword can be used to change the settings used by
+                             EstimateShear; see help(galsim.hsm.HSMParams).
+    @param nthreads          The number of threads to use.  The results do not depend on the
+                             number of threads.  (Default `nthreads = 1`)
+    @return                  A numpy structured array containing the results of shape measurement.
+    """
+    import numpy as np
+    gal_views, stack = _batchViews(gal_images, 'gal_images')
+    if isinstance(PSF_images, (np.ndarray, list, tuple)):
+        PSF_views = _batchViews(PSF_images, 'PSF_images')[0]
+        if len(PSF_views) != len(gal_views):
+            raise ValueError("PSF_images must have the same length as gal_images!")
+    else:
+        PSF_view = PSF_images.view()
+        if not isinstance(PSF_view, (galsim.ImageViewF, galsim.ImageViewD)):
+            PSF_view = galsim.ImageViewD(PSF_view.array.astype(np.float64),
+                                         PSF_view.xmin, PSF_view.ymin)
+        PSF_views = [ PSF_view ]
+    mask_views = _batchMasks(gal_views, stack, weight, badpix)
+
+    d = _galsim._EstimateShearBatch(gal_views, PSF_views, mask_views,
+                                    sky_var = sky_var,
+                                    shear_est = shear_est.upper(),
+                                    recompute_flux = recompute_flux.upper(),
+                                    guess_sig_gal = guess_sig_gal,
+                                    guess_sig_PSF = guess_sig_PSF,
+                                    precision = precision,
+                                    guess_x_centroid = guess_x_centroid,
+                                    guess_y_centroid = guess_y_centroid,
+                                    hsmparams = hsmparams,
+                                    nthreads = int(nthreads))
+    return _batchResults(d, strict, 'EstimateShearBatch')
+
+def FindAdaptiveMomBatch(object_images, weight = None, badpix = None, guess_sig = 5.0,
+                         precision = 1.0e-6, guess_x_centroid = -1000.0,
+                         guess_y_centroid = -1000.0, strict = True, hsmparams = None,
+                         nthreads = 1):
+    """Measure adaptive moments of a batch of objects.
+
+    This is equivalent to calling FindAdaptiveMom for each image, but the loop over objects is
+    done in C++, optionally using several threads, and the results are returned in a single numpy
+    structured array.  See EstimateShearBatch for a description of the fields of the returned
+    array.  The fields related to PSF correction keep their default values.
+
+    Example usage
+    -------------
+
+        >>> results = galsim.hsm.FindAdaptiveMomBatch(star_stack, nthreads=4)
+        >>> sigma = results['moments_sigma']
+
+    @param object_images     The images of the objects, given either as a 3-d numpy array or as a
+                             list of Images or ImageViews.  cf. EstimateShearBatch.
+    @param weight            The optional weight image, either a single image to be used for all
+                             objects or a 3-d numpy array or list of images with one for each
+                             object.  cf. FindAdaptiveMom.
+    @param badpix            The optional bad pixel mask, given in the same forms as `weight`.
+    @param guess_sig         An initial guess for the Gaussian sigma of the objects, default
+                             `guess_sig = 5.0` (pixels).
+    @param precision         The convergence criterion for the moments; default `precision = 1e-6`.
+    @param guess_x_centroid  An initial guess for the x component of the centroids.
+    @param guess_y_centroid  An initial guess for the y component of the centroids.
+    @param strict            If `strict = True` (default), then a `RuntimeError` is raised after
+                             the batch is measured if moment measurement failed for any object.
+                             If set to `False`, then failures are only reported in the `flags` and
+                             `error_message` fields of the output.
+    @param hsmparams         The hsmparams keyword can be used to change the settings used by
+                             FindAdaptiveMom; see help(galsim.hsm.HSMParams).
+    @param nthreads          The number of threads to use.  (Default `nthreads = 1`)
+    @return                  A numpy structured array containing the results of moment measurement.
+    """
+    object_views, stack = _batchViews(object_images, 'object_images')
+    mask_views = _batchMasks(object_views, stack, weight, badpix)
+
+    d = _galsim._FindAdaptiveMomBatch(object_views, mask_views,
+                                      guess_sig = guess_sig, precision = precision,
+                                      guess_x_centroid = guess_x_centroid,
+                                      guess_y_centroid = guess_y_centroid,
+                                      hsmparams = hsmparams,
+                                      nthreads = int(nthreads))
+    return _batchResults(d, strict, 'FindAdaptiveMomBatch')
+
 # make FindAdaptiveMom a method of Image and ImageView classes
 for Class in _galsim.ImageView.itervalues():
     Class.FindAdaptiveMom = FindAdaptiveMom
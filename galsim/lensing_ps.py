@@ -204,7 +204,8 @@ class PowerSpectrum(object):
 
     def buildGrid(self, grid_spacing=None, ngrid=None, rng=None, interpolant=None,
                   center=galsim.PositionD(0,0), units=galsim.arcsec, get_convergence=False,
-                  kmax_factor=1, kmin_factor=1):
+                  kmax_factor=1, kmin_factor=1, low_memory=False, dtype=np.float64,
+                  grid_files=None):
         """Generate a realization of the current power spectrum on the specified grid.
 
         This function will generate a Gaussian random realization of the specified E and B mode
@@ -261,6 +262,17 @@ class PowerSpectrum(object):
         For more information on the effects of finite grid representation of the power spectrum 
         see `devel/modules/lensing_engine.pdf`.
 
+        For very large grids (especially with `kmin_factor` > 1), the memory required by the
+        default algorithm, which uses full complex FFTs on the intermediate grid, can be
+        prohibitive.  Setting `low_memory = True` uses real-to-complex transforms instead, only
+        stores half of the intermediate grid in fourier space, and only transforms the rows and
+        columns that are kept in the final grid.  The results are the same as the default
+        algorithm (to within rounding errors) for the same rng.  In this mode, you may also
+        set `dtype = numpy.float32` to store the intermediate and final grids in single precision,
+        and you may provide `grid_files`, a list of three file names to which the g1, g2 and
+        kappa grids are written directly as numpy memory-mapped arrays.  (Setting either of these
+        implies `low_memory = True`.)
+
         Note also that the convention for axis orientation differs from that for the GREAT10
         challenge, so when using codes that deal with GREAT10 challenge outputs, the sign of our g2
         shear component must be flipped.
@@ -331,6 +343,14 @@ class PowerSpectrum(object):
                                 larger than the default.  i.e. 
                                     kmax = pi / grid_spacing * kmax_factor
                                 [default `kmax_factor = 1`; must be an integer]
+        @param low_memory       (Optional) Use real-to-complex transforms that only store the
+                                parts of the intermediate grids that are needed.
+                                [default `low_memory = False`]
+        @param dtype            (Optional) The data type of the grids, either numpy.float64 or
+                                numpy.float32.  [default `dtype = numpy.float64`]
+        @param grid_files       (Optional) A list of three file names in which to store the g1, g2
+                                and kappa grids as memory-mapped arrays.  [default `grid_files =
+                                None`, which means to keep the grids in memory]
 
         @return g1,g2[,kappa]   2-d NumPy arrays for the shear components g_1, g_2 and (if
                                 `get_convergence=True`) convergence kappa.
@@ -351,6 +371,17 @@ class PowerSpectrum(object):
             if kmax_factor != int(kmax_factor):
                 raise ValueError("kmax_factor must be an integer")
             kmax_factor = int(kmax_factor)
+        # Normalise dtype, so e.g. 'f4' and numpy.dtype('float32') work as well as numpy.float32.
+        try:
+            dtype = np.dtype(dtype)
+        except TypeError:
+            raise ValueError("dtype must be either numpy.float64 or numpy.float32")
+        if dtype not in [np.dtype(np.float64), np.dtype(np.float32)]:
+            raise ValueError("dtype must be either numpy.float64 or numpy.float32")
+        if grid_files is not None and len(grid_files) != 3:
+            raise ValueError("grid_files must be a list of three file names")
+        if dtype != np.dtype(np.float64) or grid_files is not None:
+            low_memory = True
 
         # Check if center is a Position
         if isinstance(center,galsim.PositionD):
@@ -429,9 +460,21 @@ class PowerSpectrum(object):
 
         # Build the grid 
         psr = PowerSpectrumRealizer(ngrid*kmin_factor*kmax_factor, grid_spacing/kmax_factor,
-                                    p_E, p_B)
-        self.grid_g1, self.grid_g2, self.grid_kappa = psr(gd)
-        if kmin_factor != 1 or kmax_factor != 1:
+                                    p_E, p_B, low_memory=low_memory, dtype=dtype)
+        if low_memory:
+            # Here the realizer only computes the rows and columns that we keep, so there is
+            # no need to take the subset afterwards.
+            if grid_files is None:
+                out = None
+            else:
+                out = [ np.memmap(file_name, dtype=dtype, mode='w+', shape=(ngrid,ngrid))
+                        for file_name in grid_files ]
+            self.grid_g1, self.grid_g2, self.grid_kappa = psr(gd, ngrid, kmax_factor, out)
+            if out is not None:
+                for array in out: array.flush()
+        else:
+            self.grid_g1, self.grid_g2, self.grid_kappa = psr(gd)
+        if not low_memory and (kmin_factor != 1 or kmax_factor != 1):
             # Need to make sure the rows are continguous so we can use it in the constructor 
             # of the ImageViewD objects below.  This requires a copy.
             s = slice(0,ngrid*kmax_factor,kmax_factor)
@@ -442,9 +485,13 @@ class PowerSpectrum(object):
         # Set up the images to be interpolated.
         # Note: We don't make the SBInterpolatedImages yet, since it's not picklable. 
         #       So we wait to create them when we are actually going to use them.
-        self.im_g1 = galsim.ImageViewD(self.grid_g1, scale=grid_spacing)
-        self.im_g2 = galsim.ImageViewD(self.grid_g2, scale=grid_spacing)
-        self.im_kappa = galsim.ImageViewD(self.grid_kappa, scale=grid_spacing)
+        ImageView = galsim.ImageView[self.grid_g1.dtype.type]
+        self.im_g1 = ImageView(self.grid_g1, scale=grid_spacing)
+        self.im_g2 = ImageView(self.grid_g2, scale=grid_spacing)
+        self.im_kappa = ImageView(self.grid_kappa, scale=grid_spacing)
+        # The SBInterpolatedImages for these grids are built the first time they are needed,
+        # and then reused until the next call to buildGrid.
+        self._sbii = {}
 
         # Dealing with the center here is a bit confusing, especially if ngrid is even.
         # The InterpolatedImage will consider position (0,0) to correspond to 
@@ -501,6 +548,91 @@ class PowerSpectrum(object):
                     "Power function MUST return a list/array same length as input")
         return pf
 
+    def __getstate__(self):
+        # The SBInterpolatedImages are not picklable, so don't include them.
+        d = self.__dict__.copy()
+        d.pop('_sbii', None)
+        return d
+
+    def _getSBII(self, name):
+        """Get the SBInterpolatedImage for one of the gridded quantities.
+
+        The valid names are 'g1', 'g2', 'kappa' for the theoretical shears and convergence,
+        and 'g1_r', 'g2_r', 'mu' for the reduced shears and magnification.  For 'mu', the
+        interpolated quantity is mu-1, so the zero values off the edge are appropriate.
+        """
+        if not hasattr(self, '_sbii'):
+            self._sbii = {}
+        if name not in self._sbii:
+            if name in ['g1_r', 'g2_r', 'mu']:
+                # These all come from the same call to theoryToObserved, so do all three.
+                g1_r, g2_r, mu = galsim.lensing_ps.theoryToObserved(
+                    self.im_g1.array, self.im_g2.array, self.im_kappa.array)
+                images = { 'g1_r' : g1_r, 'g2_r' : g2_r, 'mu' : mu-1 }
+                for key in images:
+                    array = np.ascontiguousarray(images[key])
+                    im = galsim.ImageView[array.dtype.type](array, scale=self.im_kappa.scale)
+                    im.setOrigin(self.im_kappa.getXMin(), self.im_kappa.getYMin())
+                    images[key] = im
+            else:
+                images = { name : getattr(self, 'im_' + name) }
+
+            if self.interpolant is None:
+                interpolant2d = galsim.InterpolantXY(galsim.Linear())
+            else:
+                interpolant2d = galsim.utilities.convert_interpolant_to_2d(self.interpolant)
+            quint2d = galsim.InterpolantXY(galsim.Quintic())
+            for key in images:
+                self._sbii[key] = galsim.SBInterpolatedImage(images[key], xInterp=interpolant2d,
+                                                             kInterp=quint2d)
+        return self._sbii[name]
+
+    def _interpolate(self, names, defaults, pos_x, pos_y, warn_str):
+        """Interpolate the named grids at the given positions.
+
+        Positions outside the grid get the corresponding value in defaults, with a warning
+        that they are not within the bounds of warn_str[0], followed by warn_str[1].
+        Returns a list of numpy arrays, one for each name.
+        """
+        pos_x = np.asarray(pos_x, dtype=float)
+        pos_y = np.asarray(pos_y, dtype=float)
+        inside = ((pos_x >= self.bounds.xmin) & (pos_x <= self.bounds.xmax) &
+                  (pos_y >= self.bounds.ymin) & (pos_y <= self.bounds.ymax))
+        if not inside.all():
+            import warnings
+            for x, y in zip(pos_x[~inside], pos_y[~inside]):
+                warnings.warn(
+                    "Warning: position (%f,%f) not within the bounds "%(x,y) +
+                    "of the %s: "%warn_str[0] + str(self.bounds) + ".  " + warn_str[1])
+        x = pos_x[inside] + self.offset.x
+        y = pos_y[inside] + self.offset.y
+
+        results = []
+        for name, default in zip(names, defaults):
+            vals = np.empty(len(pos_x))
+            vals.fill(default)
+            # Evaluate all the positions with a single call into C++.
+            vals[inside] = self._getSBII(name).xValues(x, y)
+            if name == 'mu':
+                vals[inside] += 1.
+            results.append(vals)
+        return results
+
+    def _convertResults(self, pos, pos_x, results):
+        """Convert the arrays from _interpolate into the right kind of return values for pos.
+        """
+        if isinstance(pos, galsim.PositionD):
+            results = [ float(r[0]) for r in results ]
+        elif isinstance(pos[0], np.ndarray):
+            pass
+        elif len(pos_x) == 1 and not isinstance(pos[0],list):
+            results = [ float(r[0]) for r in results ]
+        else:
+            results = [ r.tolist() for r in results ]
+        if len(results) == 1:
+            return results[0]
+        else:
+            return tuple(results)
 
     def getShear(self, pos, units=galsim.arcsec, reduced=True):
         """
@@ -565,53 +697,14 @@ class PowerSpectrum(object):
         # Convert to numpy arrays for internal usage:
         pos_x, pos_y = galsim.utilities._convertPositions(pos, units, 'getShear')
 
-        # Set the interpolant:
-        if self.interpolant is None:
-            interpolant2d = galsim.InterpolantXY(galsim.Linear())
-        else:
-            interpolant2d = galsim.utilities.convert_interpolant_to_2d(self.interpolant)
-        quint2d = galsim.InterpolantXY(galsim.Quintic())
-
         if reduced:
-            # get reduced shear (just discard magnification)
-            g1_r, g2_r, _ = galsim.lensing_ps.theoryToObserved(self.im_g1.array, self.im_g2.array,
-                                                               self.im_kappa.array)
-            g1_r = galsim.ImageViewD(g1_r, scale=self.im_g1.scale)
-            g1_r.setOrigin(self.im_g1.getXMin(), self.im_g1.getYMin())
-            g2_r = galsim.ImageViewD(g2_r, scale=self.im_g2.scale)
-            g2_r.setOrigin(self.im_g2.getXMin(), self.im_g2.getYMin())
-            # Make an SBInterpolatedImage, which will do the heavy lifting for the
-            # interpolation.
-            sbii_g1 = galsim.SBInterpolatedImage(g1_r, xInterp=interpolant2d, kInterp=quint2d)
-            sbii_g2 = galsim.SBInterpolatedImage(g2_r, xInterp=interpolant2d, kInterp=quint2d)
+            names = ['g1_r', 'g2_r']
         else:
-            sbii_g1 = galsim.SBInterpolatedImage(self.im_g1, xInterp=interpolant2d, kInterp=quint2d)
-            sbii_g2 = galsim.SBInterpolatedImage(self.im_g2, xInterp=interpolant2d, kInterp=quint2d)
-
-        # interpolate if necessary
-        g1,g2 = [], []
-        for iter_pos in [ galsim.PositionD(pos_x[i],pos_y[i]) for i in range(len(pos_x)) ]:
-            # Check that the position is in the bounds of the interpolated image
-            if not self.bounds.includes(iter_pos):
-                import warnings
-                warnings.warn(
-                    "Warning: position (%f,%f) not within the bounds "%(iter_pos.x,iter_pos.y) +
-                    "of the gridded shear values: " + str(self.bounds) +
-                    ".  Returning a shear of (0,0) for this point.")
-                g1.append(0.)
-                g2.append(0.)
-            else:
-                g1.append(sbii_g1.xValue(iter_pos+self.offset))
-                g2.append(sbii_g2.xValue(iter_pos+self.offset))
-
-        if isinstance(pos, galsim.PositionD):
-            return g1[0], g2[0]
-        elif isinstance(pos[0], np.ndarray):
-            return np.array(g1), np.array(g2)
-        elif len(pos_x) == 1 and not isinstance(pos[0],list):
-            return g1[0], g2[0]
-        else:
-            return g1, g2
+            names = ['g1', 'g2']
+        results = self._interpolate(names, [0., 0.], pos_x, pos_y,
+                                    ('gridded shear values',
+                                     'Returning a shear of (0,0) for this point.'))
+        return self._convertResults(pos, pos_x, results)
 
     def getConvergence(self, pos, units=galsim.arcsec):
         """
@@ -651,40 +744,10 @@ class PowerSpectrum(object):
         # Convert to numpy arrays for internal usage:
         pos_x, pos_y = galsim.utilities._convertPositions(pos, units, 'getConvergence')
 
-        # Set the interpolant:
-        if self.interpolant is None:
-            interpolant2d = galsim.InterpolantXY(galsim.Linear())
-        else:
-            interpolant2d = galsim.utilities.convert_interpolant_to_2d(self.interpolant)
-        quint2d = galsim.InterpolantXY(galsim.Quintic())
-
-        # Make an SBInterpolatedImage, which will do the heavy lifting for the 
-        # interpolation.
-        sbii_kappa = galsim.SBInterpolatedImage(self.im_kappa, xInterp=interpolant2d,
-                                                kInterp=quint2d)
-
-        # interpolate if necessary
-        kappa = []
-        for iter_pos in [ galsim.PositionD(pos_x[i],pos_y[i]) for i in range(len(pos_x)) ]:
-            # Check that the position is in the bounds of the interpolated image
-            if not self.bounds.includes(iter_pos):
-                import warnings
-                warnings.warn(
-                    "Warning: position (%f,%f) not within the bounds "%(iter_pos.x,iter_pos.y) +
-                    "of the gridded convergence values: " + str(self.bounds) + 
-                    ".  Returning a convergence of 0 for this point.")
-                kappa.append(0.)
-            else:
-                kappa.append(sbii_kappa.xValue(iter_pos+self.offset))
-
-        if isinstance(pos, galsim.PositionD):
-            return kappa[0]
-        elif isinstance(pos[0], np.ndarray):
-            return np.array(kappa)
-        elif len(pos_x) == 1 and not isinstance(pos[0],list): 
-            return kappa[0]
-        else:
-            return kappa
+        results = self._interpolate(['kappa'], [0.], pos_x, pos_y,
+                                    ('gridded convergence values',
+                                     'Returning a convergence of 0 for this point.'))
+        return self._convertResults(pos, pos_x, results)
 
     def getMagnification(self, pos, units=galsim.arcsec):
         """
@@ -725,47 +788,10 @@ class PowerSpectrum(object):
         # Convert to numpy arrays for internal usage:
         pos_x, pos_y = galsim.utilities._convertPositions(pos, units, 'getMagnification')
 
-        # Set the interpolant:
-        if self.interpolant is None:
-            interpolant2d = galsim.InterpolantXY(galsim.Linear())
-        else:
-            interpolant2d = galsim.utilities.convert_interpolant_to_2d(self.interpolant)
-        quint2d = galsim.InterpolantXY(galsim.Quintic())
-
-        # Calculate the magnification based on the convergence and shear
-        _, _, mu = galsim.lensing_ps.theoryToObserved(self.im_g1.array, self.im_g2.array,
-                                                      self.im_kappa.array)
-        # Interpolate mu-1, so the zero values off the edge are appropriate.
-        im_mu = galsim.ImageViewD(mu-1)
-        im_mu.scale = self.im_kappa.scale
-        im_mu.setOrigin(self.im_kappa.getXMin(), self.im_kappa.getYMin())
-
-        # Make an SBInterpolatedImage, which will do the heavy lifting for the 
-        # interpolation.
-        sbii_mu = galsim.SBInterpolatedImage(im_mu, xInterp=interpolant2d, kInterp=quint2d)
-
-        # interpolate if necessary
-        mu = []
-        for iter_pos in [ galsim.PositionD(pos_x[i],pos_y[i]) for i in range(len(pos_x)) ]:
-            # Check that the position is in the bounds of the interpolated image
-            if not self.bounds.includes(iter_pos):
-                import warnings
-                warnings.warn(
-                    "Warning: position (%f,%f) not within the bounds "%(iter_pos.x,iter_pos.y) +
-                    "of the gridded convergence values: " + str(self.bounds) + 
-                    ".  Returning a magnification of 1 for this point.")
-                mu.append(1.)
-            else:
-                mu.append(sbii_mu.xValue(iter_pos+self.offset)+1.)
-
-        if isinstance(pos, galsim.PositionD):
-            return mu[0]
-        elif isinstance(pos[0], np.ndarray):
-            return np.array(mu)
-        elif len(pos_x) == 1 and not isinstance(pos[0],list): 
-            return mu[0]
-        else:
-            return mu
+        results = self._interpolate(['mu'], [1.], pos_x, pos_y,
+                                    ('gridded convergence values',
+                                     'Returning a magnification of 1 for this point.'))
+        return self._convertResults(pos, pos_x, results)
 
     def getLensing(self, pos, units=galsim.arcsec):
         """
@@ -806,57 +832,10 @@ class PowerSpectrum(object):
         # Convert to numpy arrays for internal usage:
         pos_x, pos_y = galsim.utilities._convertPositions(pos, units, 'getLensing')
 
-        # Set the interpolant:
-        if self.interpolant is None:
-            interpolant2d = galsim.InterpolantXY(galsim.Linear())
-        else:
-            interpolant2d = galsim.utilities.convert_interpolant_to_2d(self.interpolant)
-        quint2d = galsim.InterpolantXY(galsim.Quintic())
-
-        # Calculate the magnification based on the convergence and shear
-        g1_r, g2_r, mu = galsim.lensing_ps.theoryToObserved(self.im_g1.array, self.im_g2.array,
-                                                            self.im_kappa.array)
-        im_g1_r = galsim.ImageViewD(g1_r)
-        im_g1_r.scale = self.im_kappa.scale
-        im_g1_r.setOrigin(self.im_kappa.getXMin(), self.im_kappa.getYMin())
-        im_g2_r = galsim.ImageViewD(g2_r)
-        im_g2_r.scale = self.im_kappa.scale
-        im_g2_r.setOrigin(self.im_kappa.getXMin(), self.im_kappa.getYMin())
-        im_mu = galsim.ImageViewD(mu-1)
-        im_mu.scale = self.im_kappa.scale
-        im_mu.setOrigin(self.im_kappa.getXMin(), self.im_kappa.getYMin())
-        # Make an SBInterpolatedImage, which will do the heavy lifting for the 
-        # interpolation.
-        sbii_g1 = galsim.SBInterpolatedImage(im_g1_r, xInterp=interpolant2d, kInterp=quint2d)
-        sbii_g2 = galsim.SBInterpolatedImage(im_g2_r, xInterp=interpolant2d, kInterp=quint2d)
-        sbii_mu = galsim.SBInterpolatedImage(im_mu, xInterp=interpolant2d, kInterp=quint2d)
-
-        # interpolate if necessary
-        g1, g2, mu = [], [], []
-        for iter_pos in [ galsim.PositionD(pos_x[i],pos_y[i]) for i in range(len(pos_x)) ]:
-            # Check that the position is in the bounds of the interpolated image
-            if not self.bounds.includes(iter_pos):
-                import warnings
-                warnings.warn(
-                    "Warning: position (%f,%f) not within the bounds "%(iter_pos.x,iter_pos.y) +
-                    "of the gridded values: " + str(self.bounds) + 
-                    ".  Returning 0 for lensing observables at this point.")
-                g1.append(0.)
-                g2.append(0.)
-                mu.append(1.)
-            else:
-                g1.append(sbii_g1.xValue(iter_pos+self.offset))
-                g2.append(sbii_g2.xValue(iter_pos+self.offset))
-                mu.append(sbii_mu.xValue(iter_pos+self.offset)+1.)
-
-        if isinstance(pos, galsim.PositionD):
-            return g1[0], g2[0], mu[0]
-        elif isinstance(pos[0], np.ndarray):
-            return np.array(g1), np.array(g2), np.array(mu)
-        elif len(pos_x) == 1 and not isinstance(pos[0],list): 
-            return g1[0], g2[0], mu[0]
-        else:
-            return g1, g2, mu
+        results = self._interpolate(['g1_r', 'g2_r', 'mu'], [0., 0., 1.], pos_x, pos_y,
+                                    ('gridded values',
+                                     'Returning 0 for lensing observables at this point.'))
+        return self._convertResults(pos, pos_x, results)
 
 class PowerSpectrumRealizer(object):
     """Class for generating realizations of power spectra with any area and pixel size.
@@ -876,8 +855,16 @@ class PowerSpectrumRealizer(object):
                             PowerSpectrum class.
     @param b_power_function See description of this parameter in the documentation for the
                             PowerSpectrum class.
+    @param low_memory       Use real-to-complex transforms on half of the fourier grid rather
+                            than building the full complex grids.  In this mode, the power
+                            arrays and spin weightings are computed on the fly in chunks,
+                            rather than stored.  [default `low_memory = False`]
+    @param dtype            The data type of the stored grids in `low_memory` mode, either
+                            numpy.float64 or numpy.float32.  [default `dtype = numpy.float64`]
     """
-    def __init__(self, ngrid, pixel_size, p_E, p_B):
+    def __init__(self, ngrid, pixel_size, p_E, p_B, low_memory=False, dtype=np.float64):
+        self.low_memory = low_memory
+        self.dtype = np.dtype(dtype)
         # Set up the k grids in x and y, and the instance variables
         self.set_size(ngrid, pixel_size)
         self.set_power(p_E, p_B)
@@ -898,6 +885,14 @@ class PowerSpectrumRealizer(object):
         self.ikyp = slice(1,(self.ny+1)/2)
         self.ikyn = slice(-1,self.ny/2,-1)
 
+        if self.low_memory:
+            # Only keep the 1-d k values.  The 2-d grids are built a chunk at a time as needed.
+            # Note: the kx values include the negative Nyquist frequency for even nx, just like
+            # the ikx slice of the full kx grid.
+            self.kx1 = np.fft.fftfreq(self.nx)[self.ikx] * 2. * np.pi / self.pixel_size
+            self.ky1 = np.fft.fftfreq(self.ny) * 2. * np.pi / self.pixel_size
+            return
+
         # Set up the scalar k grid. Generally, for a box size of L (in one dimension), the grid
         # spacing in k_x or k_y is Delta k=2pi/L 
         self.kx, self.ky = galsim.utilities.kxky((self.ny,self.nx))
@@ -910,6 +905,9 @@ class PowerSpectrumRealizer(object):
     def set_power(self, p_E, p_B):
         self.p_E = p_E
         self.p_B = p_B
+        if self.low_memory:
+            # The amplitudes are computed as needed when generating the realization.
+            return
         if p_E is None:  self.amplitude_E = None
         else:            self.amplitude_E = np.sqrt(self._generate_power_array(p_E))/self.pixel_size
         if p_B is None:  self.amplitude_B = None
@@ -918,10 +916,21 @@ class PowerSpectrumRealizer(object):
     def recompute_power(self):
         self.set_power(self.p_E, self.p_B)
 
-    def __call__(self, gd):
+    def __call__(self, gd, nout=None, step=1, out=None):
         """Generate a realization of the current power spectrum.
         
+        In `low_memory` mode, only every `step`th row and column of the realization, up to
+        `nout` of each, is computed.  The results may be written into existing arrays (e.g.
+        numpy memory-mapped arrays) by providing them as `out`.  These options are not
+        available in the default mode.
+
         @param gd               A Gaussian deviate to use when generating the shear fields.
+        @param nout             The size of the returned grids in `low_memory` mode.
+                                [default `nout = ngrid/step`]
+        @param step             The step between the rows and columns to return in `low_memory`
+                                mode.  [default `step = 1`]
+        @param out              A list of three arrays of shape (nout,nout) in which to store the
+                                results in `low_memory` mode. [default `out = None`]
         @return g1,g2,kappa     NumPy arrays for the shear components g_1, g_2 and convergence
                                 kappa.
         """
@@ -931,6 +940,9 @@ class PowerSpectrumRealizer(object):
             raise TypeError(
                 "The gd provided to the PowerSpectrumRealizer is not a GaussianDeviate!")
 
+        if self.low_memory:
+            return self._call_low_memory(gd, nout, step, out)
+
         # Generate a random complex realization for the E-mode, if there is one
         if self.amplitude_E is not None:
             r1 = galsim.utilities.rand_arr(self.amplitude_E.shape, gd)
@@ -986,6 +998,156 @@ class PowerSpectrumRealizer(object):
 
         return g1, g2, k
 
+    def _call_low_memory(self, gd, nout, step, out):
+        # Generate the realization using real-to-complex transforms.
+        #
+        # The E and B mode arrays are only stored for kx >= 0, the half of fourier space that
+        # numpy's irfft uses.  They are filled with exactly the same random numbers as the
+        # default algorithm uses.
+        #
+        # Then we split gamma_k = exp2ipsi * (E_k + i B_k) into pieces whose inverse transforms
+        # are real.  With exp2ipsi = c + i s, the cos and sin terms are even in k, so c E_k, 
+        # s E_k, c B_k and s B_k are all hermitian, and
+        #     g1 = irfft2(c E_k - s B_k)
+        #     g2 = irfft2(s E_k + c B_k)
+        # The exception is s along the Nyquist row and column for even sizes, where the discrete 
+        # kx (or ky) is -pi on both sides, so s is odd there.  Then s E_k is anti-hermitian, and
+        # the real part of the full transform (which is what the default algorithm uses) picks
+        # up i s E_k instead.  So we separate s = s_e + s_o, where s_o is the odd part, and use
+        #     g1 = irfft2(c E_k - s_e B_k + i s_o E_k)
+        #     g2 = irfft2(s_e E_k + c B_k + i s_o B_k)
+        # which matches the default algorithm exactly.
+        #
+        # Finally, the 2-d inverse transform is done as a complex transform along the y axis, of
+        # which we only keep the rows we need, followed by a real transform along the x axis, of
+        # which we only keep the columns we need.  Both are done in chunks so the temporary
+        # arrays are small.
+        if nout is None:
+            nout = self.nx / step
+        if nout * step > self.nx:
+            raise ValueError("nout * step must be <= ngrid")
+        sel = slice(0, nout*step, step)
+        if self.dtype == np.dtype(np.float32):
+            ctype = np.complex64
+        else:
+            ctype = np.complex128
+        if out is None:
+            out = [ np.empty((nout,nout), dtype=self.dtype) for i in range(3) ]
+
+        nkx = self.nx/2+1
+        E_k = self._generate_half_k(self.p_E, gd, ctype)
+        B_k = self._generate_half_k(self.p_B, gd, ctype)
+
+        ncol = max(1, self._chunk_size / self.ny)
+        nrow = max(1, self._chunk_size / self.nx)
+        tmp = np.empty((nout,nkx), dtype=ctype)
+        for i in range(3):
+            if i == 2 and E_k is None:
+                out[i][:,:] = 0.
+                continue
+            for j1 in range(0,nkx,ncol):
+                j2 = min(j1+ncol,nkx)
+                if i == 2:
+                    P_k = E_k[:,j1:j2]
+                else:
+                    c, s_e, s_o = self._generate_cos_sin(j1,j2)
+                    if i == 0:
+                        E_fac, B_fac = c + 1j*s_o, -s_e
+                    else:
+                        E_fac, B_fac = s_e, c + 1j*s_o
+                    P_k = 0
+                    if E_k is not None: P_k = P_k + E_fac * E_k[:,j1:j2]
+                    if B_k is not None: P_k = P_k + B_fac * B_k[:,j1:j2]
+                tmp[:,j1:j2] = np.fft.ifft(P_k, axis=0)[sel,:]
+            for i1 in range(0,nout,nrow):
+                i2 = min(i1+nrow,nout)
+                out[i][i1:i2,:] = self.nx * np.fft.irfft(tmp[i1:i2,:], n=self.nx, axis=1)[:,sel]
+        return out[0], out[1], out[2]
+
+    # The number of elements to process at a time in low_memory mode.
+    _chunk_size = 1<<20
+
+    def _generate_half_k(self, power_function, gd, ctype):
+        # Generate a random complex realization for kx >= 0 in low_memory mode, using the
+        # same random numbers as the default algorithm.  In particular, the deviates for the
+        # real parts of all elements are drawn before those for the imaginary parts.
+        if power_function is None:
+            return None
+        ISQRT2 = np.sqrt(1.0/2.0)
+        nkx = self.nx/2+1
+        P_k = np.empty((self.ny,nkx), dtype=ctype)
+        nrow = max(1, self._chunk_size / nkx)
+
+        # Raise a clear exception for LookupTable that are not defined on the full k range!
+        # (The k=0 value is fudged to be the same as k[1,0] as in _generate_power_array.)
+        if isinstance(power_function, galsim.LookupTable):
+            absky = np.abs(self.ky1)
+            mink = min(np.min(self.kx1[1:]), absky[1])
+            maxk = np.sqrt(np.max(np.abs(self.kx1))**2 + np.max(absky)**2)
+            if mink < power_function.x_min or maxk > power_function.x_max:
+                raise ValueError(
+                    "LookupTable P(k) is not defined for full k range on grid, %f<k<%f"%(mink,maxk))
+
+        # First store the amplitudes in the real part.
+        for i1 in range(0,self.ny,nrow):
+            i2 = min(i1+nrow,self.ny)
+            k = np.sqrt(self.kx1[np.newaxis,:]**2 + self.ky1[i1:i2,np.newaxis]**2)
+            if i1 == 0:
+                k[0,0] = np.abs(self.ky1[1])
+            power = power_function(k)
+            assert type(power) is np.ndarray
+            if i1 == 0:
+                power[0,0] = type(power[0,1])(0.)
+            if np.any(power < 0):
+                raise ValueError("Negative power found for some values of k!")
+            P_k.real[i1:i2,:] = np.sqrt(power)/self.pixel_size
+        # Then the first set of deviates in the imaginary part.
+        for i1 in range(0,self.ny,nrow):
+            i2 = min(i1+nrow,self.ny)
+            P_k.imag[i1:i2,:] = galsim.utilities.rand_arr((i2-i1,nkx), gd)
+        # Then the second set of deviates, which lets us finish each element.
+        for i1 in range(0,self.ny,nrow):
+            i2 = min(i1+nrow,self.ny)
+            r2 = galsim.utilities.rand_arr((i2-i1,nkx), gd)
+            amp = P_k.real[i1:i2,:].copy()
+            P_k[i1:i2,:] = amp * (P_k.imag[i1:i2,:] + 1j*r2) * ISQRT2
+        self._make_hermitian_half(P_k)
+        return P_k
+
+    def _generate_cos_sin(self, j1, j2):
+        # Calculate the real and imaginary parts of exp2ipsi for columns j1:j2 of the
+        # half grid in low_memory mode.  The imaginary part is split into the part that is even
+        # in k and the part that is odd in k.  See the comments in _call_low_memory.
+        kx = self.kx1[np.newaxis,j1:j2]
+        ky = self.ky1[:,np.newaxis]
+        ksq = kx**2 + ky**2
+        if j1 == 0:
+            ksq[0,0] = 1.
+        c = (kx**2 - ky**2) / ksq
+        s = 2. * kx * ky / ksq
+        odd = np.zeros(s.shape, dtype=bool)
+        if self.ny % 2 == 0:
+            odd[self.ny/2,:] = True
+        if self.nx % 2 == 0 and j1 <= self.nx/2 < j2:
+            odd[:,self.nx/2-j1] = True
+            if self.ny % 2 == 0:
+                # The corner is its own reflection, so it is even.
+                odd[self.ny/2,self.nx/2-j1] = False
+        s_o = np.where(odd, s, 0.)
+        s_e = np.where(odd, 0., s)
+        return c, s_e, s_o
+
+    def _make_hermitian_half(self, P_k):
+        # The same as _make_hermitian, but for an array that only includes the kx >= 0 values.
+        # Only the kx=0 and (for even nx) kx=nx/2 columns need to be changed.
+        P_k[self.ikyn,0] = np.conj(P_k[self.ikyp,0])
+        P_k[0,0] = np.real(P_k[0,0])
+        if self.ny % 2 == 0:
+            P_k[self.ikyn,self.nx/2] = np.conj(P_k[self.ikyp,self.nx/2])
+            P_k[self.ny/2,0] = np.real(P_k[self.ny/2,0])
+            P_k[0,self.nx/2] = np.real(P_k[0,self.nx/2])
+            P_k[self.ny/2,self.nx/2] = np.real(P_k[self.ny/2,self.nx/2])
+
     def _make_hermitian(self, P_k):
         # Make P_k[-k] = conj(P_k[k])
         # First update the kx=0 values to be consistent with this.
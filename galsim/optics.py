@@ -157,37 +157,22 @@ class OpticalPSF(GSObject):
                  gsparams=None):
 
         
-        # Choose dx for lookup table using Nyquist for optical aperture and the specified
-        # oversampling factor
-        dx_lookup = .5 * lam_over_diam / oversampling
-        
-        # Start with the stepk value for Airy:
-        airy = galsim.Airy(lam_over_diam = lam_over_diam, obscuration = obscuration,
-                           gsparams = gsparams)
-        stepk_airy = airy.stepK()
+        if nstruts > 0 and not isinstance(strut_angle, galsim.Angle):
+            raise TypeError("Input kwarg strut_angle must be a galsim.Angle instance.")
+        args = (lam_over_diam, defocus, astig1, astig2, coma1, coma2, trefoil1, trefoil2, spher,
+                circular_pupil, obscuration, interpolant, oversampling, pad_factor, flux,
+                nstruts, strut_thick, strut_angle.rad() if nstruts > 0 else 0., gsparams)
+
+        # The profiles are cached, so building the same OpticalPSF again is fast.  We can only
+        # use the cache if all the arguments are hashable by value though.
+        if gsparams is None and (interpolant is None or isinstance(interpolant, basestring)):
+            sbp, stepk = _optical_psf_cache(*args)
+        else:
+            sbp, stepk = _make_optical_sbprofile(*args)
 
-        # Boost Airy image size by a user-specifed pad_factor to allow for larger, aberrated PSFs
-        stepk = stepk_airy / pad_factor
-        
-        # Get a good FFT size.  i.e. 2^n or 3 * 2^n.
-        npix = goodFFTSize(int(np.ceil(2. * np.pi / (dx_lookup * stepk) )))
-
-        # Make the psf image using this dx and array shape
-        optimage = galsim.optics.psf_image(
-            lam_over_diam=lam_over_diam, dx=dx_lookup, array_shape=(npix, npix), defocus=defocus,
-            astig1=astig1, astig2=astig2, coma1=coma1, coma2=coma2, trefoil1=trefoil1,
-            trefoil2=trefoil2, spher=spher, circular_pupil=circular_pupil, obscuration=obscuration,
-            flux=flux, nstruts=nstruts, strut_thick=strut_thick, strut_angle=strut_angle)
-        
-        # Initialize the SBProfile
-        GSObject.__init__(
-            self, galsim.InterpolatedImage(optimage, x_interpolant=interpolant, dx=dx_lookup,
-                                           calculate_stepk=True, calculate_maxk=True,
-                                           use_true_center=False, normalization='sb',
-                                           gsparams=gsparams))
-        # The above procedure ends up with a larger image than we really need, which
-        # means that the default stepK value will be smaller than we need.  
-        # Hence calculate_stepk=True and calculate_maxk=True above.
+        # Initialize the SBProfile.  Make a new SBProfile object that shares the implementation
+        # of the cached one, so transformations of this object don't affect the cached one.
+        GSObject.__init__(self, sbp.__class__(sbp))
 
         if not suppress_warning:
             # Check the calculated stepk value.  If it is smaller than stepk, then there might
@@ -203,6 +188,101 @@ class OpticalPSF(GSObject):
 
 
 
+def _make_optical_sbprofile(lam_over_diam, defocus, astig1, astig2, coma1, coma2, trefoil1,
+                            trefoil2, spher, circular_pupil, obscuration, interpolant, oversampling,
+                            pad_factor, flux, nstruts, strut_thick, strut_angle_rad, gsparams):
+    """Build the SBProfile for an OpticalPSF.
+
+    The arguments are the same as for OpticalPSF, except that the strut angle is given in radians.
+
+    @returns sbp, stepk     The SBProfile and the stepk used to build the wavefront.
+    """
+    # Choose dx for lookup table using Nyquist for optical aperture and the specified
+    # oversampling factor
+    dx_lookup = .5 * lam_over_diam / oversampling
+
+    # Start with the stepk value for Airy:
+    if gsparams is None:
+        stepk_airy = _airy_stepk_cache(lam_over_diam, obscuration)
+    else:
+        stepk_airy = _airy_stepk(lam_over_diam, obscuration, gsparams)
+
+    # Boost Airy image size by a user-specifed pad_factor to allow for larger, aberrated PSFs
+    stepk = stepk_airy / pad_factor
+
+    # Get a good FFT size.  i.e. 2^n or 3 * 2^n.
+    npix = goodFFTSize(int(np.ceil(2. * np.pi / (dx_lookup * stepk) )))
+
+    # Make the psf image using this dx and array shape
+    optimage = galsim.optics.psf_image(
+        lam_over_diam=lam_over_diam, dx=dx_lookup, array_shape=(npix, npix), defocus=defocus,
+        astig1=astig1, astig2=astig2, coma1=coma1, coma2=coma2, trefoil1=trefoil1,
+        trefoil2=trefoil2, spher=spher, circular_pupil=circular_pupil, obscuration=obscuration,
+        flux=flux, nstruts=nstruts, strut_thick=strut_thick,
+        strut_angle=strut_angle_rad*galsim.radians)
+
+    # The procedure above ends up with a larger image than we really need, which
+    # means that the default stepK value will be smaller than we need.  
+    # Hence calculate_stepk=True and calculate_maxk=True below.
+    ii = galsim.InterpolatedImage(optimage, x_interpolant=interpolant, dx=dx_lookup,
+                                  calculate_stepk=True, calculate_maxk=True,
+                                  use_true_center=False, normalization='sb', gsparams=gsparams)
+    return ii.SBProfile, stepk
+
+def _airy_stepk(lam_over_diam, obscuration, gsparams=None):
+    return galsim.Airy(lam_over_diam=lam_over_diam, obscuration=obscuration,
+                       gsparams=gsparams).stepK()
+
+_airy_stepk_cache = utilities.LRU_Cache(_airy_stepk, maxsize=100)
+_optical_psf_cache = utilities.LRU_Cache(_make_optical_sbprofile, maxsize=32)
+
+def setOpticalPSFCacheSize(maxsize):
+    """Set the number of OpticalPSF profiles that are cached.
+
+    The most recently built OpticalPSF profiles (with the default interpolant or one given as a
+    string, and no gsparams) are cached, so building an OpticalPSF with the same parameters again
+    just reuses the stored profile.  The default is to cache 32 profiles.  Setting the size to 0
+    clears the cache.
+
+    @param maxsize  The maximum number of profiles to store.
+    """
+    _optical_psf_cache.resize(maxsize)
+
+def _make_pupil_basis(array_shape, dx, lam_over_diam, circular_pupil, obscuration, nstruts,
+                      strut_thick, strut_angle_rad):
+    """Calculate the pupil plane and the values of the Zernike polynomials in the pupil.
+
+    Returns a tuple (in_pupil, basis), where in_pupil is the array of Bools returned by
+    generate_pupil_plane and basis is an array of shape (8, N), where N is the number of 
+    illuminated points.  The rows of basis are the Zernike polynomials for defocus, astig1, 
+    astig2, coma1, coma2, trefoil1, trefoil2 and spher at the illuminated points, in the Noll
+    convention, so the wavefront phase (in units of wavelength) is the dot product of the 
+    aberration coefficients with basis.
+    """
+    rho_all, in_pupil = generate_pupil_plane(
+        array_shape=array_shape, dx=dx, lam_over_diam=lam_over_diam, circular_pupil=circular_pupil,
+        obscuration=obscuration, nstruts=nstruts, strut_thick=strut_thick,
+        strut_angle=strut_angle_rad*galsim.radians)
+
+    # It is much faster to pull out the elements we will use once, rather than use the 
+    # subscript each time.
+    rho = rho_all[in_pupil]  
+    rhosq = np.abs(rho)**2
+    rho2 = rho * rho
+    rho3 = rho2 * rho
+    basis = np.array([
+        np.sqrt(3.) * (2. * rhosq - 1.),                    # defocus
+        np.sqrt(6.) * rho2.imag,                            # astig1
+        np.sqrt(6.) * rho2.real,                            # astig2
+        np.sqrt(8.) * (3. * rhosq - 2.) * rho.imag,         # coma1
+        np.sqrt(8.) * (3. * rhosq - 2.) * rho.real,         # coma2
+        np.sqrt(8.) * rho3.imag,                            # trefoil1
+        np.sqrt(8.) * rho3.real,                            # trefoil2
+        np.sqrt(5.) * (6. * rhosq**2 - 6. * rhosq + 1.) ])  # spher
+    return in_pupil, basis
+
+_pupil_basis_cache = utilities.LRU_Cache(_make_pupil_basis, maxsize=16)
+
 def generate_pupil_plane(array_shape=(256, 256), dx=1., lam_over_diam=2., circular_pupil=True,
                          obscuration=0., nstruts=0, strut_thick=0.05, 
                          strut_angle=0.*galsim.degrees):
@@ -256,7 +336,7 @@ def generate_pupil_plane(array_shape=(256, 256), dx=1., lam_over_diam=2., circul
         if not isinstance(strut_angle, galsim.Angle):
             raise TypeError("Input kwarg strut_angle must be a galsim.Angle instance.")
         # Add the initial rotation if requested, converting to radians
-        if strut_angle.rad != 0.:
+        if strut_angle.rad() != 0.:
             kxs, kys = utilities.rotate_xy(kx, ky, -strut_angle) # strut rotation +=ve, so coords
                                                                  # rotation -ve!
         else:
@@ -320,55 +400,24 @@ def wavefront(array_shape=(256, 256), dx=1., lam_over_diam=2., defocus=0., astig
 
     Outputs the wavefront for kx, ky locations corresponding to kxky(array_shape).
     """
-    # Define the pupil coordinates and non-zero regions based on input kwargs
-    rho_all, in_pupil = generate_pupil_plane(
-        array_shape=array_shape, dx=dx, lam_over_diam=lam_over_diam, circular_pupil=circular_pupil,
-        obscuration=obscuration, nstruts=nstruts, strut_thick=strut_thick, strut_angle=strut_angle)
+    # Get the pupil and the Zernike polynomials in the pupil.  These only depend on the array
+    # and the pupil geometry, so they are cached for use with different aberrations.
+    if nstruts > 0:
+        if not isinstance(strut_angle, galsim.Angle):
+            raise TypeError("Input kwarg strut_angle must be a galsim.Angle instance.")
+        strut_angle_rad = strut_angle.rad()
+    else:
+        strut_angle_rad = 0.
+    in_pupil, basis = _pupil_basis_cache(
+        tuple(array_shape), dx, lam_over_diam, circular_pupil, obscuration, nstruts, strut_thick,
+        strut_angle_rad)
 
     # Then make wavefront image
     wf = np.zeros(array_shape, dtype=complex)
 
-    # It is much faster to pull out the elements we will use once, rather than use the 
-    # subscript each time.  At the end we will fill the appropriate part of wf with the
-    # values calculated from this rho vector.
-    rho = rho_all[in_pupil]  
-    rhosq = np.abs(rho)**2
-
-    # Old version for reference:
-
-    # rho2 = rho * rho
-    # rho3 = rho2 * rho
-    # temp = np.zeros(rho.shape, dtype=complex)
-    # Defocus:
-    # temp += np.sqrt(3.) * (2. * rhosq - 1.) * defocus
-    # Astigmatism:
-    # temp += np.sqrt(6.) * ( astig1 * rho2.imag + astig2 * rho2.real )
-    # Coma:
-    # temp += np.sqrt(8.) * (3. * rhosq - 2.) * ( coma1 * rho.imag + coma2 * rho.real )
-    # Trefoil (one of the arrows along x2)
-    # temp += np.sqrt(8.) * ( trefoil1 * rho3.imag + trefoil2 * rho3.real )
-    # Spherical aberration
-    # temp += np.sqrt(5.) * (6. * rhosq**2 - 6. * rhosq + 1.) * spher
-
-    # Faster to use Horner's method in rho:
-    temp = (
-            # Constant terms:
-            -np.sqrt(3.) * defocus
-
-            # Terms with rhosq, but no rho, rho**2, etc.
-            + rhosq * ( 2. * np.sqrt(3.) * defocus
-                        - 6. * np.sqrt(5.) * spher
-                        + rhosq * (6. * np.sqrt(5.) * spher) )
-
-            # Now the powers of rho.
-            # We eventually take the real part
-            + ( rho * ( (rhosq-2./3.) * (3. * np.sqrt(8.) * (coma2 - 1j * coma1))
-                        + rho * ( (np.sqrt(6.) * (astig2 - 1j * astig1))
-                                   + rho * (np.sqrt(8.) * (trefoil2 - 1j * trefoil1)) 
-                                )
-                      ) 
-              ).real
-    )
+    # The phase is just the weighted sum of the polynomials.
+    aberrations = np.array([defocus, astig1, astig2, coma1, coma2, trefoil1, trefoil2, spher])
+    temp = np.dot(aberrations, basis)
 
     wf[in_pupil] = np.exp(2j * np.pi * temp)
 
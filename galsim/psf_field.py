@@ -0,0 +1,231 @@
+# Copyright 2012, 2013 The GalSim developers:
+# https://github.com/GalSim-developers
+#
+# This file is part of GalSim: The modular galaxy image simulation toolkit.
+#
+# GalSim is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GalSim is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GalSim.  If not, see <http://www.gnu.org/licenses/>
+#
+"""@file psf_field.py
+A PSF that varies across the focal plane, precomputed on a grid of positions.
+"""
+
+import galsim
+import numpy as np
+
+
+class PSFField(object):
+    """A spatially varying PSF, tabulated as images on a regular grid of focal-plane positions.
+
+    Building a complicated PSF (e.g. an OpticalPSF or a DES_PSFEx model) separately for every
+    object in a large field can easily cost more than drawing the galaxies.  A PSFField builds the
+    PSF once at each node of a coarse nx x ny grid covering the focal plane, draws it into a
+    postage stamp, and keeps all the stamps in a single (ny, nx, stamp_size, stamp_size) array.
+    The PSF at an arbitrary position is then returned as an InterpolatedImage of the bilinear
+    interpolation of the stamps at the four surrounding grid nodes.  Positions outside the grid
+    use the PSF at the nearest point on the edge of the grid.
+
+    Initialization
+    --------------
+
+        >>> psf_field = galsim.PSFField(psf_func, bounds, nx, ny, dx)
+
+    builds the grid by calling `psf_func(pos)` for each node position `pos`, where `psf_func` is
+    any function taking a galsim.PositionD and returning a GSObject.  E.g.
+
+        >>> def psf_func(pos):
+        ...     r = np.sqrt((pos.x-1024.)**2 + (pos.y-1024.)**2) / 1024.
+        ...     return galsim.OpticalPSF(lam_over_diam=0.8, defocus=0.3*r, astig1=0.1*r)
+        >>> psf_field = galsim.PSFField(psf_func, galsim.BoundsD(0,2048,0,2048), 9, 9, dx=0.2)
+        >>> psf = psf_field.getPSF(galsim.PositionD(312.4, 1800.7))
+
+    A PSFField may be written to a FITS file with the write() method, and read back in with
+
+        >>> psf_field = galsim.PSFField(file_name='psf_field.fits')
+
+    @param psf_func       A function that takes a galsim.PositionD and returns the PSF at that
+                          position as a GSObject.
+    @param bounds         A galsim.BoundsD or galsim.BoundsI giving the region of the focal plane
+                          to be covered by the grid.  The grid nodes include the corners.
+    @param nx             The number of grid nodes in the x direction (must be >= 2).
+    @param ny             The number of grid nodes in the y direction (must be >= 2).
+    @param dx             The pixel scale to use for the stamps.
+    @param stamp_size     The size of the stamps.  (Default `stamp_size = None`, which means to
+                          use the size GSObject.draw() picks for the PSF at the center of the grid.)
+    @param dtype          The numpy data type to use for storing the stamps.
+                          (Default `dtype = numpy.float32`)
+    @param x_interpolant  The real-space interpolant to use for the returned InterpolatedImage.
+                          (Default `x_interpolant = None`, which uses the InterpolatedImage default.)
+    @param file_name      Instead of building the grid, read a PSFField from this file, which
+                          should have been written by PSFField.write().  If this is given, no other
+                          parameters (other than `x_interpolant`) should be given.
+    @param dir            Optionally, a directory to prepend to `file_name`.
+    """
+    # Only the file_name form may be used as a config input field.
+    _req_params = { 'file_name' : str }
+    _opt_params = { 'dir' : str }
+    _single_params = []
+    _takes_rng = False
+    _takes_logger = False
+
+    def __init__(self, psf_func=None, bounds=None, nx=None, ny=None, dx=None, stamp_size=None,
+                 dtype=np.float32, x_interpolant=None, file_name=None, dir=None):
+
+        self.x_interpolant = x_interpolant
+
+        if file_name is not None:
+            if (psf_func is not None or bounds is not None or nx is not None or ny is not None or
+                dx is not None or stamp_size is not None):
+                raise TypeError("Cannot provide both file_name and grid parameters to PSFField")
+            import os
+            if dir is not None:
+                file_name = os.path.join(dir, file_name)
+            self._read(file_name)
+            return
+
+        if psf_func is None or bounds is None or nx is None or ny is None or dx is None:
+            raise TypeError("PSFField requires psf_func, bounds, nx, ny and dx")
+        if nx < 2 or ny < 2:
+            raise ValueError("PSFField requires at least 2 grid nodes in each direction")
+        if dx <= 0.:
+            raise ValueError("PSFField requires dx > 0")
+
+        self.xmin = float(bounds.xmin)
+        self.xmax = float(bounds.xmax)
+        self.ymin = float(bounds.ymin)
+        self.ymax = float(bounds.ymax)
+        if self.xmax <= self.xmin or self.ymax <= self.ymin:
+            raise ValueError("PSFField requires bounds with xmax > xmin and ymax > ymin")
+        self.nx = int(nx)
+        self.ny = int(ny)
+        self.dx = float(dx)
+
+        if stamp_size is None:
+            center = galsim.PositionD(0.5 * (self.xmin + self.xmax), 0.5 * (self.ymin + self.ymax))
+            stamp_size = psf_func(center).draw(dx=self.dx).array.shape[0]
+        self.stamp_size = int(stamp_size)
+
+        self.stamps = np.empty((self.ny, self.nx, self.stamp_size, self.stamp_size), dtype=dtype)
+        # Draw each node into a double precision image, then store it in the stamps array.
+        im = galsim.ImageD(self.stamp_size, self.stamp_size)
+        for j in range(self.ny):
+            for i in range(self.nx):
+                pos = galsim.PositionD(self._xnode(i), self._ynode(j))
+                psf_func(pos).draw(image=im, dx=self.dx)
+                self.stamps[j,i] = im.array
+
+    def _xnode(self, i):
+        return self.xmin + i * (self.xmax - self.xmin) / (self.nx - 1)
+
+    def _ynode(self, j):
+        return self.ymin + j * (self.ymax - self.ymin) / (self.ny - 1)
+
+    def _cell(self, u, n):
+        # Return the index of the lower node and the fractional distance to the upper node for a
+        # position u in grid units, clipping to the edge of the grid.
+        u = min(max(u, 0.), n - 1.)
+        i = min(int(u), n - 2)
+        return i, u - i
+
+    def getScale(self):
+        """Returns the pixel scale of the stored stamps.
+        """
+        return self.dx
+
+    def getPSFArray(self, pos):
+        """Returns the interpolated PSF stamp at position pos as a numpy array.
+
+        @param pos    The position (a galsim.PositionD or galsim.PositionI) at which to evaluate
+                      the PSF, in the same coordinates as the bounds of the grid.
+        """
+        ux = (pos.x - self.xmin) / (self.xmax - self.xmin) * (self.nx - 1)
+        uy = (pos.y - self.ymin) / (self.ymax - self.ymin) * (self.ny - 1)
+        i, fx = self._cell(ux, self.nx)
+        j, fy = self._cell(uy, self.ny)
+        s = self.stamps
+        ar = (1.-fx) * (1.-fy) * s[j,i]
+        ar += fx * (1.-fy) * s[j,i+1]
+        ar += (1.-fx) * fy * s[j+1,i]
+        ar += fx * fy * s[j+1,i+1]
+        return ar
+
+    def getPSF(self, pos, gsparams=None):
+        """Returns the PSF at position pos as an InterpolatedImage.
+
+        The flux of the returned PSF is the interpolated flux of the PSF at the grid nodes.
+
+        @param pos        The position (a galsim.PositionD or galsim.PositionI) at which to
+                          evaluate the PSF, in the same coordinates as the bounds of the grid.
+        @param gsparams   (Optional) A GSParams instance to pass to the constructed GSObject.
+
+        @returns an InterpolatedImage instance.
+        """
+        ar = self.getPSFArray(pos)
+        im = galsim.ImageView[ar.dtype.type](ar)
+        im.scale = self.dx
+        return galsim.InterpolatedImage(im, x_interpolant=self.x_interpolant, gsparams=gsparams)
+
+    def write(self, file_name, dir=None, clobber=True):
+        """Write the PSFField grid to a FITS file.
+
+        The stamps are written as a 3-d cube in the primary HDU, with the grid geometry stored
+        in the header.  The file may be read back in with `galsim.PSFField(file_name=file_name)`.
+
+        @param file_name  The name of the file to write to.
+        @param dir        Optionally, a directory to prepend to `file_name`.
+        @param clobber    Setting `clobber=True` will silently overwrite existing files.
+                          (Default `clobber = True`.)
+        """
+        import os
+        import warnings
+        from galsim import pyfits
+        if dir is not None:
+            file_name = os.path.join(dir, file_name)
+
+        cube = self.stamps.reshape(self.ny * self.nx, self.stamp_size, self.stamp_size)
+        hdu = pyfits.PrimaryHDU(cube)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            hdu.header.update("GS_SCALE", self.dx, "GalSim Image scale")
+            hdu.header.update("PF_XMIN", self.xmin, "PSFField minimum x position")
+            hdu.header.update("PF_XMAX", self.xmax, "PSFField maximum x position")
+            hdu.header.update("PF_YMIN", self.ymin, "PSFField minimum y position")
+            hdu.header.update("PF_YMAX", self.ymax, "PSFField maximum y position")
+            hdu.header.update("PF_NX", self.nx, "PSFField number of nodes in x")
+            hdu.header.update("PF_NY", self.ny, "PSFField number of nodes in y")
+        if os.path.isfile(file_name):
+            if clobber:
+                os.remove(file_name)
+            else:
+                raise IOError('File %r already exists'%file_name)
+        hdu.writeto(file_name)
+
+    def _read(self, file_name):
+        from galsim import pyfits
+        hdu_list = pyfits.open(file_name)
+        try:
+            header = hdu_list[0].header
+            self.dx = float(header['GS_SCALE'])
+            self.xmin = float(header['PF_XMIN'])
+            self.xmax = float(header['PF_XMAX'])
+            self.ymin = float(header['PF_YMIN'])
+            self.ymax = float(header['PF_YMAX'])
+            self.nx = int(header['PF_NX'])
+            self.ny = int(header['PF_NY'])
+            # FITS data are big-endian, so convert to native byte order while making the copy.
+            cube = hdu_list[0].data
+            cube = cube.astype(cube.dtype.newbyteorder('='))
+        finally:
+            hdu_list.close()
+        self.stamp_size = cube.shape[1]
+        self.stamps = cube.reshape(self.ny, self.nx, self.stamp_size, self.stamp_size)
@@ -259,6 +259,14 @@ class DistDeviate(_galsim.BaseDeviate):
     def __call__(self):
         return self._val()
 
+    def generate(self, n):
+        """Draw n new random numbers from the distribution, returning them as a numpy array.
+
+        This gives the same values as n successive calls to the DistDeviate, but does the
+        table lookup for all of them at once.
+        """
+        return self._inverseprobabilitytable(self._ud.generate(n))
+
     def reset(self, rng=0):
         _galsim.BaseDeviate.reset(self,rng)
         # Make sure the stored _ud object stays in sync with self.
@@ -352,6 +360,17 @@ Multiple Calling Options
 
 """
 
+_galsim.BaseDeviate.generate.__func__.__doc__ = """
+Draw n new random numbers from the distribution, returning them as a numpy array.
+
+This gives the same values as n successive calls to the deviate, but avoids the overhead of
+making n separate calls from python.  (So it is only valid for the derived classes, not for a
+pure BaseDeviate.)
+
+    >>> ud = galsim.UniformDeviate(215324)
+    >>> u = ud.generate(1000)     # A numpy array of 1000 uniform deviates.
+"""
+
 
 # UniformDeviate docstrings
 _galsim.UniformDeviate.__doc__ = """
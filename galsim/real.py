@@ -300,6 +300,11 @@ class RealGalaxyCatalog(object):
     To explore for the future: scaling with number of galaxies, adding more information as needed,
     and other i/o related issues.
 
+    For faster random access, a catalog can be converted to a packed single-file format with the
+    writePacked() method.  The packed file can then be given as `file_name` in place of the
+    original catalog, in which case the `image_dir`, `noise_dir` and `memmap` arguments are not
+    needed.
+
     The GalSim repository currently contains an example catalog, in
     `GalSim/examples/data/real_galaxy_catalog_example.fits` (100 galaxies), along with the
     corresponding image data in other files (`real_galaxy_images.fits` and
@@ -318,11 +323,20 @@ class RealGalaxyCatalog(object):
                       the same total I/O time (assuming you eventually use most of the image
                       files referenced in the catalog), but it is spread over the various calls to 
                       getGal and getPSF.  [Default `preload = False`]
+    @param memmap     Whether to memory-map the image files rather than reading them with pyfits.
+                      If memmap=True, each file is mapped once, and the galaxy and PSF images are
+                      returned as float32 (or float64) views of the mapped data, converted only
+                      to native byte order, with no locking needed after the first access to each
+                      file.  Since the mapped pages are shared through the operating system's
+                      page cache, several processes using the same files only hold one copy of
+                      the data in memory.  With preload=True, all of the files are mapped in the
+                      constructor, but no image data are read.  [Default `memmap = False`]
     @param noise_dir  The directory of the noise files if different from the directory of the 
                       image files.  [Default `noise_dir = image_dir`]
     """
     _req_params = { 'file_name' : str }
-    _opt_params = { 'image_dir' : str , 'dir' : str, 'preload' : bool, 'noise_dir' : str }
+    _opt_params = { 'image_dir' : str , 'dir' : str, 'preload' : bool, 'noise_dir' : str,
+                    'memmap' : bool }
     _single_params = []
     _takes_rng = False
     _takes_logger = True
@@ -331,7 +345,7 @@ class RealGalaxyCatalog(object):
     # the config structure.  It indicates that all we care about is the nobjects parameter.
     # So skip any other calculations that might normally be necessary on construction.
     def __init__(self, file_name, image_dir=None, dir=None, preload=False, nobjects_only=False,
-                 noise_dir=None, logger=None):
+                 noise_dir=None, logger=None, memmap=False):
         import os
         # First build full file_name
         if dir is None:
@@ -367,23 +381,39 @@ class RealGalaxyCatalog(object):
         # Hence this way of doing the conversion:
         self.ident = [ "%s"%val for val in ident ]
 
-        self.gal_file_name = cat.field('gal_filename') # file containing the galaxy image
-        self.psf_file_name = cat.field('PSF_filename') # file containing the PSF image
-
-        # Add the directories:
-        self.gal_file_name = [ os.path.join(self.image_dir,f) for f in self.gal_file_name ]
-        self.psf_file_name = [ os.path.join(self.image_dir,f) for f in self.psf_file_name ]
-
-        # We don't require the noise_filename column.  If it is not present, we will use
-        # Uncorrelated noise based on the variance column.
-        try:
-            self.noise_file_name = cat.field('noise_filename') # file containing the noise cf
-            self.noise_file_name = [ os.path.join(self.noise_dir,f) for f in self.noise_file_name ]
-        except:
-            self.noise_file_name = None
-
-        self.gal_hdu = cat.field('gal_hdu') # HDU containing the galaxy image
-        self.psf_hdu = cat.field('PSF_hdu') # HDU containing the PSF image
+        # A packed catalog (see writePacked) has all the images in a single array in the same
+        # file, so it has offsets and shapes into that array in place of file names and HDUs.
+        self.packed = 'gal_offset' in [ name.lower() for name in cat.columns.names ]
+        if self.packed:
+            self.gal_offset = cat.field('gal_offset')
+            self.gal_nx = cat.field('gal_nx')
+            self.gal_ny = cat.field('gal_ny')
+            self.psf_offset = cat.field('psf_offset')
+            self.psf_nx = cat.field('psf_nx')
+            self.psf_ny = cat.field('psf_ny')
+            self.noise_offset = cat.field('noise_offset') # -1 if there is no noise image
+            self.noise_nx = cat.field('noise_nx')
+            self.noise_ny = cat.field('noise_ny')
+            self.gal_file_name = self.psf_file_name = self.noise_file_name = None
+        else:
+            self.gal_file_name = cat.field('gal_filename') # file containing the galaxy image
+            self.psf_file_name = cat.field('PSF_filename') # file containing the PSF image
+
+            # Add the directories:
+            self.gal_file_name = [ os.path.join(self.image_dir,f) for f in self.gal_file_name ]
+            self.psf_file_name = [ os.path.join(self.image_dir,f) for f in self.psf_file_name ]
+
+            # We don't require the noise_filename column.  If it is not present, we will use
+            # Uncorrelated noise based on the variance column.
+            try:
+                self.noise_file_name = cat.field('noise_filename') # file containing the noise cf
+                self.noise_file_name = [ os.path.join(self.noise_dir,f) 
+                                         for f in self.noise_file_name ]
+            except:
+                self.noise_file_name = None
+
+            self.gal_hdu = cat.field('gal_hdu') # HDU containing the galaxy image
+            self.psf_hdu = cat.field('PSF_hdu') # HDU containing the PSF image
         self.pixel_scale = cat.field('pixel_scale') # pixel scale for image (could be different
         # if we have training data from other datasets... let's be general here and make it a 
         # vector in case of mixed training set)
@@ -395,6 +425,8 @@ class RealGalaxyCatalog(object):
 
         self.saved_noise_im = {}
         self.loaded_files = {}
+        self.mapped_files = {}
+        self.memmap = memmap
         self.logger = logger
 
         # The pyfits commands aren't thread safe.  So we need to make sure the methods that
@@ -424,6 +456,7 @@ class RealGalaxyCatalog(object):
             for f in self.loaded_files.values():
                 f.close()
         self.loaded_files = {}
+        self.mapped_files = {}
 
     def getNObjects(self) : return self.nobjects
     def getFileName(self) : return self.file_name
@@ -446,16 +479,24 @@ class RealGalaxyCatalog(object):
         There are memory implications to this, so we don't do this by default.  However, it can be 
         a big speedup if memory isn't an issue.  Especially if many (or all) of the images are 
         stored in the same file as different HDUs.
+
+        If the catalog was constructed with memmap=True, this just maps all the files, which
+        costs very little memory.
         """
         import numpy
         from multiprocessing import Lock
         if self.logger:
             self.logger.debug('RealGalaxyCatalog: start preload')
+        if self.packed:
+            self._getMappedFile(self.file_name)
+            return
         for file_name in numpy.concatenate((self.gal_file_name , self.psf_file_name)):
             # numpy sometimes add a space at the end of the string that is not present in 
             # the original file.  Stupid.  But this next line removes it.
             file_name = file_name.strip()
-            if file_name not in self.loaded_files:
+            if self.memmap:
+                self._getMappedFile(file_name)
+            elif file_name not in self.loaded_files:
                 if self.logger:
                     self.logger.debug('RealGalaxyCatalog: preloading %s',file_name)
                 # I use memmap=False, because I was getting problems with running out of 
@@ -487,15 +528,173 @@ class RealGalaxyCatalog(object):
             self.loaded_lock.release()
         return f
 
+    def _getMappedFile(self, file_name):
+        file_name = file_name.strip()
+        # Once a file is mapped, no lock is needed to read from it.
+        if file_name in self.mapped_files:
+            return self.mapped_files[file_name]
+        self.loaded_lock.acquire()
+        try:
+            # Check again in case two processes both got here at the same time.
+            if file_name not in self.mapped_files:
+                if self.logger:
+                    self.logger.debug('RealGalaxyCatalog: map file %s',file_name)
+                self.mapped_files[file_name] = _MappedFitsFile(file_name)
+            f = self.mapped_files[file_name]
+        finally:
+            self.loaded_lock.release()
+        return f
+
+    def _getPackedImage(self, offset, ny, nx):
+        # The packed images are the 1-d image in HDU 2 of a packed catalog file.
+        data = self._getMappedFile(self.file_name).getArray(2)
+        return _mappedImageView(data[offset:offset+ny*nx].reshape(ny,nx))
+
+    def writePacked(self, file_name, dir=None, clobber=True):
+        """Write the catalog, with all of its galaxy, PSF and noise images, to a single packed
+        file.
+
+        The packed file is a FITS file whose first extension is the catalog, with the galaxy, PSF
+        and noise image locations given as offsets and shapes in place of file names and HDUs.
+        The second extension is a single 1-d float32 array with all of the images concatenated.
+        Each distinct noise image is only stored once.  The packed file can be used in place of
+        the original catalog file:
+
+            >>> rgc.writePacked('real_galaxy_catalog_packed.fits')
+            >>> rgc_packed = galsim.RealGalaxyCatalog('real_galaxy_catalog_packed.fits')
+
+        A packed catalog always reads its images from a memory map of the packed file, so
+        selecting random galaxies from it needs no I/O other than the pages of the chosen images.
+        Note that the images are stored as float32, even if the original images were float64.
+
+        The images are written one at a time, so the whole training sample never needs to be in
+        memory at once.
+
+        @param file_name  The name of the file to write.
+        @param dir        Optionally, a directory to prepend to `file_name`.
+        @param clobber    Setting `clobber=True` will silently overwrite existing files.
+                          (Default `clobber = True`.)
+        """
+        import os
+        import numpy
+        import warnings
+        if dir is not None:
+            file_name = os.path.join(dir, file_name)
+        n = self.nobjects
+
+        # First pass: get the shapes of all the images, so we can lay out the packed array.
+        gal_shape = numpy.empty((n,2), dtype=int)
+        psf_shape = numpy.empty((n,2), dtype=int)
+        for i in range(n):
+            gal_shape[i] = self._getShape(i, 'gal')
+            psf_shape[i] = self._getShape(i, 'psf')
+        gal_size = gal_shape[:,0] * gal_shape[:,1]
+        psf_size = psf_shape[:,0] * psf_shape[:,1]
+        # Each galaxy is followed by its PSF.
+        gal_offset = numpy.zeros(n, dtype=numpy.int64)
+        gal_offset[1:] = numpy.cumsum(gal_size + psf_size)[:-1]
+        psf_offset = gal_offset + gal_size
+        ntot = int(numpy.sum(gal_size + psf_size))
+
+        # The noise images go at the end.  There are usually very few distinct ones.
+        noise_offset = -numpy.ones(n, dtype=numpy.int64)
+        noise_shape = numpy.zeros((n,2), dtype=int)
+        noise_images = []
+        noise_keys = {}
+        for i in range(n):
+            if self.packed:
+                key = self.noise_offset[i]
+                if key < 0: continue
+            elif self.noise_file_name is not None:
+                key = self.noise_file_name[i]
+            else:
+                continue
+            if key not in noise_keys:
+                im = self.getNoiseProperties(i)[0]
+                noise_keys[key] = (ntot, im.array.shape)
+                noise_images.append(im.array)
+                ntot += im.array.size
+            noise_offset[i], noise_shape[i] = noise_keys[key]
+
+        cols = []
+        ident = [ str(id) for id in self.ident ]
+        band = [ str(b) for b in self.band ]
+        cols.append( pyfits.Column(name='ident', format='A%d'%max(map(len,ident)), array=ident) )
+        cols.append( pyfits.Column(name='pixel_scale', format='f8', array=self.pixel_scale) )
+        cols.append( pyfits.Column(name='noise_variance', format='f8', array=self.variance) )
+        cols.append( pyfits.Column(name='mag', format='f8', array=self.mag) )
+        cols.append( pyfits.Column(name='band', format='A%d'%max(map(len,band)), array=band) )
+        cols.append( pyfits.Column(name='weight', format='f8', array=self.weight) )
+        cols.append( pyfits.Column(name='gal_offset', format='K', array=gal_offset) )
+        cols.append( pyfits.Column(name='gal_nx', format='J', array=gal_shape[:,1]) )
+        cols.append( pyfits.Column(name='gal_ny', format='J', array=gal_shape[:,0]) )
+        cols.append( pyfits.Column(name='psf_offset', format='K', array=psf_offset) )
+        cols.append( pyfits.Column(name='psf_nx', format='J', array=psf_shape[:,1]) )
+        cols.append( pyfits.Column(name='psf_ny', format='J', array=psf_shape[:,0]) )
+        cols.append( pyfits.Column(name='noise_offset', format='K', array=noise_offset) )
+        cols.append( pyfits.Column(name='noise_nx', format='J', array=noise_shape[:,1]) )
+        cols.append( pyfits.Column(name='noise_ny', format='J', array=noise_shape[:,0]) )
+        table = pyfits.new_table(pyfits.ColDefs(cols))
+        if os.path.isfile(file_name):
+            if clobber:
+                os.remove(file_name)
+            else:
+                raise IOError('File %r already exists'%file_name)
+        pyfits.HDUList([ pyfits.PrimaryHDU(), table ]).writeto(file_name)
+
+        # Now stream the images into a second extension.
+        header = pyfits.Header()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            header.update('SIMPLE', True)
+            header.update('BITPIX', -32)
+            header.update('NAXIS', 1)
+            header.update('NAXIS1', ntot)
+        stream = pyfits.StreamingHDU(file_name, header)
+        for i in range(n):
+            stream.write(self.getGal(i).array.astype('>f4'))
+            stream.write(self.getPSF(i).array.astype('>f4'))
+        for array in noise_images:
+            stream.write(array.astype('>f4'))
+        stream.close()
+
+    def _getShape(self, i, which):
+        # Get the shape of the galaxy or PSF image i, without reading the image if possible.
+        if self.packed:
+            if which == 'gal':
+                return self.gal_ny[i], self.gal_nx[i]
+            else:
+                return self.psf_ny[i], self.psf_nx[i]
+        if which == 'gal':
+            file_name, hdu = self.gal_file_name[i], self.gal_hdu[i]
+        else:
+            file_name, hdu = self.psf_file_name[i], self.psf_hdu[i]
+        loc = self._getMappedFile(file_name).hdus[hdu]
+        if loc is not None and len(loc[1]) == 2:
+            return loc[1]
+        elif which == 'gal':
+            return self.getGal(i).array.shape
+        else:
+            return self.getPSF(i).array.shape
+
     def getGal(self, i):
         """Returns the galaxy at index `i` as an ImageViewD object.
+
+        If the catalog was constructed with memmap=True, the image is an ImageViewF (or
+        ImageViewD) using the data type of the file instead.  For a packed catalog (see
+        writePacked), it is always an ImageViewF.
         """
         import numpy
         if self.logger:
             self.logger.debug('RealGalaxyCatalog %d: Start getGal',i)
-        if i >= len(self.gal_file_name):
+        if i >= self.nobjects:
             raise IndexError(
-                'index %d given to getGal is out of range (0..%d)'%(i,len(self.gal_file_name)-1))
+                'index %d given to getGal is out of range (0..%d)'%(i,self.nobjects-1))
+        if self.packed:
+            return self._getPackedImage(self.gal_offset[i], self.gal_ny[i], self.gal_nx[i])
+        if self.memmap:
+            f = self._getMappedFile(self.gal_file_name[i])
+            return _mappedImageView(f.getArray(self.gal_hdu[i]))
         f = self._getFile(self.gal_file_name[i])
         # For some reason the more elegant `with gal_lock:` syntax isn't working for me.
         # It gives an EOFError.  But doing an explicit acquire and release seems to work fine.
@@ -508,13 +707,22 @@ class RealGalaxyCatalog(object):
 
     def getPSF(self, i):
         """Returns the PSF at index `i` as an ImageViewD object.
+
+        If the catalog was constructed with memmap=True, the image is an ImageViewF (or
+        ImageViewD) using the data type of the file instead.  For a packed catalog (see
+        writePacked), it is always an ImageViewF.
         """
         import numpy
         if self.logger:
             self.logger.debug('RealGalaxyCatalog %d: Start getPSF',i)
-        if i >= len(self.psf_file_name):
+        if i >= self.nobjects:
             raise IndexError(
-                'index %d given to getPSF is out of range (0..%d)'%(i,len(self.psf_file_name)-1))
+                'index %d given to getPSF is out of range (0..%d)'%(i,self.nobjects-1))
+        if self.packed:
+            return self._getPackedImage(self.psf_offset[i], self.psf_ny[i], self.psf_nx[i])
+        if self.memmap:
+            f = self._getMappedFile(self.psf_file_name[i])
+            return _mappedImageView(f.getArray(self.psf_hdu[i]))
         f = self._getFile(self.psf_file_name[i])
         self.psf_lock.acquire()
         array = f[self.psf_hdu[i]].data
@@ -529,7 +737,22 @@ class RealGalaxyCatalog(object):
 
         if self.logger:
             self.logger.debug('RealGalaxyCatalog %d: Start getNoise',i)
-        if self.noise_file_name is None:
+        if self.packed:
+            if i >= self.nobjects:
+                raise IndexError(
+                    'index %d given to getNoise is out of range (0..%d)'%(i,self.nobjects-1))
+            offset = self.noise_offset[i]
+            if offset < 0:
+                im = None
+            elif offset in self.saved_noise_im:
+                im = self.saved_noise_im[offset]
+            else:
+                import numpy
+                # No lock needed here.  At worst, two threads both build the same image.
+                im = self._getPackedImage(offset, self.noise_ny[i], self.noise_nx[i])
+                im = galsim.ImageViewD(im.array.astype(numpy.float64))
+                self.saved_noise_im[offset] = im
+        elif self.noise_file_name is None:
             im = None
         else:
             if i >= len(self.noise_file_name):
@@ -575,6 +798,59 @@ class RealGalaxyCatalog(object):
         return cf
 
 
+class _MappedFitsFile(object):
+    """A read-only memory map of a FITS file, along with the location of the image data in each
+    HDU, so that images can be read without going through pyfits.
+
+    The headers are only parsed once, when the file is mapped.  After that, getArray is just a
+    numpy view into the mapped file, which is safe to call from several threads at once.
+    """
+    _bitpix_types = { 8 : '>u1', 16 : '>i2', 32 : '>i4', 64 : '>i8', -32 : '>f4', -64 : '>f8' }
+
+    def __init__(self, file_name):
+        import numpy
+        self.file_name = file_name
+        self.hdus = []
+        f = pyfits.open(file_name, memmap=False)
+        try:
+            for k in range(len(f)):
+                header = f[k].header
+                # We only handle images with no scaling of the values.
+                naxis = header.get('NAXIS',0)
+                if (naxis == 0 or header.get('XTENSION','IMAGE').strip() != 'IMAGE' or
+                    header['BITPIX'] not in self._bitpix_types or
+                    header.get('BSCALE',1) != 1 or header.get('BZERO',0) != 0):
+                    self.hdus.append(None)
+                else:
+                    offset = f.fileinfo(k)['datLoc']
+                    shape = tuple([ header['NAXIS%d'%j] for j in range(naxis,0,-1) ])
+                    dtype = numpy.dtype(self._bitpix_types[header['BITPIX']])
+                    self.hdus.append( (offset, shape, dtype) )
+        finally:
+            f.close()
+        self.data = numpy.memmap(file_name, dtype=numpy.uint8, mode='r')
+
+    def getArray(self, hdu):
+        """Returns the image in HDU number `hdu` as a (big-endian) numpy view of the mapped file.
+        """
+        import numpy
+        if hdu >= len(self.hdus) or self.hdus[hdu] is None:
+            raise IOError('HDU %d of file %s is not an unscaled image'%(hdu,self.file_name))
+        offset, shape, dtype = self.hdus[hdu]
+        return numpy.ndarray(shape, dtype=dtype, buffer=self.data, offset=offset)
+
+def _mappedImageView(array):
+    # FITS data are big-endian, so we need to convert to native byte order, which makes a copy
+    # of just this one stamp.  Keep the precision of float32 or float64 data; other types are
+    # converted to float64.
+    import numpy
+    if array.dtype.type in [ numpy.float32, numpy.float64 ]:
+        array = array.astype(array.dtype.newbyteorder('='))
+    else:
+        array = array.astype(numpy.float64)
+    return galsim.ImageView[array.dtype.type](array)
+
+
 def simReal(real_galaxy, target_PSF, target_pixel_scale, g1=0.0, g2=0.0, rotation_angle=None, 
             rand_rotate=True, rng=None, target_flux=1000.0, image=None):
     """Function to simulate images (no added noise) from real galaxy training data.
@@ -106,6 +106,53 @@ class SimpleGenerator:
     def __init__(self, obj): self._obj = obj
     def __call__(self): return self._obj
             
+class LRU_Cache(object):
+    """A simple least-recently-used cache for the results of a function.
+
+    Calling the cache with some arguments returns the result of calling `user_function` with
+    those arguments.  The results for the most recent `maxsize` distinct sets of arguments are
+    stored and reused.  The arguments must be hashable.
+
+        >>> cache = LRU_Cache(expensive_function, maxsize=16)
+        >>> result = cache(arg1, arg2)    # Calls expensive_function(arg1, arg2)
+        >>> result = cache(arg1, arg2)    # Returns the stored result
+    """
+    def __init__(self, user_function, maxsize=1024):
+        import collections
+        import threading
+        self.user_function = user_function
+        self.maxsize = maxsize
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, *key):
+        with self._lock:
+            if key in self._results:
+                # Move it to the end, since it is now the most recently used.
+                result = self._results.pop(key)
+                self._results[key] = result
+                return result
+        result = self.user_function(*key)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
+
+    def resize(self, maxsize):
+        """Change the maximum number of stored results, dropping the oldest ones if necessary.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """Remove all stored results.
+        """
+        with self._lock:
+            self._results.clear()
+
 class AttributeDict(object):
     """Dictionary class that allows for easy initialization and refs to key values via attributes.
 
@@ -0,0 +1,114 @@
+// -*- c++ -*-
+/*
+ * Copyright 2012, 2013 The GalSim developers:
+ * https://github.com/GalSim-developers
+ *
+ * This file is part of GalSim: The modular galaxy image simulation toolkit.
+ *
+ * GalSim is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * GalSim is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with GalSim.  If not, see <http://www.gnu.org/licenses/>
+ */
+#ifndef DISK_CACHE_H
+#define DISK_CACHE_H
+
+/**
+ * @file DiskCache.h
+ *
+ * @brief An optional on-disk cache for the expensive precomputed tables used by some profiles.
+ *
+ * SBSersic, SBKolmogorov, SBAiry and SBExponential each precompute tables (k-space lookup
+ * tables, photon-shooting interval trees) that depend only on a few shape parameters and the
+ * GSParams.  These are kept in an in-memory LRUCache, but every new process has to rebuild
+ * them.  If a cache directory is set (either with setInfoCacheDir or with the environment
+ * variable GALSIM_INFO_CACHE_DIR), the tables are also written to files in that directory the
+ * first time they are computed, and later processes read them back rather than recomputing.
+ *
+ * Each entry is a single file whose name is a hash of its key.  The file stores the full
+ * key, which is checked on reading, so a hash collision just looks like a cache miss.
+ * Files are written to a temporary name and then renamed, so several processes can share
+ * the same directory safely.
+ */
+
+#include <string>
+#include <vector>
+#include "GSParams.h"
+#include "Table.h"
+
+namespace galsim {
+
+    /**
+     * @brief Set the directory to use for the on-disk cache of profile tables.
+     *
+     * An empty string disables the on-disk cache.  The directory must already exist.
+     */
+    void setInfoCacheDir(const std::string& dir);
+
+    /// @brief Get the directory used for the on-disk cache of profile tables.
+    std::string getInfoCacheDir();
+
+    /**
+     * @brief The key for an entry in the on-disk cache.
+     *
+     * A key is a name identifying what kind of table is stored, plus any number of
+     * parameter values, which are added with operator<<.  Adding a GSParamsPtr adds all of
+     * its fields.
+     */
+    class DiskCacheKey
+    {
+    public:
+        DiskCacheKey(const std::string& name) : _name(name) {}
+
+        DiskCacheKey& operator<<(double x) { _values.push_back(x); return *this; }
+        DiskCacheKey& operator<<(const GSParamsPtr& gsparams);
+
+        const std::string& getName() const { return _name; }
+        const std::vector<double>& getValues() const { return _values; }
+
+        /// @brief The file name (without directory) used for this key.
+        std::string getFileName() const;
+
+    private:
+        std::string _name;
+        std::vector<double> _values;
+    };
+
+    /**
+     * @brief Read the data for the given key from the on-disk cache.
+     *
+     * Returns false if the cache is disabled or there is no valid entry for this key, in
+     * which case data is left empty.
+     */
+    bool ReadDiskCache(const DiskCacheKey& key, std::vector<double>& data);
+
+    /**
+     * @brief Write the data for the given key to the on-disk cache.
+     *
+     * This is a no-op if the cache is disabled.  Failures to write are not errors, since
+     * the cache is only an optimization.
+     */
+    void WriteDiskCache(const DiskCacheKey& key, const std::vector<double>& data);
+
+    /// @brief Append the entries of a lookup table to data.
+    void WriteTable(const Table<double,double>& table, std::vector<double>& data);
+
+    /**
+     * @brief Add the entries written by WriteTable to table.
+     *
+     * On input, pos is the index in data where the table starts.  On output, it is the
+     * index just past the table.  Returns false if data do not hold a valid table.
+     */
+    bool ReadTable(const std::vector<double>& data, size_t& pos, Table<double,double>& table);
+
+}
+
+#endif
@@ -62,6 +62,7 @@
 #include <stdexcept>
 #include <deque>
 #include <complex>
+#include <string>
 #include <boost/shared_ptr.hpp>
 
 #include "fftw3.h"
@@ -196,6 +197,85 @@ namespace galsim {
      */
     int goodFFTSize(int input);
 
+    /**
+     * @brief Set the number of threads FFTW may use for each KTable or XTable transform.
+     *
+     * Multi-threaded transforms are only a win for fairly large arrays, so the threads are
+     * only used for transforms of size N >= min_size.  Smaller transforms are always done
+     * in a single thread.
+     *
+     * This has no effect unless GalSim was compiled with the FFTW threads library
+     * (libfftw3_threads); otherwise nthreads is silently ignored.  Use getFFTThreads()
+     * to see whether the setting took effect.
+     *
+     * @param nthreads  The number of threads to use.  (nthreads <= 0 means use 1.)
+     * @param min_size  The minimum N for which to use more than one thread. (default = 1024)
+     */
+    void setFFTThreads(int nthreads, int min_size=1024);
+
+    /**
+     * @brief Get the number of threads FFTW may use for large transforms.
+     *
+     * This will always return 1 if GalSim was not compiled with the FFTW threads library.
+     */
+    int getFFTThreads();
+
+    /**
+     * @brief Set the largest FFT size for which to plan with FFTW_MEASURE.
+     *
+     * The plans for the KTable and XTable transforms are cached, so each size only needs to
+     * be planned once.  Sizes N <= max_size are planned with FFTW_MEASURE, which is slower
+     * to plan but faster to execute.  Larger sizes can take a very long time to measure, so
+     * they use FFTW_ESTIMATE unless the wisdom for that size has already been loaded with
+     * loadFFTWisdom().
+     *
+     * This only affects plans made after it is called.
+     *
+     * @param max_size  The largest N to plan with FFTW_MEASURE. (default = 1024)
+     */
+    void setFFTMeasureSize(int max_size);
+
+    /**
+     * @brief Load FFTW wisdom from a file, e.g. one written by saveFFTWisdom().
+     *
+     * @param file_name  The name of the wisdom file.
+     * @returns whether the file was read successfully.
+     */
+    bool loadFFTWisdom(const std::string& file_name);
+
+    /**
+     * @brief Save the FFTW wisdom accumulated so far to a file.
+     *
+     * @param file_name  The name of the wisdom file.
+     */
+    void saveFFTWisdom(const std::string& file_name);
+
+    //! @cond
+
+    /**
+     * @brief A lock to hold while making or destroying an FFTW plan.
+     *
+     * The fftw_execute function is the only thread-safe FFTW routine.  All the plan creation
+     * and destruction calls need to be serialized, so any code that calls fftw_plan_* or
+     * fftw_destroy_plan should do so while holding an FFTWPlanLock:
+     *
+     *     { FFTWPlanLock lock; plan = fftw_plan_dft_1d(...); }
+     *
+     * The lock is released when the FFTWPlanLock goes out of scope.
+     */
+    class FFTWPlanLock
+    {
+    public:
+        FFTWPlanLock();
+        ~FFTWPlanLock();
+    private:
+        // Not copyable
+        FFTWPlanLock(const FFTWPlanLock&);
+        void operator=(const FFTWPlanLock&);
+    };
+
+    //! @endcond
+
     class XTable;
 
     /**
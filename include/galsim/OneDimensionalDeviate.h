@@ -153,6 +153,27 @@ namespace galsim {
          */
         std::list<Interval> split(double smallFlux);
 
+        /**
+         * @brief Constructor from the values saved by write().
+         *
+         * This recreates an Interval that has already been split, without needing to
+         * integrate the flux again.
+         * @param[in] fluxDensity  The function giving flux (= unnormalized probability) density.
+         * @param[in] data         Pointer to the values written by write().
+         * @param[in] isRadial     Set true if this is an annulus on a plane, false for linear
+         *                         interval.
+         * @param[in] gsparams     GSParams object storing constants that control the accuracy of
+         *                         operations.
+         */
+        Interval(const FluxDensity& fluxDensity, const double* data, bool isRadial,
+                 const GSParamsPtr& gsparams);
+
+        /// @brief Append the state of a split Interval to data.  (cf. constructor above)
+        void write(std::vector<double>& data) const;
+
+        /// @brief The number of values written by write().
+        static const int nWriteValues = 6;
+
     private:
 
         const FluxDensity* _fluxDensityPtr;  // Pointer to the parent FluxDensity function.
@@ -230,6 +251,36 @@ namespace galsim {
             const FluxDensity& fluxDensity, std::vector<double>& range, bool isRadial,
             const GSParamsPtr& gsparams);
 
+        /**
+         * @brief Constructor from the values saved by write().
+         *
+         * This skips the integrations needed to split the domain into intervals, so it is
+         * much faster than the regular constructor.  This is used for the on-disk cache
+         * in DiskCache.h.
+         * @param[in] fluxDensity  The FluxDensity being sampled.  No copy is made, original must 
+         *                         stay in existence.
+         * Throws an SBError if data does not hold a valid deviate starting at pos.
+         *
+         * @param[in] data         The values written by write() for the same FluxDensity.
+         * @param[in,out] pos      The index in data at which the deviate's values start.
+         *                         On output, the index just past them.
+         * @param[in] isRadial     Set true for an axisymmetric function on the plane; false 
+         *                         for linear domain.
+         * @param[in] gsparams     GSParams object storing constants that control the accuracy of
+         *                         operations, if different from the default.
+         */
+        OneDimensionalDeviate(
+            const FluxDensity& fluxDensity, const std::vector<double>& data, size_t& pos,
+            bool isRadial, const GSParamsPtr& gsparams);
+
+        /**
+         * @brief Append the state of this deviate to data.
+         *
+         * The values can be used to construct an equivalent deviate later with the above
+         * constructor.
+         */
+        void write(std::vector<double>& data) const;
+
         /// @brief Return total flux in positive regions of FluxDensity
         double getPositiveFlux() const {return _positiveFlux;}
 
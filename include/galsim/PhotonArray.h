@@ -63,6 +63,17 @@ namespace galsim {
          */
         PhotonArray(std::vector<double>& vx, std::vector<double>& vy, std::vector<double>& vflux);
 
+        /** 
+         * @brief Construct from three C arrays of length N.
+         *
+         * @param[in] N     number of photons
+         * @param[in] x     array of photon x coordinates
+         * @param[in] y     array of photon y coordinates
+         * @param[in] flux  array of photon fluxes
+         */
+        PhotonArray(int N, const double* x, const double* y, const double* flux) :
+            _x(x,x+N), _y(y,y+N), _flux(flux,flux+N), _is_correlated(false) {}
+
         /**
          * @brief Accessor for array size
          *
@@ -120,6 +131,18 @@ namespace galsim {
          */
         double getFlux(int i) const { return _flux[i]; }
 
+        /**
+         * @brief Access the underlying arrays of the x, y, and flux values.
+         *
+         * These pointers are only valid until the size of the PhotonArray changes
+         * (e.g. from a call to append or reserve).
+         *
+         * @returns pointer to the first element (or 0 if the array is empty)
+         */
+        double* getXArray() { return _x.empty() ? 0 : &_x[0]; }
+        double* getYArray() { return _y.empty() ? 0 : &_y[0]; }
+        double* getFluxArray() { return _flux.empty() ? 0 : &_flux[0]; }
+
         /**
          * @brief Return sum of all photons' fluxes
          *
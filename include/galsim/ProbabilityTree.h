@@ -56,6 +56,7 @@ namespace galsim {
         typedef typename std::vector<FluxData>::iterator VecIter;
         class FluxCompare;
     public:
+        typedef typename std::vector<FluxData>::const_iterator const_iterator;
         using std::vector<FluxData>::size;
         using std::vector<FluxData>::begin;
         using std::vector<FluxData>::end;
@@ -227,6 +227,15 @@ namespace galsim {
          */
         double operator()() { return _val(); }
 
+        /**
+         * @brief Draw n new random numbers from the distribution, storing them in data.
+         *
+         * This gives the same values as n successive calls to operator(), but avoids the
+         * overhead of making n separate calls from python.
+         */
+        void generate(int n, double* data)
+        { for (int i=0; i<n; ++i) data[i] = _val(); }
+
    protected:
 
         boost::shared_ptr<rng_type> _rng;
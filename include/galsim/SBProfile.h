@@ -402,6 +402,12 @@ namespace galsim {
          *                         Poisson statistics for `N` samples 
          * @param[in] add_to_image Whether to add flux to the existing image rather than draw
          *                         an image from scratch.  
+         * @param[in] nthreads  The number of threads to use for shooting the photons.
+         *                      This is only used when the number of photons is known ahead of
+         *                      time (i.e. max_extra_noise = 0) and is more than a single chunk
+         *                      of 100000 photons.  The results are reproducible for a given
+         *                      ud and nthreads, but differ from the nthreads = 1 results.
+         *                      (default = 1)
          * @returns The total flux of photons the landed inside the image bounds.
          *
          * Note: N is input as a double so that very large values of N don't have to
@@ -411,7 +417,8 @@ namespace galsim {
         template <typename T>
         double drawShoot(
             ImageView<T> image, double N, UniformDeviate ud, double gain,
-            double max_extra_noise, bool poisson_flux, bool add_to_image) const;
+            double max_extra_noise, bool poisson_flux, bool add_to_image,
+            int nthreads=1) const;
 
 
         /** 
@@ -123,7 +123,8 @@ namespace galsim {
         mutable boost::shared_ptr<OneDimensionalDeviate> _sampler;   
 
         // Helper functions used internally:
-        void buildFT() const;
+        void buildFT() const;    // Reads the FT from the disk cache or calls calculateFT.
+        void calculateFT() const;
         void calculateHLR() const;
         double calculateMissingFluxRadius(double missing_flux_frac) const;
     };
@@ -34,6 +34,7 @@
 
 /* object data type */
 
+#include <vector>
 #include "../CppShear.h"
 #include "../Image.h"
 #include "../Bounds.h"
@@ -401,6 +402,71 @@ namespace hsm {
         double guess_y_centroid = -1000.0,
         boost::shared_ptr<HSMParams> hsmparams = boost::shared_ptr<HSMParams>());
 
+    /**
+     * @brief Carry out PSF correction for a batch of galaxies.
+     *
+     * This does the same thing as EstimateShearView for each of the gal_images, but the loop
+     * over objects is done in C++, optionally using several threads.  Errors in the measurement
+     * of any one object do not stop the others from being measured.  Instead, the failed object
+     * gets a default CppShapeData with error_message set to the text of the exception.
+     *
+     * @param[in] gal_images       The ImageViews for the galaxies being measured.
+     * @param[in] PSF_images       The ImageViews for the PSFs.  This may have either the same
+     *                             length as gal_images, or length 1, in which case the same PSF
+     *                             is used for every galaxy.
+     * @param[in] gal_mask_images  The ImageViews for the masks to be applied to the galaxies.
+     *                             This may have either the same length as gal_images, or length 1.
+     *                             Each mask must have the same bounds as its galaxy image.
+     * @param[out] results         The results for each galaxy.  This is resized to the length of
+     *                             gal_images.
+     * @param[in] nthreads         The number of threads to use.  Each thread measures every
+     *                             nthreads-th object, so the results do not depend on nthreads.
+     *
+     * The other parameters are as described for EstimateShearView, and are the same for every
+     * object.
+     */
+    template <typename T, typename U>
+    void EstimateShearBatch(
+        const std::vector<ImageView<T> >& gal_images,
+        const std::vector<ImageView<U> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images,
+        std::vector<CppShapeData>& results,
+        float sky_var = 0.0, const char *shear_est = "REGAUSS",
+        const std::string& recompute_flux = "FIT",
+        double guess_sig_gal = 5.0, double guess_sig_PSF = 3.0, double precision = 1.0e-6,
+        double guess_x_centroid = -1000.0, double guess_y_centroid = -1000.0,
+        boost::shared_ptr<HSMParams> hsmparams = boost::shared_ptr<HSMParams>(),
+        int nthreads = 1);
+
+    /**
+     * @brief Measure the adaptive moments of a batch of objects.
+     *
+     * This does the same thing as FindAdaptiveMomView for each of the object_images, but the loop
+     * over objects is done in C++, optionally using several threads.  As for EstimateShearBatch,
+     * failed measurements are reported in the error_message of the corresponding result rather
+     * than by throwing an exception.
+     *
+     * @param[in] object_images      The ImageViews for the objects being measured.
+     * @param[in] object_mask_images The ImageViews for the masks to be applied to the objects.
+     *                               This may have either the same length as object_images, or
+     *                               length 1.
+     * @param[out] results           The results for each object.  This is resized to the length
+     *                               of object_images.
+     * @param[in] nthreads           The number of threads to use.
+     *
+     * The other parameters are as described for FindAdaptiveMomView, and are the same for every
+     * object.
+     */
+    template <typename T>
+    void FindAdaptiveMomBatch(
+        const std::vector<ImageView<T> >& object_images,
+        const std::vector<ImageView<int> >& object_mask_images,
+        std::vector<CppShapeData>& results,
+        double guess_sig = 5.0, double precision = 1.0e-6, double guess_x_centroid = -1000.0,
+        double guess_y_centroid = -1000.0,
+        boost::shared_ptr<HSMParams> hsmparams = boost::shared_ptr<HSMParams>(),
+        int nthreads = 1);
+
     /**
      * @brief Carry out PSF correction.
      *
@@ -25,6 +25,7 @@
 #endif
 
 #include "boost/python.hpp"
+#include "NumpyHelper.h"
 #include "hsm/PSFCorr.h"
 
 namespace bp = boost::python;
@@ -175,6 +176,176 @@ struct PyCppShapeData {
                 "Estimate PSF-corrected shear for a galaxy, given a PSF (and some optional args).");
     };
 
+    // Extract a list of ImageView<T> from a python list of ImageViews.
+    template <typename T>
+    static void ExtractViews(const bp::object& images, std::vector<ImageView<T> >& views)
+    {
+        int n = bp::len(images);
+        views.reserve(n);
+        for (int i=0; i<n; ++i) views.push_back(bp::extract<ImageView<T> >(images[i]));
+    }
+
+    // Make a new 1-d numpy array of length n, and set data to point to its data.
+    template <typename T>
+    static bp::object MakeBatchArray(int n, T*& data)
+    {
+        npy_intp shape[1] = { n };
+        PyObject* array = PyArray_SimpleNew(1, shape, NumPyTraits<T>::getCode());
+        if (!array) bp::throw_error_already_set();
+        data = GetNumpyArrayData<T>(array);
+        return bp::object(bp::handle<>(array));
+    }
+
+    // Pack the results of a batch measurement into a dict with a numpy array for each of the
+    // numerical fields of CppShapeData and a list of the error messages.  See _batchResults
+    // in hsm.py for how these are turned into the structured array returned to the user.
+    static bp::dict PackBatchResults(const std::vector<CppShapeData>& results)
+    {
+        int n = results.size();
+        int32_t *moments_status, *moments_n_iter, *correction_status;
+        double *observed_e1, *observed_e2, *moments_sigma, *moments_amp;
+        double *moments_centroid_x, *moments_centroid_y, *moments_rho4;
+        double *corrected_e1, *corrected_e2, *corrected_g1, *corrected_g2;
+        double *corrected_shape_err, *resolution_factor;
+
+        bp::dict d;
+        d["moments_status"] = MakeBatchArray(n, moments_status);
+        d["observed_e1"] = MakeBatchArray(n, observed_e1);
+        d["observed_e2"] = MakeBatchArray(n, observed_e2);
+        d["moments_sigma"] = MakeBatchArray(n, moments_sigma);
+        d["moments_amp"] = MakeBatchArray(n, moments_amp);
+        d["moments_centroid_x"] = MakeBatchArray(n, moments_centroid_x);
+        d["moments_centroid_y"] = MakeBatchArray(n, moments_centroid_y);
+        d["moments_rho4"] = MakeBatchArray(n, moments_rho4);
+        d["moments_n_iter"] = MakeBatchArray(n, moments_n_iter);
+        d["correction_status"] = MakeBatchArray(n, correction_status);
+        d["corrected_e1"] = MakeBatchArray(n, corrected_e1);
+        d["corrected_e2"] = MakeBatchArray(n, corrected_e2);
+        d["corrected_g1"] = MakeBatchArray(n, corrected_g1);
+        d["corrected_g2"] = MakeBatchArray(n, corrected_g2);
+        d["corrected_shape_err"] = MakeBatchArray(n, corrected_shape_err);
+        d["resolution_factor"] = MakeBatchArray(n, resolution_factor);
+
+        bp::list error_message;
+        for (int i=0; i<n; ++i) {
+            const CppShapeData& r = results[i];
+            moments_status[i] = r.moments_status;
+            observed_e1[i] = r.observed_shape.getE1();
+            observed_e2[i] = r.observed_shape.getE2();
+            moments_sigma[i] = r.moments_sigma;
+            moments_amp[i] = r.moments_amp;
+            moments_centroid_x[i] = r.moments_centroid.x;
+            moments_centroid_y[i] = r.moments_centroid.y;
+            moments_rho4[i] = r.moments_rho4;
+            moments_n_iter[i] = r.moments_n_iter;
+            correction_status[i] = r.correction_status;
+            corrected_e1[i] = r.corrected_e1;
+            corrected_e2[i] = r.corrected_e2;
+            corrected_g1[i] = r.corrected_g1;
+            corrected_g2[i] = r.corrected_g2;
+            corrected_shape_err[i] = r.corrected_shape_err;
+            resolution_factor[i] = r.resolution_factor;
+            error_message.append(r.error_message);
+        }
+        d["error_message"] = error_message;
+        return d;
+    }
+
+    template <typename U, typename V>
+    static bp::dict DoEstimateShearBatch(
+        const bp::object& gal_images, const bp::object& PSF_images,
+        const bp::object& gal_mask_images, float sky_var, const char* shear_est,
+        const std::string& recompute_flux, double guess_sig_gal, double guess_sig_PSF,
+        double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        std::vector<ImageView<U> > gal_views;
+        std::vector<ImageView<V> > PSF_views;
+        std::vector<ImageView<int> > mask_views;
+        ExtractViews(gal_images, gal_views);
+        ExtractViews(PSF_images, PSF_views);
+        ExtractViews(gal_mask_images, mask_views);
+        std::vector<CppShapeData> results;
+        EstimateShearBatch(gal_views, PSF_views, mask_views, results, sky_var, shear_est,
+                           recompute_flux, guess_sig_gal, guess_sig_PSF, precision,
+                           guess_x_centroid, guess_y_centroid, hsmparams, nthreads);
+        return PackBatchResults(results);
+    }
+
+    // The python interface to EstimateShearBatch.  The galaxy images must all be ImageViewF or
+    // all ImageViewD, and likewise for the PSF images.  See EstimateShearBatch in hsm.py.
+    static bp::dict PyEstimateShearBatch(
+        const bp::object& gal_images, const bp::object& PSF_images,
+        const bp::object& gal_mask_images, float sky_var, const char* shear_est,
+        const std::string& recompute_flux, double guess_sig_gal, double guess_sig_PSF,
+        double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        if (bp::len(gal_images) == 0 || bp::len(PSF_images) == 0) {
+            PyErr_SetString(PyExc_ValueError, "EstimateShearBatch requires at least one image");
+            bp::throw_error_already_set();
+        }
+        bool gal_float = bp::extract<ImageView<float> >(gal_images[0]).check();
+        bool PSF_float = bp::extract<ImageView<float> >(PSF_images[0]).check();
+        if (gal_float && PSF_float)
+            return DoEstimateShearBatch<float,float>(
+                gal_images, PSF_images, gal_mask_images, sky_var, shear_est, recompute_flux,
+                guess_sig_gal, guess_sig_PSF, precision, guess_x_centroid, guess_y_centroid,
+                hsmparams, nthreads);
+        else if (gal_float)
+            return DoEstimateShearBatch<float,double>(
+                gal_images, PSF_images, gal_mask_images, sky_var, shear_est, recompute_flux,
+                guess_sig_gal, guess_sig_PSF, precision, guess_x_centroid, guess_y_centroid,
+                hsmparams, nthreads);
+        else if (PSF_float)
+            return DoEstimateShearBatch<double,float>(
+                gal_images, PSF_images, gal_mask_images, sky_var, shear_est, recompute_flux,
+                guess_sig_gal, guess_sig_PSF, precision, guess_x_centroid, guess_y_centroid,
+                hsmparams, nthreads);
+        else
+            return DoEstimateShearBatch<double,double>(
+                gal_images, PSF_images, gal_mask_images, sky_var, shear_est, recompute_flux,
+                guess_sig_gal, guess_sig_PSF, precision, guess_x_centroid, guess_y_centroid,
+                hsmparams, nthreads);
+    }
+
+    template <typename U>
+    static bp::dict DoFindAdaptiveMomBatch(
+        const bp::object& object_images, const bp::object& object_mask_images,
+        double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        std::vector<ImageView<U> > object_views;
+        std::vector<ImageView<int> > mask_views;
+        ExtractViews(object_images, object_views);
+        ExtractViews(object_mask_images, mask_views);
+        std::vector<CppShapeData> results;
+        FindAdaptiveMomBatch(object_views, mask_views, results, guess_sig, precision,
+                             guess_x_centroid, guess_y_centroid, hsmparams, nthreads);
+        return PackBatchResults(results);
+    }
+
+    // The python interface to FindAdaptiveMomBatch.  The images must all be ImageViewF or
+    // all ImageViewD.  See FindAdaptiveMomBatch in hsm.py.
+    static bp::dict PyFindAdaptiveMomBatch(
+        const bp::object& object_images, const bp::object& object_mask_images,
+        double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        if (bp::len(object_images) == 0) {
+            PyErr_SetString(PyExc_ValueError, "FindAdaptiveMomBatch requires at least one image");
+            bp::throw_error_already_set();
+        }
+        if (bp::extract<ImageView<float> >(object_images[0]).check())
+            return DoFindAdaptiveMomBatch<float>(
+                object_images, object_mask_images, guess_sig, precision,
+                guess_x_centroid, guess_y_centroid, hsmparams, nthreads);
+        else
+            return DoFindAdaptiveMomBatch<double>(
+                object_images, object_mask_images, guess_sig, precision,
+                guess_x_centroid, guess_y_centroid, hsmparams, nthreads);
+    }
+
     static void wrap() {
         static char const * doc = 
             "CppShapeData object represents information from the HSM moments and PSF-correction\n"
@@ -207,6 +378,22 @@ struct PyCppShapeData {
         wrapTemplates<double, float>();
         wrapTemplates<float, double>();
         wrapTemplates<int, int>();
+
+        bp::def("_EstimateShearBatch", &PyEstimateShearBatch,
+                (bp::arg("gal_images"), bp::arg("PSF_images"), bp::arg("gal_mask_images"),
+                 bp::arg("sky_var")=0.0, bp::arg("shear_est")="REGAUSS",
+                 bp::arg("recompute_flux")="FIT",
+                 bp::arg("guess_sig_gal")=5.0, bp::arg("guess_sig_PSF")=3.0,
+                 bp::arg("precision")=1.0e-6, bp::arg("guess_x_centroid")=-1000.0,
+                 bp::arg("guess_y_centroid")=-1000.0, bp::arg("hsmparams")=bp::object(),
+                 bp::arg("nthreads")=1),
+                "Estimate PSF-corrected shears for a list of galaxies.  cf. EstimateShearBatch");
+        bp::def("_FindAdaptiveMomBatch", &PyFindAdaptiveMomBatch,
+                (bp::arg("object_images"), bp::arg("object_mask_images"),
+                 bp::arg("guess_sig")=5.0, bp::arg("precision")=1.0e-6,
+                 bp::arg("guess_x_centroid")=-1000.0, bp::arg("guess_y_centroid")=-1000.0,
+                 bp::arg("hsmparams")=bp::object(), bp::arg("nthreads")=1),
+                "Find adaptive moments of a list of images.  cf. FindAdaptiveMomBatch");
     }
 };
 
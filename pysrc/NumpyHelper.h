@@ -43,6 +43,7 @@
     #define NPY_ARRAY_ALIGNED NPY_ALIGNED
     #define NPY_ARRAY_WRITEABLE NPY_WRITEABLE
     #define NPY_ARRAY_ENSURECOPY NPY_ENSURECOPY
+    #define NPY_ARRAY_IN_ARRAY NPY_IN_ARRAY
 #endif
 
 namespace bp = boost::python;
@@ -202,6 +203,15 @@ static bp::object MakeNumpyArray(
     return bp::object(bp::handle<>(result));
 }
 
+// Get a contiguous 1-d numpy array of doubles from the input, which may be a numpy array
+// of any type or any python sequence.  This only makes a copy if it needs to.
+static inline bp::object GetDoubleArray(const bp::object& v)
+{
+    PyObject* array = PyArray_FROMANY(v.ptr(), NPY_FLOAT64, 1, 1, NPY_ARRAY_IN_ARRAY);
+    if (!array) bp::throw_error_already_set();
+    return bp::object(bp::handle<>(array));
+}
+
 // Check the type of the numpy array, input as array.
 // - It should be the same type as required for data (T).
 // - It should have dimensions dim
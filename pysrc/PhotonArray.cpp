@@ -27,6 +27,7 @@
 #include "boost/python.hpp"
 #include "boost/python/stl_iterator.hpp"
 
+#include "NumpyHelper.h"
 #include "PhotonArray.h"
 
 namespace bp = boost::python;
@@ -38,26 +39,50 @@ namespace galsim {
 
         static PhotonArray * construct(bp::object const & vx, bp::object const & vy,
                                        bp::object const & vflux) {
-            Py_ssize_t size = bp::len(vx);
-            if (size != bp::len(vx)) {
+            bp::object ax = GetDoubleArray(vx);
+            bp::object ay = GetDoubleArray(vy);
+            bp::object aflux = GetDoubleArray(vflux);
+            int size = GetNumpyArrayDim(ax.ptr(), 0);
+            if (size != GetNumpyArrayDim(ay.ptr(), 0)) {
                 PyErr_SetString(PyExc_ValueError,
                                 "Length of vx array does not match  length of vy array");
                 bp::throw_error_already_set();
             }
-            if (size != bp::len(vflux)) {
+            if (size != GetNumpyArrayDim(aflux.ptr(), 0)) {
                 PyErr_SetString(PyExc_ValueError,
                                 "Length of vx array does not match length of vflux array");
                 bp::throw_error_already_set();
             }
-            std::vector<double> vx_(size);
-            std::vector<double> vy_(size);
-            std::vector<double> vflux_(size);
-            for (Py_ssize_t n = 0; n < size; ++n) {
-                vx_[n] = bp::extract<double>(vx[n]);
-                vy_[n] = bp::extract<double>(vy[n]);
-                vflux_[n] = bp::extract<double>(vflux[n]);
-            }
-            return new PhotonArray(vx_, vy_, vflux_);
+            return new PhotonArray(
+                size, GetNumpyArrayData<double>(ax.ptr()), GetNumpyArrayData<double>(ay.ptr()),
+                GetNumpyArrayData<double>(aflux.ptr()));
+        }
+
+        // Make a numpy array that is a view into the PhotonArray's data.  
+        // The numpy array keeps the python PhotonArray object alive.
+        static bp::object makeArray(bp::object self, double* data)
+        {
+            const PhotonArray& photons = bp::extract<const PhotonArray&>(self);
+            boost::shared_ptr<double> owner(data, PythonDeleter<double>(self.ptr()));
+            return MakeNumpyArray(data, photons.size(), 1, false, owner);
+        }
+
+        static bp::object getXArray(bp::object self)
+        {
+            PhotonArray& photons = bp::extract<PhotonArray&>(self);
+            return makeArray(self, photons.getXArray());
+        }
+
+        static bp::object getYArray(bp::object self)
+        {
+            PhotonArray& photons = bp::extract<PhotonArray&>(self);
+            return makeArray(self, photons.getYArray());
+        }
+
+        static bp::object getFluxArray(bp::object self)
+        {
+            PhotonArray& photons = bp::extract<PhotonArray&>(self);
+            return makeArray(self, photons.getFluxArray());
         }
 
         static void wrap() {
@@ -87,6 +112,15 @@ namespace galsim {
                 .def("getX", &PhotonArray::getX)
                 .def("getY", &PhotonArray::getY)
                 .def("getFlux", &PhotonArray::getFlux)
+                .add_property("x", &getXArray,
+                              "A numpy array view of the photons' x positions.\n"
+                              "This is only valid until the size of the PhotonArray changes.")
+                .add_property("y", &getYArray,
+                              "A numpy array view of the photons' y positions.\n"
+                              "This is only valid until the size of the PhotonArray changes.")
+                .add_property("flux", &getFluxArray,
+                              "A numpy array view of the photons' fluxes.\n"
+                              "This is only valid until the size of the PhotonArray changes.")
                 .def("getTotalFlux", &PhotonArray::getTotalFlux)
                 .def("setTotalFlux", &PhotonArray::setTotalFlux)
                 .def("append", &PhotonArray::append)
@@ -25,6 +25,7 @@
 #endif
 
 #include "boost/python.hpp"
+#include "NumpyHelper.h"
 #include "Random.h"
 
 namespace bp = boost::python;
@@ -60,6 +61,21 @@ namespace galsim {
 
     struct PyBaseDeviate {
 
+        // Draw n values with a single call from python, returning them as a numpy array.
+        static bp::object generate(BaseDeviate& dev, int n)
+        {
+            if (n < 0) {
+                PyErr_SetString(PyExc_ValueError, "Cannot generate a negative number of values");
+                bp::throw_error_already_set();
+            }
+            npy_intp shape[1] = { n };
+            PyObject* array = PyArray_SimpleNew(1, shape, NPY_FLOAT64);
+            if (!array) bp::throw_error_already_set();
+            bp::object result(bp::handle<>(array));
+            dev.generate(n, GetNumpyArrayData<double>(array));
+            return result;
+        }
+
         static void wrap() {
             bp::class_<BaseDeviateCallBack>
                 pyBaseDeviate("BaseDeviate", "", bp::no_init);
@@ -76,6 +92,7 @@ namespace galsim {
                 .def("clearCache", &BaseDeviate::clearCache, "")
                 .def("serialize", &BaseDeviate::serialize, "")
                 .def("duplicate", &BaseDeviate::duplicate, "")
+                .def("generate", &generate, (bp::arg("n")), "")
                 .enable_pickling()
                 ;
         }
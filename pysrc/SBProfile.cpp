@@ -29,8 +29,10 @@
 #include "boost/python.hpp"
 #include "boost/python/stl_iterator.hpp"
 
+#include "NumpyHelper.h"
 #include "SBProfile.h"
-#include "FFT.h"  // For goodFFTSize
+#include "FFT.h"  // For goodFFTSize, setFFTThreads, etc.
+#include "DiskCache.h"  // For setInfoCacheDir, getInfoCacheDir
 
 namespace bp = boost::python;
 
@@ -167,6 +169,120 @@ namespace galsim {
     struct PySBProfile 
     {
 
+        // Evaluate xValue at many positions with a single call from python.
+        static bp::object xValues(const SBProfile& prof, const bp::object& x, const bp::object& y)
+        {
+            bp::object ax = GetDoubleArray(x);
+            bp::object ay = GetDoubleArray(y);
+            int n = GetNumpyArrayDim(ax.ptr(), 0);
+            if (n != GetNumpyArrayDim(ay.ptr(), 0)) {
+                PyErr_SetString(PyExc_ValueError, "Length of x array does not match length of y");
+                bp::throw_error_already_set();
+            }
+            const double* xdata = GetNumpyArrayData<double>(ax.ptr());
+            const double* ydata = GetNumpyArrayData<double>(ay.ptr());
+
+            npy_intp shape[1] = { n };
+            PyObject* array = PyArray_SimpleNew(1, shape, NPY_FLOAT64);
+            if (!array) bp::throw_error_already_set();
+            bp::object result(bp::handle<>(array));
+            double* val = GetNumpyArrayData<double>(array);
+            for (int i=0; i<n; ++i) val[i] = prof.xValue(Position<double>(xdata[i], ydata[i]));
+            return result;
+        }
+
+        // Draw a single profile for drawMany.  This does the same thing as the python
+        // GSObject.draw method does for an image with defined bounds and scale.
+        template <typename T>
+        static double drawOne(
+            SBProfile prof, ImageView<T> image, double offx, double offy,
+            double gain, double wmult, bool flux_norm, bool add_to_image, bool use_true_center)
+        {
+            double scale = image.getScale();
+            if (!image.getBounds().isDefined() || scale <= 0.) {
+                PyErr_SetString(PyExc_ValueError,
+                                "drawMany requires images with defined bounds and scale");
+                bp::throw_error_already_set();
+            }
+            if (use_true_center) {
+                // For even-sized images, the SBProfile draw function centers the result in the
+                // pixel just up and right of the real center.  So shift it back.
+                if ((image.getXMax() - image.getXMin() + 1) % 2 == 0) offx -= 0.5;
+                if ((image.getYMax() - image.getYMin() + 1) % 2 == 0) offy -= 0.5;
+            }
+            if (offx != 0. || offy != 0.) prof.applyShift(offx*scale, offy*scale);
+            if (!add_to_image) image.setZero();
+            if (flux_norm) gain /= scale*scale;
+            return prof.draw(image, gain, wmult);
+        }
+
+        // Try to draw onto the image if it is an Image<T> or ImageView<T>.
+        template <typename T>
+        static bool tryDrawOne(
+            const SBProfile& prof, const bp::object& image, double offx, double offy,
+            double gain, double wmult, bool flux_norm, bool add_to_image, bool use_true_center,
+            double& added_flux)
+        {
+            bp::extract<Image<T>&> ximage(image);
+            if (ximage.check()) {
+                added_flux = drawOne(prof, ximage().view(), offx, offy, gain, wmult,
+                                     flux_norm, add_to_image, use_true_center);
+                return true;
+            }
+            bp::extract<ImageView<T> > xview(image);
+            if (xview.check()) {
+                added_flux = drawOne(prof, xview(), offx, offy, gain, wmult,
+                                     flux_norm, add_to_image, use_true_center);
+                return true;
+            }
+            return false;
+        }
+
+        // Draw a list of GSObjects onto a list of existing images with a single call
+        // from python.  See drawMany in base.py for the python interface.
+        static void drawMany(
+            const bp::object& objects, const bp::object& images, const bp::object& offsets,
+            double gain, double wmult, bool flux_norm, bool add_to_image, bool use_true_center)
+        {
+            int n = bp::len(objects);
+            if (bp::len(images) != n || (!offsets.is_none() && bp::len(offsets) != n)) {
+                PyErr_SetString(PyExc_ValueError,
+                                "drawMany requires the same number of objects, images and offsets");
+                bp::throw_error_already_set();
+            }
+            for (int i=0; i<n; ++i) {
+                const SBProfile& prof = bp::extract<const SBProfile&>(
+                    objects[i].attr("SBProfile"));
+                bp::object image = images[i];
+
+                double offx = 0., offy = 0.;
+                if (!offsets.is_none() && !bp::object(offsets[i]).is_none()) {
+                    bp::object offset = offsets[i];
+                    bp::extract<Position<double> > xposd(offset);
+                    bp::extract<Position<int> > xposi(offset);
+                    if (xposd.check()) {
+                        offx = xposd().x; offy = xposd().y;
+                    } else if (xposi.check()) {
+                        offx = xposi().x; offy = xposi().y;
+                    } else {
+                        offx = bp::extract<double>(offset[0]);
+                        offy = bp::extract<double>(offset[1]);
+                    }
+                }
+
+                double added_flux = 0.;
+                if (!tryDrawOne<float>(prof, image, offx, offy, gain, wmult,
+                                       flux_norm, add_to_image, use_true_center, added_flux) &&
+                    !tryDrawOne<double>(prof, image, offx, offy, gain, wmult,
+                                        flux_norm, add_to_image, use_true_center, added_flux)) {
+                    PyErr_SetString(PyExc_TypeError,
+                                    "drawMany requires a list of ImageF or ImageD images");
+                    bp::throw_error_already_set();
+                }
+                image.attr("added_flux") = added_flux;
+            }
+        }
+
         template <typename U, typename W>
         static void wrapTemplates(W & wrapper) {
             // We don't need to wrap templates in a separate function, but it keeps us
@@ -176,16 +292,19 @@ namespace galsim {
             wrapper
                 .def("drawShoot", 
                      (double (SBProfile::*)(ImageView<U>, double, UniformDeviate,
-                                            double, double, bool, bool)
+                                            double, double, bool, bool, int)
                       const)&SBProfile::drawShoot,
                      (bp::arg("image"), bp::arg("N")=0., bp::arg("ud"),
                       bp::arg("gain")=1., bp::arg("max_extra_noise")=0.,
-                      bp::arg("poisson_flux")=true, bp::arg("add_to_image")=false),
+                      bp::arg("poisson_flux")=true, bp::arg("add_to_image")=false,
+                      bp::arg("nthreads")=1),
                      "Draw object into existing image using photon shooting.\n"
                      "\n"
                      "Setting optional integer arg possionFlux != 0 allows profile flux to vary\n"
                      "according to Poisson statistics for N samples.\n"
                      "\n"
+                     "Setting nthreads > 1 shoots the photons in multiple threads.\n"
+                     "\n"
                      "Returns total flux of photons that landed inside image bounds.")
                 .def("draw", 
                      (double (SBProfile::*)(ImageView<U>, double, double) const)&SBProfile::draw,
@@ -239,6 +358,10 @@ namespace galsim {
                      "Return value of SBProfile at a chosen 2d position in real space.\n"
                      "May not be implemented for derived classes (e.g. SBConvolve) that\n"
                      "require an FFT to determine real-space values.")
+                .def("xValues", &xValues, (bp::arg("x"), bp::arg("y")),
+                     "Return values of SBProfile at many 2d positions in real space.\n"
+                     "x and y are 1-d arrays (or lists) of the positions, and the result\n"
+                     "is a numpy array of the values.")
                 .def("kValue", &SBProfile::kValue,
                      "Return value of SBProfile at a chosen 2d position in k-space.")
                 .def("maxK", &SBProfile::maxK, "Value of k beyond which aliasing can be neglected")
@@ -280,8 +403,33 @@ namespace galsim {
         PySBProfile::wrap();
         PyGSParams::wrap();
 
+        bp::def("_drawMany", &PySBProfile::drawMany,
+                (bp::arg("objects"), bp::arg("images"), bp::arg("offsets"),
+                 bp::arg("gain"), bp::arg("wmult"), bp::arg("flux_norm"),
+                 bp::arg("add_to_image"), bp::arg("use_true_center")),
+                "Draw a list of GSObjects onto a list of images.  cf. galsim.drawMany");
         bp::def("goodFFTSize", &goodFFTSize, (bp::arg("input_size")),
                 "Round up to the next larger 2^n or 3x2^n.");
+        bp::def("setFFTThreads", &setFFTThreads,
+                (bp::arg("nthreads"), bp::arg("min_size")=1024),
+                "Set the number of threads FFTW may use for transforms of size N >= min_size.\n"
+                "This has no effect unless GalSim was compiled with the fftw3_threads library.");
+        bp::def("getFFTThreads", &getFFTThreads,
+                "Get the number of threads FFTW may use for large transforms.");
+        bp::def("setFFTMeasureSize", &setFFTMeasureSize, (bp::arg("max_size")),
+                "Set the largest FFT size N for which to plan with FFTW_MEASURE.\n"
+                "Larger sizes use FFTW_ESTIMATE unless wisdom for them has been loaded.");
+        bp::def("loadFFTWisdom", &loadFFTWisdom, (bp::arg("file_name")),
+                "Load FFTW wisdom from a file.  Returns whether the file was read successfully.");
+        bp::def("saveFFTWisdom", &saveFFTWisdom, (bp::arg("file_name")),
+                "Save the FFTW wisdom accumulated so far to a file.");
+        bp::def("setInfoCacheDir", &setInfoCacheDir, (bp::arg("dir")),
+                "Set a directory in which to cache the lookup tables built by Sersic,\n"
+                "Kolmogorov, Airy and Exponential profiles, so other processes can reuse them.\n"
+                "An empty string disables the cache.  The default is the value of the\n"
+                "GALSIM_INFO_CACHE_DIR environment variable, if set.");
+        bp::def("getInfoCacheDir", &getInfoCacheDir,
+                "Get the directory used to cache profile lookup tables.");
     }
 
 } // namespace galsim
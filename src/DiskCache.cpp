@@ -0,0 +1,211 @@
+// -*- c++ -*-
+/*
+ * Copyright 2012, 2013 The GalSim developers:
+ * https://github.com/GalSim-developers
+ *
+ * This file is part of GalSim: The modular galaxy image simulation toolkit.
+ *
+ * GalSim is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * GalSim is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with GalSim.  If not, see <http://www.gnu.org/licenses/>
+ */
+
+//#define DEBUGLOGGING
+
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <cmath>
+#include <sstream>
+#include <iomanip>
+#include <stdint.h>
+#include <unistd.h>
+#include "DiskCache.h"
+#include "Std.h"
+
+#ifdef DEBUGLOGGING
+#include <fstream>
+//std::ostream* dbgout = new std::ofstream("debug.out");
+//int verbose_level = 1;
+#endif
+
+namespace galsim {
+
+    // The directory is initialized from the environment on first use.
+    static bool info_cache_dir_set = false;
+    static std::string info_cache_dir;
+
+    static const std::string& GetInfoCacheDir()
+    {
+        if (!info_cache_dir_set) {
+            const char* env = std::getenv("GALSIM_INFO_CACHE_DIR");
+            if (env) info_cache_dir = env;
+            info_cache_dir_set = true;
+        }
+        return info_cache_dir;
+    }
+
+    void setInfoCacheDir(const std::string& dir)
+    {
+        info_cache_dir = dir;
+        info_cache_dir_set = true;
+    }
+
+    std::string getInfoCacheDir()
+    { return GetInfoCacheDir(); }
+
+    DiskCacheKey& DiskCacheKey::operator<<(const GSParamsPtr& gsparams)
+    {
+        const GSParams& gsp = *gsparams;
+        *this << gsp.minimum_fft_size << gsp.maximum_fft_size
+            << gsp.alias_threshold << gsp.stepk_minimum_hlr << gsp.maxk_threshold
+            << gsp.kvalue_accuracy << gsp.xvalue_accuracy << gsp.table_spacing
+            << gsp.realspace_relerr << gsp.realspace_abserr
+            << gsp.integration_relerr << gsp.integration_abserr
+            << gsp.shoot_accuracy << gsp.shoot_relerr << gsp.shoot_abserr
+            << gsp.allowed_flux_variation << gsp.range_division_for_extrema
+            << gsp.small_fraction_of_flux;
+        return *this;
+    }
+
+    // 64 bit FNV-1a hash of the name and the bytes of the values.
+    static uint64_t HashBytes(uint64_t hash, const unsigned char* bytes, size_t n)
+    {
+        for (size_t i=0; i<n; ++i) {
+            hash ^= bytes[i];
+            hash *= 1099511628211ULL;
+        }
+        return hash;
+    }
+
+    std::string DiskCacheKey::getFileName() const
+    {
+        uint64_t hash = 14695981039346656037ULL;
+        hash = HashBytes(hash, reinterpret_cast<const unsigned char*>(_name.c_str()),
+                         _name.size());
+        if (_values.size() > 0)
+            hash = HashBytes(hash, reinterpret_cast<const unsigned char*>(&_values[0]),
+                             _values.size() * sizeof(double));
+        std::ostringstream oss;
+        oss << _name << '_' << std::hex << std::setw(16) << std::setfill('0') << hash << ".dat";
+        return oss.str();
+    }
+
+    // The file format is: the magic string, then the number of key values and the key
+    // values, then the number of data values and the data values.  The name is part of the
+    // file name, so it is not repeated in the file.
+    static const char magic[8] = { 'G', 'S', 'I', 'N', 'F', 'O', '0', '1' };
+
+    bool ReadDiskCache(const DiskCacheKey& key, std::vector<double>& data)
+    {
+        data.clear();
+        const std::string& dir = GetInfoCacheDir();
+        if (dir.empty()) return false;
+        std::string file_name = dir + "/" + key.getFileName();
+        FILE* fp = std::fopen(file_name.c_str(), "rb");
+        if (!fp) return false;
+        dbg<<"Reading cached table from "<<file_name<<std::endl;
+
+        bool ok = true;
+        char buf[8];
+        ok = std::fread(buf, 1, 8, fp) == 8 && std::memcmp(buf, magic, 8) == 0;
+
+        const std::vector<double>& values = key.getValues();
+        uint64_t n = 0;
+        if (ok) ok = std::fread(&n, sizeof(n), 1, fp) == 1 && n == values.size();
+        if (ok && n > 0) {
+            std::vector<double> file_values(n);
+            ok = std::fread(&file_values[0], sizeof(double), n, fp) == n &&
+                std::memcmp(&file_values[0], &values[0], n * sizeof(double)) == 0;
+        }
+        // Check the stated data length against the size of the file before allocating, and
+        // make sure nothing follows the data.
+        if (ok) ok = std::fread(&n, sizeof(n), 1, fp) == 1;
+        if (ok) {
+            long start = std::ftell(fp);
+            ok = start >= 0 && std::fseek(fp, 0, SEEK_END) == 0;
+            long nbytes = ok ? std::ftell(fp) - start : -1;
+            ok = ok && nbytes >= 0 && uint64_t(nbytes) % sizeof(double) == 0 &&
+                uint64_t(nbytes) / sizeof(double) == n &&
+                std::fseek(fp, start, SEEK_SET) == 0;
+        }
+        if (ok && n > 0) {
+            data.resize(n);
+            ok = std::fread(&data[0], sizeof(double), n, fp) == n;
+        }
+        std::fclose(fp);
+        if (!ok) {
+            dbg<<"Cached table in "<<file_name<<" is invalid.  Ignoring it.\n";
+            data.clear();
+        }
+        return ok;
+    }
+
+    void WriteDiskCache(const DiskCacheKey& key, const std::vector<double>& data)
+    {
+        const std::string& dir = GetInfoCacheDir();
+        if (dir.empty()) return;
+        std::string file_name = dir + "/" + key.getFileName();
+
+        // Write to a temporary file first and then rename it, so other processes never see
+        // a partially written file.
+        std::ostringstream tmp;
+        tmp << file_name << ".tmp." << getpid();
+        std::string tmp_name = tmp.str();
+        FILE* fp = std::fopen(tmp_name.c_str(), "wb");
+        if (!fp) {
+            dbg<<"Unable to open "<<tmp_name<<" for writing cached table.\n";
+            return;
+        }
+        dbg<<"Writing cached table to "<<file_name<<std::endl;
+
+        const std::vector<double>& values = key.getValues();
+        uint64_t n = values.size();
+        bool ok = std::fwrite(magic, 1, 8, fp) == 8;
+        ok = ok && std::fwrite(&n, sizeof(n), 1, fp) == 1;
+        if (n > 0) ok = ok && std::fwrite(&values[0], sizeof(double), n, fp) == n;
+        n = data.size();
+        ok = ok && std::fwrite(&n, sizeof(n), 1, fp) == 1;
+        if (n > 0) ok = ok && std::fwrite(&data[0], sizeof(double), n, fp) == n;
+        ok = (std::fclose(fp) == 0) && ok;
+
+        if (!ok || std::rename(tmp_name.c_str(), file_name.c_str()) != 0) {
+            dbg<<"Failed to write cached table to "<<file_name<<std::endl;
+            std::remove(tmp_name.c_str());
+        }
+    }
+
+    // The table is stored as the number of entries followed by (arg, val) for each entry.
+    void WriteTable(const Table<double,double>& table, std::vector<double>& data)
+    {
+        const std::vector<Table<double,double>::Entry>& v = table.getV();
+        data.push_back(double(v.size()));
+        for (size_t i=0; i<v.size(); ++i) {
+            data.push_back(v[i].arg);
+            data.push_back(v[i].val);
+        }
+    }
+
+    bool ReadTable(const std::vector<double>& data, size_t& pos, Table<double,double>& table)
+    {
+        if (pos >= data.size()) return false;
+        // Check the stated length explicitly, since data normally come from a file.
+        double dn = data[pos];
+        if (!(dn >= 2. && dn == std::floor(dn) && dn <= double((data.size() - pos - 1) / 2)))
+            return false;
+        size_t n = size_t(dn);
+        ++pos;
+        for (size_t i=0; i<n; ++i, pos+=2) table.addEntry(data[pos], data[pos+1]);
+        return true;
+    }
+
+}
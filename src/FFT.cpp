@@ -26,8 +26,11 @@
 #include <limits>
 #include <vector>
 #include <cassert>
+#include <cstdio>
+#include <pthread.h>
 #include "FFT.h"
 #include "Std.h"
+#include "LRUCache.h"
 
 #ifdef __SSE2__
 #include "xmmintrin.h"
@@ -56,6 +59,219 @@ namespace galsim {
         return Nk;
     }
 
+    // The FFTW planner is not thread-safe, so all plan creation and destruction happens
+    // while holding this mutex.  See FFTWPlanLock in FFT.h.
+    // The mutex is recursive, since evicting a plan from the plan cache (while holding the
+    // lock) destroys the plan, which takes the lock again.
+    static pthread_mutex_t fftw_plan_mutex;
+    static pthread_once_t fftw_plan_mutex_once = PTHREAD_ONCE_INIT;
+
+    static void InitFFTWPlanMutex()
+    {
+        pthread_mutexattr_t attr;
+        pthread_mutexattr_init(&attr);
+        pthread_mutexattr_settype(&attr, PTHREAD_MUTEX_RECURSIVE);
+        pthread_mutex_init(&fftw_plan_mutex, &attr);
+        pthread_mutexattr_destroy(&attr);
+    }
+
+    FFTWPlanLock::FFTWPlanLock() 
+    {
+        pthread_once(&fftw_plan_mutex_once, &InitFFTWPlanMutex);
+        pthread_mutex_lock(&fftw_plan_mutex); 
+    }
+    FFTWPlanLock::~FFTWPlanLock() { pthread_mutex_unlock(&fftw_plan_mutex); }
+
+    // The number of threads to use for transforms with N >= fft_threads_min_size.
+    // These are only changed while holding an FFTWPlanLock.
+    static int fft_nthreads = 1;
+
+#ifdef GALSIM_FFTW_THREADS
+    static int fft_threads_min_size = 1024;
+
+    // fftw_init_threads needs to be called once before making any plans.
+    // Only called while holding an FFTWPlanLock.
+    static void InitFFTWThreads()
+    {
+        static bool initialized = false;
+        if (!initialized) {
+            if (!fftw_init_threads()) throw FFTError("fftw_init_threads failed");
+            initialized = true;
+        }
+    }
+#endif
+
+    void setFFTThreads(int nthreads, int min_size)
+    {
+        FFTWPlanLock lock;
+#ifdef GALSIM_FFTW_THREADS
+        InitFFTWThreads();
+        fft_nthreads = std::max(nthreads, 1);
+        fft_threads_min_size = min_size;
+#endif
+    }
+
+    int getFFTThreads()
+    {
+        FFTWPlanLock lock;
+        return fft_nthreads;
+    }
+
+    // The number of threads to use for a transform of size N x N.
+    // Only called while holding an FFTWPlanLock.
+    static int GetPlanThreads(int N)
+    {
+#ifdef GALSIM_FFTW_THREADS
+        return N >= fft_threads_min_size ? fft_nthreads : 1;
+#else
+        return 1;
+#endif
+    }
+
+    // Transforms with N <= fft_measure_max_size are planned with FFTW_MEASURE.
+    // Only changed while holding an FFTWPlanLock.
+    static int fft_measure_max_size = 1024;
+
+    void setFFTMeasureSize(int max_size)
+    {
+        FFTWPlanLock lock;
+        fft_measure_max_size = max_size;
+    }
+
+    bool loadFFTWisdom(const std::string& file_name)
+    {
+        FFTWPlanLock lock;
+        FILE* fin = fopen(file_name.c_str(), "r");
+        if (!fin) return false;
+        int success = fftw_import_wisdom_from_file(fin);
+        fclose(fin);
+        return success != 0;
+    }
+
+    void saveFFTWisdom(const std::string& file_name)
+    {
+        FFTWPlanLock lock;
+        FILE* fout = fopen(file_name.c_str(), "w");
+        if (!fout) throw FFTError("Unable to open FFTW wisdom file " + file_name);
+        fftw_export_wisdom_to_file(fout);
+        fclose(fout);
+    }
+
+    // An FFTW plan for an N x N real transform, either forward (r2c) or backward (c2r).
+    // The plan is made using scratch arrays, so we don't need to know the real arrays
+    // ahead of time.  It is then applied to the real arrays using FFTW's new-array execute
+    // functions, which are thread-safe.
+    class FFTWPlan
+    {
+    public:
+        // Only constructed while holding an FFTWPlanLock.  (cf. GetFFTWPlan below.)
+        FFTWPlan(int N, bool forward, int nthreads) : _forward(forward)
+        {
+            FFTW_Array<double> xarray(N*N);
+            FFTW_Array<std::complex<double> > karray(N*(N/2+1));
+            _xalign = fftw_alignment_of(xarray.get());
+            _kalign = fftw_alignment_of(reinterpret_cast<double*>(karray.get()));
+
+#ifdef GALSIM_FFTW_THREADS
+            InitFFTWThreads();
+            fftw_plan_with_nthreads(nthreads);
+#endif
+            // Larger transforms can be very slow to plan with FFTW_MEASURE, so for those
+            // we only use a measured plan if the wisdom for it is already available.
+            // (e.g. from loadFFTWisdom)
+            unsigned flags = FFTW_MEASURE;
+            if (N > fft_measure_max_size) flags |= FFTW_WISDOM_ONLY;
+            _plan = make(N, xarray, karray, flags);
+            if (!_plan) _plan = make(N, xarray, karray, FFTW_ESTIMATE);
+            if (!_plan) throw FFTInvalid();
+        }
+
+        ~FFTWPlan()
+        {
+            FFTWPlanLock lock;
+            fftw_destroy_plan(_plan);
+        }
+
+        // Whether the given arrays are aligned the same way as the ones used to make the
+        // plan.  If not, the plan cannot be used for them.
+        bool canExecute(const double* xarray, const std::complex<double>* karray) const
+        {
+            return (fftw_alignment_of(const_cast<double*>(xarray)) == _xalign &&
+                    fftw_alignment_of(reinterpret_cast<double*>(
+                            const_cast<std::complex<double>*>(karray))) == _kalign);
+        }
+
+        void execute(double* in, fftw_complex* out) const
+        { 
+            assert(_forward);
+            fftw_execute_dft_r2c(_plan, in, out); 
+        }
+
+        void execute(fftw_complex* in, double* out) const
+        { 
+            assert(!_forward);
+            fftw_execute_dft_c2r(_plan, in, out); 
+        }
+
+    private:
+        fftw_plan make(int N, FFTW_Array<double>& xarray,
+                       FFTW_Array<std::complex<double> >& karray, unsigned flags)
+        {
+            if (_forward) 
+                return fftw_plan_dft_r2c_2d(N, N, xarray.get_fftw(), karray.get_fftw(), flags);
+            else
+                return fftw_plan_dft_c2r_2d(N, N, karray.get_fftw(), xarray.get_fftw(), flags);
+        }
+
+        bool _forward;
+        int _xalign;
+        int _kalign;
+        fftw_plan _plan;
+
+        // Not copyable
+        FFTWPlan(const FFTWPlan&);
+        void operator=(const FFTWPlan&);
+    };
+
+    // Stamp pipelines tend to use only a few different FFT sizes, so we don't need
+    // a very large cache.  (The plans are small; they don't keep the scratch arrays.)
+    static LRUCache<boost::tuple<int,bool,int>, FFTWPlan> fftw_plan_cache(32);
+
+    // Get the plan to use for an N x N transform from the cache, making it if necessary.
+    static boost::shared_ptr<FFTWPlan> GetFFTWPlan(int N, bool forward)
+    {
+        FFTWPlanLock lock;
+        return fftw_plan_cache.get(boost::make_tuple(N, forward, GetPlanThreads(N)));
+    }
+
+    // Make a one-off plan for the given arrays.  This is only used for arrays whose alignment
+    // doesn't match the cached plan, which shouldn't normally happen.
+    static fftw_plan MakeC2RPlan(int N, fftw_complex* in, double* out, unsigned flags)
+    {
+        FFTWPlanLock lock;
+#ifdef GALSIM_FFTW_THREADS
+        InitFFTWThreads();
+        fftw_plan_with_nthreads(GetPlanThreads(N));
+#endif
+        return fftw_plan_dft_c2r_2d(N, N, in, out, flags);
+    }
+
+    static fftw_plan MakeR2CPlan(int N, double* in, fftw_complex* out, unsigned flags)
+    {
+        FFTWPlanLock lock;
+#ifdef GALSIM_FFTW_THREADS
+        InitFFTWThreads();
+        fftw_plan_with_nthreads(GetPlanThreads(N));
+#endif
+        return fftw_plan_dft_r2c_2d(N, N, in, out, flags);
+    }
+
+    static void DestroyPlan(fftw_plan plan)
+    {
+        FFTWPlanLock lock;
+        fftw_destroy_plan(plan);
+    }
+
     KTable::KTable(int N, double dk, std::complex<double> value) : _dk(dk), _invdk(1./dk)
     {
         if (N<=0) throw FFTError("KTable size <=0");
@@ -1018,13 +1234,11 @@ namespace galsim {
         XTable xt( _N, 2.*M_PI*_invNd*_invdk );
 
         // Note: The fftw_execute function is the only thread-safe FFTW routine.
-        // So if we decide to go with some kind of multi-threading (rather than multi-process
-        // parallelism) all of the plan creation and destruction calls in this file 
-        // will need to be placed in critical blocks or the equivalent (mutex locks, etc.).
-        fftw_plan plan = fftw_plan_dft_c2r_2d(
-            _N, _N, t_array.get_fftw(), xt._array.get_fftw(), FFTW_MEASURE);
+        // So all of the plan creation and destruction calls in this file go through
+        // the above helper functions, which hold an FFTWPlanLock while calling FFTW.
+        fftw_plan plan = MakeC2RPlan(_N, t_array.get_fftw(), xt._array.get_fftw(), FFTW_MEASURE);
         if (plan==NULL) throw FFTInvalid();
-        fftw_destroy_plan(plan);
+        DestroyPlan(plan);
     }
 
     // Fourier transform from (complex) k to x:
@@ -1055,16 +1269,20 @@ namespace galsim {
         }
         dbg<<"After fill t_array"<<std::endl;
 
-        fftw_plan plan = fftw_plan_dft_c2r_2d(
-            _N, _N, t_array.get_fftw(), xt._array.get_fftw(), FFTW_ESTIMATE);
-        dbg<<"After make plan"<<std::endl;
-        if (plan==NULL) throw FFTInvalid();
+        boost::shared_ptr<FFTWPlan> plan = GetFFTWPlan(_N, false);
+        dbg<<"After get plan"<<std::endl;
 
         // Run the transform:
-        fftw_execute(plan);
+        if (plan->canExecute(xt._array.get(), t_array.get())) {
+            plan->execute(t_array.get_fftw(), xt._array.get_fftw());
+        } else {
+            fftw_plan plan1 = MakeC2RPlan(
+                _N, t_array.get_fftw(), xt._array.get_fftw(), FFTW_ESTIMATE);
+            if (plan1==NULL) throw FFTInvalid();
+            fftw_execute(plan1);
+            DestroyPlan(plan1);
+        }
         dbg<<"After exec plan"<<std::endl;
-        fftw_destroy_plan(plan);
-        dbg<<"After destroy plan"<<std::endl;
 
         xt._dx = 2.*M_PI*_invNd*_invdk;
         dbg<<"Done transform"<<std::endl;
@@ -1087,11 +1305,10 @@ namespace galsim {
 
         KTable kt( _N, 2.*M_PI*_invNd*_invdx );
 
-        fftw_plan plan = fftw_plan_dft_r2c_2d(
-            _N,_N, t_array.get_fftw(), kt._array.get_fftw(), FFTW_MEASURE);
+        fftw_plan plan = MakeR2CPlan(_N, t_array.get_fftw(), kt._array.get_fftw(), FFTW_MEASURE);
         if (plan==NULL) throw FFTInvalid();
 
-        fftw_destroy_plan(plan);
+        DestroyPlan(plan);
     }
 
     // Fourier transform from x back to (complex) k:
@@ -1102,11 +1319,16 @@ namespace galsim {
         // Make a new copy of data array since measurement will overwrite:
         FFTW_Array<double> t_array = _array;
 
-        fftw_plan plan = fftw_plan_dft_r2c_2d(
-            _N,_N, t_array.get_fftw(), kt._array.get_fftw(), FFTW_ESTIMATE);
-        if (plan==NULL) throw FFTInvalid();
-        fftw_execute(plan);
-        fftw_destroy_plan(plan);
+        boost::shared_ptr<FFTWPlan> plan = GetFFTWPlan(_N, true);
+        if (plan->canExecute(t_array.get(), kt._array.get())) {
+            plan->execute(t_array.get_fftw(), kt._array.get_fftw());
+        } else {
+            fftw_plan plan1 = MakeR2CPlan(
+                _N, t_array.get_fftw(), kt._array.get_fftw(), FFTW_ESTIMATE);
+            if (plan1==NULL) throw FFTInvalid();
+            fftw_execute(plan1);
+            DestroyPlan(plan1);
+        }
 
         // Now scale the k spectrum and flip signs for x=0 in middle.
         double fac = _dx * _dx; 
@@ -203,6 +203,31 @@ namespace galsim {
         _fluxIsReady = true;
     }
 
+    Interval::Interval(const FluxDensity& fluxDensity, const double* data, bool isRadial,
+                       const GSParamsPtr& gsparams) :
+        _fluxDensityPtr(&fluxDensity),
+        _xLower(data[0]),
+        _xUpper(data[1]),
+        _isRadial(isRadial),
+        _gsparams(gsparams),
+        _fluxIsReady(true),
+        _flux(data[2]),
+        _useRejectionMethod(data[3] != 0.),
+        _invMaxAbsDensity(data[4]),
+        _invMeanAbsDensity(data[5])
+    {}
+
+    void Interval::write(std::vector<double>& data) const
+    {
+        checkFlux();
+        data.push_back(_xLower);
+        data.push_back(_xUpper);
+        data.push_back(_flux);
+        data.push_back(_useRejectionMethod ? 1. : 0.);
+        data.push_back(_invMaxAbsDensity);
+        data.push_back(_invMeanAbsDensity);
+    }
+
     // Divide an interval into ones that are sufficiently small.  It's small enough if either
     // (a) The max/min FluxDensity ratio in the interval is small enough, i.e. close to constant, or
     // (b) The total flux in the interval is below smallFlux.
@@ -321,6 +346,45 @@ namespace galsim {
         _pt.buildTree();
     }
 
+    OneDimensionalDeviate::OneDimensionalDeviate(const FluxDensity& fluxDensity,
+                                                 const std::vector<double>& data,
+                                                 size_t& pos,
+                                                 bool isRadial,
+                                                 const GSParamsPtr& gsparams) :
+        _fluxDensity(fluxDensity),
+        _isRadial(isRadial),
+        _gsparams(gsparams)
+    {
+        dbg<<"Start ODD constructor from saved data\n";
+        // Layout is positiveFlux, negativeFlux, nIntervals, then the values for each Interval.
+        // The data normally come from a file in the disk cache, so check them explicitly rather
+        // than trusting them.  The callers catch the SBError and rebuild the deviate instead.
+        if (pos + 3 > data.size())
+            throw SBError("OneDimensionalDeviate data are too short");
+        _positiveFlux = data[pos++];
+        _negativeFlux = data[pos++];
+        double n = data[pos++];
+        if (!(n >= 1. && n == std::floor(n) &&
+              n <= double((data.size() - pos) / Interval::nWriteValues)))
+            throw SBError("OneDimensionalDeviate data have an invalid number of intervals");
+        int nIntervals = int(n);
+        for (int i=0; i<nIntervals; ++i) {
+            _pt.push_back(Interval(_fluxDensity, &data[pos], _isRadial, _gsparams));
+            pos += Interval::nWriteValues;
+        }
+        dbg<<"Total of "<<_pt.size()<<" intervals\n";
+        _pt.buildTree();
+    }
+
+    void OneDimensionalDeviate::write(std::vector<double>& data) const
+    {
+        data.push_back(_positiveFlux);
+        data.push_back(_negativeFlux);
+        data.push_back(double(_pt.size()));
+        for (ProbabilityTree<Interval>::const_iterator it=_pt.begin(); it!=_pt.end(); ++it)
+            it->write(data);
+    }
+
     boost::shared_ptr<PhotonArray> OneDimensionalDeviate::shoot(int N, UniformDeviate ud) const 
     {
         dbg<<"OneDimentionalDeviate shoot: N = "<<N<<std::endl;
@@ -34,6 +34,7 @@
 
 #include "SBAiry.h"
 #include "SBAiryImpl.h"
+#include "DiskCache.h"
 
 #ifdef DEBUGLOGGING
 #include <fstream>
@@ -393,6 +394,21 @@ namespace galsim {
         if (this->_sampler.get()) return;
         dbg<<"Airy sampler\n";
         dbg<<"obsc = "<<_obscuration<<std::endl;
+        DiskCacheKey key("AirySampler");
+        key << _obscuration << _gsparams;
+        std::vector<double> data;
+        if (ReadDiskCache(key, data)) {
+            // If the cached data are not valid, just rebuild the sampler.
+            try {
+                size_t pos = 0;
+                this->_sampler.reset(
+                    new OneDimensionalDeviate(_radial, data, pos, true, _gsparams));
+                if (pos == data.size()) return;
+            } catch (SBError& ) {}
+            dbg<<"Ignoring invalid AirySampler data from disk cache.\n";
+            this->_sampler.reset();
+            data.clear();
+        }
         std::vector<double> ranges(1,0.);
         // Break Airy function into ranges that will not have >1 extremum:
         double rmin = 1.1 - 0.5*_obscuration;
@@ -405,6 +421,8 @@ namespace galsim {
         ranges.reserve(int((rmax-rmin+2)/0.5+0.5));
         for(double r=rmin; r<=rmax; r+=0.5) ranges.push_back(r);
         this->_sampler.reset(new OneDimensionalDeviate(_radial, ranges, true, _gsparams));
+        this->_sampler->write(data);
+        WriteDiskCache(key, data);
     }
 
     // Now the specializations for when obs = 0
@@ -468,6 +486,21 @@ namespace galsim {
     {
         if (this->_sampler.get()) return;
         dbg<<"AiryNoObs sampler\n";
+        DiskCacheKey key("AirySampler");
+        key << 0. << _gsparams;
+        std::vector<double> data;
+        if (ReadDiskCache(key, data)) {
+            // If the cached data are not valid, just rebuild the sampler.
+            try {
+                size_t pos = 0;
+                this->_sampler.reset(
+                    new OneDimensionalDeviate(_radial, data, pos, true, _gsparams));
+                if (pos == data.size()) return;
+            } catch (SBError& ) {}
+            dbg<<"Ignoring invalid AirySampler data from disk cache.\n";
+            this->_sampler.reset();
+            data.clear();
+        }
         std::vector<double> ranges(1,0.);
         double rmin = 1.1;
         double rmax = 2./(_gsparams->shoot_accuracy * M_PI*M_PI);
@@ -477,5 +510,7 @@ namespace galsim {
         ranges.reserve(int((rmax-rmin+2)/0.5+0.5));
         for(double r=rmin; r<=rmax; r+=0.5) ranges.push_back(r);
         this->_sampler.reset(new OneDimensionalDeviate(_radial, ranges, true, _gsparams));
+        this->_sampler->write(data);
+        WriteDiskCache(key, data);
     }
 }
@@ -23,6 +23,7 @@
 
 #include "SBExponential.h"
 #include "SBExponentialImpl.h"
+#include "DiskCache.h"
 
 // Define this variable to find azimuth (and sometimes radius within a unit disc) of 2d photons by 
 // drawing a uniform deviate for theta, instead of drawing 2 deviates for a point on the unit 
@@ -268,9 +269,28 @@ namespace galsim {
         // Next, set up the classes for photon shooting
         _radial.reset(new ExponentialRadialFunction());
         dbg<<"Made radial"<<std::endl;
-        std::vector<double> range(2,0.);
-        range[1] = -std::log(gsparams->shoot_accuracy);
-        _sampler.reset(new OneDimensionalDeviate( *_radial, range, true, gsparams));
+        DiskCacheKey key("ExponentialSampler");
+        key << gsparams;
+        std::vector<double> data;
+        if (ReadDiskCache(key, data)) {
+            // If the cached data are not valid, just rebuild the sampler below.
+            try {
+                size_t pos = 0;
+                _sampler.reset(new OneDimensionalDeviate( *_radial, data, pos, true, gsparams));
+                if (pos != data.size()) _sampler.reset();
+            } catch (SBError& ) {}
+            if (!_sampler) {
+                dbg<<"Ignoring invalid ExponentialSampler data from disk cache.\n";
+                data.clear();
+            }
+        }
+        if (!_sampler) {
+            std::vector<double> range(2,0.);
+            range[1] = -std::log(gsparams->shoot_accuracy);
+            _sampler.reset(new OneDimensionalDeviate( *_radial, range, true, gsparams));
+            _sampler->write(data);
+            WriteDiskCache(key, data);
+        }
         dbg<<"Made sampler"<<std::endl;
 #endif
 
@@ -23,6 +23,7 @@
 
 #include "SBKolmogorov.h"
 #include "SBKolmogorovImpl.h"
+#include "DiskCache.h"
 
 #ifdef DEBUGLOGGING
 #include <fstream>
@@ -329,6 +330,30 @@ namespace galsim {
     {
         dbg<<"Initializing KolmogorovInfo\n";
 
+        // The data in the disk cache are maxk, stepk, the radial table, and the sampler.
+        DiskCacheKey key("KolmogorovInfo");
+        key << gsparams;
+        std::vector<double> data;
+        if (ReadDiskCache(key, data)) {
+            size_t pos = 2;
+            // If the cached data are not valid, just recompute everything.
+            try {
+                if (data.size() > pos && ReadTable(data, pos, _radial)) {
+                    _sampler.reset(new OneDimensionalDeviate(_radial, data, pos, true, gsparams));
+                    if (pos == data.size()) {
+                        _maxk = data[0];
+                        _stepk = data[1];
+                        dbg<<"Read KolmogorovInfo from disk cache.\n";
+                        return;
+                    }
+                }
+            } catch (SBError& ) {}
+            dbg<<"Ignoring invalid KolmogorovInfo data from disk cache.\n";
+            _sampler.reset();
+            _radial.clear();
+            data.clear();
+        }
+
         // Calculate maxK:
         // exp(-k^5/3) = kvalue_accuracy
         _maxk = std::pow(-std::log(gsparams->kvalue_accuracy),3./5.);
@@ -388,6 +413,13 @@ namespace galsim {
         range[1] = _radial.argMax();
         _sampler.reset(new OneDimensionalDeviate(_radial, range, true, gsparams));
 
+        data.clear();
+        data.push_back(_maxk);
+        data.push_back(_stepk);
+        WriteTable(_radial, data);
+        _sampler->write(data);
+        WriteDiskCache(key, data);
+
 #ifdef SOLVE_FWHM_HLR
         // Improve upon the conversion between lam_over_r0 and fwhm:
         KolmTargetValue fwhm_func(0.55090124543985636638457099311149824 / 2., gsparams);
@@ -23,6 +23,7 @@
 
 //#define OUTPUT_FFT // Output the fft grids to files.  (Requires DEBUGLOGGING to be on as well.)
 
+#include <pthread.h>
 #include "SBProfile.h"
 #include "SBTransform.h"
 #include "SBProfileImpl.h"
@@ -814,10 +815,97 @@ namespace galsim {
         FillQuadrant(*this,val,x0,dx,nx1,y0,dy,ny1);
     }
 
+    // The work for a single thread in the multi-threaded version of drawShoot.
+    // Each thread shoots its share of the chunks of photons, and adds them to its own image,
+    // so no locking is required.
+    template <class T>
+    struct ShootThreadData
+    {
+        const SBProfile* prof;
+        std::vector<int> chunk_n;                 // The number of photons in each chunk
+        std::vector<UniformDeviate> chunk_ud;     // The rng to use for each chunk
+        double flux_per_photon;                   // Scale the photon fluxes by this * n
+        boost::shared_ptr<Image<T> > image;       // The image to add the photons to
+        double added_flux;
+        std::string error;                        // Any error message from the thread
+    };
+
+    template <class T>
+    static void* ShootThread(void* arg)
+    {
+        ShootThreadData<T>* data = static_cast<ShootThreadData<T>*>(arg);
+        try {
+            ImageView<T> view = data->image->view();
+            for (size_t k=0; k<data->chunk_n.size(); ++k) {
+                boost::shared_ptr<PhotonArray> pa =
+                    data->prof->shoot(data->chunk_n[k], data->chunk_ud[k]);
+                pa->scaleFlux(data->flux_per_photon * data->chunk_n[k]);
+                data->added_flux += pa->addTo(view);
+            }
+        } catch (std::exception& e) {
+            data->error = e.what();
+        }
+        return 0;
+    }
+
+    // Shoot N photons in chunks of maxN, using nthreads threads.
+    // Each chunk gets its own UniformDeviate, seeded from u, and the chunks are assigned to
+    // the threads in order, so the result is reproducible for a given seed and nthreads.
+    // Returns the flux added to the image.
+    template <class T>
+    static double DrawShootThreads(
+        const SBProfile& prof, ImageView<T> img, double N, UniformDeviate u,
+        double flux_per_photon, int maxN, int nthreads)
+    {
+        dbg<<"Start DrawShootThreads with nthreads = "<<nthreads<<std::endl;
+
+        // Many profiles build their photon-shooting structures on the first call to shoot,
+        // which is not thread-safe.  So shoot a single photon here to make sure they are built
+        // before starting the threads.  (Use a separate rng, so u is not affected.)
+        UniformDeviate ud0(u.duplicate());
+        prof.shoot(1, ud0);
+
+        std::vector<ShootThreadData<T> > data(nthreads);
+        for (int i=0; i<nthreads; ++i) {
+            data[i].prof = &prof;
+            data[i].flux_per_photon = flux_per_photon;
+            data[i].image.reset(new Image<T>(img.getBounds(), img.getScale()));
+            data[i].added_flux = 0.;
+        }
+        int ichunk = 0;
+        while (N >= 0.5) {
+            int thisN = N > maxN ? maxN : int(N+0.5);
+            // Seeds must be > 0, since 0 means to seed from the time.
+            long seed = long(u() * 2147483646.) + 1;
+            data[ichunk % nthreads].chunk_n.push_back(thisN);
+            data[ichunk % nthreads].chunk_ud.push_back(UniformDeviate(seed));
+            N -= thisN;
+            ++ichunk;
+        }
+        dbg<<"nchunks = "<<ichunk<<std::endl;
+
+        std::vector<pthread_t> threads(nthreads);
+        for (int i=0; i<nthreads; ++i) {
+            if (pthread_create(&threads[i], 0, &ShootThread<T>, &data[i]) != 0) 
+                throw std::runtime_error("Unable to start a thread for drawShoot");
+        }
+        for (int i=0; i<nthreads; ++i) pthread_join(threads[i], 0);
+
+        // Add up the results in a fixed order.
+        double added_flux = 0.;
+        for (int i=0; i<nthreads; ++i) {
+            if (data[i].error != "") throw std::runtime_error(data[i].error);
+            img += *data[i].image;
+            added_flux += data[i].added_flux;
+        }
+        dbg<<"Done DrawShootThreads: added_flux = "<<added_flux<<std::endl;
+        return added_flux;
+    }
+
     template <class T>
     double SBProfile::drawShoot(
         ImageView<T> img, double N, UniformDeviate u, double gain, double max_extra_noise,
-        bool poisson_flux, bool add_to_image) const 
+        bool poisson_flux, bool add_to_image, int nthreads) const 
     {
         // If N = 0, this routine will try to end up with an image with the number of real 
         // photons = flux that has the corresponding Poisson noise. For profiles that are 
@@ -940,6 +1028,15 @@ namespace galsim {
         img.setCenter(0,0);
         dbg<<"On input, image has central value = "<<img(0,0)<<std::endl;
 
+        // If we know the number of photons ahead of time, then we can split the photons
+        // into chunks up front and shoot them in multiple threads.
+        if (nthreads > 1 && max_extra_noise <= 0. && N > maxN) {
+            double added_flux = DrawShootThreads(
+                *this, img, N, u, flux_scaling / origN, maxN, nthreads);
+            dbg<<"Added flux (falling within image bounds) = "<<added_flux*gain<<std::endl;
+            return added_flux * gain;
+        }
+
         // Store the PhotonArrays to be added here rather than add them as we go,
         // since we might need to rescale them all before adding.
         // We only use this if max_extra_noise > 0 and add_to_image = true.
@@ -1102,10 +1199,10 @@ namespace galsim {
 
     template double SBProfile::drawShoot(
         ImageView<float> image, double N, UniformDeviate ud, double gain,
-        double max_extra_noise, bool poisson_flux, bool add_to_image) const;
+        double max_extra_noise, bool poisson_flux, bool add_to_image, int nthreads) const;
     template double SBProfile::drawShoot(
         ImageView<double> image, double N, UniformDeviate ud, double gain,
-        double max_extra_noise, bool poisson_flux, bool add_to_image) const;
+        double max_extra_noise, bool poisson_flux, bool add_to_image, int nthreads) const;
 
     template double SBProfile::draw(ImageView<float> img, double gain, double wmult) const;
     template double SBProfile::draw(ImageView<double> img, double gain, double wmult) const;
@@ -42,6 +42,7 @@
 #include "integ/Int.h"
 #include "Solve.h"
 #include "bessel/Roots.h"
+#include "DiskCache.h"
 
 #ifdef DEBUGLOGGING
 #include <fstream>
@@ -405,6 +406,43 @@ namespace galsim {
     };
 
     void SersicInfo::buildFT() const
+    {
+        DiskCacheKey key("SersicFT");
+        key << _n << _trunc << _gsparams;
+        std::vector<double> data;
+        if (ReadDiskCache(key, data)) {
+            // The data are maxk, kderiv2, kderiv4, ksq_min, ksq_max, highk_a, highk_b, ft.
+            size_t pos = 7;
+            if (data.size() > pos && ReadTable(data, pos, _ft) && pos == data.size()) {
+                _maxk = data[0];
+                _kderiv2 = data[1];
+                _kderiv4 = data[2];
+                _ksq_min = data[3];
+                _ksq_max = data[4];
+                _highk_a = data[5];
+                _highk_b = data[6];
+                dbg<<"Read SersicInfo FT from disk cache.  maxk = "<<_maxk<<std::endl;
+                return;
+            }
+            dbg<<"Ignoring invalid SersicFT data from disk cache.\n";
+            _ft.clear();
+        }
+
+        calculateFT();
+
+        data.clear();
+        data.push_back(_maxk);
+        data.push_back(_kderiv2);
+        data.push_back(_kderiv4);
+        data.push_back(_ksq_min);
+        data.push_back(_ksq_max);
+        data.push_back(_highk_a);
+        data.push_back(_highk_b);
+        WriteTable(_ft, data);
+        WriteDiskCache(key, data);
+    }
+
+    void SersicInfo::calculateFT() const
     {
         // The small-k expansion of the Hankel transform is (normalized to have flux=1):
         // 1 - Gamma(4n) / 4 Gamma(2n) + Gamma(6n) / 64 Gamma(2n) - Gamma(8n) / 2304 Gamma(2n)
@@ -800,11 +838,31 @@ namespace galsim {
         if (!_sampler) {
             // Set up the classes for photon shooting
             _radial.reset(new SersicRadialFunction(_invn));
-            std::vector<double> range(2,0.);
-            double shoot_maxr = calculateMissingFluxRadius(_gsparams->shoot_accuracy);
-            if (_truncated && _trunc < shoot_maxr) shoot_maxr = _trunc;
-            range[1] = shoot_maxr;
-            _sampler.reset(new OneDimensionalDeviate( *_radial, range, true, _gsparams));
+            DiskCacheKey key("SersicSampler");
+            key << _n << _trunc << _gsparams;
+            std::vector<double> data;
+            if (ReadDiskCache(key, data)) {
+                // If the cached data are not valid, just rebuild the sampler below.
+                try {
+                    size_t pos = 0;
+                    _sampler.reset(
+                        new OneDimensionalDeviate(*_radial, data, pos, true, _gsparams));
+                    if (pos != data.size()) _sampler.reset();
+                } catch (SBError& ) {}
+                if (!_sampler) {
+                    dbg<<"Ignoring invalid SersicSampler data from disk cache.\n";
+                    data.clear();
+                }
+            }
+            if (!_sampler) {
+                std::vector<double> range(2,0.);
+                double shoot_maxr = calculateMissingFluxRadius(_gsparams->shoot_accuracy);
+                if (_truncated && _trunc < shoot_maxr) shoot_maxr = _trunc;
+                range[1] = shoot_maxr;
+                _sampler.reset(new OneDimensionalDeviate( *_radial, range, true, _gsparams));
+                _sampler->write(data);
+                WriteDiskCache(key, data);
+            }
         }
  
         assert(_sampler.get());
@@ -25,6 +25,7 @@
 
 #include <cstring>
 #include <string>
+#include <pthread.h>
 #define TMV_NDEBUG
 #include "TMV.h"
 #include "hsm/PSFCorr.h"
@@ -294,6 +295,212 @@ namespace hsm {
         return results;
     }
 
+    // The batch functions below are written in terms of a BatchMeasurer, whose measure(i)
+    // method measures object i and stores the result in results[i].  It must not throw, so any
+    // errors are stored in the error_message of the result.  Since measure(i) only writes to
+    // results[i], and the HSM routines have no shared state (other than the FFTW planner, which
+    // is locked in fourier_trans_1), several threads can measure different objects at once.
+    struct BatchMeasurer
+    {
+        virtual ~BatchMeasurer() {}
+        virtual void measure(int i) const = 0;
+    };
+
+    struct BatchThreadData
+    {
+        const BatchMeasurer* measurer;
+        int first;  // The first object for this thread to measure
+        int step;   // The step between objects for this thread (= nthreads)
+        int n;      // The total number of objects
+    };
+
+    static void* BatchThread(void* arg)
+    {
+        BatchThreadData* data = static_cast<BatchThreadData*>(arg);
+        for (int i=data->first; i<data->n; i+=data->step) data->measurer->measure(i);
+        return 0;
+    }
+
+    // Measure n objects using nthreads threads.  Thread k measures objects k, k+nthreads, ...,
+    // which keeps the load roughly balanced when the difficulty of the objects varies
+    // smoothly along the list.
+    static void RunBatch(const BatchMeasurer& measurer, int n, int nthreads)
+    {
+        dbg<<"Start RunBatch with n = "<<n<<", nthreads = "<<nthreads<<std::endl;
+        if (nthreads > n) nthreads = n;
+        if (nthreads <= 1) {
+            for (int i=0; i<n; ++i) measurer.measure(i);
+            return;
+        }
+
+        std::vector<BatchThreadData> data(nthreads);
+        std::vector<pthread_t> threads(nthreads);
+        for (int k=0; k<nthreads; ++k) {
+            data[k].measurer = &measurer;
+            data[k].first = k;
+            data[k].step = nthreads;
+            data[k].n = n;
+            if (pthread_create(&threads[k], 0, &BatchThread, &data[k]) != 0) {
+                for (int j=0; j<k; ++j) pthread_join(threads[j], 0);
+                throw HSMError("Unable to start a thread for batch measurement");
+            }
+        }
+        for (int k=0; k<nthreads; ++k) pthread_join(threads[k], 0);
+        dbg<<"Done RunBatch"<<std::endl;
+    }
+
+    template <typename T, typename U>
+    struct EstimateShearMeasurer : public BatchMeasurer
+    {
+        EstimateShearMeasurer(
+            const std::vector<ImageView<T> >& _gal_images,
+            const std::vector<ImageView<U> >& _PSF_images,
+            const std::vector<ImageView<int> >& _gal_mask_images,
+            std::vector<CppShapeData>& _results,
+            float _sky_var, const char* _shear_est, const std::string& _recompute_flux,
+            double _guess_sig_gal, double _guess_sig_PSF, double _precision,
+            double _guess_x_centroid, double _guess_y_centroid,
+            boost::shared_ptr<HSMParams> _hsmparams) :
+            gal_images(_gal_images), PSF_images(_PSF_images), gal_mask_images(_gal_mask_images),
+            results(_results), sky_var(_sky_var), shear_est(_shear_est),
+            recompute_flux(_recompute_flux), guess_sig_gal(_guess_sig_gal),
+            guess_sig_PSF(_guess_sig_PSF), precision(_precision),
+            guess_x_centroid(_guess_x_centroid), guess_y_centroid(_guess_y_centroid),
+            hsmparams(_hsmparams) {}
+
+        void measure(int i) const
+        {
+            const ImageView<U>& PSF_image = PSF_images.size() == 1 ? PSF_images[0] : PSF_images[i];
+            const ImageView<int>& gal_mask_image =
+                gal_mask_images.size() == 1 ? gal_mask_images[0] : gal_mask_images[i];
+            try {
+                results[i] = EstimateShearView(
+                    gal_images[i], PSF_image, gal_mask_image, sky_var, shear_est.c_str(),
+                    recompute_flux, guess_sig_gal, guess_sig_PSF, precision,
+                    guess_x_centroid, guess_y_centroid, hsmparams);
+            } catch (std::exception& e) {
+                results[i] = CppShapeData();
+                results[i].error_message = e.what();
+            }
+        }
+
+        const std::vector<ImageView<T> >& gal_images;
+        const std::vector<ImageView<U> >& PSF_images;
+        const std::vector<ImageView<int> >& gal_mask_images;
+        std::vector<CppShapeData>& results;
+        float sky_var;
+        std::string shear_est;
+        std::string recompute_flux;
+        double guess_sig_gal, guess_sig_PSF, precision;
+        double guess_x_centroid, guess_y_centroid;
+        boost::shared_ptr<HSMParams> hsmparams;
+    };
+
+    template <typename T>
+    struct FindAdaptiveMomMeasurer : public BatchMeasurer
+    {
+        FindAdaptiveMomMeasurer(
+            const std::vector<ImageView<T> >& _object_images,
+            const std::vector<ImageView<int> >& _object_mask_images,
+            std::vector<CppShapeData>& _results,
+            double _guess_sig, double _precision,
+            double _guess_x_centroid, double _guess_y_centroid,
+            boost::shared_ptr<HSMParams> _hsmparams) :
+            object_images(_object_images), object_mask_images(_object_mask_images),
+            results(_results), guess_sig(_guess_sig), precision(_precision),
+            guess_x_centroid(_guess_x_centroid), guess_y_centroid(_guess_y_centroid),
+            hsmparams(_hsmparams) {}
+
+        void measure(int i) const
+        {
+            const ImageView<int>& object_mask_image =
+                object_mask_images.size() == 1 ? object_mask_images[0] : object_mask_images[i];
+            try {
+                results[i] = FindAdaptiveMomView(
+                    object_images[i], object_mask_image, guess_sig, precision,
+                    guess_x_centroid, guess_y_centroid, hsmparams);
+            } catch (std::exception& e) {
+                results[i] = CppShapeData();
+                results[i].error_message = e.what();
+            }
+        }
+
+        const std::vector<ImageView<T> >& object_images;
+        const std::vector<ImageView<int> >& object_mask_images;
+        std::vector<CppShapeData>& results;
+        double guess_sig, precision;
+        double guess_x_centroid, guess_y_centroid;
+        boost::shared_ptr<HSMParams> hsmparams;
+    };
+
+    // Check that a list of PSF or mask images has a valid length for a batch of n objects.
+    static void CheckBatchLength(int n, int n2, const char* name)
+    {
+        if (n2 != 1 && n2 != n) {
+            throw HSMError(std::string("Batch measurement requires either 1 or n ") + name);
+        }
+    }
+
+    // Check that the mask images have the same bounds as the corresponding object images,
+    // since MakeMaskedImage assumes that they do.
+    template <typename T>
+    static void CheckBatchMasks(
+        const std::vector<ImageView<T> >& images, const std::vector<ImageView<int> >& masks)
+    {
+        for (size_t i=0; i<images.size(); ++i) {
+            const ImageView<int>& mask = masks.size() == 1 ? masks[0] : masks[i];
+            if (mask.getBounds() != images[i].getBounds())
+                throw HSMError("Mask image does not have same bounds as the input Image!");
+        }
+    }
+
+    template <typename T, typename U>
+    void EstimateShearBatch(
+        const std::vector<ImageView<T> >& gal_images,
+        const std::vector<ImageView<U> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images,
+        std::vector<CppShapeData>& results,
+        float sky_var, const char* shear_est, const std::string& recompute_flux,
+        double guess_sig_gal, double guess_sig_PSF, double precision,
+        double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        dbg<<"Start EstimateShearBatch"<<std::endl;
+        int n = gal_images.size();
+        CheckBatchLength(n, PSF_images.size(), "PSF images");
+        CheckBatchLength(n, gal_mask_images.size(), "mask images");
+        CheckBatchMasks(gal_images, gal_mask_images);
+
+        results.resize(n);
+        EstimateShearMeasurer<T,U> measurer(
+            gal_images, PSF_images, gal_mask_images, results, sky_var, shear_est,
+            recompute_flux, guess_sig_gal, guess_sig_PSF, precision,
+            guess_x_centroid, guess_y_centroid, hsmparams);
+        RunBatch(measurer, n, nthreads);
+        dbg<<"Exiting EstimateShearBatch"<<std::endl;
+    }
+
+    template <typename T>
+    void FindAdaptiveMomBatch(
+        const std::vector<ImageView<T> >& object_images,
+        const std::vector<ImageView<int> >& object_mask_images,
+        std::vector<CppShapeData>& results,
+        double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads)
+    {
+        dbg<<"Start FindAdaptiveMomBatch"<<std::endl;
+        int n = object_images.size();
+        CheckBatchLength(n, object_mask_images.size(), "mask images");
+        CheckBatchMasks(object_images, object_mask_images);
+
+        results.resize(n);
+        FindAdaptiveMomMeasurer<T> measurer(
+            object_images, object_mask_images, results, guess_sig, precision,
+            guess_x_centroid, guess_y_centroid, hsmparams);
+        RunBatch(measurer, n, nthreads);
+        dbg<<"Exiting FindAdaptiveMomBatch"<<std::endl;
+    }
+
     /* fourier_trans_1
      * *** FOURIER TRANSFORMS A DATA SET WITH LENGTH A POWER OF 2 ***
      *
@@ -325,9 +532,14 @@ namespace hsm {
         }
 
         // Make the fftw plan
-        fftw_plan plan=fftw_plan_dft_1d(nn, b1.get_fftw(), b2.get_fftw(),
-                                        isign == 1 ? FFTW_FORWARD : FFTW_BACKWARD, 
-                                        FFTW_ESTIMATE);
+        // (The FFTW planner is not thread-safe, so hold the plan lock while using it.)
+        fftw_plan plan;
+        {
+            FFTWPlanLock lock;
+            plan=fftw_plan_dft_1d(nn, b1.get_fftw(), b2.get_fftw(),
+                                  isign == 1 ? FFTW_FORWARD : FFTW_BACKWARD, 
+                                  FFTW_ESTIMATE);
+        }
         if (plan == NULL) throw FFTInvalid();
 
         // Execute the plan.
@@ -340,7 +552,10 @@ namespace hsm {
         }
 
         // Destroy the plan.
-        fftw_destroy_plan(plan);
+        {
+            FFTWPlanLock lock;
+            fftw_destroy_plan(plan);
+        }
 #else
 
         double *data_i, *data_i1;
@@ -1850,5 +2065,49 @@ namespace hsm {
         double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
         boost::shared_ptr<HSMParams> hsmparams);
 
+    template void EstimateShearBatch(
+        const std::vector<ImageView<float> >& gal_images,
+        const std::vector<ImageView<float> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images, std::vector<CppShapeData>& results,
+        float sky_var, const char* shear_est, const std::string& recompute_flux,
+        double guess_sig_gal, double guess_sig_PSF, double precision,
+        double guess_x_centroid, double guess_y_centroid, boost::shared_ptr<HSMParams> hsmparams,
+        int nthreads);
+    template void EstimateShearBatch(
+        const std::vector<ImageView<double> >& gal_images,
+        const std::vector<ImageView<double> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images, std::vector<CppShapeData>& results,
+        float sky_var, const char* shear_est, const std::string& recompute_flux,
+        double guess_sig_gal, double guess_sig_PSF, double precision,
+        double guess_x_centroid, double guess_y_centroid, boost::shared_ptr<HSMParams> hsmparams,
+        int nthreads);
+    template void EstimateShearBatch(
+        const std::vector<ImageView<float> >& gal_images,
+        const std::vector<ImageView<double> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images, std::vector<CppShapeData>& results,
+        float sky_var, const char* shear_est, const std::string& recompute_flux,
+        double guess_sig_gal, double guess_sig_PSF, double precision,
+        double guess_x_centroid, double guess_y_centroid, boost::shared_ptr<HSMParams> hsmparams,
+        int nthreads);
+    template void EstimateShearBatch(
+        const std::vector<ImageView<double> >& gal_images,
+        const std::vector<ImageView<float> >& PSF_images,
+        const std::vector<ImageView<int> >& gal_mask_images, std::vector<CppShapeData>& results,
+        float sky_var, const char* shear_est, const std::string& recompute_flux,
+        double guess_sig_gal, double guess_sig_PSF, double precision,
+        double guess_x_centroid, double guess_y_centroid, boost::shared_ptr<HSMParams> hsmparams,
+        int nthreads);
+
+    template void FindAdaptiveMomBatch(
+        const std::vector<ImageView<float> >& object_images,
+        const std::vector<ImageView<int> >& object_mask_images, std::vector<CppShapeData>& results,
+        double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads);
+    template void FindAdaptiveMomBatch(
+        const std::vector<ImageView<double> >& object_images,
+        const std::vector<ImageView<int> >& object_mask_images, std::vector<CppShapeData>& results,
+        double guess_sig, double precision, double guess_x_centroid, double guess_y_centroid,
+        boost::shared_ptr<HSMParams> hsmparams, int nthreads);
+
 }
 }
@@ -1723,6 +1723,64 @@ def test_kolmogorov_flux_scaling():
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
 
+def test_info_cache():
+    """Test that the on-disk cache of profile tables gives the same results as computing them.
+    """
+    import time
+    t1 = time.time()
+    import shutil
+    import subprocess
+
+    cache_dir = 'test_info_cache'
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.mkdir(cache_dir)
+    old_dir = galsim.getInfoCacheDir()
+    galsim.setInfoCacheDir(cache_dir)
+    assert galsim.getInfoCacheDir() == cache_dir
+
+    # Use parameters that are not used in other tests, so the tables are built here and
+    # written to the cache, rather than already being in the in-memory cache.
+    gsp = galsim.GSParams(kvalue_accuracy=2.e-5, shoot_accuracy=2.e-5)
+    script = """
+import galsim, numpy
+gsp = galsim.GSParams(kvalue_accuracy=2.e-5, shoot_accuracy=2.e-5)
+obj = galsim.Add([galsim.Sersic(n=2.345, half_light_radius=1.1, gsparams=gsp),
+                  galsim.Kolmogorov(fwhm=0.7, gsparams=gsp)])
+im1 = obj.draw(galsim.ImageD(64,64,scale=0.2))
+im2 = obj.drawShoot(galsim.ImageD(64,64,scale=0.2), n_photons=10000,
+                    rng=galsim.BaseDeviate(1234))
+numpy.save('%s', numpy.array([im1.array, im2.array]))
+"""
+    obj = galsim.Add([galsim.Sersic(n=2.345, half_light_radius=1.1, gsparams=gsp),
+                      galsim.Kolmogorov(fwhm=0.7, gsparams=gsp)])
+    im1 = obj.draw(galsim.ImageD(64,64,scale=0.2))
+    im2 = obj.drawShoot(galsim.ImageD(64,64,scale=0.2), n_photons=10000,
+                        rng=galsim.BaseDeviate(1234))
+    galsim.setInfoCacheDir(old_dir)
+    files = os.listdir(cache_dir)
+    for name in ['SersicFT', 'SersicSampler', 'KolmogorovInfo']:
+        assert any(f.startswith(name + '_') for f in files), "%s not written to cache"%name
+
+    # A new process should read the tables from the cache and get the same images.
+    out_file = os.path.join(cache_dir, 'images.npy')
+    env = dict(os.environ)
+    env['GALSIM_INFO_CACHE_DIR'] = cache_dir
+    galsim_dir = os.path.dirname(os.path.dirname(os.path.abspath(galsim.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([galsim_dir, env.get('PYTHONPATH', '')])
+    subprocess.check_call([sys.executable, '-c', script%out_file], env=env)
+    arrays = np.load(out_file)
+    np.testing.assert_array_almost_equal(
+            arrays[0], im1.array, 12,
+            err_msg="Image drawn with cached FT tables disagrees with original")
+    np.testing.assert_array_almost_equal(
+            arrays[1], im2.array, 12,
+            err_msg="Image shot with cached sampler disagrees with original")
+    shutil.rmtree(cache_dir)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 
 if __name__ == "__main__":
     test_gaussian()
@@ -1750,4 +1808,4 @@ if __name__ == "__main__":
     test_kolmogorov_properties()
     test_kolmogorov_radii()
     test_kolmogorov_flux_scaling()
-
+    test_info_cache()
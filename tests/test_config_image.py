@@ -142,10 +142,366 @@ def test_scattered():
     np.testing.assert_almost_equal(image.array, image2.array)
 
 
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_worker_pool():
+    """Test that building stamps with a persistent WorkerPool matches the serial result
+    """
+    import copy
+    import time
+    t1 = time.time()
+
+    base_config = {
+        'gal' : { 'type' : 'Exponential',
+                  'half_light_radius' : { 'type' : 'Random', 'min' : 0.5, 'max' : 1.5 },
+                  'flux' : 100 
+                },
+        'image' : { 'type' : 'Tiled',
+                    'nx_tiles' : 4,
+                    'ny_tiles' : 3,
+                    'stamp_size' : 24,
+                    'pixel_scale' : 0.3,
+                    'random_seed' : 1234,
+                    'noise' : { 'sky_level' : 100 }
+                  }
+    }
+
+    # The reference image built with a single process.
+    config = copy.deepcopy(base_config)
+    image1 = galsim.config.BuildImage(config)[0]
+
+    # A temporary pool made by BuildStamps for this one image.
+    config = copy.deepcopy(base_config)
+    config['image']['nproc'] = 2
+    image2 = galsim.config.BuildImage(config)[0]
+    np.testing.assert_array_equal(image2.array, image1.array)
+
+    # A persistent pool reused for several images.
+    pool = galsim.config.WorkerPool(2)
+    for k in range(3):
+        config = copy.deepcopy(base_config)
+        config['image']['nproc'] = 2
+        config['worker_pool'] = pool
+        image3 = galsim.config.BuildImage(config)[0]
+        np.testing.assert_array_equal(image3.array, image1.array)
+        np.testing.assert_equal(len(pool), 2)
+    pool.close()
+    np.testing.assert_equal(len(pool), 0)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_stream_multi():
+    """Test that streaming the stamps into the full images gives the same multi-image file
+    as building all the stamps first and then adding them in
+    """
+    import copy
+    import shutil
+    import tempfile
+    import time
+    t1 = time.time()
+
+    def build_all_stamps(**kwargs):
+        # This is how Tiled and Scattered images used to be built: make all the stamps first,
+        # and only then add them into the full image.
+        kwargs.pop('shared_images', None)
+        return zip(*galsim.config.BuildStamps(**kwargs))
+
+    base_config = {
+        'gal' : { 'type' : 'Exponential',
+                  'half_light_radius' : { 'type' : 'Random', 'min' : 0.5, 'max' : 1.5 },
+                  'flux' : { 'type' : 'Random', 'min' : 50, 'max' : 150 }
+                },
+        'image' : { 'type' : 'Tiled',
+                    'nx_tiles' : 4,
+                    'ny_tiles' : 3,
+                    'stamp_size' : 24,
+                    'pixel_scale' : 0.3,
+                    'random_seed' : 1234,
+                    'noise' : { 'sky_level' : 100 }
+                  },
+        'output' : { 'type' : 'MultiFits',
+                     'nimages' : 3,
+                     'weight' : { 'file_name' : 'test_stream_weight.fits' }
+                   }
+    }
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        for image_type in [ 'Tiled', 'Scattered' ]:
+            config1 = copy.deepcopy(base_config)
+            if image_type == 'Scattered':
+                config1['image'] = { 'type' : 'Scattered',
+                                     'size' : 64,
+                                     'stamp_size' : 24,
+                                     'nobjects' : 10,
+                                     'pixel_scale' : 0.3,
+                                     'random_seed' : 1234,
+                                     'noise' : { 'sky_level' : 100 }
+                                   }
+            config1['output']['dir'] = os.path.join(out_dir, 'stream')
+            config1['output']['file_name'] = 'test_stream.fits'
+            config2 = copy.deepcopy(config1)
+            config2['output']['dir'] = os.path.join(out_dir, 'no_stream')
+
+            galsim.config.Process(config1)
+
+            save_stream = galsim.config.StreamStamps
+            galsim.config.StreamStamps = build_all_stamps
+            try:
+                galsim.config.Process(config2)
+            finally:
+                galsim.config.StreamStamps = save_stream
+
+            for file_name in [ 'test_stream.fits', 'test_stream_weight.fits' ]:
+                images1 = galsim.fits.readMulti(os.path.join(out_dir, 'stream', file_name))
+                images2 = galsim.fits.readMulti(os.path.join(out_dir, 'no_stream', file_name))
+                np.testing.assert_equal(len(images1), 3)
+                np.testing.assert_equal(len(images2), 3)
+                for im1, im2 in zip(images1, images2):
+                    np.testing.assert_equal(im1.bounds, im2.bounds)
+                    np.testing.assert_array_equal(
+                        im1.array, im2.array,
+                        err_msg='Streamed %s image in %s differs'%(image_type,file_name))
+    finally:
+        shutil.rmtree(out_dir)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_stamp_scheduling():
+    """Test that the stamps built by several processes, with chunks of work handed out as the
+    workers become free, come back in order and match the serial result
+    """
+    import copy
+    import time
+    t1 = time.time()
+
+    # Make the stamps take quite different amounts of time to build, so the workers finish
+    # their chunks out of order.  Each stamp's flux is 100 * (obj_num+1), so we can check the
+    # order of the returned stamps.
+    nobjects = 20
+    base_config = {
+        'gal' : { 'type' : 'Exponential',
+                  'half_light_radius' : { 'type' : 'List',
+                                          'items' : [ 0.3, 0.3, 3.0, 0.3, 1.0, 5.0, 0.3 ] },
+                  'flux' : { 'type' : 'Sequence', 'first' : 100, 'step' : 100 }
+                },
+        'image' : { 'pixel_scale' : 0.3,
+                    'draw_method' : 'fft',
+                    'random_seed' : { 'type' : 'Sequence', 'first' : 1234 },
+                    'noise' : { 'type' : 'Gaussian', 'sigma' : 0.01 }
+                  },
+        'image_num' : 0,
+        'image_origin' : galsim.PositionI(1,1)
+    }
+
+    config = copy.deepcopy(base_config)
+    images1 = galsim.config.BuildStamps(nobjects, config, nproc=1)[0]
+    np.testing.assert_equal(len(images1), nobjects)
+    for k, im in enumerate(images1):
+        np.testing.assert_almost_equal(im.array.sum() / (100.*(k+1)), 1., decimal=1)
+
+    # Use a very short stamp_task_time, so the work is split into many small chunks, and a
+    # small max_stamps_pending, so the workers have to wait for the earlier stamps to be done.
+    save_time = galsim.config.stamp.stamp_task_time
+    save_pending = galsim.config.stamp.max_stamps_pending
+    try:
+        for stamp_task_time, max_stamps_pending in [ (save_time, save_pending),
+                                                     (1.e-4, save_pending), (save_time, 3) ]:
+            galsim.config.stamp.stamp_task_time = stamp_task_time
+            galsim.config.stamp.max_stamps_pending = max_stamps_pending
+            for nproc in [ 2, 3 ]:
+                config = copy.deepcopy(base_config)
+                images2 = galsim.config.BuildStamps(nobjects, config, nproc=nproc)[0]
+                np.testing.assert_equal(len(images2), nobjects)
+                for k in range(nobjects):
+                    np.testing.assert_equal(images2[k].bounds, images1[k].bounds)
+                    np.testing.assert_array_equal(
+                        images2[k].array, images1[k].array,
+                        err_msg='Stamp %d differs for nproc=%d'%(k,nproc))
+    finally:
+        galsim.config.stamp.stamp_task_time = save_time
+        galsim.config.stamp.max_stamps_pending = save_pending
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_abandoned_stream():
+    """Test that abandoning a StreamStamps generator part way through doesn't leave stale
+    results in a persistent WorkerPool for the next image
+    """
+    import copy
+    import time
+    t1 = time.time()
+
+    nobjects = 12
+    base_config = {
+        'gal' : { 'type' : 'Exponential',
+                  'half_light_radius' : { 'type' : 'Random', 'min' : 0.5, 'max' : 1.5 },
+                  'flux' : { 'type' : 'Sequence', 'first' : 100, 'step' : 100 }
+                },
+        'image' : { 'pixel_scale' : 0.3,
+                    'draw_method' : 'fft',
+                    'random_seed' : { 'type' : 'Sequence', 'first' : 1234 }
+                  },
+        'image_num' : 0,
+        'image_origin' : galsim.PositionI(1,1)
+    }
+
+    config = copy.deepcopy(base_config)
+    images1 = galsim.config.BuildStamps(nobjects, config, nproc=1)[0]
+
+    pool = galsim.config.WorkerPool(2)
+    try:
+        # Stop after the first stamp by closing the generator.
+        config = copy.deepcopy(base_config)
+        config['worker_pool'] = pool
+        stream = galsim.config.StreamStamps(nobjects, config, nproc=2)
+        stream.next()
+        stream.close()
+
+        # Stop after the first stamp by raising an exception while handling it.
+        config = copy.deepcopy(base_config)
+        config['worker_pool'] = pool
+        try:
+            for stamp in galsim.config.StreamStamps(nobjects, config, nproc=2):
+                raise ValueError('Stop here')
+        except ValueError:
+            pass
+
+        # The next use of the pool should only get its own results.
+        config = copy.deepcopy(base_config)
+        config['worker_pool'] = pool
+        images2 = galsim.config.BuildStamps(nobjects, config, nproc=2)[0]
+        np.testing.assert_equal(len(images2), nobjects)
+        for k in range(nobjects):
+            np.testing.assert_array_equal(
+                images2[k].array, images1[k].array,
+                err_msg='Stamp %d differs after abandoning a stream on the same pool'%k)
+    finally:
+        pool.close()
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_shared_images():
+    """Test that building Tiled and Scattered images with several processes, which add their
+    stamps into shared images, matches the serial result and cleans up the shared files
+    """
+    import copy
+    import glob
+    import tempfile
+    import time
+    t1 = time.time()
+
+    if os.path.isdir('/dev/shm'):
+        shm_dir = '/dev/shm'
+    else:
+        shm_dir = tempfile.gettempdir()
+    shm_pattern = os.path.join(shm_dir, 'galsim_shared_*')
+    shm_files = set(glob.glob(shm_pattern))
+
+    gal = { 'type' : 'Exponential',
+            'half_light_radius' : { 'type' : 'Random', 'min' : 0.5, 'max' : 1.5 },
+            'flux' : 100 
+          }
+    tiled = { 'type' : 'Tiled',
+              'nx_tiles' : 4,
+              'ny_tiles' : 3,
+              'stamp_size' : 24,
+              'pixel_scale' : 0.3,
+              'random_seed' : 1234,
+              'noise' : { 'sky_level' : 100 }
+            }
+    scattered = { 'type' : 'Scattered',
+                  'size' : 64,
+                  'stamp_size' : 24,
+                  'nobjects' : 10,
+                  'pixel_scale' : 0.3,
+                  'random_seed' : 1234,
+                  'noise' : { 'sky_level' : 100 }
+                }
+
+    for image_config in [ tiled, scattered ]:
+        base_config = { 'gal' : gal, 'image' : image_config }
+        config = copy.deepcopy(base_config)
+        config['image']['nproc'] = 1
+        image1 = galsim.config.BuildImage(config)[0]
+
+        config = copy.deepcopy(base_config)
+        config['image']['nproc'] = 2
+        image2 = galsim.config.BuildImage(config)[0]
+        np.testing.assert_array_equal(
+            image2.array, image1.array,
+            err_msg='%s image built with nproc=2 differs from nproc=1'%image_config['type'])
+
+        # The shared files should all have been removed.
+        np.testing.assert_equal(set(glob.glob(shm_pattern)), shm_files)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_precompute_lensing():
+    """Test that precomputing the lensing for a whole image gives the same result as doing it
+    for each object separately
+    """
+    import copy
+    import time
+    t1 = time.time()
+
+    base_config = {
+        'input' : { 'power_spectrum' : { 'e_power_function' : 'np.exp(-k**0.2)',
+                                         'grid_spacing' : 5 },
+                    'nfw_halo' : { 'mass' : 1.e14, 'conc' : 4, 'redshift' : 0.3 } },
+        'gal' : { 'type' : 'Exponential',
+                  'half_light_radius' : { 'type' : 'Random', 'min' : 0.5, 'max' : 1.5 },
+                  'flux' : 100,
+                  'redshift' : 0.6,
+                  'shear' : { 'type' : 'PowerSpectrumShear' },
+                  'magnification' : { 'type' : 'NFWHaloMagnification' }
+                },
+        'image' : { 'type' : 'Scattered',
+                    'size' : 256,
+                    'nobjects' : 20,
+                    'stamp_size' : 32,
+                    'pixel_scale' : 0.3,
+                    'random_seed' : 1234,
+                  }
+    }
+
+    config = copy.deepcopy(base_config)
+    galsim.config.ProcessInput(config)
+    image1 = galsim.config.BuildImage(config)[0]
+    assert 'precomputed_lensing' in config
+    lensing = config['precomputed_lensing']
+    np.testing.assert_equal(len(lensing['x']), 20)
+    np.testing.assert_equal(len(lensing['power_spectrum']), 1)
+    np.testing.assert_equal(len(lensing['nfw_halo']), 1)
+
+    # Turn off the precomputation, so each object calls the lensing engines itself.
+    save_func = galsim.config.image.PrecomputeLensing
+    galsim.config.image.PrecomputeLensing = lambda *args, **kwargs: None
+    try:
+        config = copy.deepcopy(base_config)
+        galsim.config.ProcessInput(config)
+        image2 = galsim.config.BuildImage(config)[0]
+    finally:
+        galsim.config.image.PrecomputeLensing = save_func
+    assert 'precomputed_lensing' not in config
+    np.testing.assert_array_equal(image1.array, image2.array)
+
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
 if __name__ == "__main__":
     test_scattered()
+    test_worker_pool()
+    test_stream_multi()
+    test_stamp_scheduling()
+    test_abandoned_stream()
+    test_shared_images()
+    test_precompute_lensing()
 
 
@@ -867,6 +867,168 @@ def test_pos_value():
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
 
+def test_eval_value():
+    """Test the Eval type, including the caching of the compiled strings
+    """
+    import time
+    t1 = time.time()
+
+    config = {
+        'eval_variables' : { 'fscale' : 0.5, 'iext' : 3 },
+        'pixel_scale' : 0.3,
+
+        'eval1' : { 'type' : 'Eval', 'str' : '800 * 1.e-9 / 4 * 206265' },
+        'eval2' : { 'type' : 'Eval', 'str' : 'math.sqrt(x**2 + y**2) * scale',
+                    'fx' : 3., 'fy' : 4. },
+        'eval3' : { 'type' : 'Eval',
+                    'str' : 'sum(numpy.arange(ext).sum() * k for k in [1, 2])' },
+        'eval4' : { 'type' : 'Eval', 'str' : 'obj_num * pixel_scale' },
+        'eval5' : { 'type' : 'Eval', 'str' : 'obj_num * 2', 'iobj_num' : 7 },
+        'eval6' : { 'type' : 'Eval', 'str' : 'math.sqrt(-1)' },
+        'eval7' : { 'type' : 'Eval', 'str' : '3 *' },
+    }
+
+    eval1, safe1 = galsim.config.ParseValue(config,'eval1',config, float)
+    np.testing.assert_almost_equal(eval1, 800 * 1.e-9 / 4 * 206265)
+    assert safe1
+
+    # User-defined variables and eval_variables.
+    eval2, safe2 = galsim.config.ParseValue(config,'eval2',config, float)
+    np.testing.assert_almost_equal(eval2, 2.5)
+    assert safe2
+
+    # The variables should also be visible inside generator expressions.
+    eval3, safe3 = galsim.config.ParseValue(config,'eval3',config, int)
+    np.testing.assert_equal(eval3, 9)
+    assert safe3
+
+    # Values that use base variables like obj_num are not safe.
+    for k in range(4):
+        config['obj_num'] = k
+        config['seq_index'] = k
+        eval4, safe4 = galsim.config.ParseValue(config,'eval4',config, float)
+        np.testing.assert_almost_equal(eval4, k * 0.3)
+        assert not safe4
+        namespace = config['eval_namespace']
+
+        # Unless a user-defined variable has the same name.
+        eval5, safe5 = galsim.config.ParseValue(config,'eval5',config, int)
+        np.testing.assert_equal(eval5, 14)
+        assert safe5
+
+        # The shared part of the namespace is only built once for each object.
+        assert config['eval_namespace'] is namespace
+
+    # Each string is only compiled once.
+    code = galsim.config.value._eval_cache('obj_num * pixel_scale')[0]
+    assert code is galsim.config.value._eval_cache('obj_num * pixel_scale')[0]
+
+    try:
+        np.testing.assert_raises(ValueError, galsim.config.ParseValue, config, 'eval6', config,
+                                 float)
+        np.testing.assert_raises(ValueError, galsim.config.ParseValue, config, 'eval7', config,
+                                 float)
+    except ImportError:
+        print 'The assert_raises tests require nose'
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+
+def test_plan_values():
+    """Test PlanValues, which generates the values for all the objects in an image at once
+    """
+    import time
+    t1 = time.time()
+
+    seed = 1234
+    first = 30
+    nobjects = 20
+    config = {
+        'input' : { 'catalog' : { 'dir' : 'config_input', 'file_name' : 'catalog.txt' } },
+        'image' : { 'plan_values' : True },
+        'image_num' : 0,
+        'gal' : {
+            'type' : 'Gaussian',
+            'flux' : { 'type' : 'Random', 'min' : 1, 'max' : 10 },
+            'ellip' : {
+                'type' : 'G1G2',
+                'g1' : { 'type' : 'RandomGaussian', 'sigma' : 0.2, 'min' : -0.3, 'max' : 0.3 },
+                'g2' : { 'type' : 'Sequence', 'first' : 0.1, 'step' : 0.01 }
+            },
+            'sigma' : { 'type' : 'Eval', 'str' : 'x * 2 + obj_num',
+                        'fx' : { 'type' : 'Random', 'min' : 0, 'max' : 1 } },
+            'magnification' : { 'type' : 'Catalog', 'col' : 1,
+                                'index' : { 'type' : 'Sequence', 'step' : 2 } },
+            'shift' : { 'type' : 'XY', 'x' : { 'type' : 'Random', 'min' : 0, 'max' : 3 },
+                        'y' : { 'type' : 'Random', 'min' : { 'type' : 'Sequence' }, 'max' : 9 } },
+            'rotate' : { 'type' : 'Random' }
+        }
+    }
+    galsim.config.ProcessInput(config)
+    config['rng'] = galsim.BaseDeviate(seed)
+    config['start_obj_num'] = first
+    galsim.config.PlanValues(config, first, nobjects)
+
+    gal = config['gal']
+    for item in [ gal['flux'], gal['ellip']['g1'], gal['ellip']['g2'], gal['sigma'],
+                  gal['sigma']['fx'], gal['magnification'], gal['shift']['x'], gal['rotate'] ]:
+        assert 'planned' in item
+    # Items whose parameters are not constants are generated as usual.
+    for item in [ gal['ellip'], gal['shift'], gal['shift']['y'] ]:
+        assert 'planned' not in item
+
+    # Check that the random values follow the documented layout.  The random items in
+    # sorted order are gal.ellip.g1, gal.flux, gal.rotate, gal.shift.x, gal.sigma.fx.
+    ud = galsim.UniformDeviate(seed)
+    rngs = [ galsim.BaseDeviate(int(ud() * 2**31) + 1) for i in range(5) ]
+    gd = galsim.GaussianDeviate(rngs[0], sigma=0.2)
+    g1 = [ gd() for k in range(nobjects) ]
+    while any([ abs(x) > 0.3 for x in g1 ]):
+        g1 = [ abs(x) > 0.3 and gd() or x for x in g1 ]
+    flux_u = galsim.UniformDeviate(rngs[1])
+    rotate_u = galsim.UniformDeviate(rngs[2])
+    x_u = galsim.UniformDeviate(rngs[3])
+    fx_u = galsim.UniformDeviate(rngs[4])
+
+    input_cat = galsim.Catalog(dir='config_input', file_name='catalog.txt')
+    for k in range(nobjects):
+        config['obj_num'] = first + k
+        config['seq_index'] = first + k
+        flux = galsim.config.ParseValue(gal, 'flux', config, int)[0]
+        np.testing.assert_equal(flux, min(int(math.floor(flux_u() * 10)) + 1, 10))
+        np.testing.assert_almost_equal(
+            galsim.config.ParseValue(gal['ellip'], 'g1', config, float)[0], g1[k])
+        np.testing.assert_almost_equal(
+            galsim.config.ParseValue(gal['ellip'], 'g2', config, float)[0], 0.1 + 0.01*(first+k))
+        np.testing.assert_almost_equal(
+            galsim.config.ParseValue(gal, 'rotate', config, galsim.Angle)[0].rad(),
+            rotate_u() * 2 * math.pi)
+        np.testing.assert_almost_equal(
+            galsim.config.ParseValue(gal['shift'], 'x', config, float)[0], x_u() * 3)
+        sigma, safe = galsim.config.ParseValue(gal, 'sigma', config, float)
+        np.testing.assert_almost_equal(sigma, fx_u() * 2 + first + k)
+        assert not safe
+        np.testing.assert_almost_equal(
+            galsim.config.ParseValue(gal, 'magnification', config, float)[0],
+            input_cat.getFloat(index = 2 * (k % 3), col = 1))
+
+    # The planned values are only used for the objects they were planned for.
+    config['obj_num'] = config['seq_index'] = first + nobjects
+    config['rng'] = galsim.BaseDeviate(seed)
+    np.testing.assert_equal(galsim.config.ParseValue(gal, 'flux', config, int)[0],
+                            min(int(math.floor(galsim.UniformDeviate(seed)() * 10)) + 1, 10))
+
+    # Turning plan_values off removes the plans.
+    config['image']['plan_values'] = False
+    galsim.config.PlanValues(config, first, nobjects)
+    for item in [ gal['flux'], gal['sigma'], gal['sigma']['fx'], gal['magnification'] ]:
+        assert 'planned' not in item
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+
 if __name__ == "__main__":
     test_float_value()
     test_int_value()
@@ -875,5 +1037,7 @@ if __name__ == "__main__":
     test_angle_value()
     test_shear_value()
     test_pos_value()
+    test_eval_value()
+    test_plan_values()
 
 
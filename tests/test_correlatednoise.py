@@ -614,9 +614,8 @@ def test_copy():
     cn_copy.setRNG(galsim.UniformDeviate(rseed))
     outim1.addNoise(cn)
     outim2.addNoise(cn_copy)
-    # The test below does not yield *exactly* equivalent results, plausibly due to the fact that the
-    # rootps_store cache is *not* copied over and when the CF is redrawn the GSObject may make
-    # slight approximations.  So we'll just test at high precision:
+    # The copy shares the cached rootps with its parent, since the correlation functions are the
+    # same, but we'll just test at high precision in case the CF gets redrawn:
     np.testing.assert_array_almost_equal(
         outim1.array, outim2.array, decimal=decimal_precise,
         err_msg="Copied correlated noise does not produce the same noise field as the parent "+
@@ -866,6 +865,145 @@ def test_convolve_cosmos():
     print 'time for %s = %.2f'%(funcname(), t2 - t1)
 
 
+def test_generate_noise_shapes():
+    """Check that the noise generated from a flat power spectrum is white with the right variance
+    for both odd and even image dimensions.
+    """
+    t1 = time.time()
+    gd = galsim.GaussianDeviate(rseed)
+    for ny, nx in [ (128, 128), (127, 128), (128, 129), (127, 129) ]:
+        variance = 0.
+        lag_x = 0.
+        lag_y = 0.
+        for i in range(nsum_test):
+            rootps = np.ones((ny, nx)) * np.sqrt(nx * ny)
+            noise = galsim.correlatednoise._generate_noise_from_rootps(gd, rootps)
+            np.testing.assert_equal(noise.shape, (ny, nx))
+            variance += np.mean(noise**2) / nsum_test
+            lag_x += np.mean(noise * np.roll(noise, 1, axis=1)) / nsum_test
+            lag_y += np.mean(noise * np.roll(noise, 1, axis=0)) / nsum_test
+        np.testing.assert_almost_equal(
+            variance, 1., decimal=decimal_approx,
+            err_msg="Noise generated from flat rootps has wrong variance for shape %s"%((ny,nx),))
+        np.testing.assert_almost_equal(
+            lag_x, 0., decimal=decimal_approx,
+            err_msg="Noise generated from flat rootps is correlated for shape %s"%((ny,nx),))
+        np.testing.assert_almost_equal(
+            lag_y, 0., decimal=decimal_approx,
+            err_msg="Noise generated from flat rootps is correlated for shape %s"%((ny,nx),))
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(), t2 - t1)
+
+
+def test_tiled_noise():
+    """Check that the tiled mode of applyTo gives noise with the right correlation function, which
+    does not depend on the number of threads, and that is not periodic.
+    """
+    t1 = time.time()
+    # A Gaussian correlation function with unit variance.
+    sigma = 1.5
+    cf = galsim.Gaussian(sigma=sigma, flux=2.*np.pi*sigma**2)
+    cn = galsim.correlatednoise._BaseCorrelatedNoise(galsim.BaseDeviate(rseed), cf)
+    size = 200
+    im1 = galsim.ImageD(size, size, scale=1.)
+    cn.applyTo(im1, tile_size=64)
+    np.testing.assert_almost_equal(
+        np.var(im1.array), 1., decimal=1, err_msg="Tiled noise has the wrong variance")
+    lag1 = np.mean(im1.array[:,1:] * im1.array[:,:-1])
+    np.testing.assert_almost_equal(
+        lag1, np.exp(-0.5/sigma**2), decimal=1,
+        err_msg="Tiled noise has the wrong correlation at a lag of 1 pixel")
+
+    # The periodic mode correlates the first and last columns, but the tiled mode shouldn't.
+    assert abs(np.mean(im1.array[:,0] * im1.array[:,-1])) < 0.4, "Tiled noise is periodic"
+    im2 = galsim.ImageD(size, size, scale=1.)
+    cn.applyTo(im2)
+    assert np.mean(im2.array[:,0] * im2.array[:,-1]) > 0.4, "Untiled noise is not periodic"
+
+    # The result should not depend on the number of threads, and with an explicit apron the image
+    # size does not need to be a multiple of the tile size.
+    for tile_size, apron in [ (64, None), (50, 6) ]:
+        im3 = galsim.ImageD(size+3, size-7, scale=1.)
+        im4 = galsim.ImageD(size+3, size-7, scale=1.)
+        cn.setRNG(galsim.BaseDeviate(rseed))
+        cn.applyTo(im3, tile_size=tile_size, apron=apron)
+        cn.setRNG(galsim.BaseDeviate(rseed))
+        cn.applyTo(im4, tile_size=tile_size, apron=apron, nthreads=3)
+        np.testing.assert_array_equal(
+            im3.array, im4.array, err_msg="Tiled noise depends on the number of threads")
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(), t2 - t1)
+
+
+def test_rootps_cache():
+    """Check that the cache of rootps arrays is shared by identical correlated noise models, is
+    updated when a model is transformed, and respects its size limit.
+    """
+    t1 = time.time()
+    galsim.clearCorrelatedNoiseCache()
+    ud = galsim.UniformDeviate(rseed)
+    noise_image = setup_uncorrelated_noise(ud, smallim_size)
+    cn1 = galsim.CorrelatedNoise(ud, noise_image, correct_periodicity=True)
+    cn2 = galsim.CorrelatedNoise(ud, noise_image, correct_periodicity=True)
+    shape = (largeim_size, largeim_size)
+    rootps1 = cn1._get_update_rootps(shape, 0.)
+    rootps2 = cn2._get_update_rootps(shape, 0.)
+    assert rootps1 is rootps2, "Identical correlated noise models did not share a cached rootps"
+    rootpsw1, var1 = cn1._get_update_rootps_whitening(shape, 0.)
+    rootpsw2, var2 = cn2._get_update_rootps_whitening(shape, 0.)
+    assert rootpsw1 is rootpsw2, \
+        "Identical correlated noise models did not share a cached whitening rootps"
+    np.testing.assert_equal(var1, var2)
+
+    # The cached arrays are shared, so they should not be writeable.
+    assert not rootps1.flags.writeable, "Cached rootps array is writeable"
+    assert not rootpsw1.flags.writeable, "Cached whitening rootps array is writeable"
+
+    # Once the key is known, a lookup should not need to draw the correlation function again.
+    cn1._draw_cf = None
+    try:
+        assert cn1._get_update_rootps(shape, 0.) is rootps1
+        assert cn1._get_update_rootps_whitening(shape, 0.)[0] is rootpsw1
+    finally:
+        del cn1._draw_cf
+
+    # A transformation in place should not use the old values.
+    cn2.applyShear(g1=0.2, g2=0.1)
+    rootps3 = cn2._get_update_rootps(shape, 0.)
+    assert rootps3 is not rootps1, "Sheared correlated noise model used the unsheared rootps"
+    cn3 = cn1.createSheared(g1=0.2, g2=0.1)
+    assert cn3._get_update_rootps(shape, 0.) is rootps3, \
+        "Equivalent sheared correlated noise models did not share a cached rootps"
+
+    # The noise generated from a cached rootps should be the same as from a recomputed one.
+    im1 = galsim.ImageD(largeim_size, largeim_size)
+    im2 = galsim.ImageD(largeim_size, largeim_size)
+    cn1.setRNG(galsim.BaseDeviate(rseed))
+    cn1.applyTo(im1)
+    galsim.clearCorrelatedNoiseCache()
+    cn1.setRNG(galsim.BaseDeviate(rseed))
+    cn1.applyTo(im2)
+    np.testing.assert_array_equal(
+        im1.array, im2.array, err_msg="Noise from cached rootps differs from recomputed rootps")
+
+    # With a limit of two arrays, the least recently used one should be dropped.
+    galsim.setCorrelatedNoiseCacheSize(2 * rootps1.nbytes)
+    try:
+        galsim.clearCorrelatedNoiseCache()
+        rootps1 = cn1._get_update_rootps(shape, 0.)
+        rootps3 = cn2._get_update_rootps(shape, 0.)
+        assert cn1._get_update_rootps(shape, 0.) is rootps1
+        rootps4 = cn1._get_update_rootps(shape, 0.5)
+        assert cn1._get_update_rootps(shape, 0.) is rootps1, \
+            "Most recently used rootps was dropped from the cache"
+        assert cn2._get_update_rootps(shape, 0.) is not rootps3, \
+            "Least recently used rootps was not dropped from the cache"
+    finally:
+        galsim.setCorrelatedNoiseCacheSize(100 * 1024**2)
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(), t2 - t1)
+
+
 if __name__ == "__main__":
     test_uncorrelated_noise_zero_lag()
     test_uncorrelated_noise_nonzero_lag()
@@ -881,3 +1019,6 @@ if __name__ == "__main__":
     test_copy()
     test_cosmos_and_whitening()
     test_convolve_cosmos()
+    test_rootps_cache()
+    test_generate_noise_shapes()
+    test_tiled_noise()
@@ -763,9 +763,214 @@ def test_offset():
                 im.array, im2.array, 6,
                 "obj.draw(im, offset=%f,%f) different from use_true_center=False")
 
+def test_fft_threads():
+    """Test that drawing with multi-threaded FFTs gives the same answer as a single thread.
+    """
+    import time
+    t1 = time.time()
+
+    # Use a convolution that needs a reasonably large FFT, so the threads are really used
+    # (if GalSim was compiled with the FFTW threads library).
+    gal = galsim.Sersic(n=2.5, half_light_radius=1.7, flux=test_flux)
+    psf = galsim.Moffat(beta=3, fwhm=0.7)
+    obj = galsim.Convolve([gal,psf])
+
+    im1 = galsim.ImageD(64,64)
+    galsim.setFFTThreads(1)
+    np.testing.assert_equal(galsim.getFFTThreads(), 1, "getFFTThreads is wrong")
+    obj.draw(im1, dx=0.05)
+
+    im2 = galsim.ImageD(64,64)
+    galsim.setFFTThreads(4, min_size=32)
+    nthreads = galsim.getFFTThreads()
+    print 'getFFTThreads() = ',nthreads
+    assert nthreads in [1,4], "getFFTThreads should be either 4 or 1 (if not using fftw threads)"
+    obj.draw(im2, dx=0.05)
+    galsim.setFFTThreads(1)
+
+    np.testing.assert_array_almost_equal(
+            im2.array, im1.array, 10,
+            "Drawing with multi-threaded FFTs gave a different image")
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_fft_wisdom():
+    """Test that the FFTW plan cache and wisdom files give consistent results.
+    """
+    import time
+    t1 = time.time()
+
+    obj = galsim.Convolve([galsim.Exponential(half_light_radius=1.2, flux=test_flux),
+                           galsim.Gaussian(sigma=0.4)])
+
+    # Drawing the same size repeatedly reuses the cached plan, which should give
+    # the same answer each time.
+    im1 = obj.draw(dx=0.1)
+    im2 = obj.draw(dx=0.1)
+    np.testing.assert_array_equal(
+            im2.array, im1.array, "Drawing with a cached FFTW plan gave a different image")
+
+    # Write the wisdom accumulated so far, and read it back in.
+    filename = "test_fft_wisdom.txt"
+    galsim.saveFFTWisdom(filename)
+    assert galsim.loadFFTWisdom(filename), "loadFFTWisdom failed to read %s"%filename
+    os.remove(filename)
+    assert not galsim.loadFFTWisdom(filename), "loadFFTWisdom should fail for missing file"
+
+    # Plans for large sizes only use FFTW_MEASURE if the wisdom is available.  Either way
+    # the results should match.
+    galsim.setFFTMeasureSize(0)
+    im3 = obj.draw(dx=0.1)
+    galsim.setFFTMeasureSize(1024)
+    np.testing.assert_array_almost_equal(
+            im3.array, im1.array, 10,
+            "Drawing with an FFTW_ESTIMATE plan gave a different image")
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_drawMany():
+    """Test that drawMany gives the same images as drawing each object separately.
+    """
+    import time
+    t1 = time.time()
+
+    ud = galsim.UniformDeviate(1234)
+    objs = []
+    offsets = []
+    for i in range(10):
+        gal = galsim.Exponential(half_light_radius=0.5+ud(), flux=test_flux)
+        gal.applyShear(g1=0.3*ud()-0.15, g2=0.3*ud()-0.15)
+        objs.append(galsim.Convolve([gal, galsim.Gaussian(sigma=0.3), galsim.Pixel(0.2)]))
+        offsets.append((ud()-0.5, ud()-0.5))
+
+    # Mix up the image types and even/odd sizes.
+    images1 = [ galsim.ImageF(32,32,scale=0.2) if i%2 == 0 else galsim.ImageD(33,31,scale=0.2)
+                for i in range(10) ]
+    images2 = [ im.copy() for im in images1 ]
+
+    for obj, im, offset in zip(objs, images1, offsets):
+        obj.draw(im, offset=offset)
+    galsim.drawMany(objs, images2, offsets)
+    for im1, im2 in zip(images1, images2):
+        np.testing.assert_array_almost_equal(
+                im2.array, im1.array, 6, "drawMany gave a different image than draw")
+        np.testing.assert_almost_equal(
+                im2.added_flux, im1.added_flux, 6, "drawMany gave a different added_flux")
+
+    # Check the other options.
+    for obj, im in zip(objs, images1):
+        obj.draw(im, gain=2.3, normalization='sb', use_true_center=False)
+        obj.draw(im, gain=2.3, normalization='sb', use_true_center=False, add_to_image=True)
+    galsim.drawMany(objs, images2, gain=2.3, normalization='sb', use_true_center=False)
+    galsim.drawMany(objs, images2, gain=2.3, normalization='sb', use_true_center=False,
+                    add_to_image=True)
+    for im1, im2 in zip(images1, images2):
+        np.testing.assert_array_almost_equal(
+                im2.array, im1.array, 6, "drawMany gave a different image than draw")
+
+    # Check invalid inputs
+    try:
+        np.testing.assert_raises(ValueError, galsim.drawMany, objs, images2[:5])
+        np.testing.assert_raises(ValueError, galsim.drawMany, objs[:1], [galsim.ImageF()])
+        np.testing.assert_raises(ValueError, galsim.drawMany, objs, images2,
+                                 normalization='invalid')
+    except ImportError:
+        print 'The assert_raises tests require nose'
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_shoot():
+    """Test the shoot method and the numpy arrays of PhotonArray.
+    """
+    import time
+    t1 = time.time()
+
+    obj = galsim.Gaussian(sigma=1.3, flux=test_flux)
+    n_photons = 10000
+    photons = obj.shoot(n_photons, galsim.BaseDeviate(1234))
+    np.testing.assert_equal(len(photons), n_photons, "shoot made the wrong number of photons")
+    np.testing.assert_equal(photons.x.shape, (n_photons,), "photons.x has the wrong shape")
+    np.testing.assert_almost_equal(
+            photons.flux.sum(), photons.getTotalFlux(), 6, "photons.flux has the wrong sum")
+    for i in range(0, n_photons, 1000):
+        assert photons.x[i] == photons.getX(i)
+        assert photons.y[i] == photons.getY(i)
+        assert photons.flux[i] == photons.getFlux(i)
+
+    # Using the same seed should give the same photons.
+    photons2 = obj.shoot(n_photons, galsim.BaseDeviate(1234))
+    np.testing.assert_array_equal(photons2.x, photons.x, "shoot with same rng is different")
+
+    # The arrays are views, so changing them changes the photons.
+    x = photons.x
+    x += 0.5
+    np.testing.assert_almost_equal(photons.getX(0), photons2.getX(0) + 0.5, 10,
+                                   "Changing photons.x didn't change the PhotonArray")
+
+    # Making a PhotonArray from arrays should give the same result when added to an image.
+    photons3 = galsim.PhotonArray(photons.x, photons.y, photons.flux)
+    im1 = galsim.ImageD(31,31,scale=0.3)
+    im1.setCenter(0,0)
+    im2 = im1.copy()
+    flux1 = photons.addTo(im1.view())
+    flux2 = photons3.addTo(im2.view())
+    np.testing.assert_almost_equal(flux2, flux1, 10, "addTo gave different added flux")
+    np.testing.assert_array_almost_equal(im2.array, im1.array, 10,
+                                         "addTo from arrays gave different image")
+    np.testing.assert_almost_equal(im1.array.sum() * 0.3**2, flux1, 6,
+                                   "addTo added the wrong flux to the image")
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_drawShoot_threads():
+    """Test that drawShoot with multiple threads is reproducible and consistent.
+    """
+    import time
+    t1 = time.time()
+
+    obj = galsim.Gaussian(sigma=1.3, flux=1.e6)
+    n_photons = 450000   # More than several chunks of 100000.
+
+    im1 = obj.drawShoot(galsim.ImageD(64,64,scale=0.2), n_photons=n_photons,
+                        rng=galsim.BaseDeviate(1234))
+    im2 = obj.drawShoot(galsim.ImageD(64,64,scale=0.2), n_photons=n_photons,
+                        rng=galsim.BaseDeviate(1234), nthreads=3)
+    im3 = obj.drawShoot(galsim.ImageD(64,64,scale=0.2), n_photons=n_photons,
+                        rng=galsim.BaseDeviate(1234), nthreads=3)
+
+    # The same seed and nthreads should give exactly the same image.
+    np.testing.assert_array_equal(
+            im3.array, im2.array, "drawShoot with nthreads=3 is not reproducible")
+
+    # Compared to the single thread version, the images should only differ by the noise.
+    np.testing.assert_almost_equal(
+            im2.added_flux / obj.getFlux(), im1.added_flux / obj.getFlux(), 4,
+            "drawShoot with nthreads=3 has the wrong added_flux")
+    mom1 = getmoments(im1)
+    mom2 = getmoments(im2)
+    print 'moments 1 = ',mom1
+    print 'moments 2 = ',mom2
+    np.testing.assert_array_almost_equal(
+            mom2[0:2], mom1[0:2], 1, "drawShoot with nthreads=3 has the wrong centroid")
+    np.testing.assert_array_almost_equal(
+            np.array(mom2[2:4]) / np.array(mom1[2:4]), 1., 2,
+            "drawShoot with nthreads=3 has the wrong second moments")
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 if __name__ == "__main__":
     test_draw()
     test_drawK()
     test_drawK_Gaussian()
     test_drawK_Exponential_Moffat()
     test_offset()
+    test_fft_threads()
+    test_fft_wisdom()
+    test_drawMany()
+    test_shoot()
+    test_drawShoot_threads()
@@ -590,6 +590,95 @@ def test_hsmparams_nodefault():
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
+def test_batch():
+    """Test that the batch functions give the same results as measuring one object at a time."""
+    import time
+    t1 = time.time()
+
+    # Make a stack of sheared Gaussian galaxies of various sizes, all convolved with the same PSF.
+    nx = 48
+    psf = galsim.Gaussian(flux = 1.0, sigma = 0.6)
+    psf_image = psf.draw(image = galsim.ImageF(nx, nx), dx = pixel_scale)
+    gal_images = []
+    for sig in gaussian_sig_values:
+        for g1 in shear_values:
+            gal = galsim.Gaussian(flux = 1.0, sigma = sig)
+            gal.applyShear(g1=g1, g2=-0.5*g1)
+            final = galsim.Convolve([gal, psf])
+            gal_images.append(final.draw(image = galsim.ImageF(nx, nx), dx = pixel_scale))
+    # Add an image that will fail, since it is all 0's.
+    gal_images.append(galsim.ImageF(nx, nx))
+    n = len(gal_images)
+    stack = np.array([ im.array for im in gal_images ])
+
+    def check(results, single_results, err_msg):
+        for i, res in enumerate(single_results):
+            np.testing.assert_equal(results['error_message'][i], res.error_message, err_msg)
+            np.testing.assert_equal(results['flags'][i], int(res.error_message != ""), err_msg)
+            for name in ['moments_status', 'moments_sigma', 'moments_amp', 'moments_rho4',
+                         'moments_n_iter', 'correction_status', 'corrected_e1', 'corrected_e2',
+                         'corrected_g1', 'corrected_g2', 'corrected_shape_err',
+                         'resolution_factor']:
+                np.testing.assert_almost_equal(
+                    results[name][i], getattr(res, name), decimal=12,
+                    err_msg=err_msg + " - incorrect %s"%name)
+            np.testing.assert_almost_equal(results['observed_e1'][i], res.observed_shape.e1,
+                                           decimal=12, err_msg=err_msg)
+            np.testing.assert_almost_equal(results['observed_e2'][i], res.observed_shape.e2,
+                                           decimal=12, err_msg=err_msg)
+            np.testing.assert_almost_equal(results['moments_centroid_x'][i],
+                                           res.moments_centroid.x, decimal=12, err_msg=err_msg)
+            np.testing.assert_almost_equal(results['moments_centroid_y'][i],
+                                           res.moments_centroid.y, decimal=12, err_msg=err_msg)
+
+    # EstimateShear with a shared PSF, for a 3-d stack and for a list of images.
+    single = [ galsim.hsm.EstimateShear(im, psf_image, strict = False) for im in gal_images ]
+    assert single[-1].error_message != ""
+    results = galsim.hsm.EstimateShearBatch(stack, psf_image, strict = False)
+    np.testing.assert_equal(len(results), n)
+    check(results, single, "EstimateShearBatch with a 3-d stack")
+    results = galsim.hsm.EstimateShearBatch(gal_images, psf_image, strict = False, nthreads = 3)
+    check(results, single, "EstimateShearBatch with a list of images and 3 threads")
+
+    # A PSF for each galaxy, and a different method.
+    psf_images = [ psf.draw(image = galsim.ImageD(nx+4, nx+4), dx = pixel_scale,
+                            offset = (0.1*i, -0.05*i))
+                   for i in range(n) ]
+    single = [ galsim.hsm.EstimateShear(im, p, shear_est = 'KSB', strict = False)
+               for im, p in zip(gal_images, psf_images) ]
+    results = galsim.hsm.EstimateShearBatch(stack, psf_images, shear_est = 'KSB', strict = False,
+                                            nthreads = 2)
+    check(results, single, "EstimateShearBatch with a PSF for each galaxy")
+
+    # FindAdaptiveMom with a badpix image for each object.
+    badpix = np.zeros(stack.shape, dtype=np.int32)
+    for i in range(n):
+        badpix[i, i % nx, :] = 1
+    single = [ galsim.hsm.FindAdaptiveMom(im, badpix = galsim.ImageViewI(b), strict = False)
+               for im, b in zip(gal_images, badpix) ]
+    results = galsim.hsm.FindAdaptiveMomBatch(stack, badpix = badpix, strict = False)
+    check(results, single, "FindAdaptiveMomBatch with per-object badpix")
+    results = galsim.hsm.FindAdaptiveMomBatch(
+        gal_images, badpix = [ galsim.ImageViewI(b) for b in badpix ], strict = False,
+        nthreads = 4)
+    check(results, single, "FindAdaptiveMomBatch with a list of images and 4 threads")
+
+    # With strict = True, the failure should raise an exception, but not without it.
+    try:
+        np.testing.assert_raises(RuntimeError, galsim.hsm.EstimateShearBatch, stack, psf_image)
+        np.testing.assert_raises(RuntimeError, galsim.hsm.FindAdaptiveMomBatch, stack)
+        np.testing.assert_raises(ValueError, galsim.hsm.FindAdaptiveMomBatch, stack,
+                                 badpix = badpix[:, 1:, :])
+        np.testing.assert_raises(ValueError, galsim.hsm.EstimateShearBatch, stack,
+                                 psf_images[:-1])
+    except ImportError:
+        print 'The assert_raises tests require nose'
+    results = galsim.hsm.FindAdaptiveMomBatch(stack[:-1])
+    np.testing.assert_equal(results['flags'], 0)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 if __name__ == "__main__":
     test_moments_basic()
     test_shearest_basic()
@@ -598,4 +687,5 @@ if __name__ == "__main__":
     test_shearest_shape()
     test_hsmparams()
     test_hsmparams_nodefault()
+    test_batch()
 
@@ -501,6 +501,143 @@ def test_shear_get():
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
+def test_shear_get_many():
+    """Check that getting many positions at once matches getting them one at a time"""
+    import time
+    t1 = time.time()
+    import cPickle
+    import warnings
+
+    my_ps = galsim.PowerSpectrum(lambda k : k**0.5)
+    my_ps.buildGrid(grid_spacing = 1., ngrid = 50, rng = galsim.BaseDeviate(1234),
+                    interpolant = 'cubic')
+    ud = galsim.UniformDeviate(5678)
+    x = np.array([ 45.*ud() - 22.5 for i in range(20) ])
+    y = np.array([ 45.*ud() - 22.5 for i in range(20) ])
+    # Add a position off the grid, which should get the default values.
+    x[-1] = 100.
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        g1, g2 = my_ps.getShear((x,y))
+        kappa = my_ps.getConvergence((x,y))
+        g1_l, g2_l, mu = my_ps.getLensing((x,y))
+        for i in range(len(x)):
+            g1_i, g2_i = my_ps.getShear(galsim.PositionD(x[i],y[i]))
+            np.testing.assert_almost_equal(
+                g1_i, g1[i], 12, err_msg="getShear for an array and a single position disagree")
+            np.testing.assert_almost_equal(
+                g2_i, g2[i], 12, err_msg="getShear for an array and a single position disagree")
+            np.testing.assert_almost_equal(
+                my_ps.getConvergence((x[i],y[i])), kappa[i], 12,
+                err_msg="getConvergence for an array and a single position disagree")
+            np.testing.assert_almost_equal(
+                my_ps.getMagnification((x[i],y[i])), mu[i], 12,
+                err_msg="getMagnification and getLensing disagree")
+    np.testing.assert_array_equal(g1_l, g1, "getShear and getLensing disagree")
+    np.testing.assert_array_equal(g2_l, g2, "getShear and getLensing disagree")
+    np.testing.assert_equal((g1[-1], g2[-1], kappa[-1], mu[-1]), (0., 0., 0., 1.),
+                            "Wrong values for a position off the grid")
+
+    # The cached interpolators should not be pickled, and should be rebuilt after unpickling.
+    ps2 = cPickle.loads(cPickle.dumps(my_ps))
+    g1_2, g2_2 = ps2.getShear((x[:-1],y[:-1]))
+    np.testing.assert_array_equal(g1_2, g1[:-1], "getShear after pickling disagrees")
+    np.testing.assert_array_equal(g2_2, g2[:-1], "getShear after pickling disagrees")
+
+    # A new grid should not use the old interpolators.
+    my_ps.buildGrid(grid_spacing = 1., ngrid = 50, rng = galsim.BaseDeviate(8765))
+    g1_3, g2_3 = my_ps.getShear((x[:-1],y[:-1]))
+    assert not np.any(g1_3 == g1[:-1]), "getShear used the interpolator from an old grid"
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+
+def test_low_memory_grid():
+    """Check that the low_memory mode of buildGrid matches the default algorithm"""
+    import time
+    t1 = time.time()
+    import os
+    import shutil
+    import tempfile
+
+    ps = galsim.PowerSpectrum(lambda k : k**0.5, lambda k : 0.3 * k**0.5)
+    for ngrid, kmin_factor, kmax_factor in [ (50, 1, 1), (31, 1, 1), (20, 3, 2), (15, 2, 3) ]:
+        g1, g2, kappa = ps.buildGrid(grid_spacing = 1., ngrid = ngrid,
+                                     rng = galsim.BaseDeviate(1234), get_convergence = True,
+                                     kmin_factor = kmin_factor, kmax_factor = kmax_factor)
+        g1_l, g2_l, kappa_l = ps.buildGrid(grid_spacing = 1., ngrid = ngrid,
+                                           rng = galsim.BaseDeviate(1234), get_convergence = True,
+                                           kmin_factor = kmin_factor, kmax_factor = kmax_factor,
+                                           low_memory = True)
+        np.testing.assert_equal(g1_l.shape, (ngrid,ngrid))
+        np.testing.assert_array_almost_equal(
+            g1_l, g1, 12, err_msg="low_memory g1 does not match default for ngrid=%d"%ngrid)
+        np.testing.assert_array_almost_equal(
+            g2_l, g2, 12, err_msg="low_memory g2 does not match default for ngrid=%d"%ngrid)
+        np.testing.assert_array_almost_equal(
+            kappa_l, kappa, 12, err_msg="low_memory kappa does not match default for ngrid=%d"%ngrid)
+
+        # The float32 grids should match to float precision.
+        g1_f, g2_f, kappa_f = ps.buildGrid(grid_spacing = 1., ngrid = ngrid,
+                                           rng = galsim.BaseDeviate(1234), get_convergence = True,
+                                           kmin_factor = kmin_factor, kmax_factor = kmax_factor,
+                                           dtype = np.float32)
+        np.testing.assert_equal(g1_f.dtype, np.float32)
+        scale = np.max(np.abs(g1))
+        np.testing.assert_array_almost_equal(
+            g1_f/scale, g1/scale, 5, err_msg="float32 g1 does not match default")
+        np.testing.assert_array_almost_equal(
+            g2_f/scale, g2/scale, 5, err_msg="float32 g2 does not match default")
+        np.testing.assert_array_almost_equal(
+            kappa_f/scale, kappa/scale, 5, err_msg="float32 kappa does not match default")
+
+        # Other ways of specifying the same dtypes should work the same way.
+        for dtype in [ 'float32', 'f4', np.dtype(np.float32) ]:
+            g1_d = ps.buildGrid(grid_spacing = 1., ngrid = ngrid, rng = galsim.BaseDeviate(1234),
+                                kmin_factor = kmin_factor, kmax_factor = kmax_factor,
+                                dtype = dtype)[0]
+            np.testing.assert_equal(g1_d.dtype, np.float32)
+            np.testing.assert_array_equal(g1_d, g1_f, err_msg="dtype = %r differs"%dtype)
+        g1_d = ps.buildGrid(grid_spacing = 1., ngrid = ngrid, rng = galsim.BaseDeviate(1234),
+                            kmin_factor = kmin_factor, kmax_factor = kmax_factor,
+                            dtype = np.dtype('float64'))[0]
+        np.testing.assert_array_equal(g1_d, g1, err_msg="dtype = numpy.dtype('float64') differs")
+        try:
+            np.testing.assert_raises(ValueError, ps.buildGrid, grid_spacing=1., ngrid=ngrid,
+                                     dtype=np.int32)
+            np.testing.assert_raises(ValueError, ps.buildGrid, grid_spacing=1., ngrid=ngrid,
+                                     dtype='not_a_dtype')
+        except ImportError:
+            print 'The assert_raises tests require nose'
+
+    # Write the grids to memory-mapped files in a temporary directory, so we don't leave anything
+    # behind.
+    out_dir = tempfile.mkdtemp()
+    grid_files = [ os.path.join(out_dir, name)
+                   for name in [ 'test_g1.dat', 'test_g2.dat', 'test_kappa.dat' ] ]
+    try:
+        ps.buildGrid(grid_spacing = 1., ngrid = 20, rng = galsim.BaseDeviate(1234),
+                     kmin_factor = 3, kmax_factor = 2, grid_files = grid_files)
+        assert isinstance(ps.grid_g1, np.memmap)
+        g1_m, g2_m = ps.getShear((3.2, -4.7))
+        g1, g2, kappa = ps.buildGrid(grid_spacing = 1., ngrid = 20,
+                                     rng = galsim.BaseDeviate(1234), get_convergence = True,
+                                     kmin_factor = 3, kmax_factor = 2)
+        for file_name, array in zip(grid_files, [g1, g2, kappa]):
+            np.testing.assert_array_almost_equal(
+                np.fromfile(file_name).reshape(20,20), array, 12,
+                err_msg="grid written to %s is wrong"%file_name)
+        np.testing.assert_almost_equal(ps.getShear((3.2, -4.7)), (g1_m, g2_m), 12,
+                                       err_msg="getShear with memory-mapped grids is wrong")
+    finally:
+        shutil.rmtree(out_dir)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+
 def test_shear_units():
     """Test that the shears we get out do not depend on the input PS and grid units."""
     import time
@@ -814,6 +951,8 @@ if __name__ == "__main__":
     test_shear_reference()
     test_shear_units()
     test_shear_get()
+    test_shear_get_many()
+    test_low_memory_grid()
     test_tabulated()
     test_kappa_gauss()
     test_power_spectrum_with_kappa()
@@ -425,6 +425,87 @@ def test_OpticalPSF_flux_scaling():
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
+def test_OpticalPSF_cache():
+    """Test that the cached pupil planes and profiles give the right answers.
+    """
+    import time
+    t1 = time.time()
+
+    # The wavefront phase from the cached Zernike basis should match a direct calculation.
+    aberrations = dict(defocus=-0.7, astig1=0.03, astig2=-0.04, coma1=0.1, coma2=-0.2,
+                       trefoil1=0.05, trefoil2=0.15, spher=-0.1)
+    rho_all, in_pupil = galsim.optics.generate_pupil_plane(
+        array_shape=(64, 64), lam_over_diam=3., obscuration=0.2, nstruts=3)
+    rho = rho_all[in_pupil]
+    rhosq = np.abs(rho)**2
+    phase = (np.sqrt(3.) * (2. * rhosq - 1.) * aberrations['defocus'] +
+             np.sqrt(6.) * ( aberrations['astig1'] * (rho**2).imag +
+                             aberrations['astig2'] * (rho**2).real ) +
+             np.sqrt(8.) * (3. * rhosq - 2.) * ( aberrations['coma1'] * rho.imag + 
+                                                 aberrations['coma2'] * rho.real ) +
+             np.sqrt(8.) * ( aberrations['trefoil1'] * (rho**3).imag + 
+                             aberrations['trefoil2'] * (rho**3).real ) +
+             np.sqrt(5.) * (6. * rhosq**2 - 6. * rhosq + 1.) * aberrations['spher'])
+    for i in range(2):
+        # The second time uses the cached basis.
+        wf = galsim.optics.wavefront(array_shape=(64, 64), lam_over_diam=3., obscuration=0.2,
+                                     nstruts=3, **aberrations)
+        np.testing.assert_array_almost_equal(
+            wf[in_pupil], np.exp(2j * np.pi * phase), decimal=12,
+            err_msg="Wavefront from cached Zernike basis does not match direct calculation")
+        np.testing.assert_array_equal(
+            wf[~in_pupil], 0., err_msg="Wavefront is non-zero outside the pupil")
+
+    # Building the same OpticalPSF again should give the same profile, even if the first one was
+    # transformed in place.
+    kwargs = dict(lam_over_diam=1.9, obscuration=0.32, oversampling=1.3, pad_factor=1.7,
+                  **aberrations)
+    psf1 = galsim.OpticalPSF(**kwargs)
+    im1 = psf1.draw(dx=0.4)
+    psf1.applyShear(g1=0.2, g2=0.1)
+    psf1 *= 3.
+    psf2 = galsim.OpticalPSF(**kwargs)
+    im2 = psf2.draw(dx=0.4)
+    np.testing.assert_array_equal(
+        im2.array, im1.array, err_msg="Cached OpticalPSF was changed by transforming a copy")
+
+    # And it should be the same as building it without the cache.
+    galsim.setOpticalPSFCacheSize(0)
+    try:
+        psf3 = galsim.OpticalPSF(**kwargs)
+        im3 = psf3.draw(dx=0.4)
+    finally:
+        galsim.setOpticalPSFCacheSize(32)
+    np.testing.assert_array_equal(
+        im3.array, im1.array, err_msg="Cached OpticalPSF differs from a newly built one")
+
+    # Likewise with struts, which are part of the cache key.
+    kwargs = dict(lam_over_diam=1.9, obscuration=0.32, nstruts=4, strut_thick=0.08,
+                  strut_angle=20.*galsim.degrees, **aberrations)
+    psf1 = galsim.OpticalPSF(**kwargs)
+    im1 = psf1.draw(dx=0.4)
+    psf2 = galsim.OpticalPSF(**kwargs)
+    im2 = psf2.draw(dx=0.4)
+    np.testing.assert_array_equal(
+        im2.array, im1.array, err_msg="Cached OpticalPSF with struts differs from the first one")
+    galsim.setOpticalPSFCacheSize(0)
+    try:
+        psf3 = galsim.OpticalPSF(**kwargs)
+        im3 = psf3.draw(dx=0.4)
+    finally:
+        galsim.setOpticalPSFCacheSize(32)
+    np.testing.assert_array_equal(
+        im3.array, im1.array,
+        err_msg="Cached OpticalPSF with struts differs from a newly built one")
+    # A different strut angle should give a different profile.
+    kwargs['strut_angle'] = 35.*galsim.degrees
+    ny, nx = im1.array.shape
+    im4 = galsim.OpticalPSF(**kwargs).draw(image=galsim.ImageD(nx, ny), dx=0.4)
+    assert np.max(np.abs(im4.array - im1.array)) > 0.
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 
 if __name__ == "__main__":
     test_check_all_contiguous()
@@ -442,3 +523,4 @@ if __name__ == "__main__":
     test_OpticalPSF_vs_Airy_with_obs()
     test_OpticalPSF_aberrations_struts()
     test_OpticalPSF_flux_scaling()
+    test_OpticalPSF_cache()
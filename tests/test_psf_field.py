@@ -0,0 +1,159 @@
+# Copyright 2012, 2013 The GalSim developers:
+# https://github.com/GalSim-developers
+#
+# This file is part of GalSim: The modular galaxy image simulation toolkit.
+#
+# GalSim is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GalSim is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GalSim.  If not, see <http://www.gnu.org/licenses/>
+#
+import numpy as np
+import os
+import sys
+
+from galsim_test_helpers import *
+
+try:
+    import galsim
+except ImportError:
+    path, filename = os.path.split(__file__)
+    sys.path.append(os.path.abspath(os.path.join(path, "..")))
+    import galsim
+
+# The PSF used for these tests: a Gaussian whose size and shape vary across a 100x100 field.
+def psf_func(pos):
+    psf = galsim.Gaussian(sigma = 1. + 0.2 * pos.x / 100.)
+    psf.applyShear(g1 = 0.1 * pos.y / 100., g2 = 0.03)
+    return psf
+
+bounds = galsim.BoundsD(0., 100., 0., 100.)
+dx = 0.2
+stamp_size = 64
+
+def psf_compare(psf1, psf2):
+    """Helper function to check that two PSFs draw the same image
+    """
+    im1 = psf1.draw(image=galsim.ImageD(stamp_size, stamp_size), dx=dx)
+    im2 = psf2.draw(image=galsim.ImageD(stamp_size, stamp_size), dx=dx)
+    np.testing.assert_array_almost_equal(im1.array, im2.array, 10)
+
+def test_psf_field_nodes():
+    """Test that a PSFField reproduces the PSF at its nodes and interpolates between them.
+    """
+    import time
+    t1 = time.time()
+
+    psf_field = galsim.PSFField(psf_func, bounds, nx=3, ny=5, dx=dx, stamp_size=stamp_size,
+                                dtype=np.float64)
+    np.testing.assert_equal(psf_field.stamps.shape, (5, 3, stamp_size, stamp_size))
+    np.testing.assert_equal(psf_field.getScale(), dx)
+
+    # At the nodes, the stored stamps should be just the drawn PSF.
+    im = galsim.ImageD(stamp_size, stamp_size)
+    for pos in [ galsim.PositionD(0., 0.), galsim.PositionD(50., 25.),
+                 galsim.PositionD(100., 75.), galsim.PositionI(100, 100) ]:
+        psf_func(pos).draw(image=im, dx=dx)
+        np.testing.assert_array_almost_equal(
+            psf_field.getPSFArray(pos), im.array, decimal=12,
+            err_msg="PSFField stamp at a grid node does not match the drawn PSF")
+
+    # Halfway between nodes, the stamp is the average of the node stamps.
+    np.testing.assert_array_almost_equal(
+        psf_field.getPSFArray(galsim.PositionD(25., 25.)),
+        0.5 * (psf_field.stamps[1,0] + psf_field.stamps[1,1]), decimal=12,
+        err_msg="PSFField does not interpolate linearly between nodes")
+
+    # Outside the grid, use the nearest edge.
+    np.testing.assert_array_almost_equal(
+        psf_field.getPSFArray(galsim.PositionD(-30., 150.)), psf_field.stamps[4,0], decimal=12,
+        err_msg="PSFField does not clip positions outside the grid")
+
+    # The InterpolatedImage should be a good approximation of the true PSF.
+    pos = galsim.PositionD(37., 61.)
+    psf = psf_field.getPSF(pos)
+    im1 = psf.draw(image=galsim.ImageD(stamp_size, stamp_size), dx=dx)
+    im2 = psf_func(pos).draw(image=galsim.ImageD(stamp_size, stamp_size), dx=dx)
+    np.testing.assert_almost_equal(
+        im1.array.sum(), 1., decimal=4, err_msg="PSFField PSF does not have unit flux")
+    np.testing.assert_array_almost_equal(
+        im1.array, im2.array, decimal=3,
+        err_msg="PSFField PSF is not close to the true PSF between nodes")
+
+    # Default is float32 storage, with stamp size chosen from the center of the field.
+    psf_field = galsim.PSFField(psf_func, bounds, nx=2, ny=2, dx=dx)
+    np.testing.assert_equal(psf_field.stamps.dtype, np.float32)
+    np.testing.assert_equal(
+        psf_field.stamp_size, psf_func(galsim.PositionD(50.,50.)).draw(dx=dx).array.shape[0])
+    np.testing.assert_equal(psf_field.getPSFArray(pos).dtype, np.float32)
+
+    # Check for errors
+    try:
+        np.testing.assert_raises(ValueError, galsim.PSFField, psf_func, bounds, 1, 3, dx)
+        np.testing.assert_raises(ValueError, galsim.PSFField, psf_func, bounds, 3, 3, -dx)
+        np.testing.assert_raises(TypeError, galsim.PSFField, psf_func, bounds, 3, 3)
+        np.testing.assert_raises(TypeError, galsim.PSFField, psf_func, file_name='junk.fits')
+    except ImportError:
+        print 'The assert_raises tests require nose'
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_psf_field_io():
+    """Test writing a PSFField to a file and using it from a config file.
+    """
+    import shutil
+    import tempfile
+    import time
+    t1 = time.time()
+
+    # Write the file to a temporary directory, so we don't leave anything behind.
+    out_dir = tempfile.mkdtemp()
+    file_name = os.path.join(out_dir, 'test_psf_field.fits')
+    try:
+        psf_field = galsim.PSFField(psf_func, bounds, nx=4, ny=3, dx=dx, stamp_size=stamp_size)
+        psf_field.write(file_name)
+
+        psf_field2 = galsim.PSFField(file_name=file_name)
+        np.testing.assert_array_equal(
+            psf_field2.stamps, psf_field.stamps, err_msg="PSFField stamps changed on write/read")
+        for attr in ['xmin', 'xmax', 'ymin', 'ymax', 'nx', 'ny', 'dx', 'stamp_size']:
+            np.testing.assert_equal(
+                getattr(psf_field2, attr), getattr(psf_field, attr),
+                err_msg="PSFField %s changed on write/read"%attr)
+
+        pos = galsim.PositionD(81.3, 12.9)
+        config = {
+            'input' : { 'psf_field' : { 'file_name' : file_name } },
+            'psf1' : { 'type' : 'PSFField' },
+            'psf2' : { 'type' : 'PSFField', 'flux' : 17., 'x_interpolant' : 'lanczos5' },
+            'image_pos' : pos
+        }
+        galsim.config.ProcessInput(config)
+        psf1a = galsim.config.BuildGSObject(config, 'psf1')[0]
+        psf1b = psf_field.getPSF(pos)
+        psf_compare(psf1a, psf1b)
+
+        psf2a = galsim.config.BuildGSObject(config, 'psf2')[0]
+        psf_field.x_interpolant = 'lanczos5'
+        psf2b = psf_field.getPSF(pos)
+        psf2b.setFlux(17.)
+        psf_compare(psf2a, psf2b)
+    finally:
+        shutil.rmtree(out_dir)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+
+if __name__ == "__main__":
+    test_psf_field_nodes()
+    test_psf_field_io()
@@ -1440,6 +1440,38 @@ def test_multiprocess():
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
+def test_generate():
+    """Test that generate gives the same values as successive calls to the deviate.
+    """
+    import time
+    t1 = time.time()
+
+    seed = 1532424
+    for dev1, dev2 in [
+            (galsim.UniformDeviate(seed), galsim.UniformDeviate(seed)),
+            (galsim.GaussianDeviate(seed, mean=3, sigma=2),
+             galsim.GaussianDeviate(seed, mean=3, sigma=2)),
+            (galsim.PoissonDeviate(seed, mean=10), galsim.PoissonDeviate(seed, mean=10)),
+            (galsim.DistDeviate(seed, function='x*x', x_min=0., x_max=2.),
+             galsim.DistDeviate(seed, function='x*x', x_min=0., x_max=2.)) ]:
+        vals = dev1.generate(17)
+        np.testing.assert_equal(vals.shape, (17,))
+        np.testing.assert_array_almost_equal(
+                vals, [ dev2() for i in range(17) ], decimal=12,
+                err_msg="%s.generate does not match successive calls"%dev1.__class__.__name__)
+        # And it continues the same sequence afterwards.
+        np.testing.assert_almost_equal(dev1(), dev2(), decimal=12)
+    np.testing.assert_equal(galsim.UniformDeviate(seed).generate(0).shape, (0,))
+
+    try:
+        np.testing.assert_raises(ValueError, galsim.UniformDeviate(seed).generate, -1)
+        np.testing.assert_raises(RuntimeError, galsim.BaseDeviate(seed).generate, 3)
+    except ImportError:
+        print 'The assert_raises tests require nose'
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 if __name__ == "__main__":
     test_uniform()
     test_gaussian()
@@ -1452,4 +1484,5 @@ if __name__ == "__main__":
     test_distLookupTable()
     test_ccdnoise()
     test_multiprocess()
+    test_generate()
 
@@ -170,6 +170,106 @@ def test_real_galaxy_saved():
     t2 = time.time()
     print 'time for %s = %.2f'%(funcname(),t2-t1)
 
+def test_real_galaxy_memmap():
+    """Test that a memory-mapped RealGalaxyCatalog gives the same images as the default one"""
+    import time
+    t1 = time.time()
+    rgc = galsim.RealGalaxyCatalog(catalog_file, image_dir)
+    for preload in [False, True]:
+        rgc_mm = galsim.RealGalaxyCatalog(catalog_file, image_dir, preload=preload, memmap=True)
+        for i in range(rgc.getNObjects()):
+            gal = rgc.getGal(i)
+            gal_mm = rgc_mm.getGal(i)
+            np.testing.assert_array_equal(
+                gal_mm.array, gal.array,
+                err_msg="Memory-mapped galaxy image differs from the pyfits one")
+            np.testing.assert_array_equal(
+                rgc_mm.getPSF(i).array, rgc.getPSF(i).array,
+                err_msg="Memory-mapped PSF image differs from the pyfits one")
+            # The memory-mapped images keep the precision of the file (which has both float32
+            # and float64 images), rather than always converting to float64.
+            assert gal_mm.array.dtype.type in [np.float32, np.float64]
+
+        rg = galsim.RealGalaxy(rgc, index = ind_real)
+        rg_mm = galsim.RealGalaxy(rgc_mm, index = ind_real)
+        im = rg.draw(dx = shera_target_pixel_scale)
+        im_mm = rg_mm.draw(dx = shera_target_pixel_scale)
+        np.testing.assert_array_almost_equal(
+            im_mm.array, im.array, decimal=10,
+            err_msg="RealGalaxy from memory-mapped catalog differs from the default one")
+        rgc_mm.close()
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
+def test_real_galaxy_packed():
+    """Test that a packed RealGalaxyCatalog gives the same images as the original one"""
+    import shutil
+    import tempfile
+    import time
+    t1 = time.time()
+    # Write the packed catalogs to a temporary directory, so we don't leave anything behind.
+    out_dir = tempfile.mkdtemp()
+    catalogs = []
+    try:
+        rgc = galsim.RealGalaxyCatalog(catalog_file, image_dir)
+        packed_file = os.path.join(out_dir,'test_catalog_packed.fits')
+        rgc.writePacked(packed_file)
+
+        rgc_packed = galsim.RealGalaxyCatalog(packed_file)
+        catalogs.append(rgc_packed)
+        np.testing.assert_equal(rgc_packed.getNObjects(), rgc.getNObjects())
+        np.testing.assert_equal(rgc_packed.ident, rgc.ident)
+        np.testing.assert_array_equal(rgc_packed.pixel_scale, rgc.pixel_scale)
+        np.testing.assert_array_equal(rgc_packed.variance, rgc.variance)
+        for i in range(rgc.getNObjects()):
+            # The packed images are always float32.
+            gal = rgc_packed.getGal(i)
+            np.testing.assert_equal(gal.array.dtype.type, np.float32)
+            np.testing.assert_array_equal(
+                gal.array, rgc.getGal(i).array.astype(np.float32),
+                err_msg="Packed galaxy image differs from the original one")
+            np.testing.assert_array_equal(
+                rgc_packed.getPSF(i).array, rgc.getPSF(i).array.astype(np.float32),
+                err_msg="Packed PSF image differs from the original one")
+            im, scale, var = rgc_packed.getNoiseProperties(i)
+            im0, scale0, var0 = rgc.getNoiseProperties(i)
+            if im0 is None:
+                assert im is None
+            else:
+                np.testing.assert_array_almost_equal(
+                    im.array, im0.array, decimal=6,
+                    err_msg="Packed noise image differs from the original one")
+            np.testing.assert_equal(scale, scale0)
+            np.testing.assert_equal(var, var0)
+
+        # A RealGalaxy built from the packed catalog should match to float32 precision.
+        rg = galsim.RealGalaxy(rgc, index = ind_real)
+        rg_packed = galsim.RealGalaxy(rgc_packed, index = ind_real)
+        im = rg.draw(dx = shera_target_pixel_scale)
+        im_packed = rg_packed.draw(dx = shera_target_pixel_scale)
+        np.testing.assert_array_almost_equal(
+            im_packed.array / im.array.max(), im.array / im.array.max(), decimal=5,
+            err_msg="RealGalaxy from packed catalog differs from the original one")
+
+        # Packing the packed catalog again should give the same file contents.
+        packed_file2 = os.path.join(out_dir,'test_catalog_packed2.fits')
+        rgc_packed.writePacked(packed_file2)
+        rgc_packed2 = galsim.RealGalaxyCatalog(packed_file2)
+        catalogs.append(rgc_packed2)
+        for i in range(rgc.getNObjects()):
+            np.testing.assert_array_equal(rgc_packed2.getGal(i).array, rgc_packed.getGal(i).array)
+            np.testing.assert_array_equal(rgc_packed2.getPSF(i).array, rgc_packed.getPSF(i).array)
+    finally:
+        for cat in catalogs:
+            cat.close()
+        shutil.rmtree(out_dir)
+
+    t2 = time.time()
+    print 'time for %s = %.2f'%(funcname(),t2-t1)
+
 if __name__ == "__main__":
     test_real_galaxy_ideal()
     test_real_galaxy_saved()
+    test_real_galaxy_memmap()
+    test_real_galaxy_packed()